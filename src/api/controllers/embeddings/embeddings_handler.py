@@ -1,65 +1,70 @@
-from collections.abc import Generator
 from gzip import BadGzipFile
 from tarfile import TarError
 from zipfile import BadZipFile
 
-from fastapi import APIRouter, BackgroundTasks, File, HTTPException, Request, UploadFile, status
+from fastapi import APIRouter, File, Form, HTTPException, Query, Request, UploadFile, status
 
-from src.api.schemas.embeddings_schemas import GenerateEmbeddingsInputSchema, GenerateStatusOutputSchema
-from src.api.schemas.status_ok_schema import StatusOkResponseSchema
-from src.application.embeddings.embedding_service import EmbeddingsService
-from src.application.embeddings.file_parser.errors import InvalidFileError
-from src.application.embeddings.file_parser.file_parser import FileParser
+from src.api.schemas.embeddings_schemas import (
+    GenerateEmbeddingsInputSchema,
+    GenerateStatusOutputSchema,
+    IngestionJobCreatedOutputSchema,
+    IngestionJobListOutputSchema,
+    IngestionJobOutputSchema,
+    IngestionJobProgressSchema,
+)
+from src.application.embeddings.errors import IngestionJobFinishedError
+from src.application.embeddings.file_parser.errors import ArchiveTooLargeError, InvalidFileError
+from src.application.embeddings.file_parser.file_parser import FileParser, FileParserParams
+from src.application.embeddings.file_parser.spooled_file import spool_file
+from src.application.embeddings.ingestion_job_manager import IngestionJobManager
+from src.application.embeddings.ingestion_tasks import FileIngestionTask, UrlIngestionTask
+from src.application.embeddings.web_crawler import CrawlBudget
+from src.configurations.service_model import ChunkingStrategy
 from src.context import AppContext
+from src.infrastracture.vector_store_manager.ingestion_job_store import IngestionJob
 
 router = APIRouter()
 
-# This is a simplified mechanism to prevent multiple requests from generating embeddings at the same time.
-# For this specific router, we designed it to only allow one request to generate embeddings at a time, therefore
-# we use a lock to prevent multiple requests from starting the process at the same time.
-#
-# In case of need of multiple methods that requires locking or very long tasks,
-# you might want to use a more sophisticated mechanism to handle this.
-router.lock = False
-
-
-def generate_embeddings_from_url_background_task(app_context: AppContext, url: str, filter_path: str | None):
-    """
-    Generate embeddings for a given URL.
-
-    This method is intended to be called as a background task. Includes management of the lock mechanism
-    of this router, which is locked when the embedding generation process is running, and unlocked when it finishes.
-
-    Args:
-        app_context (AppContext): The application context.
-        url (str): The URL to generate embeddings from.
-        filter_path (str | None): The full domain to compare the hyperlinks against.
-    """
-    logger = app_context.logger
-
-    try:
-        logger.debug("Locking router for embedding generation.")
-        router.lock = True
-        embedding_generator = EmbeddingsService(app_context=app_context)
-        logger.info("Starting embedding generation process.")
-        embedding_generator.generate_from_url(url, filter_path)
-        logger.info("Embedding generation process finished.")
-    # pylint: disable=W0718
-    except Exception as e:
-        logger.error(f"Error in background task: {str(e)}")
-    finally:
-        router.lock = False
-        logger.debug("Router unlocked after embedding generation.")
-
-
-@router.post("/embeddings/generate", response_model=StatusOkResponseSchema, status_code=status.HTTP_200_OK, tags=["Embeddings"])
-def generate_embeddings_from_url(request: Request, data: GenerateEmbeddingsInputSchema, background_tasks: BackgroundTasks):
+JOB_NOT_FOUND_DETAIL = "Ingestion job not found."
+
+
+def _to_job_schema(job: IngestionJob) -> IngestionJobOutputSchema:
+    progress = job.progress
+    return IngestionJobOutputSchema(
+        id=job.id,
+        kind=job.kind,
+        source=job.source,
+        status=job.status.value,
+        progress=IngestionJobProgressSchema(
+            pages=progress.pages,
+            chunks=progress.chunks,
+            tokens=progress.tokens,
+            errors=progress.errors,
+            totalPages=progress.total_pages,
+            etaSeconds=job.eta_seconds,
+        ),
+        replica=job.replica,
+        createdAt=job.created_at,
+        startedAt=job.started_at,
+        finishedAt=job.finished_at,
+        cancelRequested=job.cancel_requested,
+        error=job.error,
+    )
+
+
+def _get_job_manager(request: Request) -> IngestionJobManager:
+    return request.app.state.ingestion_job_manager
+
+
+@router.post("/embeddings/generate", response_model=IngestionJobCreatedOutputSchema, status_code=status.HTTP_200_OK, tags=["Embeddings"])
+def generate_embeddings_from_url(request: Request, data: GenerateEmbeddingsInputSchema):
     """
     Generate embeddings for a given URL. It starts from a single web page and generates embeddings for the text data of that page and
     for every page connected via hyperlinks (anchor tags).
 
-    This method can be run only one at a time, as it uses a lock to prevent multiple requests from starting the process at the same time.
-    If a process is already in progress, it will return a 409 status code (Conflict).
+    The generation runs as an ingestion job, whose identifier is returned: at most `ingestionJobs.maxConcurrentJobs` jobs
+    run at the same time on each replica, in worker processes isolated from the API, the further ones are queued. The job can be followed and cancelled with the
+    `/embeddings/jobs` endpoints.
 
     The embeddings are generated only from the text of each web page: images, rss and any other webpage with a ContextType different from text/html
     are not included.
@@ -68,63 +73,34 @@ def generate_embeddings_from_url(request: Request, data: GenerateEmbeddingsInput
 
     - url: The URL to generate embeddings from.
     - filterPath: The full domain to compare the hyperlinks against.
+    - maxDepth, maxPages, maxDurationSeconds, maxBytes: optional limits of the crawl, in links followed from the url,
+      pages, seconds and downloaded bytes.
+    - useSitemap: whether to crawl also the pages listed in the sitemap.xml of the website.
+    - chunkingStrategy: optional strategy used to split the pages into chunks (`semantic`, `markdown` or `token`).
 
     Args:
         request (Request): The request object.
         data (GenerateEmbeddingsInputSchema): The input schema.
-        background_tasks (BackgroundTasks): The background tasks object.
     """
 
     request_context: AppContext = request.state.app_context
-    url = data.url
-    filter_path = data.filterPath
-    request_context.logger.info(f"Generate embeddings request received for url: {url}")
-
-    if not router.lock:
-        background_tasks.add_task(generate_embeddings_from_url_background_task, request_context, url, filter_path)
-        request_context.logger.info("Generation embeddings process started.")
-        return {"statusOk": True}
+    request_context.logger.info(f"Generate embeddings request received for url: {data.url}")
 
-    raise HTTPException(status_code=409, detail="A process to generate embeddings is already in progress.")
+    budget = CrawlBudget(max_depth=data.maxDepth, max_pages=data.maxPages, max_duration_seconds=data.maxDurationSeconds, max_bytes=data.maxBytes)
+    task = UrlIngestionTask(url=data.url, filter_path=data.filterPath, budget=budget, use_sitemap=data.useSitemap, chunking_strategy=data.chunkingStrategy)
 
-
-def generate_embeddings_from_file_background_task(app_context: AppContext, document_generator: Generator[str, None, None]):
-    """
-    Generate embeddings for an uploaded file.
-
-    This method is intended to be called as a background task. Includes managmement of the lock mechanism
-    of this router, which is locked when the embedding generation process is running, and unlocked when it finishes.
-
-    Args:
-        app_context (AppContext): The application context.
-        document_generator (Generator[str, None, None]): The generator, as iterable, of the texts to be evaluated
-    """
-    logger = app_context.logger
-
-    try:
-        logger.debug("Locking router for embedding generation.")
-        router.lock = True
-        embedding_generator = EmbeddingsService(app_context=app_context)
-        logger.info("Starting embedding generation process.")
-        for doc in document_generator:
-            embedding_generator.generate_from_text(doc)
-        logger.info("Embedding generation process finished.")
-    # pylint: disable=W0718
-    except Exception as ex:
-        logger.error(ex)
-        logger.error(f"Error in background task: {str(ex)}")
-    finally:
-        router.lock = False
-        logger.debug("Router unlocked after embedding generation.")
+    job = _get_job_manager(request).submit_task(task)
+    request_context.logger.info(f"Generation embeddings job {job.id} created.")
+    return {"statusOk": True, "jobId": job.id}
 
 
 @router.post(
     "/embeddings/generateFromFile",
-    response_model=StatusOkResponseSchema,
+    response_model=IngestionJobCreatedOutputSchema,
     status_code=status.HTTP_200_OK,
     tags=["Embeddings"],
 )
-def generate_embeddings_from_file(request: Request, background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+def generate_embeddings_from_file(request: Request, file: UploadFile = File(...), chunkingStrategy: ChunkingStrategy | None = Form(None)):
     """
     Generate embeddings for a given file.
 
@@ -139,40 +115,108 @@ def generate_embeddings_from_file(request: Request, background_tasks: Background
         - application/gzip
     Please mind that archive files must contain only files with the aforementioned content types.
 
+    The optional `chunkingStrategy` form field selects the strategy used to split the texts into chunks (`semantic`,
+    `markdown` or `token`), overriding the configured one.
+
+    The file is saved to the disk (`ingestionJobs.uploadDirectory`) and only validated before replying: its type, the
+    header of PDF and gzip files and the directory of zip files. The documents are then extracted by the ingestion job,
+    whose identifier is returned (see `/embeddings/generate`), while they are embedded.
 
     Args:
         request (Request): The request object.
         file (UploadFile): The file received.
-        background_tasks (BackgroundTasks): The background tasks object.
+        chunkingStrategy (ChunkingStrategy | None): The strategy used to split the texts into chunks.
     """
 
     request_context: AppContext = request.state.app_context
     request_context.logger.info(f"Generate embeddings request received for file {file.filename} (content type: {file.content_type})")
 
+    job_manager = _get_job_manager(request)
+    file_name = file.filename or ""
+    # The upload is copied to a file read by the ingestion job, its hash identifies files already ingested
+    spooled_file = spool_file(file.file, job_manager.params.upload_directory)
     try:
-        file_parser = FileParser(request_context.logger)
-        docs = list(file_parser.extract_documents_from_file(file))
+        file_parser = FileParser(request_context.logger, FileParserParams.from_configuration(request_context.configurations.fileParsing))
+        file_parser.validate_file(spooled_file.path, file_name, file.content_type)
     except (BadZipFile, BadGzipFile, TarError) as ex:
+        spooled_file.remove()
         raise HTTPException(status_code=400, detail="The file uploaded is not a valid archive file.") from ex
     except InvalidFileError as ex:
+        spooled_file.remove()
         raise HTTPException(status_code=400, detail=str(ex)) from ex
+    except ArchiveTooLargeError as ex:
+        spooled_file.remove()
+        raise HTTPException(status_code=413, detail=str(ex)) from ex
     except Exception as ex:
+        spooled_file.remove()
         raise HTTPException(status_code=500, detail=f"Error parsing file: {str(ex)}") from ex
 
-    if not router.lock:
-        background_tasks.add_task(generate_embeddings_from_file_background_task, request_context, docs)
-        request_context.logger.info("Generation embeddings process started.")
-        return {"statusOk": True}
-
-    raise HTTPException(status_code=409, detail="A process to generate embeddings is already in progress.")
+    task = FileIngestionTask(
+        file_name=file_name,
+        file_path=spooled_file.path,
+        content_type=file.content_type,
+        file_sha=spooled_file.sha256,
+        chunking_strategy=chunkingStrategy,
+    )
+    job = job_manager.submit_task(task)
+    request_context.logger.info(f"Generation embeddings job {job.id} created.")
+    return {"statusOk": True, "jobId": job.id}
 
 
 @router.get("/embeddings/status", response_model=GenerateStatusOutputSchema, status_code=status.HTTP_200_OK, tags=["Embeddings"])
-def embeddings_status():
+def embeddings_status(request: Request):
     """
     Get the status of the embeddings generation process.
 
     Returns:
-        dict: A `status` object that can be either "running" (if a process is ongoing) or "idle" (if the service is ready).
+        dict: A `status` object that can be either "running" (if a job is queued or running on any replica) or "idle" (if the service is ready).
     """
-    return {"status": "running" if router.lock else "idle"}
+    return {"status": "running" if _get_job_manager(request).has_active_jobs() else "idle"}
+
+
+@router.get("/embeddings/jobs", response_model=IngestionJobListOutputSchema, status_code=status.HTTP_200_OK, tags=["Embeddings"])
+def list_ingestion_jobs(request: Request, limit: int = Query(50, ge=1, le=1000)):
+    """
+    List the most recent ingestion jobs of every replica, the newest first, with their status and progress.
+
+    Args:
+        request (Request): The request object.
+        limit (int): The maximum number of jobs to return.
+    """
+    return {"jobs": [_to_job_schema(job) for job in _get_job_manager(request).list_jobs(limit)]}
+
+
+@router.get("/embeddings/jobs/{jobId}", response_model=IngestionJobOutputSchema, status_code=status.HTTP_200_OK, tags=["Embeddings"])
+def get_ingestion_job(request: Request, jobId: str):
+    """
+    Get the status and the progress (pages, chunks, tokens, errors and estimated time to complete) of an ingestion job.
+    If the job does not exist, it returns a 404 status code (Not Found).
+
+    Args:
+        request (Request): The request object.
+        jobId (str): The identifier of the job.
+    """
+    job = _get_job_manager(request).get_job(jobId)
+    if job is None:
+        raise HTTPException(status_code=404, detail=JOB_NOT_FOUND_DETAIL)
+    return _to_job_schema(job)
+
+
+@router.delete("/embeddings/jobs/{jobId}", response_model=IngestionJobOutputSchema, status_code=status.HTTP_200_OK, tags=["Embeddings"])
+def cancel_ingestion_job(request: Request, jobId: str):
+    """
+    Cancel an ingestion job: a queued job is cancelled immediately, while a running job stops at its next page or batch
+    of chunks, keeping the chunks already stored. If the job does not exist, it returns a 404 status code (Not Found),
+    if the job is already finished, it returns a 409 status code (Conflict).
+
+    Args:
+        request (Request): The request object.
+        jobId (str): The identifier of the job.
+    """
+    try:
+        job = _get_job_manager(request).cancel(jobId)
+    except IngestionJobFinishedError as ex:
+        raise HTTPException(status_code=409, detail=f"The ingestion job is already {ex.status}.") from ex
+    if job is None:
+        raise HTTPException(status_code=404, detail=JOB_NOT_FOUND_DETAIL)
+    return _to_job_schema(job)
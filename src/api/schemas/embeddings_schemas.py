@@ -1,11 +1,20 @@
+from datetime import datetime
 from typing import Any, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from src.configurations.service_model import ChunkingStrategy
 
 
 class GenerateEmbeddingsInputSchema(BaseModel):
     url: str
     filterPath: str | None = None
+    maxDepth: int | None = Field(default=None, ge=0, description="Maximum number of links followed from the starting URL")
+    maxPages: int | None = Field(default=None, ge=1, description="Maximum number of pages to crawl")
+    maxDurationSeconds: float | None = Field(default=None, gt=0, description="Maximum duration of the crawl, in seconds")
+    maxBytes: int | None = Field(default=None, ge=1, description="Maximum total size of the downloaded pages, in bytes")
+    useSitemap: bool = Field(default=False, description="Crawl also the pages listed in the sitemap.xml of the website")
+    chunkingStrategy: ChunkingStrategy | None = Field(default=None, description="Strategy used to split the pages into chunks, the configured one if omitted")
 
 
 class GenerateEmbeddingsOutputSchema(BaseModel):
@@ -15,3 +24,35 @@ class GenerateEmbeddingsOutputSchema(BaseModel):
 
 class GenerateStatusOutputSchema(BaseModel):
     status: Literal["running", "idle"]
+
+
+class IngestionJobCreatedOutputSchema(BaseModel):
+    statusOk: bool
+    jobId: str = Field(description="Identifier of the ingestion job, to follow its progress with the /embeddings/jobs endpoints")
+
+
+class IngestionJobProgressSchema(BaseModel):
+    pages: int = Field(description="Pages crawled or documents parsed")
+    chunks: int = Field(description="Chunks stored in the Vector Store")
+    tokens: int = Field(description="Tokens of the chunks stored")
+    errors: int = Field(description="Pages that could not be crawled")
+    totalPages: int | None = Field(default=None, description="Pages or documents to process (for crawls, the maximum number of pages), if known")
+    etaSeconds: float | None = Field(default=None, description="Estimated time to complete the job, in seconds, if the total is known")
+
+
+class IngestionJobOutputSchema(BaseModel):
+    id: str
+    kind: Literal["url", "file"]
+    source: str
+    status: Literal["queued", "running", "completed", "failed", "cancelled"]
+    progress: IngestionJobProgressSchema
+    replica: str | None = None
+    createdAt: datetime
+    startedAt: datetime | None = None
+    finishedAt: datetime | None = None
+    cancelRequested: bool
+    error: str | None = None
+
+
+class IngestionJobListOutputSchema(BaseModel):
+    jobs: list[IngestionJobOutputSchema]
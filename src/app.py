@@ -9,6 +9,7 @@ from src.api.controllers.core.readiness import readiness_handler
 from src.api.controllers.embeddings import embeddings_handler
 from src.api.middlewares.app_context_middleware import AppContextMiddleware
 from src.api.middlewares.logger_middleware import LoggerMiddleware
+from src.application.embeddings.ingestion_job_manager import IngestionJobManager
 from src.configurations.configuration import get_configuration
 from src.configurations.variables import get_variables
 from src.context import AppContext, AppContextParams
@@ -20,6 +21,10 @@ from src.lib.vector_search_index_updater import VectorSearchIndexUpdater
 def create_app(context: AppContext) -> FastAPI:
     app = FastAPI(openapi_url="/documentation/json", redoc_url=None, title="ai-rag-template", version="0.6.0")
 
+    # Ingestion jobs are shared by all the requests, as they run in the background of the service
+    app.state.ingestion_job_manager = IngestionJobManager(context)
+    app.add_event_handler("shutdown", app.state.ingestion_job_manager.shutdown)
+
     app.add_middleware(AppContextMiddleware, app_context=context)
     app.add_middleware(LoggerMiddleware, logger=context.logger)
 
@@ -2,15 +2,16 @@ from dataclasses import dataclass
 
 from langchain_community.callbacks.manager import get_openai_callback
 from langchain_core.embeddings import Embeddings
-from pymongo.uri_parser import parse_uri
 
 from src.application.assistant.chains.assistant_chain import AssistantChain
 from src.application.assistant.chains.assistant_prompt import AssistantPromptBuilder, AssistantPromptTemplate
 from src.application.assistant.chains.combine_docs_chain import AggregateDocsChunksChain
-from src.application.assistant.chains.retriever_chain import RetrieverChain, RetrieverChainConfiguration
+from src.application.assistant.chains.retriever_chain import RetrieverChain, RetrieverChainConfiguration, RetrieverSourceConfiguration
+from src.configurations.service_model import VectorStoreType
 from src.context import AppContext
 from src.infrastracture.embeddings_manager.embeddings_manager import EmbeddingsManager
 from src.infrastracture.llm_manager.llm_manager import LlmManager
+from src.infrastracture.vector_store_manager.vector_store_manager import VectorStoreManager
 
 
 @dataclass
@@ -41,30 +42,42 @@ class AssistantService:
     def _init_llm(self):
         return LlmManager(self.app_context).get_llm_instance()
 
+    def _get_retriever_sources(self) -> list[RetrieverSourceConfiguration] | None:
+        """
+        Get the sources of the Vector Store queried by the retriever, if configured
+        """
+        vector_store_configurations = self.app_context.configurations.vectorStore
+        if not vector_store_configurations.sources:
+            return None
+
+        return [
+            RetrieverSourceConfiguration(
+                name=source.name or source.collectionName,
+                db_name=source.dbName,
+                collection_name=source.collectionName,
+                index_name=source.indexName or vector_store_configurations.indexName,
+                max_number_of_results=source.maxDocumentsToRetrieve,
+                weight=source.weight if source.weight is not None else 1.0,
+            )
+            for source in vector_store_configurations.sources
+        ]
+
     def _init_retriever_chain(self, embeddings: Embeddings):
         """
         Initialize the retriever
         """
         vector_store_configurations = self.app_context.configurations.vectorStore
-        vector_store_cluster_uri = self.app_context.env_vars.MONGODB_CLUSTER_URI
-
-        db_name = vector_store_configurations.dbName or parse_uri(vector_store_cluster_uri).get("database")
+        vector_store_params = VectorStoreManager(self.app_context).get_vector_store_params(embeddings)
 
-        if db_name is None:
+        if vector_store_params.db_name is None and vector_store_configurations.type == VectorStoreType.mongodb:
             raise ValueError("Database name is not provided in the configuration or the cluster URI")
 
         configuration = RetrieverChainConfiguration(
-            mongodb_cluster_uri=vector_store_cluster_uri,
-            db_name=db_name,
-            collection_name=vector_store_configurations.collectionName,
-            embeddings=embeddings,
-            index_name=vector_store_configurations.indexName,
-            embedding_key=vector_store_configurations.embeddingKey,
-            relevance_score_fn=vector_store_configurations.relevanceScoreFn,
-            text_key=vector_store_configurations.textKey,
+            vector_store=vector_store_params,
             max_number_of_results=vector_store_configurations.maxDocumentsToRetrieve,
             max_score_distance=vector_store_configurations.maxScoreDistance,
             min_score_distance=vector_store_configurations.minScoreDistance,
+            sources=self._get_retriever_sources(),
         )
 
         retriever_chain = RetrieverChain(context=self.app_context, configuration=configuration)
@@ -115,8 +128,8 @@ class AssistantService:
     def _setup_assistant(self):
         # Load the embeddings model
         embeddings = self._init_embeddings()
-        # Load the MongoDB Atlas Retriever
-        mongo_retriever_chain = self._init_retriever_chain(embeddings=embeddings)
+        # Load the Vector Store Retriever
+        retriever_chain = self._init_retriever_chain(embeddings=embeddings)
         # Load the documentation aggregator
         aggregate_docs_chain = self._init_documentation_aggregator()
         # Load the LLM
@@ -125,7 +138,7 @@ class AssistantService:
         prompt_template = self._build_prompt()
         # Load the Assistant Chain
         self._chain = AssistantChain(
-            retriever_chain=mongo_retriever_chain,
+            retriever_chain=retriever_chain,
             aggregate_docs_chain=aggregate_docs_chain,
             llm=llm,
             prompt_template=prompt_template,
@@ -1,29 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
-from attr import dataclass
+from attr import dataclass, evolve
 from langchain.chains.base import Chain
-from langchain_community.vectorstores.mongodb_atlas import MongoDBAtlasVectorSearch
 from langchain_core.callbacks import CallbackManagerForChainRun
+from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, create_model
 
 from src.context import AppContext
+from src.infrastracture.vector_store_manager.vector_store_backend import VectorStoreBackend, VectorStoreBackendParams
+from src.infrastracture.vector_store_manager.vector_store_manager import create_vector_store_backend
+
+# Threads shared by every request to query the sources of the Vector Store concurrently
+MAX_RETRIEVAL_WORKERS = 16
+_retrieval_executor = ThreadPoolExecutor(max_workers=MAX_RETRIEVAL_WORKERS, thread_name_prefix="retriever")
+
+
+def _normalize_scores(scores: list[float]) -> list[float]:
+    """
+    Rescale the relevance scores of the results of a source to the [0, 1] range (min-max normalization), so that the
+    results of sources using different relevance score functions or embeddings models can be merged. When all the
+    results of the source have the same score, they all get the highest one.
+    """
+    if not scores:
+        return []
+    min_score, max_score = min(scores), max(scores)
+    if max_score == min_score:
+        return [1.0] * len(scores)
+    return [(score - min_score) / (max_score - min_score) for score in scores]
+
+
+class _PrecomputedQueryEmbeddings(Embeddings):
+    """Embeddings reusing the vector of a query already embedded, so that it is computed once for all the sources."""
+
+    def __init__(self, embeddings: Embeddings, query: str, query_vector: list[float]):
+        self._embeddings = embeddings
+        self._query = query
+        self._query_vector = query_vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        if text == self._query:
+            return self._query_vector
+        return self._embeddings.embed_query(text)
 
 
 @dataclass
-class RetrieverChainConfiguration:
-    mongodb_cluster_uri: str
-    db_name: str
+class RetrieverSourceConfiguration:
+    name: str
     collection_name: str
-    embeddings: Embeddings
     index_name: str
-    embedding_key: str
-    relevance_score_fn: str
-    text_key: str
+    db_name: str | None = None
+    max_number_of_results: int | None = None
+    weight: float = 1.0
+
+
+@dataclass
+class RetrieverChainConfiguration:
+    vector_store: VectorStoreBackendParams
     max_number_of_results: int
     max_score_distance: float | None = None
     min_score_distance: float | None = None
+    sources: list[RetrieverSourceConfiguration] | None = None
 
 
 class RetrieverChain(Chain):
@@ -63,40 +105,68 @@ class RetrieverChain(Chain):
             },  # type: ignore[call-overload]
         )
 
-    def _setup_vector_search(self):
-        return MongoDBAtlasVectorSearch.from_connection_string(
-            connection_string=self.configuration.mongodb_cluster_uri,
-            namespace=f"{self.configuration.db_name}.{self.configuration.collection_name}",
-            embedding=self.configuration.embeddings,
-            index_name=self.configuration.index_name,
-            embedding_key=self.configuration.embedding_key,
-            relevance_score_fn=self.configuration.relevance_score_fn,
-            text_key=self.configuration.text_key,
+    def _setup_vector_search(self) -> VectorStoreBackend:
+        return create_vector_store_backend(self.configuration.vector_store)
+
+    def _setup_source_vector_search(self, source: RetrieverSourceConfiguration, embeddings: Embeddings) -> VectorStoreBackend:
+        params = evolve(
+            self.configuration.vector_store,
+            embeddings=embeddings,
+            collection_name=source.collection_name,
+            index_name=source.index_name,
+            db_name=source.db_name or self.configuration.vector_store.db_name,
         )
+        return create_vector_store_backend(params)
+
+    def _search_source(self, source: RetrieverSourceConfiguration, query: str, embeddings: Embeddings) -> list[Document]:
+        vector_search = self._setup_source_vector_search(source, embeddings)
+        with self.context.metrics_manager.retrieval_source_duration.labels(source=source.name).time():
+            return vector_search.similarity_search(
+                query,
+                k=source.max_number_of_results or self.configuration.max_number_of_results,
+                max_score_distance=self.configuration.max_score_distance,
+                min_score_distance=self.configuration.min_score_distance,
+            )
 
-    def _get_post_filter_pipeline(self):
-        if self.configuration.max_score_distance is not None:
-            return [
-                {
-                    "$match": {"score": {"$lte": self.configuration.max_score_distance}},
-                }
-            ]
-        if self.configuration.min_score_distance is not None:
-            return [
-                {
-                    "$match": {"score": {"$gte": self.configuration.min_score_distance}},
-                }
-            ]
-        return None
+    def _fan_out_similarity_search(self, query: str) -> list[Document]:
+        """
+        Query every source concurrently and merge the results into a single top-k list. The query is embedded once.
+
+        The relevance scores of each source are normalized over its own results (see `_normalize_scores`), and
+        multiplied by the weight of the source before the merge. A failing source is logged and skipped.
+        """
+        sources = self.configuration.sources
+        configured_embeddings = self.configuration.vector_store.embeddings
+        embeddings = _PrecomputedQueryEmbeddings(configured_embeddings, query, configured_embeddings.embed_query(query))
+        futures = [_retrieval_executor.submit(self._search_source, source, query, embeddings) for source in sources]
+
+        scored_documents: list[tuple[float, Document]] = []
+        for source, future in zip(sources, futures, strict=True):
+            try:
+                documents = future.result()
+            # pylint: disable=broad-except
+            except Exception as ex:
+                self.context.logger.warning(f'Unable to retrieve documents from source "{source.name}": {ex}')
+                continue
+
+            scores = _normalize_scores([float(document.metadata.get("score", 0.0)) for document in documents])
+            for document, score in zip(documents, scores, strict=True):
+                document.metadata["source"] = source.name
+                scored_documents.append((score * source.weight, document))
+
+        scored_documents.sort(key=lambda scored_document: scored_document[0], reverse=True)
+        return [document for _, document in scored_documents[: self.configuration.max_number_of_results]]
 
     def _call(self, inputs: dict[str, Any], run_manager: CallbackManagerForChainRun | None = None) -> dict[str, Any]:
         query = inputs[self.query_key]
-        post_filter_pipeline = self._get_post_filter_pipeline()
+        if self.configuration.sources:
+            return {self.output_key: self._fan_out_similarity_search(query)}
+
         vector_search = self._setup_vector_search()
         result = vector_search.similarity_search(
             query,
             k=self.configuration.max_number_of_results,
-            additional={"similarity_score": True},
-            post_filter_pipeline=post_filter_pipeline,
+            max_score_distance=self.configuration.max_score_distance,
+            min_score_distance=self.configuration.min_score_distance,
         )
         return {self.output_key: result}
@@ -0,0 +1,75 @@
+"""
+Module to include the BoilerplateFilter class, which removes from the pages of an ingestion the blocks of text
+repeated across its pages, such as headers, footers, sidebars or legal notices.
+"""
+
+import threading
+from collections import Counter
+
+from attr import dataclass
+
+from src.configurations.service_model import Boilerplate
+
+
+@dataclass
+class BoilerplateParams:
+    enabled: bool = False
+    min_pages: int = 5
+    min_page_fraction: float = 0.5
+    min_block_chars: int = 20
+
+    @classmethod
+    def from_configuration(cls, configuration: Boilerplate | None) -> "BoilerplateParams":
+        configuration = configuration or Boilerplate()
+        return cls(
+            enabled=configuration.enabled,
+            min_pages=configuration.minPages,
+            min_page_fraction=configuration.minPageFraction,
+            min_block_chars=configuration.minBlockChars,
+        )
+
+
+class BoilerplateFilter:
+    """
+    Track the blocks of text (the lines of the texts, e.g. the paragraphs of a crawled page or the lines of a PDF page)
+    across the pages of an ingestion, and remove from each page the blocks found on at least `min_page_fraction` of the
+    previous pages, once `min_pages` pages have been seen, so that a block repeated on most pages is embedded only with
+    the first ones while a block shared by a few pages is kept.
+
+    Blocks are compared by the hash of their text, ignoring whitespace, and blocks shorter than `min_block_chars` are always kept.
+    A block repeated within the same page counts once. The filter is meant to be used for a single ingestion, by any thread.
+    """
+
+    def __init__(self, params: BoilerplateParams | None = None):
+        self.params = params or BoilerplateParams()
+        self._lock = threading.Lock()
+        self._page_counts: Counter[int] = Counter()
+        self._pages = 0
+        self.removed_count = 0
+
+    def _get_block_key(self, block: str) -> int | None:
+        normalized_block = " ".join(block.split())
+        if len(normalized_block) < self.params.min_block_chars:
+            return None
+        return hash(normalized_block)
+
+    def filter(self, text: str) -> str:
+        """
+        Return the text of a page without the blocks found on too many of the previous pages, and record its blocks.
+        """
+        if not self.params.enabled:
+            return text
+
+        lines = text.splitlines(keepends=True)
+        keys = [self._get_block_key(line) for line in lines]
+        with self._lock:
+            removed_keys = set()
+            if self._pages >= self.params.min_pages:
+                min_count = self.params.min_page_fraction * self._pages
+                removed_keys = {key for key in keys if key is not None and self._page_counts[key] >= min_count}
+            self._page_counts.update({key for key in keys if key is not None})
+            self._pages += 1
+            self.removed_count += len(removed_keys)
+        if not removed_keys:
+            return text
+        return "".join(line for line, key in zip(lines, keys, strict=True) if key not in removed_keys)
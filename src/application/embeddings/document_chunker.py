@@ -3,19 +3,66 @@ Module to include the EmbeddingsService class, a class that generates embeddings
 """
 
 import hashlib
+from collections.abc import Iterator
 
+import numpy as np
+from attr import dataclass
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
-from langchain_experimental.text_splitter import SemanticChunker
+from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
+
+from src.application.embeddings.semantic_chunker import SemanticChunker, normalize_rows
+from src.configurations.service_model import Chunking, ChunkingStrategy
+from src.infrastracture.embeddings_manager.tokenizer import count_tokens, get_tokenizer
+
+MARKDOWN_HEADERS_TO_SPLIT_ON = [("#" * level, f"h{level}") for level in range(1, 7)]
+
+
+@dataclass
+class ChunkingParams:
+    strategy: ChunkingStrategy = ChunkingStrategy.semantic
+    chunk_size: int = 512
+    chunk_overlap: int = 64
+    min_tokens: int = 0
+    max_tokens: int = 2048
+    reuse_sentence_embeddings: bool = False
+
+    @classmethod
+    def from_configuration(cls, configuration: Chunking | None) -> "ChunkingParams":
+        configuration = configuration or Chunking()
+        return cls(
+            strategy=configuration.strategy,
+            chunk_size=configuration.chunkSize,
+            chunk_overlap=configuration.chunkOverlap,
+            min_tokens=configuration.minTokens,
+            max_tokens=configuration.maxTokens,
+            reuse_sentence_embeddings=configuration.reuseSentenceEmbeddings,
+        )
 
 
 class DocumentChunker:
     """
-    Initialize the DocumentChunker class.
+    Split texts into chunks with one of the strategies of `ChunkingStrategy`:
+    - `semantic`: breakpoints between sentences with distant embeddings (requires calls to the embeddings model)
+    - `markdown`: one chunk per Markdown section, sections longer than `chunk_size` tokens being split as by `token`
+    - `token`: recursive splitting on paragraphs, lines and words into chunks of at most `chunk_size` tokens
+
+    Whatever the strategy, the chunks longer than `max_tokens` tokens are split as by `token`, and the chunks shorter
+    than `min_tokens` tokens are merged with a neighbouring chunk as long as the merged chunk fits in `max_tokens` tokens.
     """
 
-    def __init__(self, embedding: Embeddings) -> None:
-        self._chunker = SemanticChunker(embeddings=embedding, breakpoint_threshold_type="percentile")
+    def __init__(self, embedding: Embeddings, params: ChunkingParams | None = None, tokenizer_model_name: str | None = None) -> None:
+        self.params = params or ChunkingParams()
+        self._chunker = SemanticChunker(embeddings=embedding)
+
+        self._tokenizer = get_tokenizer(tokenizer_model_name)
+        self._token_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.params.chunk_size,
+            chunk_overlap=min(self.params.chunk_overlap, self.params.chunk_size - 1),
+            length_function=self._count_tokens,
+        )
+        self._max_tokens_splitter = RecursiveCharacterTextSplitter(chunk_size=self.params.max_tokens, chunk_overlap=0, length_function=self._count_tokens)
+        self._markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=MARKDOWN_HEADERS_TO_SPLIT_ON, strip_headers=False)
 
     def _remove_consecutive_newlines(self, text: str) -> str:
         """
@@ -29,14 +76,13 @@ class DocumentChunker:
         """
         return hashlib.sha256(content.encode()).hexdigest()
 
-    def split_text_into_chunks(self, text: str, url: str | None = None) -> list[Document]:
+    def compute_sha(self, text: str) -> str:
         """
-        Generate chunks via semantic separation from a given text
-
-        Args:
-            text (str): The input text.
-            url (str | None): The URL of the text. Could be None if the text is not from a URL (e.g. from an uploaded file).
+        Return the SHA hash of the text, the same one stored in the `sha` metadata of its chunks.
         """
+        return self._generate_sha(self._remove_consecutive_newlines(text))
+
+    def _get_document(self, text: str, url: str | None) -> Document:
         content = self._remove_consecutive_newlines(text)
         sha = self._generate_sha(content)
 
@@ -44,8 +90,115 @@ class DocumentChunker:
         if url:
             metadata["url"] = url
 
-        document = Document(page_content=content, metadata=metadata)
-        chunks = [Document(page_content=chunk) for chunk in self._chunker.split_text(document.page_content)]
-        # NOTE: "copy" method actually exists.
-        # pylint: disable=E1101
-        return [Document(page_content=chunk.page_content, metadata=document.metadata.copy()) for chunk in chunks]
+        return Document(page_content=content, metadata=metadata)
+
+    def _count_tokens(self, text: str) -> int:
+        return count_tokens(self._tokenizer, text)
+
+    def _iter_markdown_sections(self, content: str) -> Iterator[str]:
+        for section in self._markdown_splitter.split_text(content):
+            if self._count_tokens(section.page_content) > self.params.chunk_size:
+                yield from self._token_splitter.split_text(section.page_content)
+            else:
+                yield section.page_content
+
+    def _iter_split_oversized_chunks(self, chunks: Iterator[tuple[str, np.ndarray | None]]) -> Iterator[tuple[str, np.ndarray | None, int]]:
+        """
+        Split the chunks longer than `max_tokens` tokens, yielding each chunk with its number of tokens.
+
+        The embeddings of the pieces of a split chunk cannot be derived from the embeddings of its sentences,
+        so they are computed by the embeddings model when the split chunk has an embedding.
+        """
+        for chunk, vector in chunks:
+            tokens = self._count_tokens(chunk)
+            if tokens <= self.params.max_tokens:
+                yield chunk, vector, tokens
+                continue
+
+            pieces = self._max_tokens_splitter.split_text(chunk)
+            vectors = (
+                normalize_rows(np.asarray(self._chunker.embeddings.embed_documents(pieces), dtype=np.float32)) if vector is not None else [None] * len(pieces)
+            )
+            for piece, piece_vector in zip(pieces, vectors, strict=True):
+                yield piece, piece_vector, self._count_tokens(piece)
+
+    def _merge_chunks(self, first: tuple[str, np.ndarray | None, int], second: tuple[str, np.ndarray | None, int]) -> tuple[str, np.ndarray | None, int]:
+        text = f"{first[0]}\n{second[0]}"
+        vector = None
+        if first[1] is not None and second[1] is not None:
+            vector = normalize_rows((len(first[0]) * first[1] + len(second[0]) * second[1])[np.newaxis])[0]
+        return text, vector, self._count_tokens(text)
+
+    def _bound_chunk_sizes(self, chunks: Iterator[tuple[str, np.ndarray | None]]) -> Iterator[tuple[str, np.ndarray | None]]:
+        """
+        Enforce the `min_tokens` and `max_tokens` sizes on the chunks, keeping a single chunk in memory: a chunk shorter
+        than `min_tokens` tokens is merged with the previous or the next chunk, unless the merged chunk would exceed `max_tokens` tokens.
+        """
+        pending = None
+        for chunk in self._iter_split_oversized_chunks(chunks):
+            if pending is not None and min(pending[2], chunk[2]) < self.params.min_tokens:
+                merged = self._merge_chunks(pending, chunk)
+                if merged[2] <= self.params.max_tokens:
+                    pending = merged
+                    continue
+            if pending is not None:
+                yield pending[0], pending[1]
+            pending = chunk
+
+        if pending is not None:
+            yield pending[0], pending[1]
+
+    def iter_chunks(
+        self, text: str, url: str | None = None, with_vectors: bool = False, strategy: ChunkingStrategy | None = None
+    ) -> Iterator[tuple[Document, np.ndarray | None]]:
+        """
+        Generate chunks from a given text, yielding each chunk as soon as it is complete, so that the chunks and the
+        embeddings of the sentences of very long texts are never held in memory at once.
+
+        Args:
+            text (str): The input text.
+            url (str | None): The URL of the text. Could be None if the text is not from a URL (e.g. from an uploaded file).
+            with_vectors (bool): Whether to derive the embeddings of the chunks from the embeddings of their sentences,
+                so that the chunks do not need to be embedded again. Supported only by the `semantic` strategy.
+            strategy (ChunkingStrategy | None): The strategy used to split the text. If None, the configured one is used.
+
+        Yields:
+            tuple[Document, np.ndarray | None]: The chunk and, if `with_vectors` is True, its embedding.
+        """
+        document = self._get_document(text, url)
+        match strategy or self.params.strategy:
+            case ChunkingStrategy.markdown:
+                chunks = ((chunk, None) for chunk in self._iter_markdown_sections(document.page_content))
+            case ChunkingStrategy.token:
+                chunks = ((chunk, None) for chunk in self._token_splitter.split_text(document.page_content))
+            case _:
+                chunks = ((chunk.text, chunk.vector) for chunk in self._chunker.iter_split(document.page_content, with_vectors=with_vectors))
+
+        for chunk, vector in self._bound_chunk_sizes(chunks):
+            yield Document(page_content=chunk, metadata=document.metadata.copy()), vector
+
+    def split_text_into_chunks(self, text: str, url: str | None = None, strategy: ChunkingStrategy | None = None) -> list[Document]:
+        """
+        Generate chunks from a given text
+
+        Args:
+            text (str): The input text.
+            url (str | None): The URL of the text. Could be None if the text is not from a URL (e.g. from an uploaded file).
+            strategy (ChunkingStrategy | None): The strategy used to split the text. If None, the configured one is used.
+        """
+        return [chunk for chunk, _ in self.iter_chunks(text, url, strategy=strategy)]
+
+    def split_text_into_embedded_chunks(self, text: str, url: str | None = None) -> tuple[list[Document], np.ndarray]:
+        """
+        Generate chunks via semantic separation from a given text, along with their embeddings derived from the
+        embeddings of their sentences, so that the chunks do not need to be embedded again.
+
+        Args:
+            text (str): The input text.
+            url (str | None): The URL of the text. Could be None if the text is not from a URL (e.g. from an uploaded file).
+
+        Returns:
+            tuple[list[Document], np.ndarray]: The chunks and a matrix with the embedding of each chunk in its rows.
+        """
+        chunks = list(self.iter_chunks(text, url, with_vectors=True))
+        return [chunk for chunk, _ in chunks], np.array([vector for _, vector in chunks], dtype=np.float32)
@@ -1,171 +1,489 @@
-import re
-from collections import deque
+import asyncio
+import hashlib
+import queue
+import threading
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sized
+from itertools import batched
 from urllib.parse import urlparse
 
-import requests
-from bs4 import BeautifulSoup
-from langchain_community.vectorstores.mongodb_atlas import MongoDBAtlasVectorSearch
-
-from src.application.embeddings.document_chunker import DocumentChunker
-from src.application.embeddings.hyperlink_parser import HyperlinkParser
+import numpy as np
+from attr import Factory, dataclass
+from langchain_core.documents import Document
+
+from src.application.embeddings.boilerplate_filter import BoilerplateFilter, BoilerplateParams
+from src.application.embeddings.document_chunker import ChunkingParams, DocumentChunker
+from src.application.embeddings.ingestion_batcher import ChunkBatch, ChunkBatcher, IngestionParams, PendingChunks
+from src.application.embeddings.ingestion_job_tracker import JobTracker
+from src.application.embeddings.ingestion_pipeline import IngestionPipeline, PipelineStage
+from src.application.embeddings.url_canonicalizer import canonicalize_url
+from src.application.embeddings.web_crawler import CrawlBudget, CrawledPage, CrawlerParams, WebCrawler
+from src.configurations.service_model import ChunkingStrategy
 from src.context import AppContext
 from src.infrastracture.embeddings_manager.embeddings_manager import EmbeddingsManager
+from src.infrastracture.embeddings_manager.tokenizer import count_tokens, get_tokenizer
+from src.infrastracture.vector_store_manager.crawl_manifest import CrawlManifest, CrawlManifestEntry
+from src.infrastracture.vector_store_manager.vector_store_manager import VectorStoreManager
+
+SITEMAP_PATH = "/sitemap.xml"
+FILE_SHA_KEY = "fileSha"
+CHUNKING_STRATEGY_KEY = "chunkingStrategy"
+CHUNKS_BATCH_SIZE = 64
+# The interval at which the crawl checks whether the queue of the crawled pages has room for the next page
+PAGE_QUEUE_POLL_SECONDS = 0.05
+_END_OF_CRAWL = object()
+
+
+@dataclass
+class _CrawlState:
+    """
+    The state shared by the stages of the pipeline embedding the pages of a crawl: the crawl manifest, its entries
+    saved by the previous crawls and the number of pages referencing each chunk, updated under `lock`.
+    """
 
-# Regex pattern to match a URL
-HTTP_URL_PATTERN = r"^http[s]*://.+"
+    manifest: CrawlManifest
+    previous_pages: dict[str, CrawlManifestEntry]
+    chunk_references: Counter[str]
+    chunking_strategy: ChunkingStrategy
+    lock: threading.Lock = Factory(threading.Lock)
+
+
+@dataclass
+class _ChangedPage:
+    """
+    A crawled page whose content changed since the previous crawl: its text to split into chunks, without the repeated
+    blocks, and its crawl manifest entry, saved once its chunks are stored.
+    """
+
+    url: str
+    text: str
+    entry: CrawlManifestEntry
+    previous_page: CrawlManifestEntry | None = None
 
 
 class EmbeddingsService:
     """
     Class to generate embeddings for text data.
+
+    When the generation runs as an ingestion job, its progress (pages, chunks and tokens stored, pages failed) is
+    reported to the `job_tracker`, and the generation stops at the next page or batch once the job is cancelled.
     """
 
-    def __init__(self, app_context: AppContext):
+    def __init__(self, app_context: AppContext, job_tracker: JobTracker | None = None):
         self.logger = app_context.logger
-        mongodb_cluster_uri = app_context.env_vars.MONGODB_CLUSTER_URI
-        configuration = app_context.configurations
+        self._job_tracker = job_tracker
+        self._metrics_manager = app_context.metrics_manager
+
+        embeddings_manager = EmbeddingsManager(app_context)
+        embedding = embeddings_manager.get_ingestion_embeddings_instance()
+        self._embedding = embedding
+        self._embeddings_model_id = embeddings_manager.get_embeddings_model_id()
+
+        self._tokenizer_model_name = app_context.configurations.embeddings.name
+        self._tokenizer = get_tokenizer(self._tokenizer_model_name)
+        self._chunking_params = ChunkingParams.from_configuration(app_context.configurations.chunking)
+        self._document_chunker = DocumentChunker(embedding=embedding, params=self._chunking_params, tokenizer_model_name=self._tokenizer_model_name)
+        self._batcher_params = IngestionParams.from_configuration(app_context.configurations.ingestion)
+        self._boilerplate_params = BoilerplateParams.from_configuration(app_context.configurations.boilerplate)
+        self._boilerplate_filter = BoilerplateFilter(self._boilerplate_params)
+
+        self._embedding_vector_store = VectorStoreManager(app_context).get_vector_store_instance(embedding)
+        self._crawler_params = CrawlerParams.from_configuration(app_context.configurations.crawler)
+        self._num_dimensions_validated = False
+
+    def _validate_num_dimensions(self):
+        """
+        Refuse to add embeddings to a collection that contains embeddings of a different size (e.g. after a change of the `dimensions` configuration).
+        The check is performed once, before the first embeddings are stored.
+        """
+        if not self._num_dimensions_validated:
+            self._embedding_vector_store.validate_num_dimensions()
+            self._num_dimensions_validated = True
+
+    def _check_cancelled(self):
+        if self._job_tracker is not None:
+            self._job_tracker.check_cancelled()
 
-        embedding = EmbeddingsManager(app_context).get_embeddings_instance()
+    def _report_progress(self, pages: int = 0, chunks: list[Document] | None = None, errors: int = 0):
+        """
+        Add the pages processed, the chunks stored and the pages failed to the progress of the job, if any.
+        """
+        if self._job_tracker is None:
+            return
+        chunks = chunks or []
+        tokens = sum(count_tokens(self._tokenizer, chunk.page_content) for chunk in chunks)
+        self._job_tracker.add_progress(pages=pages, chunks=len(chunks), tokens=tokens, errors=errors)
 
-        self._document_chunker = DocumentChunker(embedding=embedding)
+    def _get_chunk_id(self, text: str) -> str:
+        """
+        Return the content address of a chunk: the hash of its normalized text and of the embeddings model,
+        so that the same text embedded by another model is stored separately.
+        """
+        normalized_text = " ".join(text.split())
+        return hashlib.sha256(f"{self._embeddings_model_id}\n{normalized_text}".encode()).hexdigest()
 
-        self._embedding_vector_store = MongoDBAtlasVectorSearch.from_connection_string(
-            connection_string=mongodb_cluster_uri,
-            namespace=f"{configuration.vectorStore.dbName}.{configuration.vectorStore.collectionName}",
-            embedding=embedding,
-            index_name=configuration.vectorStore.indexName,
-            embedding_key=configuration.vectorStore.embeddingKey,
-            relevance_score_fn=configuration.vectorStore.relevanceScoreFn,
-            text_key=configuration.vectorStore.textKey,
-        )
+    def _iter_chunk_batches(
+        self, text: str, url: str | None = None, chunking_strategy: ChunkingStrategy | None = None
+    ) -> Iterator[tuple[list[Document], np.ndarray | None]]:
+        """
+        Split the text into chunks, yielding them in batches of `CHUNKS_BATCH_SIZE` as they are produced, so that the
+        chunks of very long texts are stored while the text is still being split.
 
-    def _get_hyperlinks(self, raw_text: str):
+        If `chunking.reuseSentenceEmbeddings` is enabled and the text is split semantically, each batch includes also the
+        embeddings of the chunks derived from the sentence embeddings computed by the chunker, so that the chunks are not embedded again.
         """
-        Function to get the hyperlinks from a raw HTML text
+        strategy = chunking_strategy or self._chunking_params.strategy
+        with_vectors = self._chunking_params.reuse_sentence_embeddings and strategy == ChunkingStrategy.semantic
+        chunks = self._document_chunker.iter_chunks(text=text, url=url, with_vectors=with_vectors, strategy=strategy)
+        for batch in batched(chunks, CHUNKS_BATCH_SIZE):
+            documents = [document for document, _ in batch]
+            vectors = np.array([vector for _, vector in batch], dtype=np.float32) if with_vectors else None
+            yield documents, vectors
+
+    def _get_new_chunks(self, chunks: list[Document], ids: list[str], vectors: np.ndarray | None = None) -> ChunkBatch | None:
         """
-        # Create the HTML Parser and then Parse the HTML to get hyperlinks
-        parser = HyperlinkParser()
-        parser.feed(raw_text)
+        Return the chunks not stored yet in the vector store, identified by their content address, so that ingesting
+        the same content multiple times neither embeds it again nor creates duplicates. Chunks repeated in the same
+        batch are returned once. Returns None if all the chunks are already stored.
 
-        return parser.hyperlinks
+        Args:
+            chunks (list[Document]): The chunks to store.
+            ids (list[str]): The content addresses of the chunks (see `_get_chunk_id`).
+            vectors (np.ndarray | None, optional): The embeddings of the chunks, if already computed. Defaults to None.
+        """
+        existing_ids = self._embedding_vector_store.get_existing_ids(list(set(ids)))
+
+        new_chunks: dict[str, int] = {}
+        for index, _id in enumerate(ids):
+            if _id not in existing_ids:
+                new_chunks.setdefault(_id, index)
+        self.logger.debug(f"Found {len(new_chunks)} new chunks, {len(chunks) - len(new_chunks)} chunks were already stored")
+        if not new_chunks:
+            return None
+
+        indexes = list(new_chunks.values())
+        return ChunkBatch(
+            documents=[chunks[index] for index in indexes],
+            ids=list(new_chunks.keys()),
+            vectors=vectors[indexes] if vectors is not None else None,
+        )
 
-    def _get_domain_hyperlinks(self, raw_text: str, local_domain: str, path: str | None = None):
+    def _filter_domain_links(self, links: list[str], local_domain: str, path: str | None = None):
         """
-        Function to get the hyperlinks from a URL that are within the same domain
+        Function to keep only the links that are within the same domain and, if included, that are within the path,
+        matched on whole path segments (`/docs` includes `/docs/intro` but not `/docs-old`)
 
         Args:
-            raw_text (str): The raw HTML text to extract hyperlinks from.
-            local_domain (str): The domain to compare the hyperlinks against.
+            links (list[str]): The canonical URLs to filter.
+            local_domain (str): The domain to compare the links against.
+            path (str | None, optional): The canonical path the links should be within.
 
         Returns:
-            list: A list of hyperlinks that are within the same domain.
+            list: A list of links that are within the same domain.
         """
         clean_links = []
-        for link in set(self._get_hyperlinks(raw_text)):
-            clean_link = None
-
-            # If the link is a URL, check if it is within the same domain
-            if re.search(HTTP_URL_PATTERN, link):
-                # Parse the URL and check if the domain is the same
-                url_obj = urlparse(link)
-                # Link should be within the same domain and should start with one of the paths
-                if url_obj.netloc == local_domain and url_obj.path.startswith(path or ""):
-                    clean_link = link
-
-            # If the link is not a URL, check if it is a relative link
-            else:
-                if link.startswith("/"):
-                    link = link[1:]  # noqa: PLW2901
-                elif link.startswith("#") or link.startswith("mailto:"):
-                    continue
-                clean_link = "https://" + local_domain + "/" + link
-
-            if clean_link is not None:
-                if clean_link.endswith("/"):
-                    clean_link = clean_link[:-1]
-                if path:
-                    # Check if the link starts with the path (if included)
-                    url_obj = urlparse(clean_link)
-                    if not url_obj.path.startswith(path or ""):
-                        continue
-                clean_links.append(clean_link)
-
-        return list(set(clean_links))
-
-    def generate_from_url(self, url: str, filter_path: str | None = None):
-        """
-        Crawls the given URL and saves the text content of each page to a text file.
+        for link in links:
+            url_obj = urlparse(link)
+            if url_obj.netloc == local_domain and (not path or url_obj.path == path or url_obj.path.startswith(f"{path}/")):
+                clean_links.append(link)
+
+        return clean_links
+
+    def _prepare_page(self, page: CrawledPage, crawl: _CrawlState) -> list[_ChangedPage]:
+        """
+        Return the crawled page to split into chunks, if its content changed since the previous crawl.
+
+        Pages whose content did not change since the previous crawl are skipped, their crawl manifest entry being
+        updated, as well as the pages that cannot be parsed.
+        """
+        self._check_cancelled()
+        previous_page = crawl.previous_pages.get(page.url)
+        if page.not_modified:
+            self.logger.debug(f"Page {page.url} not modified since the previous crawl, skipping it")
+            self._report_progress(pages=1)
+            return []
+
+        # The text of the main content, extracted by the crawler along with the links of the page
+        text = page.text
+
+        # Pages that require JavaScript cannot be parsed, they are skipped
+        if "You need to enable JavaScript to run this app." in text:
+            self.logger.debug(f"Unable to parse page {page.url} due to JavaScript being required")
+            self._report_progress(pages=1)
+            return []
+
+        # The blocks repeated across the pages are removed only from the chunked text, so that the hash of the page does not
+        # depend on the pages crawled before it. The blocks of unchanged pages are recorded too, as they are already stored.
+        filtered_text = self._boilerplate_filter.filter(text)
+
+        entry = CrawlManifestEntry(
+            url=page.url,
+            sha=self._document_chunker.compute_sha(text),
+            etag=page.etag,
+            last_modified=page.last_modified,
+            links=page.links,
+        )
+        if previous_page is not None and previous_page.sha == entry.sha:
+            self.logger.debug(f"Content of page {page.url} unchanged since the previous crawl, skipping it")
+            entry.chunk_ids = previous_page.chunk_ids
+            crawl.manifest.save(entry)
+            self._report_progress(pages=1)
+            return []
+        return [_ChangedPage(url=page.url, text=filtered_text, entry=entry, previous_page=previous_page)]
+
+    def _chunk_page(self, page: _ChangedPage, crawl: _CrawlState) -> Iterator[ChunkBatch]:
+        """
+        Split the text of a changed page into chunks, yielding the new ones (see `_get_new_chunks`) as they are produced.
+        Once all of them are stored, the chunks of the previous version of the page are replaced (see `_replace_page`).
+
+        Since chunks are content-addressed, the same chunk can belong to several pages: `chunk_references` counts
+        the pages of the manifest referencing each chunk, so that a chunk is deleted only when no page uses it anymore.
+        """
+        pending = PendingChunks(lambda: self._replace_page(page, crawl))
+        chunk_ids: dict[str, None] = {}
+        for chunks, vectors in self._iter_chunk_batches(text=page.text, url=page.url, chunking_strategy=crawl.chunking_strategy):
+            ids = [self._get_chunk_id(chunk.page_content) for chunk in chunks]
+            # The references are counted before the chunks are looked up, so that the outdated chunks of a previous page,
+            # removed once its new chunks are stored, are either kept if used by this page or found missing and stored again
+            new_ids = [chunk_id for chunk_id in dict.fromkeys(ids) if chunk_id not in chunk_ids]
+            chunk_ids.update(dict.fromkeys(new_ids))
+            with crawl.lock:
+                crawl.chunk_references.update(new_ids)
+            new_chunks = self._get_new_chunks(chunks, ids, vectors)
+            if new_chunks is not None:
+                pending.attach(len(new_chunks.documents))
+                new_chunks.pending = [pending] * len(new_chunks.documents)
+                yield new_chunks
+        self.logger.debug(f"Extracted {len(chunk_ids)} chunks from the page {page.url}")
+        page.entry.chunk_ids = list(chunk_ids)
+        if page.previous_page is not None:
+            with crawl.lock:
+                crawl.chunk_references.subtract(page.previous_page.chunk_ids)
+        self._report_progress(pages=1)
+        pending.close()
+
+    def _replace_page(self, page: _ChangedPage, crawl: _CrawlState) -> None:
+        """
+        Remove the chunks of the previous version of a page no longer used by any page, and save its crawl manifest entry.
+
+        The new chunks are stored before removing the previous ones, so that the page is never missing from the vector store,
+        and the manifest is saved once the chunks are stored, so that an interrupted generation embeds the page again.
+        """
+        if page.previous_page is not None:
+            # The chunks are removed under the lock, so that a page chunked meanwhile does not count them as stored
+            with crawl.lock:
+                unused_chunk_ids = [chunk_id for chunk_id in page.previous_page.chunk_ids if crawl.chunk_references[chunk_id] <= 0]
+                if unused_chunk_ids:
+                    deleted_count = self._embedding_vector_store.delete_by_ids(unused_chunk_ids)
+                    self.logger.debug(f"Removed {deleted_count} outdated chunks of the changed page {page.url}")
+        crawl.manifest.save(page.entry)
+
+    @staticmethod
+    async def _put_page(pages: queue.Queue, page: CrawledPage | object, pipeline_run: asyncio.Future) -> bool:
+        """
+        Put a crawled page (or the end of the crawl) in the queue of the pipeline, waiting while the queue is full,
+        unless the pipeline has stopped (e.g. after an error). Return whether the page was put.
+        """
+        while not pipeline_run.done():
+            try:
+                pages.put_nowait(page)
+                return True
+            except queue.Full:
+                await asyncio.sleep(PAGE_QUEUE_POLL_SECONDS)
+        return False
+
+    async def _generate_from_url(
+        self, url: str, filter_path: str | None, budget: CrawlBudget | None, use_sitemap: bool, chunking_strategy: ChunkingStrategy | None
+    ):
+        url_obj = urlparse(canonicalize_url(url) or url)
+        local_domain = url_obj.netloc
+        path = urlparse(canonicalize_url(filter_path) or filter_path).path if filter_path else None
+
+        manifest = self._embedding_vector_store.get_crawl_manifest()
+        previous_pages = await asyncio.to_thread(manifest.load)
+        crawl = _CrawlState(
+            manifest=manifest,
+            previous_pages=previous_pages,
+            chunk_references=Counter(chunk_id for entry in previous_pages.values() for chunk_id in entry.chunk_ids),
+            chunking_strategy=chunking_strategy or self._chunking_params.strategy,
+        )
+
+        crawler = WebCrawler(
+            logger=self.logger,
+            params=self._crawler_params,
+            filter_links=lambda links: self._filter_domain_links(links, local_domain, path),
+            previous_pages=previous_pages,
+        )
+        sitemap_url = f"{url_obj.scheme}://{local_domain}{SITEMAP_PATH}" if use_sitemap else None
+
+        pipeline = self._create_pipeline(
+            [
+                # A single worker handles the pages in the order of the crawl, so that the repeated blocks are kept in the first pages
+                PipelineStage("page", lambda page: self._prepare_page(page, crawl)),
+                PipelineStage("chunk", lambda page: self._chunk_page(page, crawl), workers=self._batcher_params.chunk_workers),
+            ]
+        )
+        # The pipeline runs in a thread, fed with the pages as they are downloaded, so that the crawler keeps downloading pages meanwhile
+        pages: queue.Queue = queue.Queue(maxsize=self._batcher_params.queue_size)
+        pipeline_run = asyncio.ensure_future(asyncio.to_thread(pipeline.run, iter(pages.get, _END_OF_CRAWL), "crawl"))
+
+        reported_failed_count = 0
+        try:
+            async for page in crawler.crawl(url, budget=budget, sitemap_url=sitemap_url):
+                if not await self._put_page(pages, page, pipeline_run):
+                    break
+                self._report_progress(errors=crawler.failed_count - reported_failed_count)
+                reported_failed_count = crawler.failed_count
+        finally:
+            await self._put_page(pages, _END_OF_CRAWL, pipeline_run)
+            (pipeline_error,) = await asyncio.gather(pipeline_run, return_exceptions=True)
+        self._report_progress(errors=crawler.failed_count - reported_failed_count)
+        if pipeline_error is not None:
+            raise pipeline_error
+
+    def generate_from_url(
+        self,
+        url: str,
+        filter_path: str | None = None,
+        budget: CrawlBudget | None = None,
+        use_sitemap: bool = False,
+        chunking_strategy: ChunkingStrategy | None = None,
+    ):
+        """
+        Crawls the given URL and generates the embeddings of the text content of each page.
 
         Args:
             url (str): The URL to crawl. From this URL, the crawler will extract the text content
                 of said page and any other page connected via hyperlinks (anchor tags).
-            domain (str | None, optional): The domain to compare the hyperlinks against. If None,
-                the hyperlinks will not be filtered by domain. Defaults to None.
+            filter_path (str | None, optional): The path to compare the hyperlinks against. If None,
+                the hyperlinks will not be filtered by path. Defaults to None.
+            budget (CrawlBudget | None, optional): The limits of the crawl (depth, pages, duration and bytes).
+                Defaults to None, meaning an unlimited crawl.
+            use_sitemap (bool, optional): Whether to crawl also the pages listed in the `/sitemap.xml` of the website.
+                Defaults to False.
+            chunking_strategy (ChunkingStrategy | None, optional): The strategy used to split the pages into chunks.
+                Defaults to None, meaning the configured strategy.
 
         Returns:
             None
         """
+        self._validate_num_dimensions()
+        if self._job_tracker is not None and budget is not None:
+            self._job_tracker.set_total_pages(budget.max_pages)
 
-        local_domain = urlparse(url).netloc
-        path = urlparse(filter_path).path if filter_path else None
-
-        queue = deque([url])
-        seen = {url}
-
-        # While the queue is not empty, continue crawling
-        while queue:
-            # Get the next URL from the queue
-            url = queue.pop()
-            self.logger.debug(f"Scraping page: {url}")  # for debugging and to see the progress
+        self._boilerplate_filter = BoilerplateFilter(self._boilerplate_params)
+        asyncio.run(self._generate_from_url(url, filter_path, budget, use_sitemap, chunking_strategy))
 
-            # Get the text from the URL using BeautifulSoup
-            response = requests.get(url, timeout=5)
-            response.raise_for_status()
-            # check the response headers to see if the content is HTML
-            if not response.headers.get("Content-Type", "").startswith("text/html"):
-                self.logger.debug(f"Skipping page {url} as it is not HTML content.")
-                continue
+        self.logger.debug(f"Scraping completed, {self._boilerplate_filter.removed_count} repeated blocks removed from the pages.")
 
-            raw_text = response.text
-
-            # Get the text but remove the tags
-            soup = BeautifulSoup(raw_text, "html.parser")
-            text = soup.get_text()
+    def is_file_ingested(self, file_sha: str, chunking_strategy: ChunkingStrategy | None = None) -> bool:
+        """
+        Return whether the ingestion of a file with the given hash has completed, split with the given strategy
+        (or the configured one, if None). A file whose ingestion failed or was cancelled is not ingested.
+        """
+        strategy = chunking_strategy or self._chunking_params.strategy
+        return self._embedding_vector_store.get_file_manifest().contains(file_sha, strategy.value)
 
-            # If the crawler gets to a page that requires JavaScript, it will stop the crawl
-            if "You need to enable JavaScript to run this app." in text:
-                self.logger.debug(f"Unable to parse page {url} due to JavaScript being required")
-                continue
+    def _chunk_text(self, text: str, file_sha: str | None, chunking_strategy: ChunkingStrategy) -> Iterator[ChunkBatch]:
+        """
+        Split a text into chunks, yielding the new ones (see `_get_new_chunks`) as they are produced.
+        """
+        self._check_cancelled()
+        for chunks, vectors in self._iter_chunk_batches(text=text, chunking_strategy=chunking_strategy):
+            if file_sha is not None:
+                for chunk in chunks:
+                    chunk.metadata[FILE_SHA_KEY] = file_sha
+                    chunk.metadata[CHUNKING_STRATEGY_KEY] = chunking_strategy.value
+            new_chunks = self._get_new_chunks(chunks, [self._get_chunk_id(chunk.page_content) for chunk in chunks], vectors)
+            if new_chunks is not None:
+                yield new_chunks
+        self._report_progress(pages=1)
+
+    def _embed_chunks(self, batch: ChunkBatch) -> Iterator[ChunkBatch]:
+        if batch.vectors is None:
+            batch.vectors = np.asarray(self._embedding.embed_documents([document.page_content for document in batch.documents]), dtype=np.float32)
+        yield batch
+
+    def _write_chunks(self, batch: ChunkBatch):
+        self._check_cancelled()
+        self._embedding_vector_store.add_documents(batch.documents, ids=batch.ids, vectors=batch.vectors)
+        self.logger.debug(f"Stored {len(batch.documents)} chunks")
+        self._report_progress(chunks=batch.documents)
+        batch.release()
+
+    def _create_pipeline(self, first_stages: list[PipelineStage]) -> IngestionPipeline:
+        """
+        Create the pipeline of an ingestion: the first stages, producing the new chunks (see `_get_new_chunks`), are
+        followed by the stages accumulating them into batches across pages and documents (see `ChunkBatcher`), so that
+        many short texts (e.g. the pages of a website or of a PDF file) do not each require their own requests, embedding
+        them by `ingestion.concurrency` threads and writing them in bulk by `ingestion.writeWorkers` threads.
+        """
+        chunk_batcher = ChunkBatcher(self._batcher_params, self._tokenizer_model_name)
+        return IngestionPipeline(
+            [
+                *first_stages,
+                PipelineStage("batch", chunk_batcher.add, finish=chunk_batcher.flush),
+                PipelineStage("embed", self._embed_chunks, workers=self._batcher_params.concurrency),
+                PipelineStage("write", self._write_chunks, workers=self._batcher_params.write_workers),
+            ],
+            self._metrics_manager,
+            queue_size=self._batcher_params.queue_size,
+        )
 
-            chunks = self._document_chunker.split_text_into_chunks(text=text, url=url)
-            self.logger.debug(f"Extracted {len(chunks)} chunks from the page. Generated embeddings for these...")
-            self._embedding_vector_store.add_documents(chunks)
+    def generate_from_texts(self, texts: Iterable[str], file_sha: str | None = None, chunking_strategy: ChunkingStrategy | None = None):
+        """
+        Separate each text passed as argument into chunks and generate embeddings for each chunk.
+        Chunks already stored are not embedded again.
 
-            self.logger.debug("Embeddings generation completed. Extracting links...")
-            hyperlinks = self._get_domain_hyperlinks(raw_text, local_domain, path)
-            if len(hyperlinks) == 0:
-                self.logger.debug("No links found, move on.")
+        The texts are processed by a pipeline (see `IngestionPipeline`) whose stages run at the same time: the texts
+        are produced by iterating `texts` (e.g. parsing a file), stripped of the blocks repeated across them (see
+        `BoilerplateFilter`), split into chunks by `ingestion.chunkWorkers` threads,
+        accumulated into batches across texts (see `ChunkBatcher`), so that the many short texts of a file (e.g. the
+        pages of a PDF) do not each require their own requests, embedded by `ingestion.concurrency` threads and written
+        in bulk by `ingestion.writeWorkers` threads.
 
-            # Get the hyperlinks from the URL and add them to the queue
-            for link in hyperlinks:
-                if link not in seen:
-                    self.logger.debug(f"Found new link: {link}")
-                    queue.append(link)
-                    seen.add(link)
+        Args:
+            texts (Iterable[str]): The texts to generate embeddings for, e.g. the documents extracted from a file.
+            file_sha (str | None, optional): The hash of the file the texts come from, stored with the chunks and recorded
+                once they are all stored, so that the same file is not ingested again (see `is_file_ingested`). Defaults to None.
+            chunking_strategy (ChunkingStrategy | None, optional): The strategy used to split the texts into chunks.
+                Defaults to None, meaning the configured strategy.
 
-        self.logger.debug("Scraping completed.")
+        Returns:
+            None
+        """
+        self._validate_num_dimensions()
+        if self._job_tracker is not None and isinstance(texts, Sized):
+            self._job_tracker.set_total_pages(len(texts))
+
+        strategy = chunking_strategy or self._chunking_params.strategy
+        self._boilerplate_filter = BoilerplateFilter(self._boilerplate_params)
+        pipeline = self._create_pipeline(
+            [
+                # A single worker removes the repeated blocks, so that they are kept in the first texts
+                PipelineStage("boilerplate", lambda text: [self._boilerplate_filter.filter(text)]),
+                PipelineStage("chunk", lambda text: self._chunk_text(text, file_sha, strategy), workers=self._batcher_params.chunk_workers),
+            ]
+        )
+        pipeline.run(texts, source_name="parse")
+        if file_sha is not None:
+            # The file is recorded once all its chunks are stored, so that a failed ingestion can be completed later
+            self._embedding_vector_store.get_file_manifest().save(file_sha, strategy.value)
+        self.logger.debug(f"Embeddings generation completed, {self._boilerplate_filter.removed_count} repeated blocks removed from the texts.")
 
-    def generate_from_text(self, text: str):
+    def generate_from_text(self, text: str, file_sha: str | None = None, chunking_strategy: ChunkingStrategy | None = None):
         """
         Take the string passed as argument, it separates the text into chunks and generates embeddings for each chunk.
+        Chunks already stored are not embedded again.
 
         Args:
             text (str): The text to generate embeddings for.
+            file_sha (str | None, optional): The hash of the file the text comes from, stored with the chunks and recorded
+                once they are all stored, so that the same file is not ingested again (see `is_file_ingested`). Defaults to None.
+            chunking_strategy (ChunkingStrategy | None, optional): The strategy used to split the text into chunks.
+                Defaults to None, meaning the configured strategy.
 
         Returns:
             None
         """
-        chunks = self._document_chunker.split_text_into_chunks(text=text)
-        self.logger.debug(f"Extracted {len(chunks)} chunks from the page. Generated embeddings for these...")
-        self._embedding_vector_store.add_documents(chunks)
-        self.logger.debug("Embeddings generation completed.")
+        self.generate_from_texts([text], file_sha=file_sha, chunking_strategy=chunking_strategy)
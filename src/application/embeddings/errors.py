@@ -0,0 +1,19 @@
+class IngestionJobCancelledError(Exception):
+    """Exception raised within an ingestion job when its cancellation has been requested, to stop the job."""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"The ingestion job {job_id} has been cancelled.")
+        self.job_id = job_id
+
+    def __reduce__(self):
+        # The error is raised in the worker processes and pickled back to the API process
+        return (self.__class__, (self.job_id,))
+
+
+class IngestionJobFinishedError(Exception):
+    """Exception raised when the cancellation of an ingestion job is requested after the job is finished."""
+
+    def __init__(self, job_id: str, status: str):
+        super().__init__(f"The ingestion job {job_id} is already {status}.")
+        self.job_id = job_id
+        self.status = status
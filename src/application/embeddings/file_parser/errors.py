@@ -18,3 +18,13 @@ The file {filename} cannot be processed. File must include one of the specific C
 Otherwise can have the following extensions: {", ".join(SUPPORTED_EXT_TUPLE)}.\
 """
         super().__init__(self.message)
+
+
+class ArchiveTooLargeError(Exception):
+    """
+    Exception raised when the files of an archive exceed the maximum decompressed size, e.g. a compression bomb.
+    """
+
+    def __init__(self, filename, limit):
+        self.message = f"The archive {filename} exceeds the maximum decompressed size of {limit} bytes."
+        super().__init__(self.message)
@@ -1,17 +1,20 @@
 import gzip
-import io
+import multiprocessing
 import tarfile
-from collections.abc import Generator
+import threading
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
 from logging import Logger
-from tempfile import TemporaryDirectory
 from typing import IO
 from zipfile import BadZipFile, ZipFile
 
-from fastapi import File, UploadFile
+from attr import dataclass
 from pymupdf import Document
 
-from src.application.embeddings.file_parser.errors import InvalidFileError
+from src.application.embeddings.file_parser.errors import ArchiveTooLargeError, InvalidFileError
 from src.application.embeddings.file_parser.get_file_type import FileType, get_file_type
+from src.configurations.service_model import FileParsing
 from src.constants import (
     MD_EXTENSION,
     MDX_EXTENSION,
@@ -20,6 +23,75 @@ from src.constants import (
     TEXT_EXTENSION,
 )
 
+# A PDF file starts with this header, possibly after some bytes within the first kilobyte
+PDF_MAGIC = b"%PDF-"
+PDF_HEADER_SIZE = 1024
+GZIP_MAGIC = b"\x1f\x8b"
+ARCHIVE_READ_CHUNK_SIZE = 1024 * 1024
+
+
+_parsing_pools: dict[int, ProcessPoolExecutor] = {}
+_parsing_pools_lock = threading.Lock()
+
+
+@dataclass
+class FileParserParams:
+    max_archive_member_bytes: int = 256 * 1024 * 1024
+    max_archive_total_bytes: int = 4 * 1024 * 1024 * 1024
+    workers: int = 1
+    pdf_pages_per_task: int = 16
+
+    @classmethod
+    def from_configuration(cls, configuration: FileParsing | None) -> "FileParserParams":
+        configuration = configuration or FileParsing()
+        return cls(
+            max_archive_member_bytes=configuration.maxArchiveMemberBytes,
+            max_archive_total_bytes=configuration.maxArchiveTotalBytes,
+            workers=configuration.workers,
+            pdf_pages_per_task=configuration.pdfPagesPerTask,
+        )
+
+
+def _get_parsing_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Return the pool of `workers` processes parsing the files, shared by the parsers of the process and started on first use.
+    """
+    with _parsing_pools_lock:
+        if workers not in _parsing_pools:
+            _parsing_pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _parsing_pools[workers]
+
+
+def _extract_pdf_pages(source: str | bytes, start: int = 0, stop: int | None = None) -> list[str]:
+    """
+    Extract the text of the pages from `start` to `stop` (excluded, the last page if None) of a PDF file, given its
+    path or its content. This function runs in the parsing processes.
+    """
+    with Document(filename=source) if isinstance(source, str) else Document(stream=source) as doc:
+        return [doc[page].get_text() for page in range(start, doc.page_count if stop is None else stop)]
+
+
+def _completed(result: list[str]) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class _ArchiveBudget:
+    """
+    The decompressed bytes of the files of an archive, which cannot exceed `limit` in total.
+    """
+
+    def __init__(self, archive_name: str, limit: int):
+        self.archive_name = archive_name
+        self.limit = limit
+        self.used = 0
+
+    def consume(self, size: int) -> None:
+        self.used += size
+        if self.used > self.limit:
+            raise ArchiveTooLargeError(filename=self.archive_name, limit=self.limit)
+
 
 class FileParser:
     """
@@ -37,121 +109,245 @@ class FileParser:
         - Process ZIP files and extract supported file types within them
         - Handle file content encoding and conversion
 
+        The files are read from the disk (e.g. an upload saved by the API) only while the documents are consumed,
+        so that they are never loaded in memory at once: the PDF files are opened by path and their pages read on demand.
+        The archives are read in a single pass, decompressing only the supported files, each one at most
+        `max_archive_member_bytes` large and at most `max_archive_total_bytes` in total.
+
+        With more than one `workers`, the PDF files are parsed in parallel by a pool of processes: the large PDF files
+        in ranges of `pdf_pages_per_task` pages, and the PDF files of the archives one per process. The documents
+        are still returned in the order of the pages and of the files of the archives.
+
         Args:
             logger (Logger): A logger instance for tracking operations and debugging
+            params (FileParserParams | None): The limits of the parsing, the default ones if None
     """
 
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, params: FileParserParams | None = None):
         self.logger = logger
+        self.params = params or FileParserParams()
 
     def _convert_bytes_to_str(self, content: bytes) -> str:
         return content.decode("utf-8")
 
-    def _convert_text_to_str(self, file: UploadFile = File(...)) -> str:
-        self.logger.debug(f"Converting text file {file.filename} to string...")
-        content = file.file.read()
-        return self._convert_bytes_to_str(content)
+    def _convert_text_to_str(self, file_path: str, file_name: str) -> str:
+        self.logger.debug(f"Converting text file {file_name} to string...")
+        with open(file_path, "rb") as file:
+            return self._convert_bytes_to_str(file.read())
 
     def _convert_from_doc_to_str(self, doc: Document) -> Generator[str, None, None]:
         for page in doc:
             yield page.get_text()
 
-    def _convert_pdf_to_str(self, file: UploadFile) -> Generator[str, None, None]:
-        self.logger.debug(f"Extracting text from PDF file {file.filename}")
-        file_content = file.file.read()
-        doc = Document(stream=file_content)
-        yield from self._convert_from_doc_to_str(doc)
-
-    def _convert_file_to_str(self, file: IO[bytes], file_name: str) -> Generator[str, None, None]:
-        file_content = file.read()
+    def _convert_pdf_to_str(self, file_path: str, file_name: str) -> Generator[str, None, None]:
+        self.logger.debug(f"Extracting text from PDF file {file_name}")
+        pages_per_task = self.params.pdf_pages_per_task
+        with Document(filename=file_path) as doc:
+            page_count = doc.page_count
+            if self.params.workers == 1 or page_count <= pages_per_task:
+                yield from self._convert_from_doc_to_str(doc)
+                return
+
+        # The page ranges are parsed by the workers, each one opening the file by path
+        page_ranges = ((start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task))
+        pages = (self._submit(_extract_pdf_pages, file_path, start, stop) for start, stop in page_ranges)
+        for texts in self._in_order(pages):
+            yield from texts
+
+    def _convert_members(self, members: Iterable[tuple[bytes, str]]) -> Generator[str, None, None]:
+        if self.params.workers == 1:
+            for content, member_name in members:
+                yield from self._convert_file_to_str(content, member_name)
+            return
+
+        # The PDF files are distributed across the workers, the text files are decoded right away
+        documents = (
+            self._submit(_extract_pdf_pages, content)
+            if member_name.endswith(PDF_EXTENSION)
+            else _completed(list(self._convert_file_to_str(content, member_name)))
+            for content, member_name in members
+        )
+        for texts in self._in_order(documents):
+            yield from texts
+
+    def _submit(self, function: Callable[..., list[str]], *args) -> Future:
+        return _get_parsing_pool(self.params.workers).submit(function, *args)
+
+    def _in_order(self, futures: Iterable[Future]) -> Generator[list[str], None, None]:
+        # At most twice as many tasks as workers are submitted ahead of the one being consumed, so that the documents
+        # held in memory are bounded while the workers are kept busy
+        pending: deque[Future] = deque()
+        try:
+            for future in futures:
+                pending.append(future)
+                if len(pending) > 2 * self.params.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _convert_file_to_str(self, file_content: bytes, file_name: str) -> Generator[str, None, None]:
         file_extension = file_name.split(".")[-1]
 
         if file_extension == PDF_EXTENSION:
-            doc = Document(stream=file_content)
-            yield from self._convert_from_doc_to_str(doc)
+            with Document(stream=file_content) as doc:
+                yield from self._convert_from_doc_to_str(doc)
         elif file_extension == TEXT_EXTENSION:
             yield self._convert_bytes_to_str(file_content)
         elif file_extension in (MD_EXTENSION, MDX_EXTENSION):
             yield self._convert_bytes_to_str(file_content)
 
-    def _extract_documents_from_zip_file(self, file: UploadFile = File(...)) -> Generator[str, None, None]:
-        self.logger.debug(f"Extracting files from zip file {file.filename}")
+    def _read_member(self, file: IO[bytes], archive_name: str, budget: _ArchiveBudget) -> bytes:
+        # The member is decompressed chunk by chunk, so that a member larger than the limits is never held in memory
+        content = bytearray()
+        while chunk := file.read(ARCHIVE_READ_CHUNK_SIZE):
+            content.extend(chunk)
+            if len(content) > self.params.max_archive_member_bytes:
+                raise ArchiveTooLargeError(filename=archive_name, limit=self.params.max_archive_member_bytes)
+            budget.consume(len(chunk))
+        return bytes(content)
+
+    def _check_member_size(self, size: int, archive_name: str, budget: _ArchiveBudget) -> None:
+        # The size declared by the archive is checked before decompressing the member, the actual size while reading it
+        if size > self.params.max_archive_member_bytes:
+            raise ArchiveTooLargeError(filename=archive_name, limit=self.params.max_archive_member_bytes)
+        if budget.used + size > budget.limit:
+            raise ArchiveTooLargeError(filename=archive_name, limit=budget.limit)
+
+    def _extract_documents_from_zip_file(self, file_path: str, file_name: str) -> Generator[str, None, None]:
+        yield from self._convert_members(self._read_zip_members(file_path, file_name))
+
+    def _read_zip_members(self, file_path: str, file_name: str) -> Generator[tuple[bytes, str], None, None]:
+        self.logger.debug(f"Extracting files from zip file {file_name}")
+        budget = _ArchiveBudget(file_name, self.params.max_archive_total_bytes)
         try:
-            content = file.file.read()
-            with TemporaryDirectory() as temp_dir, ZipFile(io.BytesIO(content)) as zipf:
-                zipf.extractall(path=temp_dir, members=zipf.namelist())
-
-                self.logger.info(f"Extracted {len(zipf.namelist())} files. Processing them...")
-
-                # Check for the list of file: we extract the files then we check if the extension match the available ones (supported: pdf, txt, md)
-                for file_name in zipf.namelist():
+            with ZipFile(file_path) as zipf:
+                # Only the supported files (pdf, txt, md) are decompressed, each one read once from the archive
+                for member in zipf.infolist():
                     # For now we do not support folders inside zip files.
-                    if file_name.endswith(SUPPORTED_EXT_IN_COMPRESSED_FILE_TUPLE):
-                        with zipf.open(file_name) as f:
-                            self.logger.info(f"Reading file {file_name}")
-                            yield from self._convert_file_to_str(f, file_name)
+                    if member.is_dir() or not member.filename.endswith(SUPPORTED_EXT_IN_COMPRESSED_FILE_TUPLE):
+                        continue
+                    self._check_member_size(member.file_size, file_name, budget)
+                    with zipf.open(member) as f:
+                        self.logger.info(f"Reading file {member.filename}")
+                        content = self._read_member(f, file_name, budget)
+                    yield content, member.filename
         except BadZipFile as bad_zip_file_ex:
             self.logger.error(bad_zip_file_ex)
             raise BadZipFile(bad_zip_file_ex)
+        except ArchiveTooLargeError:
+            raise
         except Exception as ex:
             # pylint: disable=W0719
-            raise Exception(f"An error occurred while extracting the file {file.filename}") from ex
+            raise Exception(f"An error occurred while extracting the file {file_name}") from ex
 
-    def _extract_documents_from_tar_file(self, file: UploadFile = File(...)) -> Generator[str, None, None]:
-        self.logger.debug(f"Extracting files from tar file {file.filename}")
-        try:
-            content = file.file.read()
-            with TemporaryDirectory() as temp_dir, tarfile.open(fileobj=io.BytesIO(content)) as tarf:
-                tarf.extractall(path=temp_dir, filter="data")
-                self.logger.info(f"Extracted {len(tarf.getmembers())} files. Processing them...")
+    def _extract_documents_from_tar_file(self, file_path: str, file_name: str, mode: str = "r|*") -> Generator[str, None, None]:
+        yield from self._convert_members(self._read_tar_members(file_path, file_name, mode))
 
-                # Process each file in the tar archive
-                for member in tarf.getmembers():
+    def _read_tar_members(self, file_path: str, file_name: str, mode: str) -> Generator[tuple[bytes, str], None, None]:
+        self.logger.debug(f"Extracting files from tar file {file_name}")
+        budget = _ArchiveBudget(file_name, self.params.max_archive_total_bytes)
+        try:
+            # The archive is read as a stream, in a single pass: each member is read as soon as its header is found
+            with tarfile.open(file_path, mode) as tarf:
+                for member in tarf:
                     # Skip if it's a directory
-                    if member.isfile() and member.name.endswith(SUPPORTED_EXT_IN_COMPRESSED_FILE_TUPLE):
-                        with tarf.extractfile(member) as f:
-                            self.logger.info(f"Reading file {member.name}")
-                            yield from self._convert_file_to_str(f, member.name)
+                    if not member.isfile() or not member.name.endswith(SUPPORTED_EXT_IN_COMPRESSED_FILE_TUPLE):
+                        continue
+                    self._check_member_size(member.size, file_name, budget)
+                    with tarf.extractfile(member) as f:
+                        self.logger.info(f"Reading file {member.name}")
+                        content = self._read_member(f, file_name, budget)
+                    yield content, member.name
         except tarfile.TarError as tar_error:
             self.logger.error(tar_error)
             raise tarfile.TarError(f"Invalid tar file: {tar_error}")
+        except ArchiveTooLargeError:
+            raise
         except Exception as ex:
             # pylint: disable=W0719
-            raise Exception(f"An error occurred while extracting the file {file.filename}") from ex
+            raise Exception(f"An error occurred while extracting the file {file_name}") from ex
 
-    def _extract_documents_from_gzip_file(self, file: UploadFile = File(...)) -> Generator[str, None, None]:
-        self.logger.debug(f"Extracting files from gzip file {file.filename}")
-        try:
-            content = file.file.read()
-            with TemporaryDirectory() as temp_dir, gzip.open(io.BytesIO(content)) as gzf:
-                # For .tar.gz files
-                if file.filename.endswith(".tar.gz"):
-                    with tarfile.open(fileobj=gzf) as tarf:
-                        tarf.extractall(path=temp_dir, filter="data")
-                        self.logger.info(f"Extracted {len(tarf.getmembers())} files. Processing them...")
-
-                        for member in tarf.getmembers():
-                            if member.isfile() and member.name.endswith(SUPPORTED_EXT_IN_COMPRESSED_FILE_TUPLE):
-                                with tarf.extractfile(member) as f:
-                                    self.logger.info(f"Reading file {member.name}")
-                                    yield from self._convert_file_to_str(f, member.name)
-                # For single .gz files
-                else:
-                    decompressed_content = gzf.read()
-                    if file.filename.endswith(".pdf.gz"):
-                        doc = Document(stream=decompressed_content)
-                        yield from self._convert_from_doc_to_str(doc)
-                    elif file.filename.endswith((".txt.gz", ".md.gz")):
-                        yield self._convert_bytes_to_str(decompressed_content)
+    def _extract_documents_from_gzip_file(self, file_path: str, file_name: str) -> Generator[str, None, None]:
+        self.logger.debug(f"Extracting files from gzip file {file_name}")
+        # For .tar.gz files
+        if file_name.endswith(".tar.gz"):
+            yield from self._extract_documents_from_tar_file(file_path, file_name, mode="r|gz")
+            return
 
+        # For single .gz files
+        budget = _ArchiveBudget(file_name, self.params.max_archive_total_bytes)
+        try:
+            if not file_name.endswith((".pdf.gz", ".txt.gz", ".md.gz")):
+                return
+            with gzip.open(file_path) as gzf:
+                decompressed_content = self._read_member(gzf, file_name, budget)
+            yield from self._convert_file_to_str(decompressed_content, file_name.removesuffix(".gz"))
         except gzip.BadGzipFile as gzip_error:
             self.logger.error(gzip_error)
             raise gzip.BadGzipFile(f"Invalid gzip file: {gzip_error}")
+        except ArchiveTooLargeError:
+            raise
         except Exception as ex:
             # pylint: disable=W0719
-            raise Exception(f"An error occurred while extracting the file {file.filename}") from ex
+            raise Exception(f"An error occurred while extracting the file {file_name}") from ex
+
+    def validate_file(self, file_path: str, file_name: str, content_type: str | None = None) -> FileType:
+        """
+        Check that a file can be parsed, without reading its content: the type of the file, the header of the PDF and
+        gzip files and the directory of the archives.
+
+        Args:
+            file_path (str): The path of the file to check.
+            file_name (str): The name of the file, whose extension is used when the content type is not supported.
+            content_type (str | None): The content type of the file.
+
+        Returns:
+            FileType: The type of the file.
+
+        Raises:
+            InvalidFileError: If the file type is not supported, or the file is not a PDF file as its type says
+            ArchiveTooLargeError: If the files of a zip file exceed the maximum decompressed size
+            BadZipFile: If the zip file is corrupted or invalid
+            TarError: If the tar file is corrupted or invalid
+            BadGzipFile: If the gzip file is corrupted or invalid
+        """
+        file_type = get_file_type(file_name, content_type)
+
+        match file_type:
+            case FileType.TEXT:
+                pass
+            case FileType.PDF:
+                with open(file_path, "rb") as file:
+                    if PDF_MAGIC not in file.read(PDF_HEADER_SIZE):
+                        raise InvalidFileError(filename=file_name)
+            case FileType.ZIP:
+                # The directory of the zip file declares the size of the files, checked again while they are read
+                budget = _ArchiveBudget(file_name, self.params.max_archive_total_bytes)
+                with ZipFile(file_path) as zipf:
+                    for member in zipf.infolist():
+                        if not member.is_dir() and member.filename.endswith(SUPPORTED_EXT_IN_COMPRESSED_FILE_TUPLE):
+                            self._check_member_size(member.file_size, file_name, budget)
+                            budget.consume(member.file_size)
+            case FileType.TAR:
+                # Unlike zip files, tar files have no directory: only the header of the first member is read
+                with tarfile.open(file_path):
+                    pass
+            case FileType.GZIP:
+                with open(file_path, "rb") as file:
+                    if file.read(len(GZIP_MAGIC)) != GZIP_MAGIC:
+                        raise gzip.BadGzipFile(f"Invalid gzip file: {file_name} is not a gzip file")
+                if file_name.endswith(".tar.gz"):
+                    with tarfile.open(file_path, "r:gz"):
+                        pass
+            case _:
+                raise InvalidFileError(filename=file_name)
+
+        return file_type
 
-    def extract_documents_from_file(self, file: UploadFile = File(...)) -> Generator[str, None, None]:
+    def extract_documents_from_file(self, file_path: str, file_name: str, content_type: str | None = None) -> Generator[str, None, None]:
         """
         Extract text content from various file types and return it as a Generator.
 
@@ -164,41 +360,44 @@ class FileParser:
         using the `list()` function or simply iterated over.
 
         Args:
-            file (UploadFile): The file to process, supported formats are PDF, TXT, MD, and ZIP
+            file_path (str): The path of the file to process, supported formats are PDF, TXT, MD, and ZIP
+            file_name (str): The name of the file, whose extension is used when the content type is not supported.
+            content_type (str | None): The content type of the file.
 
         Returns:
             Generator[str, None, None]: A generator that yields strings of text content
 
         Raises:
             InvalidFileError: If the file extension is not supported
+            ArchiveTooLargeError: If the files of an archive exceed the maximum decompressed size
             BadZipFile: If the zip file is corrupted or invalid
             TarError: If the tar file is corrupted or invalid
             BadGzipFile: If the gzip file is corrupted or invalid
             Exception: For general processing errors
 
         """
-        self.logger.info(f"Extracting documents from file {file.filename}")
+        self.logger.info(f"Extracting documents from file {file_name}")
 
-        file_type = get_file_type(file)
+        file_type = get_file_type(file_name, content_type)
 
         if file_type is None:
-            raise InvalidFileError(filename=file.filename)
+            raise InvalidFileError(filename=file_name)
 
         result: list[str] | Generator[str, None, None] = []
 
         match file_type:
             case FileType.TEXT:
-                result = [self._convert_text_to_str(file)]
+                result = [self._convert_text_to_str(file_path, file_name)]
             case FileType.PDF:
-                result = self._convert_pdf_to_str(file)
+                result = self._convert_pdf_to_str(file_path, file_name)
             case FileType.ZIP:
-                result = self._extract_documents_from_zip_file(file)
+                result = self._extract_documents_from_zip_file(file_path, file_name)
             case FileType.TAR:
-                result = self._extract_documents_from_tar_file(file)
+                result = self._extract_documents_from_tar_file(file_path, file_name)
             case FileType.GZIP:
-                result = self._extract_documents_from_gzip_file(file)
+                result = self._extract_documents_from_gzip_file(file_path, file_name)
             case _:
-                raise InvalidFileError(filename=file.filename)
+                raise InvalidFileError(filename=file_name)
 
-        self.logger.info(f"Completed documents extraction from file {file.filename}")
         yield from result
+        self.logger.info(f"Completed documents extraction from file {file_name}")
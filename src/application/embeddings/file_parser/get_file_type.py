@@ -1,7 +1,5 @@
 from enum import Enum
 
-from fastapi import UploadFile
-
 from src.constants import (
     GZIP_COMPRESSED_CONTENT_TYPE,
     GZIP_CONTENT_TYPE,
@@ -51,8 +49,7 @@ EXTENSION_TYPE_MAP = {
 }
 
 
-def get_file_type(file: UploadFile):
-    content_type = file.content_type
-    file_extension = file.filename.split(".")[-1]
+def get_file_type(file_name: str, content_type: str | None = None) -> FileType | None:
+    file_extension = file_name.split(".")[-1]
 
     return CONTENT_TYPE_MAP.get(content_type, None) or EXTENSION_TYPE_MAP.get(file_extension, None)
@@ -0,0 +1,51 @@
+import contextlib
+import hashlib
+import os
+import tempfile
+from typing import IO
+
+from attr import dataclass
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class SpooledFile:
+    """
+    A file copied to the disk, e.g. an upload to be parsed by an ingestion job once the request is completed.
+    """
+
+    path: str
+    sha256: str
+
+    def remove(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
+
+
+def spool_file(file: IO[bytes], directory: str | None = None) -> SpooledFile:
+    """
+    Copy a file to a new file of `directory` (the temporary directory of the system if None), chunk by chunk, so
+    that the file is never loaded in memory at once. The hash of the file is computed in the same pass.
+
+    Args:
+        file (IO[bytes]): The file to copy, read from its current position.
+        directory (str | None): The directory of the copy, created if missing.
+
+    Returns:
+        SpooledFile: The path and the SHA-256 hash of the copy.
+    """
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+
+    digest = hashlib.sha256()
+    descriptor, path = tempfile.mkstemp(prefix="upload-", dir=directory)
+    try:
+        with os.fdopen(descriptor, "wb") as spooled:
+            while chunk := file.read(SPOOL_CHUNK_SIZE):
+                digest.update(chunk)
+                spooled.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledFile(path=path, sha256=digest.hexdigest())
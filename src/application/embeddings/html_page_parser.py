@@ -0,0 +1,176 @@
+"""
+Module providing the HtmlPageParser class.
+"""
+
+import re
+from html.parser import HTMLParser
+
+# Elements whose content is never part of the text of the page
+SKIPPED_TAGS = frozenset({"script", "style", "template", "svg", "iframe", "canvas", "nav", "footer", "aside", "form", "button", "select"})
+# Elements skipped when not within the main content, since they also introduce articles and sections
+PAGE_HEADER_TAGS = frozenset({"header"})
+SKIPPED_ROLES = frozenset({"navigation", "banner", "contentinfo", "complementary", "search", "menu", "menubar", "dialog", "alertdialog"})
+MAIN_CONTENT_TAGS = frozenset({"main", "article"})
+# Elements never skipped by their attributes, e.g. a `<body class="cookie-consent">` set by a consent script
+CONTAINER_TAGS = frozenset({"html", "body"}) | MAIN_CONTENT_TAGS
+# Elements starting a new block of text
+BLOCK_TAGS = frozenset(
+    {
+        "address", "article", "blockquote", "br", "dd", "details", "dialog", "div", "dl", "dt", "fieldset", "figcaption", "figure",
+        "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "main", "ol", "p", "pre", "section", "summary", "table", "td", "th", "title",
+        "tr", "ul",
+    }
+)  # fmt: skip
+# Elements without closing tag
+VOID_TAGS = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"})
+# Cookie banners, consent dialogs and similar overlays, matched by their id or class
+BOILERPLATE_ATTRIBUTE_PATTERN = re.compile(r"(?:^|[\s_-])(?:cookie|consent|gdpr|newsletter|popup|modal)(?:$|[\s_-])", re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class HtmlPageParser(HTMLParser):
+    """
+    A class that parses an HTML page in a single pass, extracting both its hyperlinks and the text of its main content.
+
+    The text leaves out the boilerplate of the page: scripts and styles, navigation menus, page headers and footers,
+    forms, and elements such as cookie banners (by their id or class) or hidden ones. When the page marks its main
+    content with `<main>`, `<article>` or `role="main"`, only the text within is kept, along with the title of the page.
+    The text is split into blocks, one per line, following the block elements (paragraphs, headings, list items...).
+
+    Attributes:
+        hyperlinks (list): A list to store the extracted hyperlinks.
+        canonical_url (str | None): The URL declared by the `<link rel="canonical">` tag, if any.
+
+    Methods:
+        handle_starttag(tag, attrs): Extracts the hyperlinks and tracks the elements whose text is skipped.
+        handle_endtag(tag): Closes the elements opened by handle_starttag.
+        handle_data(data): Collects the text of the page.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # Create a list to store the hyperlinks
+        self.hyperlinks = []
+        self.canonical_url = None
+        self._title: list[str] = []
+        self._blocks: list[str] = []
+        self._main_blocks: list[str] = []
+        self._block: list[str] = []
+        # Stack of the open elements, with whether they are skipped and whether they are the main content
+        self._open_elements: list[tuple[str, bool, bool]] = []
+        self._skipped_depth = 0
+        self._main_depth = 0
+        self._pre_depth = 0
+        self._title_depth = 0
+
+    def _is_skipped(self, tag: str, attrs: dict[str, str | None]) -> bool:
+        if tag in SKIPPED_TAGS or (tag in PAGE_HEADER_TAGS and self._main_depth == 0):
+            return True
+        if tag in CONTAINER_TAGS:
+            return False
+        if "hidden" in attrs or (attrs.get("aria-hidden") or "").lower() == "true":
+            return True
+        if (attrs.get("role") or "").lower() in SKIPPED_ROLES:
+            return True
+        return any(BOILERPLATE_ATTRIBUTE_PATTERN.search(attrs.get(name) or "") for name in ("id", "class"))
+
+    def _end_block(self) -> None:
+        if not self._block:
+            return
+        text = "".join(self._block)
+        self._block = []
+        if not self._pre_depth:
+            text = WHITESPACE_PATTERN.sub(" ", text)
+        text = text.strip()
+        if text:
+            self._blocks.append(text)
+            if self._main_depth:
+                self._main_blocks.append(text)
+
+    def _close_element(self) -> None:
+        tag, skipped, main = self._open_elements.pop()
+        if tag in BLOCK_TAGS:
+            self._end_block()
+        self._skipped_depth -= skipped
+        self._pre_depth -= tag == "pre"
+        self._title_depth -= tag == "title"
+        if main:
+            # The main content ends with its last block
+            self._end_block()
+            self._main_depth -= 1
+
+    # Override the HTMLParser's handle_starttag method to get the hyperlinks
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        # If the tag is an anchor tag and it has an href attribute, add the href attribute to the list of hyperlinks
+        if tag == "a" and "href" in attrs:
+            self.hyperlinks.append(attrs["href"])
+
+        # If the tag declares the canonical URL of the page, keep the first one
+        if tag == "link" and "canonical" in (attrs.get("rel") or "").lower().split() and attrs.get("href") and self.canonical_url is None:
+            self.canonical_url = attrs["href"]
+
+        if tag in BLOCK_TAGS:
+            self._end_block()
+        if tag in VOID_TAGS:
+            return
+
+        skipped = self._is_skipped(tag, attrs)
+        main = not skipped and (tag in MAIN_CONTENT_TAGS or (attrs.get("role") or "").lower() == "main")
+        if main:
+            self._end_block()
+        self._open_elements.append((tag, skipped, main))
+        self._skipped_depth += skipped
+        self._main_depth += main
+        self._pre_depth += tag == "pre"
+        self._title_depth += tag == "title"
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing elements, e.g. `<div/>`, have no content
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self._open_elements and self._open_elements[-1][0] == tag:
+            self._close_element()
+
+    def handle_endtag(self, tag):
+        # Elements left open within the closed one (e.g. a `<p>` without its closing tag) are closed along with it,
+        # while closing tags without a matching open element are ignored
+        if not any(open_tag == tag for open_tag, _, _ in self._open_elements):
+            return
+        while self._open_elements:
+            open_tag = self._open_elements[-1][0]
+            self._close_element()
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._title_depth:
+            self._title.append(data)
+        elif not self._skipped_depth:
+            self._block.append(data)
+
+    def close(self):
+        super().close()
+        self._end_block()
+
+    @property
+    def title(self) -> str:
+        """
+        The title of the page, empty if missing.
+        """
+        return WHITESPACE_PATTERN.sub(" ", "".join(self._title)).strip()
+
+    @property
+    def blocks(self) -> list[str]:
+        """
+        The blocks of text of the main content of the page, preceded by the title of the page.
+        """
+        blocks = self._main_blocks or self._blocks
+        return [self.title, *blocks] if self.title else list(blocks)
+
+    @property
+    def text(self) -> str:
+        """
+        The text of the main content of the page, one block per line.
+        """
+        return "\n".join(self.blocks)
@@ -0,0 +1,169 @@
+"""
+Module to include the ChunkBatcher class, which accumulates the chunks to store across pages and documents into
+batches embedded by a single request to the embeddings model and written to the vector store with a single bulk write.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+
+import numpy as np
+from attr import Factory, dataclass
+from langchain_core.documents import Document
+
+from src.configurations.service_model import Ingestion
+from src.infrastracture.embeddings_manager.tokenizer import count_tokens, get_tokenizer
+
+# The number of identifiers of the chunks recently added remembered by a ChunkBatcher, to skip the chunks repeated across
+# nearby pages (about 1 MB); older chunks added again are found by the lookup of the stored chunks, or upserted again
+MAX_RECENT_CHUNK_IDS = 10000
+
+
+@dataclass
+class IngestionParams:
+    batch_max_tokens: int = 50000
+    batch_max_size: int = 256
+    concurrency: int = 4
+    chunk_workers: int = 2
+    write_workers: int = 2
+    queue_size: int = 16
+
+    @classmethod
+    def from_configuration(cls, configuration: Ingestion | None) -> "IngestionParams":
+        configuration = configuration or Ingestion()
+        return cls(
+            batch_max_tokens=configuration.batchMaxTokens,
+            batch_max_size=configuration.batchMaxSize,
+            concurrency=configuration.concurrency,
+            chunk_workers=configuration.chunkWorkers,
+            write_workers=configuration.writeWorkers,
+            queue_size=configuration.queueSize,
+        )
+
+
+class PendingChunks:
+    """
+    Call a callback once all the chunks attached to it are stored and it is closed, whatever the batches and the threads
+    storing them, e.g. to save the crawl manifest entry of a page once all its chunks are stored.
+    """
+
+    def __init__(self, callback: Callable[[], None]):
+        self._callback = callback
+        self._lock = threading.Lock()
+        # The reference released by `close`, so that the callback is not called while chunks can still be attached
+        self._count = 1
+
+    def attach(self, count: int) -> None:
+        """
+        Attach chunks to store, each one being released once stored.
+        """
+        with self._lock:
+            self._count += count
+
+    def release(self) -> None:
+        """
+        Release a chunk attached once it is stored, calling the callback if it was the last one.
+        """
+        with self._lock:
+            self._count -= 1
+            is_done = self._count == 0
+        if is_done:
+            self._callback()
+
+    def close(self) -> None:
+        """
+        Stop attaching chunks, calling the callback if all the chunks attached are already stored.
+        """
+        self.release()
+
+
+@dataclass
+class ChunkBatch:
+    """
+    Chunks embedded by a single request to the embeddings model and written to the vector store with a single bulk write.
+    `vectors` holds the embeddings of the chunks when already computed (e.g. derived from the sentence embeddings), and
+    `pending` the `PendingChunks` each chunk is attached to, if any, to release once the batch is stored.
+    """
+
+    documents: list[Document]
+    ids: list[str]
+    vectors: np.ndarray | None = None
+    pending: list[PendingChunks | None] = Factory(list)
+
+    def release(self) -> None:
+        """
+        Release the chunks of the batch, once stored, from their `PendingChunks`.
+        """
+        for pending in self.pending:
+            if pending is not None:
+                pending.release()
+
+
+class ChunkBatcher:
+    """
+    Accumulate the chunks to store into batches of at most `batch_max_size` chunks and `batch_max_tokens` tokens to embed,
+    whatever the page or document they come from. Chunks with an identifier among the last `max_recent_ids` added are
+    ignored, so that the memory used does not grow with the ingestion, and a batch includes either chunks already
+    embedded or chunks to embed.
+    """
+
+    def __init__(self, params: IngestionParams | None = None, tokenizer_model_name: str | None = None, max_recent_ids: int = MAX_RECENT_CHUNK_IDS):
+        self.params = params or IngestionParams()
+        self._tokenizer = get_tokenizer(tokenizer_model_name)
+        self._documents: list[Document] = []
+        self._ids: list[str] = []
+        self._vectors: list[np.ndarray] = []
+        self._pending: list[PendingChunks | None] = []
+        self._tokens = 0
+        # The chunks of the pending batch are always remembered, so that a batch never includes the same chunk twice
+        self._max_recent_ids = max(max_recent_ids, self.params.batch_max_size)
+        self._recent_ids: OrderedDict[str, None] = OrderedDict()
+
+    @property
+    def pending_count(self) -> int:
+        """
+        The number of chunks added but not yet returned in a batch.
+        """
+        return len(self._documents)
+
+    def add(self, batch: ChunkBatch) -> list[ChunkBatch]:
+        """
+        Add chunks to store, returning the batches filled by them.
+        """
+        batches = []
+        vectors = batch.vectors
+        pending = batch.pending or [None] * len(batch.documents)
+        for index, (document, _id) in enumerate(zip(batch.documents, batch.ids, strict=True)):
+            if _id in self._recent_ids:
+                self._recent_ids.move_to_end(_id)
+                # The chunk is stored by the batch of the same chunk added before, which is not waited for
+                if pending[index] is not None:
+                    pending[index].release()
+                continue
+            self._recent_ids[_id] = None
+            if len(self._recent_ids) > self._max_recent_ids:
+                self._recent_ids.popitem(last=False)
+
+            # Only the chunks without embeddings count in the tokens sent to the embeddings model
+            tokens = 0 if vectors is not None else count_tokens(self._tokenizer, document.page_content)
+            batch_is_full = len(self._documents) >= self.params.batch_max_size or self._tokens + tokens > self.params.batch_max_tokens
+            if self._documents and (batch_is_full or bool(self._vectors) != (vectors is not None)):
+                batches.extend(self.flush())
+
+            self._documents.append(document)
+            self._ids.append(_id)
+            self._pending.append(pending[index])
+            if vectors is not None:
+                self._vectors.append(vectors[index])
+            self._tokens += tokens
+        return batches
+
+    def flush(self) -> list[ChunkBatch]:
+        """
+        Return the batch of the chunks added since the last full batch, if any.
+        """
+        if not self._documents:
+            return []
+        batch = ChunkBatch(self._documents, self._ids, np.asarray(self._vectors, dtype=np.float32) if self._vectors else None, self._pending)
+        self._documents, self._ids, self._vectors, self._pending, self._tokens = [], [], [], [], 0
+        return [batch]
@@ -0,0 +1,288 @@
+"""
+Module to include the ingestion executors, which run the tasks of the ingestion jobs either in threads of the API
+process (ThreadIngestionExecutor) or in a pool of worker processes isolated from the API (ProcessIngestionExecutor).
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.managers import SyncManager
+
+from src.application.embeddings.errors import IngestionJobCancelledError
+from src.application.embeddings.ingestion_job_tracker import IngestionJobTracker, JobTracker
+from src.application.embeddings.ingestion_tasks import IngestionTask, run_ingestion_task
+from src.configurations.service_model import IngestionExecutor, RagTemplateConfigSchema, VectorStoreType
+from src.configurations.variables_model import Variables
+from src.context import AppContext, AppContextParams
+from src.infrastracture.logger import get_logger
+from src.infrastracture.metrics_manager.metrics_manager import MetricsManager
+
+PROGRESS_POLL_SECONDS = 0.2
+
+_worker_contexts: dict[str, AppContext] = {}
+
+
+class IngestionTaskExecutor(ABC):
+    """
+    Run the task of an ingestion job in the calling thread, until the task is completed.
+    """
+
+    @abstractmethod
+    def run(self, task: IngestionTask, job_tracker: IngestionJobTracker) -> None:
+        """
+        Run the task, reporting its progress to the tracker of the job and stopping when the job is cancelled.
+
+        Raises:
+            IngestionJobCancelledError: If the job has been cancelled.
+            Exception: Any error raised by the task.
+        """
+
+    def shutdown(self) -> None:
+        """
+        Release the resources of the executor, e.g. the worker processes.
+        """
+
+
+class ThreadIngestionExecutor(IngestionTaskExecutor):
+    """
+    Run the tasks in the thread of the job, within the API process.
+    """
+
+    def __init__(self, app_context: AppContext):
+        self._app_context = app_context
+
+    def run(self, task: IngestionTask, job_tracker: IngestionJobTracker) -> None:
+        run_ingestion_task(self._app_context, task, job_tracker)
+
+
+class _ForwardedMetric:
+    """
+    A metric of a worker process, whose updates are recorded by `_WorkerMetricsManager` to be applied to the same
+    metric of the API process.
+    """
+
+    def __init__(self, metrics_manager: "_WorkerMetricsManager", name: str, labels: tuple[tuple[str, str], ...] = ()):
+        self._metrics_manager = metrics_manager
+        self._name = name
+        self._labels = labels
+
+    def labels(self, **labels: str) -> "_ForwardedMetric":
+        return _ForwardedMetric(self._metrics_manager, self._name, tuple(sorted(labels.items())))
+
+    def inc(self, amount: float = 1) -> None:
+        self._metrics_manager.record(self._name, self._labels, "inc", amount)
+
+    def set(self, value: float) -> None:
+        self._metrics_manager.record(self._name, self._labels, "set", value)
+
+    def observe(self, value: float) -> None:
+        self._metrics_manager.record(self._name, self._labels, "observe", value)
+
+
+class _WorkerMetricsManager:
+    """
+    Metrics of a worker process: as the metrics exposed by the API process cannot be shared, the updates of the
+    metrics (e.g. the embeddings cache hits or the depth of the queues of the ingestion pipeline) are accumulated
+    and sent with the progress of the job, to be applied to the metrics of the API process (see `apply_metrics`).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._updates: dict[tuple[str, tuple[tuple[str, str], ...], str], float | list[float]] = {}
+
+    def __getattr__(self, name: str) -> _ForwardedMetric:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _ForwardedMetric(self, name)
+
+    def record(self, name: str, labels: tuple[tuple[str, str], ...], method: str, value: float) -> None:
+        key = (name, labels, method)
+        with self._lock:
+            # Increments are summed and only the last value of a gauge is kept, while all the observations are sent
+            if method == "inc":
+                self._updates[key] = self._updates.get(key, 0) + value
+            elif method == "observe":
+                self._updates.setdefault(key, []).append(value)
+            else:
+                self._updates[key] = value
+
+    def pop_updates(self) -> list[tuple[str, tuple[tuple[str, str], ...], str, float | list[float]]]:
+        with self._lock:
+            updates, self._updates = self._updates, {}
+        return [(name, labels, method, value) for (name, labels, method), value in updates.items()]
+
+
+def apply_metrics(metrics_manager: MetricsManager, updates: list[tuple[str, tuple[tuple[str, str], ...], str, float | list[float]]]) -> None:
+    """
+    Apply to the metrics of the API process the updates of the metrics of a worker process.
+    """
+    for name, labels, method, value in updates:
+        metric = getattr(metrics_manager, name)
+        if labels:
+            metric = metric.labels(**dict(labels))
+        for item in value if isinstance(value, list) else [value]:
+            getattr(metric, method)(item)
+
+
+class _WorkerJobTracker(JobTracker):
+    """
+    Tracker of a job running in a worker process, which sends its progress, along with the updates of the metrics of
+    the worker, to the API process through a queue and reads its cancellation from an event set by the API process.
+    """
+
+    def __init__(self, job_id: str, progress_queue: queue.Queue, cancelled: threading.Event, metrics_manager: _WorkerMetricsManager | None = None):
+        self._job_id = job_id
+        self._progress_queue = progress_queue
+        self._cancelled = cancelled
+        self._metrics_manager = metrics_manager
+
+    def check_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise IngestionJobCancelledError(self._job_id)
+
+    def set_total_pages(self, total_pages: int | None) -> None:
+        self._progress_queue.put(("total_pages", total_pages))
+
+    def add_progress(self, pages: int = 0, chunks: int = 0, tokens: int = 0, errors: int = 0) -> None:
+        self._progress_queue.put(("progress", {"pages": pages, "chunks": chunks, "tokens": tokens, "errors": errors}))
+        self.send_metrics()
+
+    def send_metrics(self) -> None:
+        if self._metrics_manager is not None and (updates := self._metrics_manager.pop_updates()):
+            self._progress_queue.put(("metrics", updates))
+
+
+def _initialize_worker(configurations: RagTemplateConfigSchema, env_vars: Variables, cpu_affinity: list[int] | None) -> None:
+    """
+    Prepare a worker process: bind it to the configured CPUs and create its own application context, as the
+    logger, the metrics and the clients of the API process cannot be shared.
+    """
+    if cpu_affinity and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpu_affinity)
+
+    logger = get_logger()
+    _worker_contexts["app_context"] = AppContext(
+        params=AppContextParams(logger=logger, metrics_manager=_WorkerMetricsManager(), env_vars=env_vars, configurations=configurations)
+    )
+
+
+def _run_in_worker(task: IngestionTask, job_id: str, progress_queue: queue.Queue, cancelled: threading.Event) -> None:
+    app_context = _worker_contexts["app_context"]
+    job_tracker = _WorkerJobTracker(job_id, progress_queue, cancelled, app_context.metrics_manager)
+    try:
+        run_ingestion_task(app_context, task, job_tracker)
+    finally:
+        job_tracker.send_metrics()
+
+
+class ProcessIngestionExecutor(IngestionTaskExecutor):
+    """
+    Run the tasks in a pool of `max_workers` worker processes, so that parsing, chunking and the other CPU-bound steps
+    of the ingestion never hold the GIL of the API process serving the chat. The workers are started with the `spawn`
+    method, on first use, and optionally bound to the `cpu_affinity` CPUs.
+
+    The thread of the job waits for its task, forwarding the progress sent by the worker to the tracker of the job,
+    and the cancellation of the job to the worker, which stops at its next checkpoint. A worker process that dies
+    (e.g. killed because out of memory) fails its job, and the pool is created again for the next jobs.
+    """
+
+    def __init__(self, app_context: AppContext, max_workers: int, cpu_affinity: list[int] | None = None):
+        self.logger = app_context.logger
+        self._app_context = app_context
+        self._max_workers = max_workers
+        self._cpu_affinity = cpu_affinity
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self._sync_manager: SyncManager | None = None
+
+    def _get_pool(self) -> tuple[ProcessPoolExecutor, SyncManager]:
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context("spawn")
+                if self._sync_manager is None:
+                    # The queues and the events shared with the workers are served by a manager process
+                    self._sync_manager = context.Manager()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=context,
+                    initializer=_initialize_worker,
+                    initargs=(self._app_context.configurations, self._app_context.env_vars, self._cpu_affinity),
+                )
+                self.logger.info(f"Started the ingestion worker pool with {self._max_workers} processes")
+            return self._pool, self._sync_manager
+
+    def _reset_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _forward_progress(self, message: tuple, job_tracker: IngestionJobTracker) -> None:
+        kind, value = message
+        if kind == "total_pages":
+            job_tracker.set_total_pages(value)
+        elif kind == "metrics":
+            apply_metrics(self._app_context.metrics_manager, value)
+        else:
+            job_tracker.add_progress(**value)
+
+    def run(self, task: IngestionTask, job_tracker: IngestionJobTracker) -> None:
+        pool, sync_manager = self._get_pool()
+        progress_queue = sync_manager.Queue()
+        cancelled = sync_manager.Event()
+        future = pool.submit(_run_in_worker, task, job_tracker.job.id, progress_queue, cancelled)
+
+        while not future.done():
+            try:
+                self._forward_progress(progress_queue.get(timeout=PROGRESS_POLL_SECONDS), job_tracker)
+            except queue.Empty:
+                pass
+            if job_tracker.is_cancelled and not cancelled.is_set():
+                cancelled.set()
+                if future.cancel():
+                    raise IngestionJobCancelledError(job_tracker.job.id)
+        # The progress is sent before the task returns, so the queue holds the last messages of the task
+        while not progress_queue.empty():
+            self._forward_progress(progress_queue.get_nowait(), job_tracker)
+
+        try:
+            future.result()
+        except BrokenProcessPool:
+            self.logger.error("An ingestion worker process terminated abruptly, the worker pool will be started again")
+            self._reset_pool(pool)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, sync_manager = self._pool, self._sync_manager
+            self._pool, self._sync_manager = None, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if sync_manager is not None:
+            sync_manager.shutdown()
+
+
+def create_ingestion_executor(
+    app_context: AppContext, executor: IngestionExecutor, max_workers: int, cpu_affinity: list[int] | None = None
+) -> IngestionTaskExecutor:
+    """
+    Create the executor of the ingestion tasks matching the configured type.
+
+    With the `local` Vector Store the tasks always run in threads: each process keeps its own in-memory copy of the
+    local vector index, so worker processes would overwrite the files of each other, and the API would not see the
+    documents they store.
+    """
+    executor = IngestionExecutor(executor)
+    if executor == IngestionExecutor.process and VectorStoreType(app_context.configurations.vectorStore.type) == VectorStoreType.local:
+        app_context.logger.warning("The local Vector Store can only be written by the API process, the ingestion jobs run in threads")
+        executor = IngestionExecutor.thread
+
+    match executor:
+        case IngestionExecutor.thread:
+            return ThreadIngestionExecutor(app_context)
+        case IngestionExecutor.process:
+            return ProcessIngestionExecutor(app_context, max_workers, cpu_affinity)
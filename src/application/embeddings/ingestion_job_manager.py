@@ -0,0 +1,249 @@
+"""
+Module to include the IngestionJobManager class, which runs the embeddings generation requests as jobs queued beyond
+a maximum number of jobs running at the same time.
+"""
+
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from attr import dataclass
+
+from src.application.embeddings.errors import IngestionJobCancelledError, IngestionJobFinishedError
+from src.application.embeddings.ingestion_executor import IngestionTaskExecutor, create_ingestion_executor
+from src.application.embeddings.ingestion_job_tracker import IngestionJobTracker
+from src.application.embeddings.ingestion_tasks import IngestionTask
+from src.configurations.service_model import IngestionExecutor, IngestionJobs
+from src.context import AppContext
+from src.infrastracture.vector_store_manager.ingestion_job_store import IngestionJob, IngestionJobStatus, IngestionJobStore
+from src.infrastracture.vector_store_manager.vector_store_manager import VectorStoreManager
+
+
+@dataclass
+class IngestionJobParams:
+    max_concurrent_jobs: int = 2
+    executor: IngestionExecutor = IngestionExecutor.thread
+    cpu_affinity: list[int] | None = None
+    upload_directory: str | None = None
+    progress_interval_seconds: float = 2.0
+    heartbeat_interval_seconds: float = 30.0
+    stale_job_timeout_seconds: float = 120.0
+
+    @classmethod
+    def from_configuration(cls, configuration: IngestionJobs | None) -> "IngestionJobParams":
+        configuration = configuration or IngestionJobs()
+        return cls(
+            max_concurrent_jobs=configuration.maxConcurrentJobs,
+            executor=configuration.executor,
+            cpu_affinity=configuration.cpuAffinity,
+            upload_directory=configuration.uploadDirectory,
+            progress_interval_seconds=configuration.progressIntervalSeconds,
+            heartbeat_interval_seconds=configuration.heartbeatIntervalSeconds,
+            stale_job_timeout_seconds=configuration.staleJobTimeoutSeconds,
+        )
+
+
+class IngestionJobManager:
+    """
+    Run the embeddings generation requests as jobs, each one returning an identifier. At most `maxConcurrentJobs`
+    jobs run at the same time on each replica, each one in its own worker thread, while the further ones are queued
+    in the order they are submitted. The ingestion tasks themselves run in the `IngestionTaskExecutor` configured by
+    `ingestionJobs.executor`, i.e. in threads of the API process by default or in a pool of worker processes isolated from it.
+
+    The jobs and their progress are saved in the `IngestionJobStore` of the vector store, so that any replica can
+    report them and request their cancellation: a running job stops at its next checkpoint (e.g. the next page) once
+    it sees the request, which a job of another replica sees when saving its progress.
+
+    While this replica has queued or running jobs, their heartbeat is saved every `heartbeatIntervalSeconds`: the jobs
+    without heartbeat for `staleJobTimeoutSeconds` (e.g. because their replica crashed) are no longer reported as
+    active, and the jobs a replica left queued or running before it restarted are marked as failed.
+    """
+
+    def __init__(self, app_context: AppContext):
+        self.logger = app_context.logger
+        self.params = IngestionJobParams.from_configuration(app_context.configurations.ingestionJobs)
+        self._app_context = app_context
+        self._store: IngestionJobStore | None = None
+        self._replica = socket.gethostname()
+        self._started_at = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=self.params.max_concurrent_jobs, thread_name_prefix="ingestion-job")
+        self.task_executor: IngestionTaskExecutor = create_ingestion_executor(
+            app_context, self.params.executor, self.params.max_concurrent_jobs, self.params.cpu_affinity
+        )
+
+        self._lock = threading.Lock()
+        self._futures: dict[str, Future] = {}
+        self._trackers: dict[str, IngestionJobTracker] = {}
+        self._on_finished: dict[str, Callable[[], None]] = {}
+        self._heartbeat: threading.Thread | None = None
+
+    @property
+    def store(self) -> IngestionJobStore:
+        # The store is created on first use, so that the service starts without connecting to the vector store
+        with self._lock:
+            if self._store is not None:
+                return self._store
+            store = self._store = VectorStoreManager(self._app_context).get_vector_store_instance().get_ingestion_job_store()
+        self.recover_jobs()
+        return store
+
+    def recover_jobs(self) -> None:
+        """
+        Mark as failed the jobs left queued or running by this replica before it started, e.g. because it crashed:
+        the queued jobs were only known by the replica, and the running ones were interrupted.
+        """
+        try:
+            failed_count = self.store.fail_orphaned_jobs(self._replica, self._started_at, error="The replica running the job stopped before the job finished")
+        # pylint: disable=W0718
+        except Exception as ex:
+            self.logger.warning(f"Failed to recover the ingestion jobs of the replica {self._replica}: {str(ex)}")
+            return
+        if failed_count:
+            self.logger.warning(f"Marked as failed {failed_count} ingestion jobs interrupted when the replica {self._replica} stopped")
+
+    def _start_heartbeat(self) -> None:
+        # Called with the lock held, the heartbeat runs while the replica has queued or running jobs
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._send_heartbeats, name="ingestion-job-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _send_heartbeats(self) -> None:
+        while True:
+            time.sleep(self.params.heartbeat_interval_seconds)
+            with self._lock:
+                job_ids = list(self._trackers)
+                if not job_ids:
+                    self._heartbeat = None
+                    return
+            try:
+                self.store.touch(job_ids, time.time())
+            # pylint: disable=W0718
+            except Exception as ex:
+                self.logger.warning(f"Failed to save the heartbeat of the ingestion jobs: {str(ex)}")
+
+    def submit(self, kind: str, source: str, task: Callable[[IngestionJobTracker], None], on_finished: Callable[[], None] | None = None) -> IngestionJob:
+        """
+        Queue a job, which runs as soon as one of the `maxConcurrentJobs` workers is available.
+
+        Args:
+            kind (str): The kind of the job, e.g. `url` or `file`.
+            source (str): What the job ingests, e.g. the URL or the name of the file.
+            task (Callable[[IngestionJobTracker], None]): The ingestion, which reports its progress and checks its
+                cancellation through the tracker of the job.
+            on_finished (Callable[[], None] | None): Called once the job is finished, even if it is cancelled before
+                starting, e.g. to remove the files the job ingests.
+
+        Returns:
+            IngestionJob: The queued job.
+        """
+        job = IngestionJob(id=uuid.uuid4().hex, kind=kind, source=source, replica=self._replica)
+        tracker = IngestionJobTracker(job, self.store, self.params.progress_interval_seconds)
+        tracker.save()
+        queued_job = tracker.snapshot()
+        with self._lock:
+            self._trackers[job.id] = tracker
+            if on_finished is not None:
+                self._on_finished[job.id] = on_finished
+            self._futures[job.id] = self._executor.submit(self._run, tracker, task)
+            self._start_heartbeat()
+        self.logger.info(f"Ingestion job {job.id} queued for {kind} {source}")
+        return queued_job
+
+    def submit_task(self, task: IngestionTask) -> IngestionJob:
+        """
+        Queue a job running an ingestion task in the task executor.
+
+        Args:
+            task (IngestionTask): The ingestion task.
+
+        Returns:
+            IngestionJob: The queued job.
+        """
+        return self.submit(task.kind, task.source, lambda tracker: self.task_executor.run(task, tracker), on_finished=task.release)
+
+    def _run(self, tracker: IngestionJobTracker, task: Callable[[IngestionJobTracker], None]) -> None:
+        job_id = tracker.job.id
+        try:
+            tracker.start()
+            tracker.check_cancelled()
+            self.logger.info(f"Ingestion job {job_id} started")
+            task(tracker)
+            tracker.finish(IngestionJobStatus.completed)
+            self.logger.info(f"Ingestion job {job_id} completed")
+        except IngestionJobCancelledError:
+            tracker.finish(IngestionJobStatus.cancelled)
+            self.logger.info(f"Ingestion job {job_id} cancelled")
+        # pylint: disable=W0718
+        except Exception as ex:
+            self.logger.error(f"Ingestion job {job_id} failed: {str(ex)}")
+            tracker.finish(IngestionJobStatus.failed, error=str(ex))
+        finally:
+            self._release(job_id)
+
+    def _release(self, job_id: str) -> None:
+        with self._lock:
+            self._trackers.pop(job_id, None)
+            self._futures.pop(job_id, None)
+            on_finished = self._on_finished.pop(job_id, None)
+        if on_finished is None:
+            return
+        try:
+            on_finished()
+        # pylint: disable=W0718
+        except Exception as ex:
+            self.logger.warning(f"Failed to release the resources of the ingestion job {job_id}: {str(ex)}")
+
+    def get_job(self, job_id: str) -> IngestionJob | None:
+        return self.store.get(job_id)
+
+    def list_jobs(self, limit: int = 50) -> list[IngestionJob]:
+        return self.store.list_jobs(limit)
+
+    def has_active_jobs(self) -> bool:
+        """
+        Return whether at least one job is queued or running on any replica, ignoring the jobs without recent heartbeat.
+        """
+        return self.store.has_active_jobs(updated_after=time.time() - self.params.stale_job_timeout_seconds)
+
+    def cancel(self, job_id: str) -> IngestionJob | None:
+        """
+        Request the cancellation of a job, returning the job, or None if it does not exist. A queued job of this
+        replica is cancelled immediately, while a running job (or a job of another replica) stops at its next checkpoint.
+        Raise an `IngestionJobFinishedError` if the job was already finished.
+        """
+        job = self.store.request_cancel(job_id)
+        if job is None:
+            return None
+        if not job.is_active:
+            raise IngestionJobFinishedError(job_id, job.status.value)
+
+        with self._lock:
+            tracker = self._trackers.get(job_id)
+            future = self._futures.get(job_id)
+        if tracker is None:
+            return job
+
+        tracker.cancel()
+        if future is not None and future.cancel():
+            tracker.finish(IngestionJobStatus.cancelled)
+            self._release(job_id)
+            self.logger.info(f"Ingestion job {job_id} cancelled before starting")
+        return tracker.snapshot()
+
+    def wait(self, job_id: str, timeout: float | None = None) -> None:
+        """
+        Wait until a job of this replica is finished, if it is still queued or running.
+        """
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            wait([future], timeout=timeout)
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker processes of the task executor, which are started again by the next job.
+        """
+        self.task_executor.shutdown()
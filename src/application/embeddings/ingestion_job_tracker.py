@@ -0,0 +1,113 @@
+"""
+Module to include the JobTracker interface, through which a running ingestion reports its progress and checks whether
+it has been cancelled, and the IngestionJobTracker class, which saves the progress of a job in the job store.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from attr import evolve
+
+from src.application.embeddings.errors import IngestionJobCancelledError
+from src.infrastracture.vector_store_manager.ingestion_job_store import IngestionJob, IngestionJobStatus, IngestionJobStore
+
+
+class JobTracker(ABC):
+    """
+    Interface through which a running ingestion reports its progress and checks whether it has been cancelled,
+    whether it runs in the API process (see `IngestionJobTracker`) or in a worker process.
+    """
+
+    @abstractmethod
+    def check_cancelled(self) -> None:
+        """
+        Raises:
+            IngestionJobCancelledError: If the cancellation of the job has been requested.
+        """
+
+    @abstractmethod
+    def set_total_pages(self, total_pages: int | None) -> None:
+        """
+        Set the number of pages (or documents) to process, or its upper bound, if known.
+        """
+
+    @abstractmethod
+    def add_progress(self, pages: int = 0, chunks: int = 0, tokens: int = 0, errors: int = 0) -> None:
+        """
+        Add the pages (or documents) processed, the chunks stored with their tokens and the pages that failed to the progress of the job.
+        """
+
+
+class IngestionJobTracker(JobTracker):
+    """
+    Track a job while it runs: the progress is updated by the threads of the ingestion and saved in the job store at
+    most once every `progress_interval_seconds`, and each save reads back whether the cancellation of the job has been
+    requested, so that a job is also cancelled from the other replicas.
+    """
+
+    def __init__(self, job: IngestionJob, store: IngestionJobStore, progress_interval_seconds: float = 2.0):
+        self.job = job
+        self._store = store
+        self._progress_interval_seconds = progress_interval_seconds
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._saved_at = 0.0
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """
+        Request the cancellation of the job, which stops at its next call to `check_cancelled`.
+        """
+        self._cancelled.set()
+
+    def check_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise IngestionJobCancelledError(self.job.id)
+
+    def set_total_pages(self, total_pages: int | None) -> None:
+        with self._lock:
+            self.job.progress.total_pages = total_pages
+
+    def add_progress(self, pages: int = 0, chunks: int = 0, tokens: int = 0, errors: int = 0) -> None:
+        # The progress is saved only if the last save is older than `progress_interval_seconds`
+        with self._lock:
+            progress = self.job.progress
+            progress.pages += pages
+            progress.chunks += chunks
+            progress.tokens += tokens
+            progress.errors += errors
+            if time.monotonic() - self._saved_at < self._progress_interval_seconds:
+                return
+        self.save()
+
+    def start(self) -> None:
+        with self._lock:
+            self.job.status = IngestionJobStatus.running
+            self.job.started_at = time.time()
+        self.save()
+
+    def finish(self, status: IngestionJobStatus, error: str | None = None) -> None:
+        with self._lock:
+            self.job.status = status
+            self.job.error = error
+            self.job.finished_at = time.time()
+        self.save()
+
+    def snapshot(self) -> IngestionJob:
+        """
+        Return a copy of the job, which is not changed by the threads of the ingestion.
+        """
+        with self._lock:
+            return evolve(self.job, progress=evolve(self.job.progress), cancel_requested=self._cancelled.is_set())
+
+    def save(self) -> None:
+        with self._lock:
+            self._saved_at = time.monotonic()
+            self.job.updated_at = time.time()
+        job = self.snapshot()
+        if self._store.save(job):
+            self._cancelled.set()
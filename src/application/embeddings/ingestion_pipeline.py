@@ -0,0 +1,135 @@
+"""
+Module to include the IngestionPipeline class, which runs the stages of the ingestion (e.g. parsing, chunking, embedding
+and writing) at the same time, connected by bounded queues.
+"""
+
+import queue
+import threading
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from attr import dataclass
+
+from src.infrastracture.metrics_manager.metrics_manager import MetricsManager
+
+_END = object()
+
+
+@dataclass
+class PipelineStage:
+    """
+    A stage of the pipeline: `process` is called by `workers` threads on the items of the stage, and returns the items
+    of the next stage (None for the last stage). `finish`, if any, is called once all the items of the stage are processed (e.g. to send the
+    items accumulated by the stage), and yields the last items of the next stage.
+    """
+
+    name: str
+    process: Callable[[Any], Iterable[Any] | None]
+    workers: int = 1
+    finish: Callable[[], Iterable[Any]] | None = None
+
+
+class IngestionPipeline:
+    """
+    Run stages connected by queues of at most `queue_size` items: each stage processes its items as soon as they are
+    produced by the previous one, so that the CPU-bound and the network-bound stages overlap, while a stage producing
+    items faster than the next one can consume them waits (backpressure), keeping the memory used bounded.
+
+    The depth of the queue of each stage and the items processed by each stage are exposed as the
+    `ingestion_queue_depth` and `ingestion_stage_items` metrics.
+    """
+
+    def __init__(self, stages: list[PipelineStage], metrics_manager: MetricsManager, queue_size: int = 16):
+        self.stages = stages
+        self._metrics_manager = metrics_manager
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self._lock = threading.Lock()
+        self._running_workers = [stage.workers for stage in stages]
+        self._errors: list[Exception] = []
+        self._failed = threading.Event()
+
+    def _fail(self, error: Exception) -> None:
+        with self._lock:
+            self._errors.append(error)
+        self._failed.set()
+
+    def _put(self, index: int, item: Any) -> None:
+        """
+        Put an item in the queue of the stage at the given index, waiting while the queue is full.
+        """
+        self._queues[index].put(item)
+        self._metrics_manager.ingestion_queue_depth.labels(stage=self.stages[index].name).set(self._queues[index].qsize())
+
+    def _put_outputs(self, index: int, outputs: Iterable[Any] | None) -> None:
+        for output in outputs or ():
+            # After a failure the outputs are discarded, so that the pipeline stops as soon as possible
+            if self._failed.is_set():
+                return
+            if index + 1 < len(self.stages):
+                self._put(index + 1, output)
+
+    def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        stage_queue = self._queues[index]
+        # The worker keeps consuming its queue after a failure, so that the previous stages are never blocked
+        while (item := stage_queue.get()) is not _END:
+            self._metrics_manager.ingestion_queue_depth.labels(stage=stage.name).set(stage_queue.qsize())
+            if self._failed.is_set():
+                continue
+            try:
+                self._put_outputs(index, stage.process(item))
+                self._metrics_manager.ingestion_stage_items.labels(stage=stage.name).inc()
+            # pylint: disable=W0718
+            except Exception as ex:
+                self._fail(ex)
+
+        with self._lock:
+            self._running_workers[index] -= 1
+            is_last_worker = self._running_workers[index] == 0
+        if not is_last_worker:
+            return
+
+        if stage.finish is not None and not self._failed.is_set():
+            try:
+                self._put_outputs(index, stage.finish())
+            # pylint: disable=W0718
+            except Exception as ex:
+                self._fail(ex)
+        if index + 1 < len(self.stages):
+            for _ in range(self.stages[index + 1].workers):
+                self._queues[index + 1].put(_END)
+
+    def run(self, items: Iterable[Any], source_name: str = "source") -> None:
+        """
+        Process the items through all the stages, waiting until they are all processed. The items are produced by
+        iterating `items` in the calling thread (e.g. parsing the documents of a file), as the first stage consumes them,
+        and are counted in the `ingestion_stage_items` metric as the items of the `source_name` stage.
+
+        Raises:
+            Exception: The first error raised by a stage (or by `items`), once all the workers are stopped.
+        """
+        threads = [
+            threading.Thread(target=self._work, args=(index,), name=f"ingestion-{stage.name}-{worker}", daemon=True)
+            for index, stage in enumerate(self.stages)
+            for worker in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for item in items:
+                if self._failed.is_set():
+                    break
+                self._put(0, item)
+                self._metrics_manager.ingestion_stage_items.labels(stage=source_name).inc()
+        # pylint: disable=W0718
+        except Exception as ex:
+            self._fail(ex)
+        finally:
+            for _ in range(self.stages[0].workers):
+                self._queues[0].put(_END)
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
@@ -0,0 +1,100 @@
+"""
+Module to include the ingestion tasks, which describe what an ingestion job ingests and can be sent to a worker
+process, and the `run_ingestion_task` function running them.
+"""
+
+import contextlib
+import os
+from typing import ClassVar
+
+from attr import Factory, dataclass
+
+from src.application.embeddings.embedding_service import EmbeddingsService
+from src.application.embeddings.file_parser.file_parser import FileParser, FileParserParams
+from src.application.embeddings.ingestion_job_tracker import JobTracker
+from src.application.embeddings.web_crawler import CrawlBudget
+from src.configurations.service_model import ChunkingStrategy
+from src.context import AppContext
+
+
+@dataclass
+class UrlIngestionTask:
+    """
+    Crawl of a website starting from `url` (see `EmbeddingsService.generate_from_url`).
+    """
+
+    kind: ClassVar[str] = "url"
+
+    url: str
+    filter_path: str | None = None
+    budget: CrawlBudget = Factory(CrawlBudget)
+    use_sitemap: bool = False
+    chunking_strategy: ChunkingStrategy | None = None
+
+    @property
+    def source(self) -> str:
+        return self.url
+
+    def release(self) -> None:
+        """
+        Release the resources of the task once its job is finished.
+        """
+
+
+@dataclass
+class FileIngestionTask:
+    """
+    Ingestion of an uploaded file, saved to `file_path` and parsed only while it is ingested (see
+    `EmbeddingsService.generate_from_texts`). The file is removed once the job is finished.
+    """
+
+    kind: ClassVar[str] = "file"
+
+    file_name: str
+    file_path: str
+    content_type: str | None = None
+    file_sha: str | None = None
+    chunking_strategy: ChunkingStrategy | None = None
+
+    @property
+    def source(self) -> str:
+        return self.file_name
+
+    def release(self) -> None:
+        """
+        Remove the uploaded file once the job is finished.
+        """
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.file_path)
+
+
+IngestionTask = UrlIngestionTask | FileIngestionTask
+
+
+def run_ingestion_task(app_context: AppContext, task: IngestionTask, job_tracker: JobTracker | None = None) -> None:
+    """
+    Run an ingestion task, reporting its progress to the job tracker, if any.
+
+    Args:
+        app_context (AppContext): The application context.
+        task (IngestionTask): The task to run.
+        job_tracker (JobTracker | None): The tracker of the job running the task.
+    """
+    logger = app_context.logger
+    embedding_generator = EmbeddingsService(app_context=app_context, job_tracker=job_tracker)
+
+    match task:
+        case UrlIngestionTask():
+            logger.info("Starting embedding generation process.")
+            embedding_generator.generate_from_url(
+                task.url, task.filter_path, budget=task.budget, use_sitemap=task.use_sitemap, chunking_strategy=task.chunking_strategy
+            )
+        case FileIngestionTask():
+            if task.file_sha is not None and embedding_generator.is_file_ingested(task.file_sha, task.chunking_strategy):
+                logger.info(f"File with hash {task.file_sha} already ingested, skipping the embedding generation.")
+                return
+            logger.info("Starting embedding generation process.")
+            file_parser = FileParser(logger, FileParserParams.from_configuration(app_context.configurations.fileParsing))
+            documents = file_parser.extract_documents_from_file(task.file_path, task.file_name, task.content_type)
+            embedding_generator.generate_from_texts(documents, file_sha=task.file_sha, chunking_strategy=task.chunking_strategy)
+    logger.info("Embedding generation process finished.")
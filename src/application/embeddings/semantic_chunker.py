@@ -0,0 +1,159 @@
+"""
+Module providing a semantic text splitter: the text is split into sentences, each sentence is embedded together
+with its neighbours and a new chunk starts where the distance between consecutive sentences is unusually large.
+
+The sentence embeddings computed to find the breakpoints can also be combined into the embeddings of the chunks,
+so that the chunks do not need to be embedded again.
+"""
+
+import re
+from collections.abc import Iterator
+from itertools import islice
+
+import numpy as np
+from attr import dataclass
+from langchain_core.embeddings import Embeddings
+
+SENTENCE_SPLIT_REGEX = r"(?<=[.?!])\s+"
+DEFAULT_BREAKPOINT_PERCENTILE = 95.0
+DEFAULT_BUFFER_SIZE = 1
+DEFAULT_WINDOW_SIZE = 256
+
+
+@dataclass
+class SemanticChunk:
+    """
+    A chunk of text and, when computed, its embedding derived from the embeddings of its sentences.
+    """
+
+    text: str
+    vector: np.ndarray | None = None
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scale each row to unit length, leaving rows of zeros unchanged.
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class SemanticChunker:
+    """
+    Split a text into chunks of semantically related sentences, embedding each sentence once.
+
+    Breakpoints are placed after the sentences whose cosine distance from the next one is greater than the
+    `breakpoint_percentile` percentile of the distances, as done by the `SemanticChunker` of LangChain.
+
+    The sentences are processed in windows of `window_size` sentences, each embedded with a single call to the
+    model, so that the memory used does not depend on the length of the text: the percentile is computed on the
+    distances of the window, and the sentences following the last breakpoint of a window are carried over to the next one.
+    Texts shorter than a window are split exactly as they would be in a single pass.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        breakpoint_percentile: float = DEFAULT_BREAKPOINT_PERCENTILE,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+    ):
+        self.embeddings = embeddings
+        self.breakpoint_percentile = breakpoint_percentile
+        self.buffer_size = buffer_size
+        self.window_size = window_size
+
+    def _iter_sentences(self, text: str) -> Iterator[str]:
+        start = 0
+        for match in re.finditer(SENTENCE_SPLIT_REGEX, text):
+            if match.start() > start:
+                yield text[start : match.start()]
+            start = match.end()
+        if start < len(text):
+            yield text[start:]
+
+    def _iter_windows(self, text: str) -> Iterator[tuple[list[str], list[str], bool]]:
+        """
+        Yield the windows of sentences, with the texts to embed for them and whether the window is the last one.
+
+        Each sentence is embedded with its `buffer_size` neighbours, to smooth the distances between single
+        sentences: the neighbours are taken from the adjacent windows too.
+        """
+        sentences = self._iter_sentences(text)
+        previous: list[str] = []
+        upcoming = list(islice(sentences, self.window_size + self.buffer_size))
+        while upcoming:
+            window, following = upcoming[: self.window_size], upcoming[self.window_size :]
+            context = previous + window + following
+            offset = len(previous)
+            combined = [" ".join(context[max(0, offset + i - self.buffer_size) : offset + i + self.buffer_size + 1]) for i in range(len(window))]
+
+            previous = (previous + window)[-self.buffer_size :] if self.buffer_size > 0 else []
+            upcoming = following + list(islice(sentences, self.window_size + self.buffer_size - len(following)))
+            yield window, combined, not upcoming
+
+    def _find_breakpoints(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Return the indexes of the sentences that end a chunk, except the last sentence.
+        """
+        distances = 1.0 - np.einsum("ij,ij->i", vectors[:-1], vectors[1:])
+        threshold = np.percentile(distances, self.breakpoint_percentile)
+        return np.flatnonzero(distances > threshold)
+
+    def _create_chunk(self, sentences: list[str], vectors: np.ndarray, with_vectors: bool) -> SemanticChunk:
+        vector = None
+        if with_vectors:
+            lengths = np.fromiter((len(sentence) for sentence in sentences), dtype=np.float32, count=len(sentences))
+            vector = normalize_rows((lengths @ vectors)[np.newaxis])[0]
+        return SemanticChunk(text=" ".join(sentences), vector=vector)
+
+    def iter_split(self, text: str, with_vectors: bool = False) -> Iterator[SemanticChunk]:
+        """
+        Split the text into semantic chunks, yielding each chunk as soon as its last sentence is known.
+
+        Args:
+            text (str): The text to split.
+            with_vectors (bool): Whether to compute the embedding of each chunk as the mean of the embeddings of its
+                sentences, weighted by their length and normalized to unit length.
+
+        Yields:
+            SemanticChunk: The chunks, in the order they appear in the text.
+        """
+        pending_sentences: list[str] = []
+        pending_vectors: np.ndarray | None = None
+        for window, combined, is_last in self._iter_windows(text):
+            # A single sentence does not need to be embedded to be split
+            if is_last and not pending_sentences and len(window) == 1 and not with_vectors:
+                yield SemanticChunk(text=window[0])
+                return
+
+            vectors = normalize_rows(np.asarray(self.embeddings.embed_documents(combined), dtype=np.float32))
+            sentences = pending_sentences + window
+            if pending_vectors is not None:
+                vectors = np.vstack([pending_vectors, vectors])
+
+            ends = (self._find_breakpoints(vectors) + 1).tolist() if len(sentences) > 1 else []
+            if is_last:
+                ends.append(len(sentences))
+            start = 0
+            for end in ends:
+                yield self._create_chunk(sentences[start:end], vectors[start:end], with_vectors)
+                start = end
+
+            pending_sentences, pending_vectors = sentences[start:], vectors[start:].copy()
+            # Sentences without breakpoints are not carried over indefinitely
+            if len(pending_sentences) >= self.window_size:
+                yield self._create_chunk(pending_sentences, pending_vectors, with_vectors)
+                pending_sentences, pending_vectors = [], None
+
+    def split(self, text: str, with_vectors: bool = False) -> list[SemanticChunk]:
+        """
+        Split the text into semantic chunks (see `iter_split`).
+        """
+        return list(self.iter_split(text, with_vectors=with_vectors))
+
+    def split_text(self, text: str) -> list[str]:
+        """
+        Split the text into semantic chunks, returning their text.
+        """
+        return [chunk.text for chunk in self.iter_split(text)]
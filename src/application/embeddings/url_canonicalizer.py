@@ -0,0 +1,63 @@
+"""
+Module providing the normalization of the URLs found while crawling a website, so that the different
+spellings of the same page (e.g. `HTTP://Example.com/docs/index.html#intro` and `http://example.com/docs`)
+are downloaded and embedded only once.
+"""
+
+import posixpath
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+SUPPORTED_SCHEMES = frozenset({"http", "https"})
+DEFAULT_PORTS = {"http": 80, "https": 443}
+INDEX_PAGES = frozenset({"index.html", "index.htm"})
+# Query parameters used for tracking, which do not change the content of the page
+TRACKING_QUERY_PARAMETERS = frozenset({"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid"})
+TRACKING_QUERY_PARAMETERS_PREFIX = "utm_"
+
+
+def _normalize_path(path: str) -> str:
+    # Resolve dot segments and duplicated slashes, then drop the index page and the trailing slash
+    path = posixpath.normpath("/" + path.lstrip("/")) if path else "/"
+    head, tail = posixpath.split(path)
+    if tail in INDEX_PAGES:
+        path = head
+    return path.rstrip("/")
+
+
+def _normalize_query(query: str) -> str:
+    parameters = [
+        (key, value)
+        for key, value in parse_qsl(query, keep_blank_values=True)
+        if key not in TRACKING_QUERY_PARAMETERS and not key.startswith(TRACKING_QUERY_PARAMETERS_PREFIX)
+    ]
+    return urlencode(sorted(parameters))
+
+
+def canonicalize_url(url: str, base_url: str | None = None) -> str | None:
+    """
+    Return the canonical form of a URL:
+    - relative URLs are resolved against `base_url` (the URL of the page containing them)
+    - scheme and host are lowercased, default ports, credentials and fragments are removed
+    - dot segments, `index.html` pages and trailing slashes are removed from the path
+    - tracking query parameters (`utm_*`, `gclid`, ...) are removed and the others are sorted
+
+    Returns:
+        str | None: The canonical URL, or None if the URL is not a valid HTTP(S) URL (e.g. `mailto:` links).
+    """
+    url = url.strip()
+    if base_url is not None:
+        url = urljoin(base_url, url)
+
+    try:
+        parts = urlsplit(url)
+        scheme, host, port = parts.scheme.lower(), parts.hostname, parts.port
+    except ValueError:
+        return None
+    if scheme not in SUPPORTED_SCHEMES or not host:
+        return None
+
+    # IPv6 addresses must be enclosed in brackets
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = host if port is None or port == DEFAULT_PORTS[scheme] else f"{host}:{port}"
+    return urlunsplit((scheme, netloc, _normalize_path(parts.path), _normalize_query(parts.query), ""))
@@ -0,0 +1,481 @@
+"""
+Module to include the WebCrawler class, an asynchronous crawler that downloads the pages of a website concurrently.
+"""
+
+import asyncio
+import itertools
+import time
+import zlib
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from http import HTTPStatus
+from logging import Logger
+from typing import TypeVar
+from xml.etree import ElementTree
+
+import aiohttp
+from attr import Factory, dataclass
+
+from src.application.embeddings.html_page_parser import HtmlPageParser
+from src.application.embeddings.url_canonicalizer import canonicalize_url
+from src.configurations.service_model import Crawler
+from src.infrastracture.vector_store_manager.crawl_manifest import CrawlManifestEntry
+
+# Status codes of the responses that are worth retrying
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+HTTP_ERROR_STATUS_CODE = 400
+READ_CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+GZIP_WINDOW_BITS = 16 + zlib.MAX_WBITS
+# Maximum number of sitemaps downloaded when following sitemap indexes
+MAX_SITEMAPS = 50
+
+T = TypeVar("T")
+
+
+@dataclass
+class CrawlerParams:
+    max_concurrency: int = 10
+    max_concurrency_per_host: int = 4
+    request_timeout_seconds: float = 10
+    max_response_bytes: int = 10 * 1024 * 1024
+    max_retries: int = 2
+    retry_backoff_seconds: float = 0.5
+
+    @classmethod
+    def from_configuration(cls, configuration: Crawler | None) -> "CrawlerParams":
+        configuration = configuration or Crawler()
+        return cls(
+            max_concurrency=configuration.maxConcurrency,
+            max_concurrency_per_host=configuration.maxConcurrencyPerHost,
+            request_timeout_seconds=configuration.requestTimeoutSeconds,
+            max_response_bytes=configuration.maxResponseBytes,
+            max_retries=configuration.maxRetries,
+            retry_backoff_seconds=configuration.retryBackoffSeconds,
+        )
+
+
+@dataclass
+class CrawlBudget:
+    """
+    Limits of a single crawl, None meaning unlimited:
+    - `max_depth`: maximum number of links followed from the starting URL (pages listed in the sitemap have depth 1)
+    - `max_pages`: maximum number of pages downloaded
+    - `max_duration_seconds`: maximum duration of the crawl
+    - `max_bytes`: maximum total size of the downloaded pages
+    """
+
+    max_depth: int | None = None
+    max_pages: int | None = None
+    max_duration_seconds: float | None = None
+    max_bytes: int | None = None
+
+
+@dataclass
+class CrawledPage:
+    """
+    A downloaded page, whose `text` is the main content extracted from its HTML (see `HtmlPageParser`). `url` is the
+    canonical URL of the page, while `base_url` is the URL it was downloaded from, which the relative links of the page
+    are resolved against. When `not_modified` is set, the server confirmed that the page did not change since the
+    previous crawl: the page has no content and its links are the ones recorded by the previous crawl.
+    """
+
+    url: str
+    html: str
+    text: str = ""
+    base_url: str | None = None
+    depth: int = 0
+    size: int = 0
+    etag: str | None = None
+    last_modified: str | None = None
+    links: list[str] = Factory(list)
+    not_modified: bool = False
+
+
+class CrawlFrontier:
+    """
+    The URLs still to crawl, visited in breadth-first order: URLs closer to the starting one are downloaded first,
+    so that the most relevant pages are crawled before the budget is exhausted.
+
+    URLs are expected to be canonical (see `canonicalize_url`) and are deduplicated regardless of their scheme,
+    since the HTTP and HTTPS versions of a page have the same content. The frontier also keeps track of the budget:
+    once exhausted, no more URLs are accepted or handed out.
+    """
+
+    def __init__(self, logger: Logger, budget: CrawlBudget):
+        self.logger = logger
+        self.budget = budget
+
+        self._queue: asyncio.PriorityQueue[tuple[int, int, str]] = asyncio.PriorityQueue()
+        self._seen: set[str] = set()
+        # Sequence number used to visit URLs with the same depth in insertion order
+        self._sequence = itertools.count()
+        self._deadline = time.monotonic() + budget.max_duration_seconds if budget.max_duration_seconds is not None else None
+        self._exhausted = False
+
+        self.pages_count = 0
+        self.bytes_count = 0
+
+    def _exhaust(self, reason: str) -> None:
+        if not self._exhausted:
+            self._exhausted = True
+            self.logger.info(f"Crawl budget exhausted ({reason}): no more pages will be downloaded.")
+
+    def is_expired(self) -> bool:
+        """Whether the maximum duration of the crawl has elapsed."""
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+    def remaining_seconds(self) -> float | None:
+        """The time left before the maximum duration elapses, or None if the duration is unlimited."""
+        return max(self._deadline - time.monotonic(), 0) if self._deadline is not None else None
+
+    def is_exhausted(self) -> bool:
+        if self.is_expired():
+            self._exhaust(f"maximum duration of {self.budget.max_duration_seconds} seconds")
+        return self._exhausted
+
+    def mark_seen(self, url: str) -> bool:
+        """
+        Record a URL as seen, such as the target of a redirect or the canonical URL of a page.
+
+        Returns:
+            bool: False if the URL had already been seen.
+        """
+        key = url.split("://", 1)[-1]
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def add(self, url: str, depth: int) -> bool:
+        """
+        Add a URL to the frontier, unless it has already been seen, is too deep or the budget is exhausted.
+
+        Returns:
+            bool: True if the URL has been added.
+        """
+        if self.is_exhausted() or (self.budget.max_depth is not None and depth > self.budget.max_depth):
+            return False
+        if not self.mark_seen(url):
+            return False
+
+        self._queue.put_nowait((depth, next(self._sequence), url))
+        return True
+
+    async def get(self) -> tuple[str, int]:
+        depth, _, url = await self._queue.get()
+        return url, depth
+
+    def task_done(self) -> None:
+        self._queue.task_done()
+
+    async def join(self) -> None:
+        await self._queue.join()
+
+    def record(self, page: CrawledPage) -> bool:
+        """
+        Account a downloaded page in the budget.
+
+        Returns:
+            bool: False if the budget was already exhausted, meaning that the page must be discarded.
+        """
+        if self.is_exhausted():
+            return False
+
+        self.pages_count += 1
+        self.bytes_count += page.size
+        if self.budget.max_pages is not None and self.pages_count >= self.budget.max_pages:
+            self._exhaust(f"maximum of {self.budget.max_pages} pages")
+        elif self.budget.max_bytes is not None and self.bytes_count >= self.budget.max_bytes:
+            self._exhaust(f"maximum of {self.budget.max_bytes} bytes")
+        return True
+
+
+class _RetryableResponseError(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP status {status}")
+
+
+class WebCrawler:
+    """
+    Crawl a website starting from a URL, following the links of each page that are kept by `filter_links`.
+    The crawl can be seeded with the URLs listed in a sitemap, and limited by a `CrawlBudget`.
+
+    All the URLs are canonicalized, and a page is skipped as a duplicate when it redirects to a URL, or declares
+    a canonical URL (`<link rel="canonical">`), that has already been crawled.
+
+    Pages of a previous crawl (`previous_pages`) are requested with the `If-None-Match` and `If-Modified-Since`
+    headers, so that the server can reply without the content when they did not change.
+
+    Pages are downloaded concurrently by `max_concurrency` workers sharing a single keep-alive connection pool,
+    limited to `max_concurrency_per_host` connections for each host. Only HTML pages are returned: a page that
+    cannot be downloaded (after the retries) is logged and skipped, without interrupting the crawl.
+
+    The pages are yielded as soon as they are downloaded, while the workers keep crawling in the background;
+    at most `max_concurrency` downloaded pages wait to be consumed, so a slow consumer slows down the crawl
+    instead of accumulating pages in memory.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        params: CrawlerParams,
+        filter_links: Callable[[list[str]], list[str]] | None = None,
+        previous_pages: Mapping[str, CrawlManifestEntry] | None = None,
+    ):
+        self.logger = logger
+        self.params = params
+        self._previous_pages = previous_pages or {}
+        self._filter_links = filter_links or (lambda links: links)
+        # The number of URLs that could not be crawled, because of network errors or unexpected errors
+        self.failed_count = 0
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(limit=self.params.max_concurrency, limit_per_host=self.params.max_concurrency_per_host)
+        timeout = aiohttp.ClientTimeout(total=self.params.request_timeout_seconds)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def _read_body(self, response: aiohttp.ClientResponse) -> bytes | None:
+        """
+        Read the body of the response in chunks, returning None as soon as it exceeds the maximum size.
+        """
+        max_response_bytes = self.params.max_response_bytes
+        if response.content_length is not None and response.content_length > max_response_bytes:
+            return None
+
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+            body.extend(chunk)
+            if len(body) > max_response_bytes:
+                return None
+        return bytes(body)
+
+    def _get_conditional_headers(self, url: str) -> dict[str, str]:
+        previous_page = self._previous_pages.get(url)
+        headers = {}
+        if previous_page is not None and previous_page.etag:
+            headers["If-None-Match"] = previous_page.etag
+        if previous_page is not None and previous_page.last_modified:
+            headers["If-Modified-Since"] = previous_page.last_modified
+        return headers
+
+    async def _download(self, session: aiohttp.ClientSession, url: str, depth: int) -> CrawledPage | None:
+        async with session.get(url, headers=self._get_conditional_headers(url)) as response:
+            if response.status == HTTPStatus.NOT_MODIFIED and url in self._previous_pages:
+                return CrawledPage(url=url, html="", depth=depth, links=self._previous_pages[url].links, not_modified=True)
+            if response.status in RETRYABLE_STATUS_CODES:
+                raise _RetryableResponseError(response.status)
+            if response.status >= HTTP_ERROR_STATUS_CODE:
+                self.logger.warning(f"Skipping page {url} as the server replied with status {response.status}.")
+                return None
+            if not response.headers.get("Content-Type", "").startswith("text/html"):
+                self.logger.debug(f"Skipping page {url} as it is not HTML content.")
+                return None
+
+            body = await self._read_body(response)
+            if body is None:
+                self.logger.warning(f"Skipping page {url} as it is larger than {self.params.max_response_bytes} bytes.")
+                return None
+
+            # The page is identified by its URL after the redirects, and its links are relative to that URL as served,
+            # e.g. with the trailing slash or the `index.html` page that the canonical URL drops
+            final_url = canonicalize_url(str(response.url)) or url
+            return CrawledPage(
+                url=final_url,
+                base_url=str(response.url),
+                html=body.decode(response.charset or "utf-8", errors="replace"),
+                depth=depth,
+                size=len(body),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+
+    async def _download_sitemap(self, session: aiohttp.ClientSession, url: str) -> bytes | None:
+        async with session.get(url) as response:
+            if response.status in RETRYABLE_STATUS_CODES:
+                raise _RetryableResponseError(response.status)
+            if response.status >= HTTP_ERROR_STATUS_CODE:
+                self.logger.debug(f"Sitemap {url} not available, the server replied with status {response.status}.")
+                return None
+
+            body = await self._read_body(response)
+            if body is None:
+                self.logger.warning(f"Skipping sitemap {url} as it is larger than {self.params.max_response_bytes} bytes.")
+                return None
+
+            if not body.startswith(GZIP_MAGIC_NUMBER):
+                return body
+
+            # Sitemaps can be served as gzip files (e.g. sitemap.xml.gz): the size limit applies to the decompressed content too
+            try:
+                decompressed = zlib.decompressobj(GZIP_WINDOW_BITS).decompress(body, self.params.max_response_bytes + 1)
+            except zlib.error as ex:
+                self.logger.warning(f"Skipping sitemap {url} as it is not a valid gzip file: {ex}")
+                return None
+            if len(decompressed) > self.params.max_response_bytes:
+                self.logger.warning(f"Skipping sitemap {url} as it is larger than {self.params.max_response_bytes} bytes.")
+                return None
+            return decompressed
+
+    async def _with_retries(self, url: str, download: Callable[[], Awaitable[T]]) -> T | None:
+        """
+        Run a download, retrying with exponential backoff on network errors, timeouts and retryable status codes.
+        """
+        for attempt in range(self.params.max_retries + 1):
+            try:
+                return await download()
+            except (aiohttp.ClientError, TimeoutError, _RetryableResponseError) as ex:
+                if attempt == self.params.max_retries:
+                    self.logger.warning(f"Skipping {url} after {attempt + 1} failed attempts: {ex!r}")
+                    self.failed_count += 1
+                    return None
+                self.logger.debug(f"Download of {url} failed ({ex!r}), retrying...")
+                await asyncio.sleep(self.params.retry_backoff_seconds * 2**attempt)
+        return None
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str, depth: int = 0) -> CrawledPage | None:
+        """
+        Download a page, retrying with exponential backoff on network errors, timeouts and retryable status codes.
+
+        Returns:
+            CrawledPage | None: The downloaded page, or None if it is not an HTML page or cannot be downloaded.
+        """
+        return await self._with_retries(url, lambda: self._download(session, url, depth))
+
+    async def fetch_sitemap_urls(self, session: aiohttp.ClientSession, sitemap_url: str) -> list[str]:
+        """
+        Return the page URLs listed in a sitemap, following the sitemaps referenced by sitemap indexes.
+        A sitemap that is missing or cannot be parsed is skipped.
+        """
+        urls: list[str] = []
+        sitemaps, visited_sitemaps = [sitemap_url], set()
+        while sitemaps and len(visited_sitemaps) < MAX_SITEMAPS:
+            url = sitemaps.pop(0)
+            if url in visited_sitemaps:
+                continue
+            visited_sitemaps.add(url)
+
+            body = await self._with_retries(url, lambda url=url: self._download_sitemap(session, url))
+            if body is None:
+                continue
+            try:
+                root = ElementTree.fromstring(body)
+            except ElementTree.ParseError as ex:
+                self.logger.warning(f"Skipping sitemap {url} as it is not valid XML: {ex}")
+                continue
+
+            # Elements are matched by local name, ignoring the sitemap XML namespace
+            locations = [element.text.strip() for element in root.iter() if element.tag.rsplit("}", 1)[-1] == "loc" and element.text]
+            if root.tag.rsplit("}", 1)[-1] == "sitemapindex":
+                sitemaps.extend(locations)
+            else:
+                urls.extend(locations)
+
+        self.logger.debug(f"Found {len(urls)} URLs in the sitemap {sitemap_url}")
+        return urls
+
+    def _canonicalize_links(self, links: list[str], base_url: str | None = None) -> list[str]:
+        canonical_links = {canonical_link for link in links if (canonical_link := canonicalize_url(link, base_url)) is not None}
+        return self._filter_links(sorted(canonical_links))
+
+    def _parse_page(self, page: CrawledPage) -> tuple[list[str], str | None]:
+        """
+        Extract the text of the page, in the same pass as its links. Return the links of the page to crawl and its
+        canonical URL, if declared and within the crawled links.
+        """
+        parser = HtmlPageParser()
+        parser.feed(page.html)
+        parser.close()
+        page.text = parser.text
+
+        canonical_url = None
+        if parser.canonical_url is not None:
+            canonical_url = next(iter(self._canonicalize_links([parser.canonical_url], page.base_url or page.url)), None)
+        return self._canonicalize_links(parser.hyperlinks, page.base_url or page.url), canonical_url
+
+    async def _worker(self, session: aiohttp.ClientSession, frontier: CrawlFrontier, pages: asyncio.Queue) -> None:
+        while True:
+            url, depth = await frontier.get()
+            try:
+                # Once the budget is exhausted, the remaining URLs are drained without downloading them
+                if frontier.is_exhausted():
+                    continue
+
+                self.logger.debug(f"Scraping page: {url}")
+                page = await self.fetch(session, url, depth)
+                if page is None:
+                    continue
+
+                if not page.not_modified:
+                    if page.url != url and not frontier.mark_seen(page.url):
+                        self.logger.debug(f"Skipping page {url} as it redirects to the already crawled page {page.url}")
+                        continue
+
+                    # Parsing runs in a thread, so that the other workers keep downloading pages meanwhile
+                    page.links, canonical_url = await asyncio.to_thread(self._parse_page, page)
+                    if canonical_url is not None and canonical_url != page.url:
+                        if not frontier.mark_seen(canonical_url):
+                            self.logger.debug(f"Skipping page {page.url} as its canonical page {canonical_url} is already crawled")
+                            continue
+                        page.url = canonical_url
+
+                if not frontier.record(page):
+                    continue
+
+                # Links are queued before marking the page as done, so that the crawl does not end prematurely
+                for link in page.links:
+                    if frontier.add(link, depth + 1):
+                        self.logger.debug(f"Found new link: {link}")
+
+                await pages.put(page)
+            # pylint: disable=broad-except
+            except Exception as ex:
+                self.logger.warning(f"Unable to crawl page {url}: {ex!r}")
+                self.failed_count += 1
+            finally:
+                frontier.task_done()
+
+    @staticmethod
+    async def _close_when_done(frontier: CrawlFrontier, pages: asyncio.Queue) -> None:
+        await frontier.join()
+        await pages.put(None)
+
+    @staticmethod
+    async def _next_page(frontier: CrawlFrontier, pages: asyncio.Queue) -> CrawledPage | None:
+        """
+        Wait for the next downloaded page, returning None when the crawl is completed or its maximum duration has elapsed.
+        """
+        try:
+            page = await asyncio.wait_for(pages.get(), timeout=frontier.remaining_seconds())
+        except TimeoutError:
+            page = None
+        # Checking the budget also logs its exhaustion when the maximum duration has elapsed
+        return None if frontier.is_exhausted() and frontier.is_expired() else page
+
+    async def crawl(self, url: str, budget: CrawlBudget | None = None, sitemap_url: str | None = None) -> AsyncIterator[CrawledPage]:
+        """
+        Crawl the website starting from the given URL, yielding the HTML pages as they are downloaded.
+
+        Args:
+            url (str): The starting URL.
+            budget (CrawlBudget | None): The limits of the crawl. Defaults to an unlimited crawl.
+            sitemap_url (str | None): The URL of a sitemap (or sitemap index) whose pages are crawled along with the starting URL.
+        """
+        frontier = CrawlFrontier(self.logger, budget or CrawlBudget())
+        pages: asyncio.Queue[CrawledPage | None] = asyncio.Queue(maxsize=self.params.max_concurrency)
+        frontier.add(canonicalize_url(url) or url, depth=0)
+
+        async with self._create_session() as session:
+            # Pages listed in the sitemap are crawled as if they were linked by the starting page
+            if sitemap_url is not None:
+                for link in self._canonicalize_links(await self.fetch_sitemap_urls(session, sitemap_url)):
+                    frontier.add(link, depth=1)
+
+            tasks = [asyncio.create_task(self._worker(session, frontier, pages)) for _ in range(self.params.max_concurrency)]
+            tasks.append(asyncio.create_task(self._close_when_done(frontier, pages)))
+            try:
+                while (page := await self._next_page(frontier, pages)) is not None:
+                    yield page
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
@@ -7,7 +7,7 @@ from __future__ import annotations
 from enum import Enum
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, conint
 
 
 class AzureLlmConfiguration(BaseModel):
@@ -73,6 +73,11 @@ class AzureEmbeddingsConfiguration(BaseModel):
     url: str = Field(
         ..., description='The URL of the Azure OpenAI service to connect with.'
     )
+    dimensions: int | None = Field(
+        None,
+        description='The number of dimensions of the generated embeddings, supported by text-embedding-3 and later models. If omitted, the default size of the model is used.',
+        ge=1,
+    )
 
 
 class OpenAIEmbeddingsConfiguration(BaseModel):
@@ -84,6 +89,11 @@ class OpenAIEmbeddingsConfiguration(BaseModel):
         ...,
         description='The name of the embeddings model to be used by RAG-template for various tasks such as text representation and similarity.',
     )
+    dimensions: int | None = Field(
+        None,
+        description='The number of dimensions of the generated embeddings, supported by text-embedding-3 and later models. If omitted, the default size of the model is used.',
+        ge=1,
+    )
 
 
 class RelevanceScoreFn(Enum):
@@ -92,7 +102,107 @@ class RelevanceScoreFn(Enum):
     dotProduct = 'dotProduct'
 
 
+class VectorStoreType(Enum):
+    mongodb = 'mongodb'
+    local = 'local'
+
+
+class EmbeddingsEncoding(Enum):
+    array = 'array'
+    float32 = 'float32'
+    int8 = 'int8'
+    int1 = 'int1'
+
+
+class IndexQuantization(Enum):
+    none = 'none'
+    scalar = 'scalar'
+    binary = 'binary'
+
+
+class VectorStoreSource(BaseModel):
+    name: str | None = Field(
+        None,
+        description='The name of the source, used in the documents metadata and in the metrics. Defaults to the collection name.',
+    )
+    dbName: str | None = Field(
+        None,
+        description="The name of the database of the source. Defaults to the 'dbName' of the vector store.",
+    )
+    collectionName: str = Field(
+        ..., description='The name of the collection of the source.'
+    )
+    indexName: str | None = Field(
+        None,
+        description="The name of the vector index of the source. Defaults to the 'indexName' of the vector store.",
+    )
+    maxDocumentsToRetrieve: int | None = Field(
+        None,
+        description="The maximum number of documents to be retrieved from the source. Defaults to the 'maxDocumentsToRetrieve' of the vector store.",
+        ge=1,
+    )
+    weight: float | None = Field(
+        1,
+        description='The weight multiplied by the relevance scores of the source when the results are merged.',
+        ge=0.0,
+    )
+
+
+class MatryoshkaConfiguration(BaseModel):
+    embeddingKey: str = Field(
+        ...,
+        description='The key used to store the shortened embeddings in the vector store.',
+    )
+    indexName: str = Field(
+        ..., description='The name of the index built on the shortened embeddings.'
+    )
+    numDimensions: int | None = Field(
+        256,
+        description='The number of dimensions of the shortened embeddings.',
+        ge=1,
+    )
+    numCandidates: int | None = Field(
+        100,
+        description='The number of candidates retrieved with the shortened embeddings and re-ranked with the full embeddings.',
+        ge=1,
+    )
+
+
+class BulkWriteConfiguration(BaseModel):
+    maxBatchBytes: int | None = Field(
+        8388608,
+        description='The maximum size in bytes of the BSON documents sent by a single bulk write.',
+        ge=1,
+    )
+    w: int | str | None = Field(
+        None,
+        description="The write concern of the bulk writes: the number of members that must acknowledge the writes, or 'majority'. If omitted, the write concern of the cluster URI (or the default one) is used.",
+    )
+    journal: bool | None = Field(
+        None,
+        description='Whether the bulk writes wait for the writes to be committed to the journal. If omitted, the write concern of the cluster URI (or the default one) is used.',
+    )
+    maxRetries: int | None = Field(
+        2,
+        description='The number of times the documents whose write failed are written again, before failing the ingestion.',
+        ge=0,
+    )
+    retryBackoffSeconds: float | None = Field(
+        0.5,
+        description='The delay before the first retry of the failed writes, in seconds; it doubles at each following retry.',
+        ge=0.0,
+    )
+
+
 class VectorStore(BaseModel):
+    type: VectorStoreType | None = Field(
+        VectorStoreType.mongodb,
+        description="The type of vector store backend to be used. Options: 'mongodb' (MongoDB Atlas Vector Search), 'local' (on-disk index stored in the filesystem).",
+    )
+    path: str | None = Field(
+        None,
+        description="The directory where the local vector store persists its data. Required when the vector store type is 'local'.",
+    )
     dbName: str | None = Field(
         None, description='The name of the database where the vector store is hosted.'
     )
@@ -114,6 +224,14 @@ class VectorStore(BaseModel):
     textKey: str = Field(
         ..., description='The key used to store text data in the vector store.'
     )
+    embeddingsEncoding: EmbeddingsEncoding | None = Field(
+        EmbeddingsEncoding.array,
+        description="How the 'mongodb' vector store saves the embeddings. Options: 'array' (BSON array of doubles), 'float32' (packed BSON binary vector), 'int8' and 'int1' (packed BSON binary vector quantized to 8 or 1 bit per dimension, with the scale stored in the '<embeddingKey>_scale' field). 'int8' requires the 'cosine' relevance score function and 'int1' the 'euclidean' one.",
+    )
+    indexQuantization: IndexQuantization | None = Field(
+        IndexQuantization.none,
+        description="The quantization applied by MongoDB Atlas Vector Search to the indexed embeddings. Available only for the 'array' and 'float32' embeddings encodings.",
+    )
     maxDocumentsToRetrieve: int | None = Field(
         4,
         description='The maximum number of documents to be retrieved from the vector store.',
@@ -124,6 +242,18 @@ class VectorStore(BaseModel):
     minScoreDistance: float | None = Field(
         None, description='The maximum score distance for the vectors.'
     )
+    sources: list[VectorStoreSource] | None = Field(
+        None,
+        description="The partitions of the knowledge base queried by the retrieval. If set, every source is queried concurrently and the results are merged into a single list of 'maxDocumentsToRetrieve' documents. If omitted, only 'collectionName' is queried.",
+    )
+    matryoshka: MatryoshkaConfiguration | None = Field(
+        None,
+        description="Two-stage retrieval with shortened embeddings (supported by text-embedding-3 models and by the 'mongodb' vector store only). A short prefix of each embedding is stored in a second indexed field: candidates are searched on the short vectors, then re-ranked with the full vectors.",
+    )
+    bulkWrite: BulkWriteConfiguration | None = Field(
+        default_factory=lambda: BulkWriteConfiguration.model_validate({}),
+        description="Settings of the unordered bulk writes of the ingested chunks to the 'mongodb' vector store.",
+    )
 
 
 class PromptsFilePath(BaseModel):
@@ -147,6 +277,206 @@ class Chain(BaseModel):
     rag: Rag | None = Field(None, description='RAG chain configuration')
 
 
+class Crawler(BaseModel):
+    maxConcurrency: int | None = Field(
+        10,
+        description='The maximum number of pages downloaded at the same time.',
+        ge=1,
+    )
+    maxConcurrencyPerHost: int | None = Field(
+        4,
+        description='The maximum number of pages downloaded at the same time from the same host.',
+        ge=1,
+    )
+    requestTimeoutSeconds: float | None = Field(
+        10,
+        description='The maximum duration of the download of a page, in seconds.',
+        gt=0.0,
+    )
+    maxResponseBytes: int | None = Field(
+        10485760,
+        description='The maximum size of a page, in bytes: larger pages are skipped.',
+        ge=1,
+    )
+    maxRetries: int | None = Field(
+        2,
+        description='The number of retries of a download failed for a network error, a timeout or a 429/5xx status code.',
+        ge=0,
+    )
+    retryBackoffSeconds: float | None = Field(
+        0.5,
+        description='The delay before the first retry, in seconds; it doubles at each following retry.',
+        ge=0.0,
+    )
+
+
+class EmbeddingsCache(BaseModel):
+    enabled: bool | None = Field(
+        False,
+        description='Whether to reuse the embeddings of texts already embedded by the same model.',
+    )
+    collectionName: str | None = Field(
+        'embeddings_cache',
+        description='The name of the MongoDB collection (or of the file of the local Vector Store) storing the cached embeddings.',
+    )
+
+
+class ChunkingStrategy(Enum):
+    semantic = 'semantic'
+    markdown = 'markdown'
+    token = 'token'
+
+
+class Chunking(BaseModel):
+    strategy: ChunkingStrategy | None = Field(
+        ChunkingStrategy.semantic,
+        description="How the texts are split into chunks. Options: 'semantic' (breakpoints between sentences with distant embeddings), 'markdown' (one chunk per Markdown section, sections longer than 'chunkSize' tokens are split further), 'token' (recursive splitting into chunks of 'chunkSize' tokens). Can be overridden by each embeddings generation request.",
+    )
+    chunkSize: int | None = Field(
+        512,
+        description="The maximum number of tokens of the chunks created by the 'markdown' and 'token' strategies.",
+        ge=1,
+    )
+    chunkOverlap: int | None = Field(
+        64,
+        description="The number of tokens shared by consecutive chunks created by the 'token' strategy (and by the long sections of the 'markdown' strategy).",
+        ge=0,
+    )
+    minTokens: int | None = Field(
+        0,
+        description="The minimum number of tokens of the chunks of every strategy: smaller chunks are merged with a neighbouring chunk, as long as the merged chunk does not exceed 'maxTokens'. 0 disables the merging.",
+        ge=0,
+    )
+    maxTokens: int | None = Field(
+        2048,
+        description='The maximum number of tokens of the chunks of every strategy: larger chunks are split recursively on paragraphs, lines and words. It should not exceed the input limit of the embeddings model.',
+        ge=1,
+    )
+    reuseSentenceEmbeddings: bool | None = Field(
+        False,
+        description='Whether to derive the embeddings of the chunks from the embeddings of their sentences, computed to find the semantic breakpoints, instead of embedding the chunks again.',
+    )
+
+
+class Ingestion(BaseModel):
+    batchMaxTokens: int | None = Field(
+        50000,
+        description='The maximum number of tokens of the chunks embedded by a single request to the embeddings model. The chunks of different pages and documents are accumulated until the budget is reached.',
+        ge=1,
+    )
+    batchMaxSize: int | None = Field(
+        256,
+        description='The maximum number of chunks embedded by a single request to the embeddings model and written to the Vector Store at once.',
+        ge=1,
+    )
+    concurrency: int | None = Field(
+        4,
+        description='The maximum number of batches embedded at the same time.',
+        ge=1,
+    )
+    chunkWorkers: int | None = Field(
+        2,
+        description='The number of documents of an uploaded file split into chunks at the same time.',
+        ge=1,
+    )
+    writeWorkers: int | None = Field(
+        2,
+        description='The number of batches of an uploaded file written to the Vector Store at the same time.',
+        ge=1,
+    )
+    queueSize: int | None = Field(
+        16,
+        description='The maximum number of items (documents or batches of chunks) waiting between two stages of the ingestion pipeline of an uploaded file.',
+        ge=1,
+    )
+
+
+class Boilerplate(BaseModel):
+    enabled: bool | None = Field(
+        False,
+        description='Whether to remove the blocks of text repeated across the pages of a website or of an uploaded file before splitting them into chunks.',
+    )
+    minPages: int | None = Field(
+        5,
+        description='The number of pages of an ingestion seen before removing any block of text. The blocks of the first pages are always kept.',
+        ge=1,
+    )
+    minPageFraction: float | None = Field(
+        0.5,
+        description='The minimum fraction of the previous pages of an ingestion on which a block of text is found to be removed from the following pages.',
+        gt=0.0,
+        le=1.0,
+    )
+    minBlockChars: int | None = Field(
+        20,
+        description='The minimum number of characters of the blocks of text that can be removed. Shorter blocks, such as headings, are always kept.',
+        ge=1,
+    )
+
+
+class FileParsing(BaseModel):
+    maxArchiveMemberBytes: int | None = Field(
+        268435456,
+        description='The maximum decompressed size, in bytes, of each file of an uploaded archive. The ingestion of an archive including a larger file fails.',
+        ge=1,
+    )
+    maxArchiveTotalBytes: int | None = Field(
+        4294967296,
+        description='The maximum decompressed size, in bytes, of all the files of an uploaded archive that are ingested. The ingestion of a larger archive fails.',
+        ge=1,
+    )
+    workers: int | None = Field(
+        1,
+        description='The number of processes parsing the PDF files and the files of the archives in parallel. With 1, the files are parsed one after the other by the ingestion job.',
+        ge=1,
+    )
+    pdfPagesPerTask: int | None = Field(
+        16,
+        description="The number of pages of a PDF file parsed by a process at a time, when 'workers' is greater than 1: smaller PDF files are parsed by a single process.",
+        ge=1,
+    )
+
+
+class IngestionExecutor(Enum):
+    process = 'process'
+    thread = 'thread'
+
+
+class IngestionJobs(BaseModel):
+    maxConcurrentJobs: int | None = Field(
+        2,
+        description="The maximum number of ingestion jobs running at the same time on each replica, which is also the number of worker processes of the 'process' executor. Further jobs are queued until one of them finishes.",
+        ge=1,
+    )
+    executor: IngestionExecutor | None = Field(
+        IngestionExecutor.thread,
+        description="Where the ingestion jobs run. Options: 'thread' (threads of the API process), 'process' (a pool of worker processes, isolated from the API so that parsing and chunking do not slow down the chat). With the 'local' Vector Store the jobs always run in threads.",
+    )
+    cpuAffinity: list[conint(ge=0)] | None = Field(
+        None,
+        description="The CPUs the worker processes of the 'process' executor are bound to (Linux only), e.g. to keep some CPUs for the API. If omitted, the workers can run on any CPU.",
+    )
+    uploadDirectory: str | None = Field(
+        None,
+        description='The directory where the uploaded files are saved until their ingestion job has parsed them. If omitted, the temporary directory of the system is used.',
+    )
+    progressIntervalSeconds: float | None = Field(
+        2,
+        description='The minimum interval, in seconds, between two updates of the progress of a running job saved next to the Vector Store.',
+        gt=0.0,
+    )
+    heartbeatIntervalSeconds: float | None = Field(
+        30,
+        description='The interval, in seconds, between two heartbeats of the queued and running jobs of a replica, saved next to the Vector Store.',
+        gt=0.0,
+    )
+    staleJobTimeoutSeconds: float | None = Field(
+        120,
+        description="The time, in seconds, after which a queued or running job without heartbeat is considered orphaned (e.g. its replica crashed) and no longer reported as active. It should be several times 'heartbeatIntervalSeconds'.",
+        gt=0.0,
+    )
+
+
 class RagTemplateConfigSchema(BaseModel):
     llm: AzureLlmConfiguration | OpenAILlmConfiguration
     tokenizer: Tokenizer | None = Field(
@@ -157,3 +487,31 @@ class RagTemplateConfigSchema(BaseModel):
     chain: Chain | None = Field(
         default_factory=lambda: Chain.model_validate({'aggregateMaxTokenNumber': 2000})
     )
+    crawler: Crawler | None = Field(
+        default_factory=lambda: Crawler.model_validate({}),
+        description='Configuration of the web crawler used to generate embeddings from a URL.',
+    )
+    embeddingsCache: EmbeddingsCache | None = Field(
+        default_factory=lambda: EmbeddingsCache.model_validate({}),
+        description='Configuration of the persistent cache of the embeddings generated during the ingestion, stored along with the Vector Store.',
+    )
+    chunking: Chunking | None = Field(
+        default_factory=lambda: Chunking.model_validate({}),
+        description='Configuration of the splitting of the ingested texts into chunks.',
+    )
+    ingestion: Ingestion | None = Field(
+        default_factory=lambda: Ingestion.model_validate({}),
+        description='Configuration of the batching of the chunks embedded and stored during the ingestion.',
+    )
+    boilerplate: Boilerplate | None = Field(
+        default_factory=lambda: Boilerplate.model_validate({}),
+        description='Configuration of the removal of the blocks of text repeated across the pages of an ingestion, such as headers, footers and legal notices.',
+    )
+    fileParsing: FileParsing | None = Field(
+        default_factory=lambda: FileParsing.model_validate({}),
+        description='Configuration of the parsing of the uploaded files.',
+    )
+    ingestionJobs: IngestionJobs | None = Field(
+        default_factory=lambda: IngestionJobs.model_validate({}),
+        description='Configuration of the ingestion jobs started by the embeddings generation endpoints.',
+    )
@@ -9,7 +9,7 @@ class Variables(BaseModel):
         json_schema_extra={"enum": ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]},
     )
     CONFIGURATION_PATH: str | None = Field("/app/configurations/config.json", description="The path to the configuration file for the application.")
-    MONGODB_CLUSTER_URI: str = Field(description="The URI for connecting to the MongoDB cluster.")
+    MONGODB_CLUSTER_URI: str | None = Field(None, description="The URI for connecting to the MongoDB cluster (required by the 'mongodb' vector store).")
     LLM_API_KEY: str = Field(description="The API key for accessing the Language Model API.")
     EMBEDDINGS_API_KEY: str = Field(description="The API key for accessing the Embeddings API.")
     HEADERS_TO_PROXY: str | None = Field(None, description="The headers to proxy from the client to the server during intra-service communication.")
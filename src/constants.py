@@ -1,6 +1,7 @@
 # Constants related to the vector index
 VECTOR_INDEX_TYPE = "vectorSearch"
 DEFAULT_NUM_DIMENSIONS_VALUE = 1536
+MAX_VECTOR_SEARCH_CANDIDATES = 10000
 
 DIMENSIONS_DICT: dict[str, int] = {
     "text-embedding-3-small": 1536,
@@ -0,0 +1,138 @@
+"""
+Module providing the persistent cache of the embeddings, so that the texts already embedded (e.g. when ingesting
+again the same documents, after a change of the chunking or in a new collection) do not require new calls to the model.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from pymongo.collection import Collection
+from pymongo.operations import UpdateOne
+
+from src.configurations.service_model import EmbeddingsEncoding
+from src.infrastracture.embeddings_manager.tokenizer import get_tokenizer
+from src.infrastracture.metrics_manager.metrics_manager import MetricsManager
+from src.infrastracture.vector_store_manager.vector_encoding import decode_vector, encode_vector
+
+LOCAL_CACHE_FILE_EXTENSION = "sqlite3"
+
+
+class EmbeddingsCache(ABC):
+    """
+    Persistent map from a key (see `CachedEmbeddings.get_cache_key`) to a float32 vector.
+    """
+
+    @abstractmethod
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """
+        Return the vectors stored for the given keys; missing keys are not included.
+        """
+
+    @abstractmethod
+    def put_many(self, vectors: dict[str, np.ndarray]) -> None:
+        """
+        Store the vectors of the given keys.
+        """
+
+
+class LocalEmbeddingsCache(EmbeddingsCache):
+    """
+    Embeddings cache stored in a SQLite database, with the vectors saved as raw float32 values.
+    """
+
+    def __init__(self, path: str | Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        if len(keys) == 0:
+            return {}
+        placeholders = ", ".join("?" for _ in keys)
+        with self._lock:
+            rows = self._connection.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys).fetchall()  # noqa: S608
+        return {key: np.frombuffer(vector, dtype="<f4").astype(np.float32) for key, vector in rows}
+
+    def put_many(self, vectors: dict[str, np.ndarray]) -> None:
+        rows = [(key, np.asarray(vector, dtype="<f4").tobytes()) for key, vector in vectors.items()]
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+
+
+class MongoDBEmbeddingsCache(EmbeddingsCache):
+    """
+    Embeddings cache stored in a MongoDB collection, with the vectors saved as packed float32 BSON binary vectors.
+    """
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        if len(keys) == 0:
+            return {}
+        return {document["_id"]: decode_vector(document["vector"]) for document in self.collection.find({"_id": {"$in": keys}})}
+
+    def put_many(self, vectors: dict[str, np.ndarray]) -> None:
+        if len(vectors) == 0:
+            return
+        operations = [
+            UpdateOne({"_id": key}, {"$setOnInsert": {"vector": encode_vector(vector, EmbeddingsEncoding.float32)[0]}}, upsert=True)
+            for key, vector in vectors.items()
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings that look up the documents in a persistent cache before calling the model, storing the new vectors.
+
+    Only `embed_documents`, used by the ingestion, is cached; queries are always sent to the model. The cache hits,
+    misses and the tokens saved are counted in the metrics.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingsCache, model_id: str, metrics_manager: MetricsManager, model_name: str | None = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_id = model_id
+        self.metrics_manager = metrics_manager
+        self._tokenizer = get_tokenizer(model_name)
+
+    def get_cache_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_id}\n{text}".encode()).hexdigest()
+
+    def _count_tokens(self, texts: list[str]) -> int:
+        return sum(len(tokens) for tokens in self._tokenizer.encode_batch(texts, disallowed_special=()))
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if len(texts) == 0:
+            return []
+
+        keys = [self.get_cache_key(text) for text in texts]
+        cached_vectors = self.cache.get_many(list(set(keys)))
+
+        # Texts repeated in the same batch are embedded once
+        missing_texts = {key: text for key, text in zip(keys, texts, strict=True) if key not in cached_vectors}
+        if missing_texts:
+            new_vectors = self.embeddings.embed_documents(list(missing_texts.values()))
+            new_cached_vectors = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(missing_texts.keys(), new_vectors, strict=True)}
+            self.cache.put_many(new_cached_vectors)
+            cached_vectors.update(new_cached_vectors)
+
+        hit_texts = [text for key, text in zip(keys, texts, strict=True) if key not in missing_texts]
+        self.metrics_manager.embeddings_cache_hits.inc(len(hit_texts))
+        self.metrics_manager.embeddings_cache_misses.inc(len(texts) - len(hit_texts))
+        if hit_texts:
+            self.metrics_manager.embeddings_cache_saved_tokens.inc(self._count_tokens(hit_texts))
+
+        return [cached_vectors[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
@@ -1,21 +1,40 @@
+from pathlib import Path
+
 from langchain_core.embeddings import Embeddings
 from langchain_openai import AzureOpenAIEmbeddings, OpenAIEmbeddings
 
+from src.configurations.service_model import VectorStoreType
 from src.context import AppContext
+from src.infrastracture.embeddings_manager.embeddings_cache import (
+    LOCAL_CACHE_FILE_EXTENSION,
+    CachedEmbeddings,
+    EmbeddingsCache,
+    LocalEmbeddingsCache,
+    MongoDBEmbeddingsCache,
+)
 from src.infrastracture.embeddings_manager.errors import UnsupportedEmbeddingsProviderError
+from src.infrastracture.vector_store_manager.mongodb_atlas_backend import get_mongo_client
+from src.infrastracture.vector_store_manager.vector_store_manager import VectorStoreManager
 
 
 class EmbeddingsManager:
     def __init__(self, app_context: AppContext):
         self.app_context = app_context
 
+    def get_embeddings_model_id(self) -> str:
+        """
+        Return an identifier of the configured embeddings model, that changes whenever the generated embeddings would change.
+        """
+        embeddings_configuration = self.app_context.configurations.embeddings
+        return f"{embeddings_configuration.type}/{embeddings_configuration.name}/{embeddings_configuration.dimensions or 'default'}"
+
     def get_embeddings_instance(self) -> Embeddings:
         embeddings_api_key = self.app_context.env_vars.EMBEDDINGS_API_KEY
         embeddings_configuration = self.app_context.configurations.embeddings
 
         match embeddings_configuration.type:
             case "openai":
-                return OpenAIEmbeddings(openai_api_key=embeddings_api_key, model=embeddings_configuration.name)
+                return OpenAIEmbeddings(openai_api_key=embeddings_api_key, model=embeddings_configuration.name, dimensions=embeddings_configuration.dimensions)
             case "azure":
                 return AzureOpenAIEmbeddings(
                     api_key=embeddings_api_key,
@@ -23,6 +42,48 @@ class EmbeddingsManager:
                     azure_deployment=embeddings_configuration.deploymentName,
                     azure_endpoint=embeddings_configuration.url,
                     model=embeddings_configuration.name,
+                    dimensions=embeddings_configuration.dimensions,
                 )
             case _:
                 raise UnsupportedEmbeddingsProviderError(embeddings_configuration.type)
+
+    def get_embeddings_cache(self) -> EmbeddingsCache | None:
+        """
+        Return the persistent embeddings cache, stored along with the vector store, or None if the cache is disabled.
+        """
+        cache_configuration = self.app_context.configurations.embeddingsCache
+        if cache_configuration is None or not cache_configuration.enabled:
+            return None
+
+        vector_store_configuration = self.app_context.configurations.vectorStore
+        db_name = VectorStoreManager(self.app_context).get_db_name()
+        match vector_store_configuration.type:
+            case VectorStoreType.mongodb:
+                if db_name is None:
+                    raise ValueError("Database name is not provided in the configuration or the cluster URI")
+                client = get_mongo_client(self.app_context.env_vars.MONGODB_CLUSTER_URI)
+                return MongoDBEmbeddingsCache(client[db_name][cache_configuration.collectionName])
+            case _:
+                if not vector_store_configuration.path:
+                    raise ValueError("The path of the local vector store is not provided in the configuration")
+                return LocalEmbeddingsCache(
+                    Path(vector_store_configuration.path, db_name or "", f"{cache_configuration.collectionName}.{LOCAL_CACHE_FILE_EXTENSION}")
+                )
+
+    def get_ingestion_embeddings_instance(self) -> Embeddings:
+        """
+        Return the embeddings model used to ingest documents: when the embeddings cache is enabled, the texts already
+        embedded by the same model are read from the cache instead of being sent to the model.
+        """
+        embeddings = self.get_embeddings_instance()
+        embeddings_cache = self.get_embeddings_cache()
+        if embeddings_cache is None:
+            return embeddings
+
+        return CachedEmbeddings(
+            embeddings=embeddings,
+            cache=embeddings_cache,
+            model_id=self.get_embeddings_model_id(),
+            metrics_manager=self.app_context.metrics_manager,
+            model_name=self.app_context.configurations.embeddings.name,
+        )
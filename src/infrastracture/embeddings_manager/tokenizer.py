@@ -0,0 +1,24 @@
+"""
+Module providing the tokenizer of the embeddings models, used to measure texts in tokens.
+"""
+
+import tiktoken
+
+DEFAULT_TOKENIZER_ENCODING = "cl100k_base"
+
+
+def get_tokenizer(model_name: str | None) -> tiktoken.Encoding:
+    """
+    Return the tokenizer of the given model or, if the model is unknown, the tokenizer of the OpenAI embeddings models.
+    """
+    try:
+        return tiktoken.encoding_for_model(model_name or "")
+    except KeyError:
+        return tiktoken.get_encoding(DEFAULT_TOKENIZER_ENCODING)
+
+
+def count_tokens(tokenizer: tiktoken.Encoding, text: str) -> int:
+    """
+    Return the number of tokens of the text, special tokens being counted as plain text.
+    """
+    return len(tokenizer.encode(text, disallowed_special=()))
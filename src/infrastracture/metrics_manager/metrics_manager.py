@@ -1,6 +1,6 @@
 # pylint: disable=W0511
 from fastapi import Response
-from prometheus_client import Counter, generate_latest
+from prometheus_client import Counter, Gauge, Histogram, generate_latest
 
 
 class MetricsManager:
@@ -25,6 +25,39 @@ class MetricsManager:
             "Number of ingestion tokens consumed",
             namespace="console",  # TODO: add to configurations
         )
+        self._embeddings_cache_hits = Counter(
+            "embeddings_cache_hits",
+            "Number of texts whose embeddings were found in the embeddings cache",
+            namespace="console",  # TODO: add to configurations
+        )
+        self._embeddings_cache_misses = Counter(
+            "embeddings_cache_misses",
+            "Number of texts whose embeddings were not found in the embeddings cache",
+            namespace="console",  # TODO: add to configurations
+        )
+        self._embeddings_cache_saved_tokens = Counter(
+            "embeddings_cache_saved_tokens",
+            "Number of ingestion tokens saved by the embeddings cache",
+            namespace="console",  # TODO: add to configurations
+        )
+        self._ingestion_queue_depth = Gauge(
+            "ingestion_queue_depth",
+            "Number of items waiting in the queue of each stage of the ingestion pipeline",
+            ["stage"],
+            namespace="console",  # TODO: add to configurations
+        )
+        self._ingestion_stage_items = Counter(
+            "ingestion_stage_items",
+            "Number of items processed by each stage of the ingestion pipeline",
+            ["stage"],
+            namespace="console",  # TODO: add to configurations
+        )
+        self._retrieval_source_duration = Histogram(
+            "retrieval_source_duration_seconds",
+            "Duration of the similarity search on each source of the Vector Store",
+            ["source"],
+            namespace="console",  # TODO: add to configurations
+        )
 
     @property
     def embeddings_tokens_consumed(self) -> Counter:
@@ -46,6 +79,36 @@ class MetricsManager:
         """Counter representing the total number of tokens consumed during the data ingestion process."""
         return self._ingestion_tokens_consumed
 
+    @property
+    def embeddings_cache_hits(self) -> Counter:
+        """Counter representing the number of texts whose embeddings were reused from the embeddings cache."""
+        return self._embeddings_cache_hits
+
+    @property
+    def embeddings_cache_misses(self) -> Counter:
+        """Counter representing the number of texts that had to be embedded as they were missing from the embeddings cache."""
+        return self._embeddings_cache_misses
+
+    @property
+    def embeddings_cache_saved_tokens(self) -> Counter:
+        """Counter representing the number of ingestion tokens not consumed thanks to the embeddings cache."""
+        return self._embeddings_cache_saved_tokens
+
+    @property
+    def ingestion_queue_depth(self) -> Gauge:
+        """Gauge representing the number of items waiting in the queue of each stage of the ingestion pipeline, labeled by stage name."""
+        return self._ingestion_queue_depth
+
+    @property
+    def ingestion_stage_items(self) -> Counter:
+        """Counter representing the number of items processed by each stage of the ingestion pipeline, labeled by stage name."""
+        return self._ingestion_stage_items
+
+    @property
+    def retrieval_source_duration(self) -> Histogram:
+        """Histogram representing the duration of the similarity search on each Vector Store source, labeled by source name."""
+        return self._retrieval_source_duration
+
     def expose_metrics(self) -> Response:
         """Generate and return the metrics for Prometheus scraping."""
         metrics_data = generate_latest()
@@ -0,0 +1,106 @@
+"""
+Module providing the crawl manifest, the record of the pages already embedded from a website, stored next to
+the documents of the vector store so that a new crawl only embeds the pages that have changed.
+"""
+
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from attr import Factory, asdict, dataclass
+from pymongo.collection import Collection
+
+CRAWL_MANIFEST_FILE_NAME = "crawl_manifest.jsonl"
+CRAWL_MANIFEST_COLLECTION_SUFFIX = "_crawl_manifest"
+
+
+@dataclass
+class CrawlManifestEntry:
+    """
+    What is known about a page embedded by a previous crawl:
+    - `etag` and `last_modified`: the validators returned by the server, sent back to download the page only if changed
+    - `sha`: the hash of the text of the page, to detect pages whose content did not change
+    - `chunk_ids`: the identifiers of the documents created from the page, replaced when its content changes
+    - `links`: the links of the page, followed even when the page is not downloaded again
+    """
+
+    url: str
+    sha: str
+    etag: str | None = None
+    last_modified: str | None = None
+    chunk_ids: list[str] = Factory(list)
+    links: list[str] = Factory(list)
+
+
+class CrawlManifest(ABC):
+    """
+    Persistent map from the URL of a page to its `CrawlManifestEntry`.
+    """
+
+    @abstractmethod
+    def load(self) -> dict[str, CrawlManifestEntry]:
+        """
+        Return all the entries of the manifest, by URL.
+        """
+
+    @abstractmethod
+    def save(self, entry: CrawlManifestEntry) -> None:
+        """
+        Create or replace the entry of a page.
+        """
+
+
+class LocalCrawlManifest(CrawlManifest):
+    """
+    Crawl manifest stored as a JSON Lines file: entries are appended, the last entry of a URL being the valid one,
+    and the file is compacted when loaded.
+    """
+
+    def __init__(self, directory: str | Path):
+        self._path = Path(directory) / CRAWL_MANIFEST_FILE_NAME
+        self._lock = threading.Lock()
+
+    def load(self) -> dict[str, CrawlManifestEntry]:
+        with self._lock:
+            if not self._path.exists():
+                return {}
+
+            with open(self._path, encoding="utf-8") as manifest_file:
+                lines = [line for line in manifest_file if line.strip()]
+            entries = {entry.url: entry for entry in (CrawlManifestEntry(**json.loads(line)) for line in lines)}
+
+            if len(entries) < len(lines):
+                tmp_path = self._path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+                    manifest_file.writelines(f"{json.dumps(asdict(entry))}\n" for entry in entries.values())
+                os.replace(tmp_path, self._path)
+            return entries
+
+    def save(self, entry: CrawlManifestEntry) -> None:
+        with self._lock:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._path, "a", encoding="utf-8") as manifest_file:
+                manifest_file.write(f"{json.dumps(asdict(entry))}\n")
+
+
+class MongoDBCrawlManifest(CrawlManifest):
+    """
+    Crawl manifest stored in a MongoDB collection, with one document per page identified by its URL.
+    """
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def load(self) -> dict[str, CrawlManifestEntry]:
+        entries = {}
+        for document in self.collection.find({}):
+            url = document.pop("_id")
+            entries[url] = CrawlManifestEntry(url=url, **document)
+        return entries
+
+    def save(self, entry: CrawlManifestEntry) -> None:
+        document = asdict(entry)
+        url = document.pop("url")
+        self.collection.replace_one({"_id": url}, document, upsert=True)
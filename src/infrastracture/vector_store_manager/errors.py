@@ -0,0 +1,25 @@
+class UnsupportedVectorStoreProviderError(Exception):
+    """Exception raised for errors during the creation of the Vector Store backend for a specific provider."""
+
+    def __init__(self, provider_type: str):
+        super().__init__(f'Provider "{provider_type}" for Vector Store is not supported.')
+
+
+class LocalVectorIndexError(Exception):
+    """Exception raised when the files of a local vector index are inconsistent or cannot be used with the current configuration."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class VectorDimensionsMismatchError(Exception):
+    """Exception raised when the embeddings stored in the Vector Store have a number of dimensions different from the configured one."""
+
+    def __init__(self, stored_num_dimensions: int, num_dimensions: int):
+        super().__init__(
+            f"The Vector Store contains embeddings with {stored_num_dimensions} dimensions, while the configured embeddings have {num_dimensions} dimensions: "
+            "use a different collection or delete the existing embeddings"
+        )
+        self.stored_num_dimensions = stored_num_dimensions
+        self.num_dimensions = num_dimensions
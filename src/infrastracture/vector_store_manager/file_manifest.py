@@ -0,0 +1,81 @@
+"""
+Module providing the file manifest, the record of the files whose ingestion completed, stored next to the documents
+of the vector store so that the same file is not ingested again.
+"""
+
+import json
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from pymongo.collection import Collection
+
+FILE_MANIFEST_FILE_NAME = "file_manifest.jsonl"
+FILE_MANIFEST_COLLECTION_SUFFIX = "_file_manifest"
+
+
+class FileManifest(ABC):
+    """
+    Persistent set of the files ingested, identified by the hash of their content and the strategy used to split them.
+
+    A file is recorded only once all its chunks are stored: a file whose ingestion failed or was cancelled is
+    ingested again when uploaded again, skipping the chunks already stored.
+    """
+
+    @abstractmethod
+    def contains(self, file_sha: str, chunking_strategy: str) -> bool:
+        """
+        Return whether the ingestion of the file has completed with the given chunking strategy.
+        """
+
+    @abstractmethod
+    def save(self, file_sha: str, chunking_strategy: str) -> None:
+        """
+        Record the completed ingestion of the file with the given chunking strategy.
+        """
+
+
+class LocalFileManifest(FileManifest):
+    """
+    File manifest stored as a JSON Lines file, with one entry appended per ingested file.
+    """
+
+    def __init__(self, directory: str | Path):
+        self._path = Path(directory) / FILE_MANIFEST_FILE_NAME
+        self._lock = threading.Lock()
+
+    def contains(self, file_sha: str, chunking_strategy: str) -> bool:
+        entry = {"file_sha": file_sha, "chunking_strategy": chunking_strategy}
+        with self._lock:
+            if not self._path.exists():
+                return False
+            with open(self._path, encoding="utf-8") as manifest_file:
+                return any(json.loads(line) == entry for line in manifest_file if line.strip())
+
+    def save(self, file_sha: str, chunking_strategy: str) -> None:
+        if self.contains(file_sha, chunking_strategy):
+            return
+        with self._lock:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._path, "a", encoding="utf-8") as manifest_file:
+                manifest_file.write(f"{json.dumps({'file_sha': file_sha, 'chunking_strategy': chunking_strategy})}\n")
+
+
+class MongoDBFileManifest(FileManifest):
+    """
+    File manifest stored in a MongoDB collection, with one document per file and chunking strategy.
+    """
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    @staticmethod
+    def _get_id(file_sha: str, chunking_strategy: str) -> str:
+        return f"{file_sha}:{chunking_strategy}"
+
+    def contains(self, file_sha: str, chunking_strategy: str) -> bool:
+        return self.collection.find_one({"_id": self._get_id(file_sha, chunking_strategy)}, projection={"_id": 1}) is not None
+
+    def save(self, file_sha: str, chunking_strategy: str) -> None:
+        document = {"file_sha": file_sha, "chunking_strategy": chunking_strategy}
+        self.collection.replace_one({"_id": self._get_id(file_sha, chunking_strategy)}, document, upsert=True)
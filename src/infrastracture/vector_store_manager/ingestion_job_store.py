@@ -0,0 +1,248 @@
+"""
+Module providing the ingestion job store, the record of the embeddings generation jobs and of their progress, stored
+next to the documents of the vector store so that every replica of the service can report the jobs of the others.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from enum import StrEnum
+
+from attr import Factory, asdict, dataclass, evolve
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.collection import Collection
+
+INGESTION_JOBS_COLLECTION_SUFFIX = "_ingestion_jobs"
+
+
+class IngestionJobStatus(StrEnum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+ACTIVE_JOB_STATUSES = (IngestionJobStatus.queued, IngestionJobStatus.running)
+
+
+@dataclass
+class IngestionJobProgress:
+    """
+    The progress of a job: the pages crawled (or documents parsed), the chunks stored with their tokens, and the
+    pages that could not be processed. `total_pages`, when known, is the number of pages to process (or its upper bound).
+    """
+
+    pages: int = 0
+    chunks: int = 0
+    tokens: int = 0
+    errors: int = 0
+    total_pages: int | None = None
+
+
+@dataclass
+class IngestionJob:
+    """
+    An embeddings generation job, from a URL or from a file (`kind`), with its timestamps in seconds since the epoch.
+    `replica` identifies the replica of the service running the job, which refreshes `updated_at` while the job is
+    queued or running (its heartbeat), so that the jobs of a replica that stopped are not reported as active forever.
+    """
+
+    id: str
+    kind: str
+    source: str
+    status: IngestionJobStatus = IngestionJobStatus.queued
+    progress: IngestionJobProgress = Factory(IngestionJobProgress)
+    replica: str | None = None
+    created_at: float = Factory(time.time)
+    updated_at: float | None = None
+    started_at: float | None = None
+    finished_at: float | None = None
+    cancel_requested: bool = False
+    error: str | None = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ACTIVE_JOB_STATUSES
+
+    @property
+    def eta_seconds(self) -> float | None:
+        """
+        The estimated time to complete a running job, based on its processing rate so far, if the number of pages to process is known.
+        """
+        progress = self.progress
+        if self.status != IngestionJobStatus.running or self.started_at is None or progress.total_pages is None or progress.pages == 0:
+            return None
+        elapsed_seconds = time.time() - self.started_at
+        return max(progress.total_pages - progress.pages, 0) * elapsed_seconds / progress.pages
+
+    def to_document(self) -> dict:
+        document = asdict(self)
+        document["_id"] = document.pop("id")
+        return document
+
+    @classmethod
+    def from_document(cls, document: dict) -> "IngestionJob":
+        document = dict(document)
+        return cls(
+            id=document.pop("_id"),
+            status=IngestionJobStatus(document.pop("status")),
+            progress=IngestionJobProgress(**document.pop("progress")),
+            **document,
+        )
+
+
+class IngestionJobStore(ABC):
+    """
+    Persistent map from the identifier of a job to its `IngestionJob`.
+    """
+
+    @abstractmethod
+    def save(self, job: IngestionJob) -> bool:
+        """
+        Create or replace the job, except for its cancellation request, which is only set by `request_cancel`.
+
+        Returns:
+            bool: Whether the cancellation of the job has been requested (e.g. by another replica).
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> IngestionJob | None:
+        """
+        Return the job with the given identifier, or None if it does not exist.
+        """
+
+    @abstractmethod
+    def list_jobs(self, limit: int) -> list[IngestionJob]:
+        """
+        Return the `limit` most recent jobs, the newest first.
+        """
+
+    @abstractmethod
+    def has_active_jobs(self, updated_after: float | None = None) -> bool:
+        """
+        Return whether at least one job is queued or running, ignoring the jobs whose heartbeat is not more recent
+        than `updated_after`, if set.
+        """
+
+    @abstractmethod
+    def touch(self, job_ids: list[str], updated_at: float) -> None:
+        """
+        Save the heartbeat of the jobs, without changing anything else.
+        """
+
+    @abstractmethod
+    def fail_orphaned_jobs(self, replica: str, created_before: float, error: str) -> int:
+        """
+        Mark as failed the queued and running jobs of the replica created before the given time, i.e. before the
+        replica started again, returning their number.
+        """
+
+    @abstractmethod
+    def request_cancel(self, job_id: str) -> IngestionJob | None:
+        """
+        Request the cancellation of a queued or running job, returning the job, or None if it does not exist.
+        Finished jobs are returned unchanged.
+        """
+
+
+class InMemoryIngestionJobStore(IngestionJobStore):
+    """
+    Ingestion job store kept in memory, for the `local` vector store, which is used by a single replica.
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, IngestionJob] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: IngestionJob) -> bool:
+        with self._lock:
+            previous_job = self._jobs.get(job.id)
+            cancel_requested = previous_job is not None and previous_job.cancel_requested
+            self._jobs[job.id] = evolve(job, progress=evolve(job.progress), cancel_requested=cancel_requested)
+            return cancel_requested
+
+    def get(self, job_id: str) -> IngestionJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, limit: int) -> list[IngestionJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)[:limit]
+
+    def has_active_jobs(self, updated_after: float | None = None) -> bool:
+        with self._lock:
+            return any(job.is_active and (updated_after is None or (job.updated_at or 0) > updated_after) for job in self._jobs.values())
+
+    def touch(self, job_ids: list[str], updated_at: float) -> None:
+        with self._lock:
+            for job_id in job_ids:
+                if job_id in self._jobs:
+                    self._jobs[job_id] = evolve(self._jobs[job_id], updated_at=updated_at)
+
+    def fail_orphaned_jobs(self, replica: str, created_before: float, error: str) -> int:
+        with self._lock:
+            orphaned_jobs = [job for job in self._jobs.values() if job.is_active and job.replica == replica and job.created_at < created_before]
+            for job in orphaned_jobs:
+                self._jobs[job.id] = evolve(job, status=IngestionJobStatus.failed, error=error, finished_at=time.time())
+            return len(orphaned_jobs)
+
+    def request_cancel(self, job_id: str) -> IngestionJob | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.is_active:
+                job = self._jobs[job_id] = evolve(job, cancel_requested=True)
+            return job
+
+
+class MongoDBIngestionJobStore(IngestionJobStore):
+    """
+    Ingestion job store kept in a MongoDB collection, with one document per job identified by its identifier.
+    """
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def save(self, job: IngestionJob) -> bool:
+        document = job.to_document()
+        document.pop("cancel_requested")
+        # The cancellation request is read back with the same round trip that saves the job
+        saved_document = self.collection.find_one_and_update(
+            {"_id": document.pop("_id")},
+            {"$set": document, "$setOnInsert": {"cancel_requested": False}},
+            projection={"cancel_requested": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return bool(saved_document and saved_document.get("cancel_requested"))
+
+    def get(self, job_id: str) -> IngestionJob | None:
+        document = self.collection.find_one({"_id": job_id})
+        return IngestionJob.from_document(document) if document is not None else None
+
+    def list_jobs(self, limit: int) -> list[IngestionJob]:
+        return [IngestionJob.from_document(document) for document in self.collection.find({}).sort("created_at", DESCENDING).limit(limit)]
+
+    def has_active_jobs(self, updated_after: float | None = None) -> bool:
+        query = {"status": {"$in": [status.value for status in ACTIVE_JOB_STATUSES]}}
+        if updated_after is not None:
+            query["updated_at"] = {"$gt": updated_after}
+        return self.collection.find_one(query, projection={"_id": 1}) is not None
+
+    def touch(self, job_ids: list[str], updated_at: float) -> None:
+        self.collection.update_many({"_id": {"$in": job_ids}}, {"$set": {"updated_at": updated_at}})
+
+    def fail_orphaned_jobs(self, replica: str, created_before: float, error: str) -> int:
+        result = self.collection.update_many(
+            {"replica": replica, "status": {"$in": [status.value for status in ACTIVE_JOB_STATUSES]}, "created_at": {"$lt": created_before}},
+            {"$set": {"status": IngestionJobStatus.failed.value, "error": error, "finished_at": time.time()}},
+        )
+        return result.modified_count
+
+    def request_cancel(self, job_id: str) -> IngestionJob | None:
+        document = self.collection.find_one_and_update(
+            {"_id": job_id, "status": {"$in": [status.value for status in ACTIVE_JOB_STATUSES]}},
+            {"$set": {"cancel_requested": True}},
+            return_document=ReturnDocument.AFTER,
+        )
+        return IngestionJob.from_document(document) if document is not None else self.get(job_id)
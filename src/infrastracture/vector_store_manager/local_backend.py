@@ -0,0 +1,102 @@
+import uuid
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.infrastracture.vector_store_manager.crawl_manifest import CrawlManifest, LocalCrawlManifest
+from src.infrastracture.vector_store_manager.file_manifest import FileManifest, LocalFileManifest
+from src.infrastracture.vector_store_manager.ingestion_job_store import IngestionJobStore, InMemoryIngestionJobStore
+from src.infrastracture.vector_store_manager.local_vector_index import LocalVectorIndex, get_local_vector_index
+from src.infrastracture.vector_store_manager.vector_store_backend import VectorStoreBackend, VectorStoreBackendParams
+
+
+class LocalVectorStoreBackend(VectorStoreBackend):
+    """
+    Vector store persisted in the local filesystem, that does not require any external service.
+
+    Documents are stored in `<path>/<dbName>/<collectionName>` (or `<path>/<collectionName>` if no database name is set)
+    using the same layout of the MongoDB documents: the text in `textKey` and the metadata as top-level fields.
+    """
+
+    def __init__(self, params: VectorStoreBackendParams):
+        super().__init__(params)
+        if not params.local_path:
+            raise ValueError("The path of the local vector store is not provided in the configuration")
+
+        self._directory = Path(params.local_path, params.db_name or "", params.collection_name)
+        self._index: LocalVectorIndex | None = None
+
+    @property
+    def index(self) -> LocalVectorIndex:
+        if self._index is None:
+            self._index = get_local_vector_index(self._directory, self.params.index_name)
+        return self._index
+
+    def add_documents(self, documents: list[Document], ids: list[str] | None = None, vectors: np.ndarray | None = None) -> list[str]:
+        if len(documents) == 0:
+            return []
+
+        if vectors is None:
+            vectors = self.embeddings.embed_documents([document.page_content for document in documents])
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if ids is None:
+            ids = [uuid.uuid4().hex for _ in documents]
+        else:
+            # Documents with the same identifiers are replaced
+            self.index.delete_ids(ids)
+        records = [{"_id": _id, self.params.text_key: document.page_content, **document.metadata} for _id, document in zip(ids, documents, strict=True)]
+
+        self.index.add(records, vectors)
+        return ids
+
+    def similarity_search(self, query: str, k: int, max_score_distance: float | None = None, min_score_distance: float | None = None) -> list[Document]:
+        query_vector = self.embeddings.embed_query(query)
+        results = self.index.search(query_vector, k, self.relevance_score_fn)
+
+        results = self._apply_score_thresholds(results, max_score_distance, min_score_distance)
+
+        documents = []
+        for record, score in results:
+            metadata = {key: value for key, value in record.items() if key != self.params.text_key}
+            metadata["score"] = score
+            documents.append(Document(page_content=record[self.params.text_key], metadata=metadata))
+        return documents
+
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        return self.index.get_existing_ids(ids)
+
+    def delete_by_metadata(self, metadata: dict[str, Any]) -> int:
+        return self.index.delete(metadata)
+
+    def delete_by_ids(self, ids: list[str]) -> int:
+        return self.index.delete_ids(ids)
+
+    def get_crawl_manifest(self) -> CrawlManifest:
+        return LocalCrawlManifest(self._directory)
+
+    def get_file_manifest(self) -> FileManifest:
+        return LocalFileManifest(self._directory)
+
+    def get_ingestion_job_store(self) -> IngestionJobStore:
+        # The local vector store is used by a single replica, so the jobs are only kept in memory
+        return InMemoryIngestionJobStore()
+
+    def get_stored_num_dimensions(self) -> int | None:
+        return self.index.num_dimensions
+
+    def update_index(self) -> None:
+        index_name = self.params.index_name
+        self.logger.info(f'Check of local vector index "{index_name}" in {self._directory}')
+
+        stored_dimensions = self.index.num_dimensions
+        if stored_dimensions is None:
+            self.logger.info(f'Local vector index "{index_name}" is empty, it will be populated by the embeddings generation')
+        elif stored_dimensions != self.params.num_dimensions:
+            self.logger.warning(
+                f'Local vector index "{index_name}" contains vectors with {stored_dimensions} dimensions, '
+                f"while {self.params.num_dimensions} are expected: the embeddings must be generated again"
+            )
+        else:
+            self.logger.info(f'Local vector index "{index_name}" is up-to-date ({len(self.index)} documents)')
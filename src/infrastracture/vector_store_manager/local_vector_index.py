@@ -0,0 +1,249 @@
+"""
+Module providing the LocalVectorIndex class, a persistent vector index stored in the local filesystem.
+"""
+
+import json
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.configurations.service_model import RelevanceScoreFn
+from src.infrastracture.vector_store_manager.errors import LocalVectorIndexError
+from src.infrastracture.vector_store_manager.similarity import compute_relevance_scores, top_k_indices
+
+DOCUMENTS_FILE_EXTENSION = "documents.jsonl"
+VECTORS_FILE_EXTENSION = "f32"
+METADATA_FILE_EXTENSION = "meta.json"
+
+
+class LocalVectorIndex:
+    """
+    An exact (brute force) vector index kept in memory as a NumPy matrix and persisted in a directory.
+
+    The directory contains three files per index:
+    - `<index_name>.documents.jsonl`, one JSON document per line (text, metadata and `_id`)
+    - `<index_name>.f32`, the raw float32 vectors, one row per document
+    - `<index_name>.meta.json`, the number of dimensions of the vectors
+
+    Inserts are appended to both the vectors and the documents files, so bulk loads do not rewrite what is already
+    stored; deletions rewrite the files atomically. If the process stops between the two appends, the files are
+    truncated to the rows written to both of them when the index is loaded. All the operations are thread-safe, and
+    instances are shared through `get_local_vector_index` so that every component of the application works on the same
+    in-memory copy.
+    """
+
+    def __init__(self, directory: str | Path, index_name: str):
+        self._directory = Path(directory)
+        self._documents_path = self._directory / f"{index_name}.{DOCUMENTS_FILE_EXTENSION}"
+        self._vectors_path = self._directory / f"{index_name}.{VECTORS_FILE_EXTENSION}"
+        self._metadata_path = self._directory / f"{index_name}.{METADATA_FILE_EXTENSION}"
+        self._lock = threading.RLock()
+
+        self._documents: list[dict[str, Any]] = []
+        self._ids: set[Any] = set()
+        # Vectors and their squared norms are kept in buffers that grow geometrically, so that
+        # appending a batch does not copy the whole matrix; only the first `_size` rows are valid.
+        self._buffer = np.empty((0, 0), dtype=np.float32)
+        self._squared_norms_buffer = np.empty(0, dtype=np.float32)
+        self._size = 0
+
+        self._load()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def num_dimensions(self) -> int | None:
+        """The number of dimensions of the stored vectors, or None if the index is empty."""
+        return self._buffer.shape[1] if self._size > 0 else None
+
+    @property
+    def _vectors(self) -> np.ndarray:
+        return self._buffer[: self._size]
+
+    @property
+    def _squared_norms(self) -> np.ndarray:
+        return self._squared_norms_buffer[: self._size]
+
+    def _set_vectors(self, vectors: np.ndarray) -> None:
+        self._buffer = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._squared_norms_buffer = np.einsum("ij,ij->i", self._buffer, self._buffer)
+        self._size = self._buffer.shape[0]
+
+    def _append_vectors(self, vectors: np.ndarray) -> None:
+        if self._size == 0:
+            self._set_vectors(vectors)
+            return
+
+        required_size = self._size + vectors.shape[0]
+        if required_size > self._buffer.shape[0]:
+            capacity = max(required_size, 2 * self._buffer.shape[0])
+            buffer = np.empty((capacity, self._buffer.shape[1]), dtype=np.float32)
+            buffer[: self._size] = self._vectors
+            squared_norms_buffer = np.empty(capacity, dtype=np.float32)
+            squared_norms_buffer[: self._size] = self._squared_norms
+            self._buffer, self._squared_norms_buffer = buffer, squared_norms_buffer
+
+        self._buffer[self._size : required_size] = vectors
+        self._squared_norms_buffer[self._size : required_size] = np.einsum("ij,ij->i", vectors, vectors)
+        self._size = required_size
+
+    def _load(self) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        if not self._documents_path.exists() or not self._vectors_path.exists():
+            return
+
+        with open(self._documents_path, encoding="utf-8") as documents_file:
+            lines = [line for line in documents_file if line.strip()]
+        # A line without its line break was being written when the process stopped
+        documents = [json.loads(line) for line in lines if line.endswith("\n")]
+        vectors = np.fromfile(self._vectors_path, dtype=np.float32)
+
+        num_dimensions = self._load_num_dimensions(len(documents), vectors.size)
+        if num_dimensions is None:
+            return
+        # The process may have stopped between the appends to the two files: only the rows written to both are kept
+        size = min(len(documents), vectors.size // num_dimensions)
+
+        self._documents = documents[:size]
+        self._ids = {document.get("_id") for document in self._documents}
+        self._set_vectors(vectors[: size * num_dimensions].reshape(size, num_dimensions))
+        if size != len(lines) or vectors.size != size * num_dimensions:
+            self._persist()
+
+    def _load_num_dimensions(self, documents_count: int, values_count: int) -> int | None:
+        if self._metadata_path.exists():
+            with open(self._metadata_path, encoding="utf-8") as metadata_file:
+                return json.load(metadata_file)["num_dimensions"]
+        if documents_count == 0:
+            return None
+        if values_count % documents_count != 0:
+            raise LocalVectorIndexError(f"The local vector index in {self._directory} is corrupted: {documents_count} documents and {values_count} values")
+        num_dimensions = values_count // documents_count
+        self._save_num_dimensions(num_dimensions)
+        return num_dimensions
+
+    def _save_num_dimensions(self, num_dimensions: int) -> None:
+        metadata_tmp_path = self._metadata_path.with_suffix(".tmp")
+        with open(metadata_tmp_path, "w", encoding="utf-8") as metadata_file:
+            json.dump({"num_dimensions": num_dimensions}, metadata_file)
+        os.replace(metadata_tmp_path, self._metadata_path)
+
+    def _persist(self) -> None:
+        """Rewrite both files atomically (used after deletions)."""
+        documents_tmp_path = self._documents_path.with_suffix(".tmp")
+        vectors_tmp_path = self._vectors_path.with_suffix(".tmp")
+
+        with open(documents_tmp_path, "w", encoding="utf-8") as documents_file:
+            documents_file.writelines(f"{json.dumps(document)}\n" for document in self._documents)
+        self._vectors.tofile(vectors_tmp_path)
+
+        os.replace(vectors_tmp_path, self._vectors_path)
+        os.replace(documents_tmp_path, self._documents_path)
+
+    def add(self, documents: list[dict[str, Any]], vectors: np.ndarray) -> None:
+        """
+        Append documents and their vectors to the index and to the files.
+
+        Args:
+            documents (list[dict[str, Any]]): The JSON-serializable documents to store.
+            vectors (np.ndarray): A matrix with one row per document.
+        """
+        if len(documents) == 0:
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(documents), vectors.shape[-1]):
+            raise LocalVectorIndexError(f"Expected {len(documents)} vectors, received an array of shape {vectors.shape}")
+
+        with self._lock:
+            if self.num_dimensions is not None and vectors.shape[1] != self.num_dimensions:
+                raise LocalVectorIndexError(f"Cannot add vectors with {vectors.shape[1]} dimensions to an index with {self.num_dimensions} dimensions")
+            if self.num_dimensions is None:
+                self._save_num_dimensions(vectors.shape[1])
+
+            with open(self._vectors_path, "ab") as vectors_file:
+                vectors_file.write(vectors.tobytes())
+            with open(self._documents_path, "a", encoding="utf-8") as documents_file:
+                documents_file.writelines(f"{json.dumps(document)}\n" for document in documents)
+
+            self._documents.extend(documents)
+            self._ids.update(document.get("_id") for document in documents)
+            self._append_vectors(vectors)
+
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        """
+        Return the identifiers, among the given ones, of the documents stored in the index.
+        """
+        with self._lock:
+            return {_id for _id in ids if _id in self._ids}
+
+    def delete(self, metadata: dict[str, Any]) -> int:
+        """
+        Delete the documents having all the given key/value pairs.
+
+        Returns:
+            int: The number of deleted documents.
+        """
+        return self._delete_where(lambda document: all(document.get(key) == value for key, value in metadata.items()))
+
+    def delete_ids(self, ids: list[str]) -> int:
+        """
+        Delete the documents with the given `_id`.
+
+        Returns:
+            int: The number of deleted documents.
+        """
+        ids = set(ids)
+        return self._delete_where(lambda document: document.get("_id") in ids)
+
+    def _delete_where(self, predicate: Callable[[dict[str, Any]], bool]) -> int:
+        with self._lock:
+            keep = np.array([not predicate(document) for document in self._documents], dtype=bool)
+            deleted_count = int(len(self._documents) - keep.sum())
+            if deleted_count == 0:
+                return 0
+
+            self._documents = [document for document, kept in zip(self._documents, keep, strict=True) if kept]
+            self._ids = {document.get("_id") for document in self._documents}
+            self._set_vectors(self._vectors[keep])
+            self._persist()
+            return deleted_count
+
+    def search(self, query: list[float] | np.ndarray, k: int, similarity: RelevanceScoreFn) -> list[tuple[dict[str, Any], float]]:
+        """
+        Return the `k` documents most similar to the query vector, sorted by descending score.
+        """
+        query = np.asarray(query, dtype=np.float32)
+
+        # Take a consistent snapshot: appends never modify the rows that are already valid
+        with self._lock:
+            documents, vectors, squared_norms = self._documents, self._vectors, self._squared_norms
+
+        if vectors.shape[0] == 0 or k <= 0:
+            return []
+        if query.shape[0] != vectors.shape[1]:
+            raise LocalVectorIndexError(f"Query vector has {query.shape[0]} dimensions, the index has {vectors.shape[1]} dimensions")
+
+        scores = compute_relevance_scores(vectors, query, similarity, squared_norms)
+
+        return [(documents[i], float(scores[i])) for i in top_k_indices(scores, k)]
+
+
+_indexes: dict[tuple[Path, str], LocalVectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_local_vector_index(directory: str | Path, index_name: str) -> LocalVectorIndex:
+    """
+    Return the shared instance of the local vector index stored in the given directory, loading it on first use.
+    """
+    key = (Path(directory).resolve(), index_name)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = LocalVectorIndex(directory, index_name)
+        return _indexes[key]
@@ -0,0 +1,419 @@
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+import bson
+import numpy as np
+from bson import ObjectId
+from langchain_community.vectorstores.mongodb_atlas import MongoDBAtlasVectorSearch
+from langchain_core.documents import Document
+from pymongo import MongoClient
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, ConnectionFailure
+from pymongo.operations import ReplaceOne, SearchIndexModel
+from pymongo.write_concern import WriteConcern
+
+from src.configurations.service_model import EmbeddingsEncoding, IndexQuantization, RelevanceScoreFn
+from src.constants import MAX_VECTOR_SEARCH_CANDIDATES, VECTOR_INDEX_TYPE
+from src.infrastracture.vector_store_manager.crawl_manifest import CRAWL_MANIFEST_COLLECTION_SUFFIX, CrawlManifest, MongoDBCrawlManifest
+from src.infrastracture.vector_store_manager.file_manifest import FILE_MANIFEST_COLLECTION_SUFFIX, FileManifest, MongoDBFileManifest
+from src.infrastracture.vector_store_manager.ingestion_job_store import INGESTION_JOBS_COLLECTION_SUFFIX, IngestionJobStore, MongoDBIngestionJobStore
+from src.infrastracture.vector_store_manager.similarity import compute_relevance_scores, top_k_indices, truncate_vectors
+from src.infrastracture.vector_store_manager.vector_encoding import (
+    SCALE_KEY_SUFFIX,
+    decode_vector,
+    encode_query_vector,
+    encode_vector,
+    get_vector_num_dimensions,
+)
+from src.infrastracture.vector_store_manager.vector_store_backend import BulkWriteParams, VectorStoreBackend, VectorStoreBackendParams
+
+DUPLICATE_KEY_ERROR_CODE = 11000
+# Codes of the write errors that may succeed when written again: network errors, elections, interruptions and write conflicts
+TRANSIENT_WRITE_ERROR_CODES = frozenset({6, 7, 50, 64, 89, 91, 112, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436})
+
+_clients: dict[str, MongoClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_mongo_client(mongodb_cluster_uri: str) -> MongoClient:
+    """
+    Return the shared client of the given MongoDB cluster, so that every backend uses the same connection pool.
+    """
+    with _clients_lock:
+        if mongodb_cluster_uri not in _clients:
+            _clients[mongodb_cluster_uri] = MongoClient(mongodb_cluster_uri, connect=False)
+        return _clients[mongodb_cluster_uri]
+
+
+class MongoDBAtlasVectorStoreBackend(VectorStoreBackend):
+    """
+    Vector store backed by a MongoDB collection and a MongoDB Atlas Vector Search index.
+
+    The connection is opened lazily, the first time the collection is required, and the client (with its
+    connection pool) is shared by all the backends connected to the same cluster.
+
+    When the Matryoshka configuration is set, every document also stores a shortened copy of its embedding,
+    indexed by a second Vector Search index: the search retrieves `numCandidates` documents with the short
+    vectors, then re-ranks them locally with the full vectors.
+
+    With an embeddings encoding other than `array`, the embeddings are stored as packed BSON binary vectors
+    (optionally quantized, with their scale stored in `<embeddingKey>_scale`) and queried accordingly.
+    """
+
+    def __init__(self, params: VectorStoreBackendParams):
+        super().__init__(params)
+        if params.matryoshka is not None and params.matryoshka.num_dimensions >= params.num_dimensions:
+            raise ValueError(f"The Matryoshka embeddings must have less than {params.num_dimensions} dimensions")
+        if self.embeddings_encoding in (EmbeddingsEncoding.int8, EmbeddingsEncoding.int1) and self.index_quantization != IndexQuantization.none:
+            raise ValueError(f'The index quantization is not available for embeddings already quantized with the "{self.embeddings_encoding.value}" encoding')
+        # MongoDB Atlas only indexes the int1 vectors with the euclidean similarity (the Hamming distance), and ignores the
+        # per-vector scale of the int8 vectors, so that only the cosine similarity ranks them as their original embeddings
+        if self.embeddings_encoding == EmbeddingsEncoding.int1 and self.index_similarity_fn != RelevanceScoreFn.euclidean:
+            raise ValueError(f'The "int1" embeddings encoding requires the "euclidean" relevance score function, not "{self.index_similarity_fn.value}"')
+        if self.embeddings_encoding == EmbeddingsEncoding.int8 and self.index_similarity_fn != RelevanceScoreFn.cosine:
+            raise ValueError(f'The "int8" embeddings encoding requires the "cosine" relevance score function, not "{self.index_similarity_fn.value}"')
+        self._collection: Collection | None = None
+        self._vector_search: MongoDBAtlasVectorSearch | None = None
+
+    @property
+    def embeddings_encoding(self) -> EmbeddingsEncoding:
+        return EmbeddingsEncoding(self.params.embeddings_encoding or EmbeddingsEncoding.array)
+
+    @property
+    def index_quantization(self) -> IndexQuantization:
+        return IndexQuantization(self.params.index_quantization or IndexQuantization.none)
+
+    @property
+    def index_similarity_fn(self) -> RelevanceScoreFn:
+        return RelevanceScoreFn(self.params.relevance_score_fn or RelevanceScoreFn.cosine)
+
+    @property
+    def collection(self) -> Collection:
+        if self._collection is None:
+            client = get_mongo_client(self.params.mongodb_cluster_uri)
+            self._collection = client[self.params.db_name][self.params.collection_name]
+        return self._collection
+
+    @property
+    def vector_search(self) -> MongoDBAtlasVectorSearch:
+        if self._vector_search is None:
+            self._vector_search = MongoDBAtlasVectorSearch(
+                collection=self.collection,
+                embedding=self.embeddings,
+                index_name=self.params.index_name,
+                embedding_key=self.params.embedding_key,
+                relevance_score_fn=self.relevance_score_fn.value,
+                text_key=self.params.text_key,
+            )
+        return self._vector_search
+
+    @property
+    def _uses_langchain_vector_search(self) -> bool:
+        # The LangChain integration only handles full embeddings stored as arrays
+        return self.params.matryoshka is None and self.embeddings_encoding == EmbeddingsEncoding.array
+
+    def _get_vector_fields(self, embedding_key: str, vector: np.ndarray) -> dict[str, Any]:
+        value, scale = encode_vector(vector, self.embeddings_encoding)
+        if scale is None:
+            return {embedding_key: value}
+        return {embedding_key: value, f"{embedding_key}{SCALE_KEY_SUFFIX}": scale}
+
+    def _get_vector_field_names(self, embedding_key: str) -> list[str]:
+        if self.embeddings_encoding in (EmbeddingsEncoding.int8, EmbeddingsEncoding.int1):
+            return [embedding_key, f"{embedding_key}{SCALE_KEY_SUFFIX}"]
+        return [embedding_key]
+
+    @property
+    def bulk_write_params(self) -> BulkWriteParams:
+        return self.params.bulk_write or BulkWriteParams()
+
+    def _get_bulk_write_collection(self) -> Collection:
+        bulk_write_params = self.bulk_write_params
+        if bulk_write_params.w is None and bulk_write_params.journal is None:
+            return self.collection
+        return self.collection.with_options(write_concern=WriteConcern(w=bulk_write_params.w, j=bulk_write_params.journal))
+
+    def _iter_batches_by_size(self, items: list[Any], records: list[dict[str, Any]]) -> list[list[Any]]:
+        """
+        Split the items into batches whose records do not exceed `max_batch_bytes` once encoded in BSON.
+        """
+        batches: list[list[Any]] = [[]]
+        batch_bytes = 0
+        for item, record in zip(items, records, strict=True):
+            record_bytes = len(bson.encode(record))
+            if batches[-1] and batch_bytes + record_bytes > self.bulk_write_params.max_batch_bytes:
+                batches.append([])
+                batch_bytes = 0
+            batches[-1].append(item)
+            batch_bytes += record_bytes
+        return batches
+
+    @staticmethod
+    def _get_items_to_retry(error: BulkWriteError, items: list[Any], inserts: bool) -> list[Any]:
+        """
+        Return the items of a failed bulk write to write again, raising the error if any of them failed for a reason
+        that is not transient (e.g. a validation error or a document too large).
+        """
+        write_errors = error.details.get("writeErrors", [])
+        # An insert failing with a duplicate key was written by a previous attempt, whose reply was lost, while
+        # the same error on an upsert is caused by a concurrent upsert of the same document
+        if inserts:
+            write_errors = [write_error for write_error in write_errors if write_error.get("code") != DUPLICATE_KEY_ERROR_CODE]
+        if any(write_error.get("code") not in TRANSIENT_WRITE_ERROR_CODES | {DUPLICATE_KEY_ERROR_CODE} for write_error in write_errors):
+            raise error
+        if write_errors:
+            return [items[write_error["index"]] for write_error in write_errors]
+        # Errors of the write concern do not include the failed documents, all of them are written again
+        if error.details.get("writeConcernErrors"):
+            return items
+        return []
+
+    def _write_with_retries(self, write: Callable[[list[Any]], Any], items: list[Any], inserts: bool = False) -> None:
+        """
+        Write the items with an unordered bulk operation: when some of them fail with a transient error, only these
+        are written again, up to `max_retries` times, while a lost connection writes again the whole batch. Upserts are
+        idempotent, and inserts of documents already written by a previous attempt (`inserts`) are not failures.
+        """
+        bulk_write_params = self.bulk_write_params
+        for attempt in range(bulk_write_params.max_retries + 1):
+            try:
+                write(items)
+                return
+            except BulkWriteError as ex:
+                items = self._get_items_to_retry(ex, items, inserts)
+                if not items:
+                    return
+                if attempt == bulk_write_params.max_retries:
+                    raise
+            except ConnectionFailure:
+                if attempt == bulk_write_params.max_retries:
+                    raise
+            self.logger.warning(f"Bulk write of {len(items)} documents failed, retrying ({attempt + 1}/{bulk_write_params.max_retries})")
+            time.sleep(bulk_write_params.retry_backoff_seconds * 2**attempt)
+
+    def add_documents(self, documents: list[Document], ids: list[str] | None = None, vectors: np.ndarray | None = None) -> list[str]:
+        """
+        Store the documents with unordered bulk writes of at most `bulkWrite.maxBatchBytes` bytes, using the
+        `bulkWrite` write concern: documents with identifiers are upserted, the other ones are inserted.
+        """
+        if len(documents) == 0:
+            return []
+
+        matryoshka = self.params.matryoshka
+        if vectors is None:
+            vectors = self.embeddings.embed_documents([document.page_content for document in documents])
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        short_vectors = truncate_vectors(vectors, matryoshka.num_dimensions) if matryoshka is not None else [None] * len(documents)
+
+        records = []
+        for document, vector, short_vector in zip(documents, vectors, short_vectors, strict=True):
+            record = {self.params.text_key: document.page_content, **self._get_vector_fields(self.params.embedding_key, vector)}
+            if short_vector is not None:
+                record.update(self._get_vector_fields(matryoshka.embedding_key, short_vector))
+            records.append({**record, **document.metadata})
+
+        collection = self._get_bulk_write_collection()
+        if ids is None:
+            # The identifiers are assigned before the first attempt, so that retries do not create duplicates
+            for record in records:
+                record.setdefault("_id", ObjectId())
+            for batch in self._iter_batches_by_size(records, records):
+                self._write_with_retries(lambda items: collection.insert_many(items, ordered=False), batch, inserts=True)
+            return [record.get("_id") for record in records]
+
+        # Documents are upserted by identifier, so that storing the same documents again does not create duplicates
+        operations = [ReplaceOne({"_id": _id}, record, upsert=True) for _id, record in zip(ids, records, strict=True)]
+        for batch in self._iter_batches_by_size(operations, records):
+            self._write_with_retries(lambda items: collection.bulk_write(items, ordered=False), batch)
+        return ids
+
+    def _get_post_filter_pipeline(self, max_score_distance: float | None, min_score_distance: float | None):
+        if max_score_distance is not None:
+            return [
+                {
+                    "$match": {"score": {"$lte": max_score_distance}},
+                }
+            ]
+        if min_score_distance is not None:
+            return [
+                {
+                    "$match": {"score": {"$gte": min_score_distance}},
+                }
+            ]
+        return None
+
+    def _get_vector_search_stage(self, query_vector: np.ndarray, embedding_key: str, index_name: str, limit: int) -> dict[str, Any]:
+        return {
+            "$vectorSearch": {
+                "queryVector": encode_query_vector(query_vector, self.embeddings_encoding),
+                "path": embedding_key,
+                "numCandidates": min(limit * 10, MAX_VECTOR_SEARCH_CANDIDATES),
+                "limit": limit,
+                "index": index_name,
+            }
+        }
+
+    def _to_document(self, record: dict[str, Any], score: float | None = None) -> Document:
+        text = record.pop(self.params.text_key)
+        if score is not None:
+            record["score"] = score
+        return Document(page_content=text, metadata=record)
+
+    def _single_stage_similarity_search(self, query: str, k: int, max_score_distance: float | None, min_score_distance: float | None) -> list[Document]:
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+
+        pipeline = [
+            self._get_vector_search_stage(query_vector, self.params.embedding_key, self.params.index_name, k),
+            {"$set": {"score": {"$meta": "vectorSearchScore"}}},
+            {"$project": dict.fromkeys(self._get_vector_field_names(self.params.embedding_key), 0)},
+            *(self._get_post_filter_pipeline(max_score_distance, min_score_distance) or []),
+        ]
+        return [self._to_document(record) for record in self.collection.aggregate(pipeline)]
+
+    def _two_stage_similarity_search(self, query: str, k: int, max_score_distance: float | None, min_score_distance: float | None) -> list[Document]:
+        matryoshka = self.params.matryoshka
+        embedding_key = self.params.embedding_key
+        scale_key = f"{embedding_key}{SCALE_KEY_SUFFIX}"
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+
+        # First stage: approximate search of the candidates on the short vectors
+        limit = max(matryoshka.num_candidates, k)
+        pipeline = [
+            self._get_vector_search_stage(truncate_vectors(query_vector, matryoshka.num_dimensions), matryoshka.embedding_key, matryoshka.index_name, limit),
+            {"$project": dict.fromkeys(self._get_vector_field_names(matryoshka.embedding_key), 0)},
+        ]
+        candidates = [candidate for candidate in self.collection.aggregate(pipeline) if candidate.get(embedding_key) is not None]
+        if len(candidates) == 0:
+            return []
+
+        # Second stage: exact re-ranking of the candidates with the full vectors
+        vectors = np.asarray([decode_vector(candidate.pop(embedding_key), candidate.pop(scale_key, None)) for candidate in candidates], dtype=np.float32)
+        scores = compute_relevance_scores(vectors, query_vector, self.relevance_score_fn)
+        results = self._apply_score_thresholds([(candidates[i], float(scores[i])) for i in top_k_indices(scores, k)], max_score_distance, min_score_distance)
+
+        return [self._to_document(candidate, score) for candidate, score in results]
+
+    def similarity_search(self, query: str, k: int, max_score_distance: float | None = None, min_score_distance: float | None = None) -> list[Document]:
+        if self.params.matryoshka is not None:
+            return self._two_stage_similarity_search(query, k, max_score_distance, min_score_distance)
+        if not self._uses_langchain_vector_search:
+            return self._single_stage_similarity_search(query, k, max_score_distance, min_score_distance)
+
+        return self.vector_search.similarity_search(
+            query,
+            k=k,
+            additional={"similarity_score": True},
+            post_filter_pipeline=self._get_post_filter_pipeline(max_score_distance, min_score_distance),
+        )
+
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if len(ids) == 0:
+            return set()
+        return {document["_id"] for document in self.collection.find({"_id": {"$in": ids}}, projection={"_id": 1})}
+
+    def delete_by_metadata(self, metadata: dict[str, Any]) -> int:
+        # Metadata are stored as top-level fields of each MongoDB document
+        return self.collection.delete_many(metadata).deleted_count
+
+    def delete_by_ids(self, ids: list[str]) -> int:
+        if len(ids) == 0:
+            return 0
+        # Identifiers generated by MongoDB are ObjectIds, serialized as strings by the callers
+        object_ids = [ObjectId(_id) if ObjectId.is_valid(_id) else _id for _id in ids]
+        return self.collection.delete_many({"_id": {"$in": object_ids}}).deleted_count
+
+    def get_crawl_manifest(self) -> CrawlManifest:
+        return MongoDBCrawlManifest(self.collection.database[f"{self.params.collection_name}{CRAWL_MANIFEST_COLLECTION_SUFFIX}"])
+
+    def get_file_manifest(self) -> FileManifest:
+        return MongoDBFileManifest(self.collection.database[f"{self.params.collection_name}{FILE_MANIFEST_COLLECTION_SUFFIX}"])
+
+    def get_ingestion_job_store(self) -> IngestionJobStore:
+        return MongoDBIngestionJobStore(self.collection.database[f"{self.params.collection_name}{INGESTION_JOBS_COLLECTION_SUFFIX}"])
+
+    def get_stored_num_dimensions(self) -> int | None:
+        embedding_key = self.params.embedding_key
+        document = self.collection.find_one({embedding_key: {"$exists": True}}, projection={embedding_key: 1, "_id": 0})
+        if document is None:
+            return None
+        return get_vector_num_dimensions(document[embedding_key])
+
+    def _init_collection(self) -> Collection:
+        client = get_mongo_client(self.params.mongodb_cluster_uri)
+        db = client[self.params.db_name]
+        collection_name = self.params.collection_name
+
+        # Create the collection if it does not exist
+        if collection_name not in db.list_collection_names():
+            self.logger.info(f'Collection "{collection_name}" missing, it will be created now')
+            db.create_collection(collection_name)
+        self._collection = db[collection_name]
+        return self._collection
+
+    def _create_vector_index(self, new_index_definition: SearchIndexModel) -> None:
+        index_name = new_index_definition.document.get("name")
+        self.logger.info(f'Vector Search index "{index_name}" missing in {self.collection.name}, it will be created now')
+        self.logger.debug(f'Creating Vector Search index to the following definition: "{new_index_definition.document.get("definition")}"')
+        self.collection.create_search_index(model=new_index_definition)
+        self.logger.info(f'Created Vector Search index "{index_name}"')
+
+    def _update_vector_index(self, current_index_definition: SearchIndexModel, new_index_definition: SearchIndexModel):
+        index_name = new_index_definition.document.get("name")
+        self.logger.info(f'Check of MongoDB Vector Search index "{index_name}"')
+
+        current_fields = current_index_definition.document.get("definition")
+        new_fields = new_index_definition.document.get("definition")
+
+        if current_fields == new_fields:
+            self.logger.info("Vector Search index is up-to-date, no further action required")
+            return
+
+        self.logger.debug(f'Updating Vector Search index to the following definition: "{new_fields.get("fields")}"')
+        self.collection.update_search_index(index_name, new_fields)
+        self.logger.info(f'Updated Vector Search index "{index_name}" in collection {self.collection.name}')
+
+    def _get_current_vector_index_definitions(self) -> dict[str, SearchIndexModel]:
+        return {
+            index["name"]: SearchIndexModel(definition=index.get("latestDefinition"), name=index.get("name"), type="vectorSearch")
+            for index in self.collection.list_search_indexes()
+        }
+
+    def _get_updated_vector_index_definition(self, index_name: str, embedding_key: str, num_dimensions: int) -> SearchIndexModel:
+        vector_field = {
+            "numDimensions": num_dimensions,
+            "path": embedding_key,
+            "similarity": self.index_similarity_fn.value,
+            "type": "vector",
+        }
+        if self.index_quantization != IndexQuantization.none:
+            vector_field["quantization"] = self.index_quantization.value
+
+        return SearchIndexModel(
+            definition={"fields": [vector_field]},
+            name=index_name,
+            type=VECTOR_INDEX_TYPE,
+        )
+
+    def _get_updated_vector_index_definitions(self) -> list[SearchIndexModel]:
+        definitions = [self._get_updated_vector_index_definition(self.params.index_name, self.params.embedding_key, self.params.num_dimensions)]
+
+        matryoshka = self.params.matryoshka
+        if matryoshka is not None:
+            definitions.append(self._get_updated_vector_index_definition(matryoshka.index_name, matryoshka.embedding_key, matryoshka.num_dimensions))
+        return definitions
+
+    def update_index(self) -> None:
+        self._init_collection()
+
+        current_vector_index_definitions = self._get_current_vector_index_definitions()
+
+        for new_vector_index_definition in self._get_updated_vector_index_definitions():
+            current_vector_index_definition = current_vector_index_definitions.get(new_vector_index_definition.document.get("name"))
+
+            if current_vector_index_definition is None:
+                self._create_vector_index(new_vector_index_definition)
+            else:
+                self._update_vector_index(current_vector_index_definition, new_vector_index_definition)
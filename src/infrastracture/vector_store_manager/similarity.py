@@ -0,0 +1,56 @@
+"""
+Module providing vectorized similarity functions shared by the vector store backends.
+"""
+
+import numpy as np
+
+from src.configurations.service_model import RelevanceScoreFn
+
+
+def compute_relevance_scores(vectors: np.ndarray, query: np.ndarray, similarity: RelevanceScoreFn, squared_norms: np.ndarray | None = None) -> np.ndarray:
+    """
+    Compute the relevance score of each row of `vectors` against `query`, with the same normalization
+    used by MongoDB Atlas Vector Search, so that score thresholds can be shared between backends.
+
+    Args:
+        vectors (np.ndarray): A matrix with one vector per row.
+        query (np.ndarray): The query vector.
+        similarity (RelevanceScoreFn): The similarity function.
+        squared_norms (np.ndarray | None): The precomputed squared norms of the rows, if available.
+    """
+    if squared_norms is None:
+        squared_norms = np.einsum("ij,ij->i", vectors, vectors)
+
+    dot_products = vectors @ query
+    match similarity:
+        case RelevanceScoreFn.cosine:
+            norms = np.sqrt(squared_norms) * np.linalg.norm(query)
+            cosine = np.divide(dot_products, norms, out=np.zeros_like(dot_products), where=norms > 0)
+            return (1 + cosine) / 2
+        case RelevanceScoreFn.dotProduct:
+            return (1 + dot_products) / 2
+        case _:
+            squared_distances = np.maximum(squared_norms - 2 * dot_products + query @ query, 0)
+            return 1 / (1 + np.sqrt(squared_distances))
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the `k` highest scores, sorted by descending score.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    indices = np.argpartition(-scores, k - 1)[:k]
+    return indices[np.argsort(-scores[indices])]
+
+
+def truncate_vectors(vectors: np.ndarray, num_dimensions: int) -> np.ndarray:
+    """
+    Shorten Matryoshka embeddings (such as the ones of `text-embedding-3-*` models) to their first
+    `num_dimensions` values, re-normalizing each vector to unit length.
+    """
+    truncated = np.asarray(vectors, dtype=np.float32)[..., :num_dimensions]
+    norms = np.linalg.norm(truncated, axis=-1, keepdims=True)
+    return np.divide(truncated, norms, out=np.zeros_like(truncated), where=norms > 0)
@@ -0,0 +1,118 @@
+"""
+Module providing the conversion of embeddings to and from the BSON binary vector format (binData subtype 9).
+
+A BSON binary vector is made of a header of two bytes (the data type and, for packed bits, the number of
+padding bits of the last byte) followed by the little-endian values.
+"""
+
+from enum import IntEnum
+from typing import Any
+
+import numpy as np
+from bson.binary import Binary
+
+from src.configurations.service_model import EmbeddingsEncoding
+
+BSON_VECTOR_SUBTYPE = 9
+INT8_MAX_VALUE = 127
+
+SCALE_KEY_SUFFIX = "_scale"
+
+
+class BinaryVectorDtype(IntEnum):
+    """The data types of a BSON binary vector, as defined by the BSON specification."""
+
+    FLOAT32 = 0x27
+    INT8 = 0x03
+    PACKED_BIT = 0x10
+
+
+def _to_binary(dtype: BinaryVectorDtype, data: bytes, padding: int = 0) -> Binary:
+    return Binary(bytes((dtype, padding)) + data, BSON_VECTOR_SUBTYPE)
+
+
+def quantize_vector(vector: np.ndarray, encoding: EmbeddingsEncoding) -> tuple[np.ndarray, float]:
+    """
+    Quantize a vector for the `int8` and `int1` encodings, returning the quantized values and the scale
+    that approximately restores the original vector (`vector ≈ values * scale`).
+
+    - `int8`: symmetric quantization, the largest absolute value is mapped to 127
+    - `int1`: the sign of each value, the scale is the mean absolute value
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    if encoding == EmbeddingsEncoding.int1:
+        return (vector > 0).astype(np.uint8), float(np.abs(vector).mean()) if vector.size > 0 else 0.0
+
+    max_abs_value = float(np.abs(vector).max()) if vector.size > 0 else 0.0
+    scale = max_abs_value / INT8_MAX_VALUE if max_abs_value > 0 else 1.0
+    return np.clip(np.rint(vector / scale), -INT8_MAX_VALUE, INT8_MAX_VALUE).astype(np.int8), scale
+
+
+def encode_vector(vector: np.ndarray, encoding: EmbeddingsEncoding) -> tuple[Any, float | None]:
+    """
+    Convert a vector to the value to store in MongoDB according to the encoding.
+
+    Returns:
+        tuple[Any, float | None]: The value to store and, for the quantized encodings, the scale of the vector.
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    match encoding:
+        case EmbeddingsEncoding.float32:
+            return _to_binary(BinaryVectorDtype.FLOAT32, vector.astype("<f4").tobytes()), None
+        case EmbeddingsEncoding.int8:
+            values, scale = quantize_vector(vector, encoding)
+            return _to_binary(BinaryVectorDtype.INT8, values.tobytes()), scale
+        case EmbeddingsEncoding.int1:
+            bits, scale = quantize_vector(vector, encoding)
+            return _to_binary(BinaryVectorDtype.PACKED_BIT, np.packbits(bits).tobytes(), padding=-vector.shape[0] % 8), scale
+        case _:
+            return vector.tolist(), None
+
+
+def encode_query_vector(vector: np.ndarray, encoding: EmbeddingsEncoding) -> Any:
+    """
+    Convert a query vector to the format expected by `$vectorSearch` for the given encoding: quantized
+    embeddings must be queried with a vector of the same type, while float vectors are sent as arrays.
+    """
+    if encoding in (EmbeddingsEncoding.int8, EmbeddingsEncoding.int1):
+        return encode_vector(vector, encoding)[0]
+    return np.asarray(vector, dtype=np.float32).tolist()
+
+
+def decode_vector(value: Any, scale: float | None = None) -> np.ndarray:
+    """
+    Convert a value stored in MongoDB (an array or a BSON binary vector) to a float32 vector, applying
+    the scale to the quantized vectors.
+    """
+    if not isinstance(value, Binary) or value.subtype != BSON_VECTOR_SUBTYPE:
+        return np.asarray(value, dtype=np.float32)
+
+    dtype, padding, data = value[0], value[1], bytes(value[2:])
+    match dtype:
+        case BinaryVectorDtype.FLOAT32:
+            return np.frombuffer(data, dtype="<f4").astype(np.float32)
+        case BinaryVectorDtype.INT8:
+            return np.frombuffer(data, dtype=np.int8).astype(np.float32) * (scale or 1.0)
+        case BinaryVectorDtype.PACKED_BIT:
+            bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+            bits = bits[: bits.shape[0] - padding]
+            return np.where(bits > 0, 1.0, -1.0).astype(np.float32) * (scale or 1.0)
+        case _:
+            raise ValueError(f"Unsupported BSON binary vector data type: {dtype:#04x}")
+
+
+def get_vector_num_dimensions(value: Any) -> int:
+    """
+    Return the number of dimensions of a vector stored in MongoDB, without decoding it.
+    """
+    if not isinstance(value, Binary) or value.subtype != BSON_VECTOR_SUBTYPE:
+        return len(value)
+
+    dtype, padding, data_size = value[0], value[1], len(value) - 2
+    match dtype:
+        case BinaryVectorDtype.FLOAT32:
+            return data_size // 4
+        case BinaryVectorDtype.PACKED_BIT:
+            return data_size * 8 - padding
+        case _:
+            return data_size
@@ -0,0 +1,183 @@
+from abc import ABC, abstractmethod
+from logging import Logger
+from typing import Any
+
+import numpy as np
+from attr import dataclass
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.configurations.service_model import EmbeddingsEncoding, IndexQuantization, RelevanceScoreFn, VectorStoreType
+from src.constants import DEFAULT_NUM_DIMENSIONS_VALUE
+from src.infrastracture.vector_store_manager.crawl_manifest import CrawlManifest
+from src.infrastracture.vector_store_manager.errors import VectorDimensionsMismatchError
+from src.infrastracture.vector_store_manager.file_manifest import FileManifest
+from src.infrastracture.vector_store_manager.ingestion_job_store import IngestionJobStore
+
+
+@dataclass
+class MatryoshkaParams:
+    embedding_key: str
+    index_name: str
+    num_dimensions: int = 256
+    num_candidates: int = 100
+
+
+@dataclass
+class BulkWriteParams:
+    max_batch_bytes: int = 8 * 1024 * 1024
+    w: int | str | None = None
+    journal: bool | None = None
+    max_retries: int = 2
+    retry_backoff_seconds: float = 0.5
+
+
+@dataclass
+class VectorStoreBackendParams:
+    logger: Logger
+    collection_name: str
+    index_name: str
+    embedding_key: str
+    text_key: str
+    relevance_score_fn: RelevanceScoreFn | str = RelevanceScoreFn.euclidean
+    type: VectorStoreType | str = VectorStoreType.mongodb
+    embeddings: Embeddings | None = None
+    num_dimensions: int = DEFAULT_NUM_DIMENSIONS_VALUE
+    mongodb_cluster_uri: str | None = None
+    db_name: str | None = None
+    local_path: str | None = None
+    matryoshka: MatryoshkaParams | None = None
+    embeddings_encoding: EmbeddingsEncoding | str = EmbeddingsEncoding.array
+    index_quantization: IndexQuantization | str = IndexQuantization.none
+    bulk_write: BulkWriteParams | None = None
+
+
+class VectorStoreBackend(ABC):
+    """
+    Common interface of the vector stores supported by the application.
+
+    Retrieval (`RetrieverChain`), ingestion (`EmbeddingsService`) and index management (`VectorSearchIndexUpdater`)
+    interact with the vector store only through this interface, so that the storage can be changed from the configuration.
+
+    Documents returned by `similarity_search` include the relevance score in the `score` metadata field. The score
+    follows the MongoDB Atlas Vector Search normalization (the higher, the more similar) regardless of the backend,
+    so that `maxScoreDistance` and `minScoreDistance` behave the same way.
+    """
+
+    def __init__(self, params: VectorStoreBackendParams):
+        self.params = params
+        self.logger = params.logger
+
+    @property
+    def embeddings(self) -> Embeddings:
+        if self.params.embeddings is None:
+            raise ValueError("An embeddings instance is required to read or write documents in the vector store")
+        return self.params.embeddings
+
+    @property
+    def relevance_score_fn(self) -> RelevanceScoreFn:
+        return RelevanceScoreFn(self.params.relevance_score_fn or RelevanceScoreFn.euclidean)
+
+    @staticmethod
+    def _apply_score_thresholds(
+        results: list[tuple[Any, float]], max_score_distance: float | None, min_score_distance: float | None
+    ) -> list[tuple[Any, float]]:
+        # Thresholds are applied after the top-k selection, as done by the MongoDB post filter pipeline
+        if max_score_distance is not None:
+            return [(result, score) for result, score in results if score <= max_score_distance]
+        if min_score_distance is not None:
+            return [(result, score) for result, score in results if score >= min_score_distance]
+        return results
+
+    @abstractmethod
+    def add_documents(self, documents: list[Document], ids: list[str] | None = None, vectors: np.ndarray | None = None) -> list[str]:
+        """
+        Generate the embeddings of the documents and store them in bulk.
+
+        Args:
+            documents (list[Document]): The documents to store.
+            ids (list[str] | None): The identifiers of the documents, if chosen by the caller: documents with an identifier
+                already stored replace the existing ones (upsert). If None, new identifiers are generated.
+            vectors (np.ndarray | None): The embeddings of the documents, if already computed by the caller (one row per
+                document). If None, the embeddings are generated by the embeddings model.
+
+        Returns:
+            list[str]: The identifiers of the stored documents.
+        """
+
+    @abstractmethod
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        """
+        Return the identifiers, among the given ones, of the documents already stored.
+        """
+
+    @abstractmethod
+    def similarity_search(self, query: str, k: int, max_score_distance: float | None = None, min_score_distance: float | None = None) -> list[Document]:
+        """
+        Retrieve the `k` documents most similar to the query.
+
+        Args:
+            query (str): The text to look up documents similar to.
+            k (int): The maximum number of documents to return.
+            max_score_distance (float | None): If set, documents with a score greater than this value are discarded.
+            min_score_distance (float | None): If set (and `max_score_distance` is not), documents with a score lower than this value are discarded.
+        """
+
+    @abstractmethod
+    def delete_by_metadata(self, metadata: dict[str, Any]) -> int:
+        """
+        Delete every document whose metadata matches all the given key/value pairs.
+
+        Returns:
+            int: The number of deleted documents.
+        """
+
+    @abstractmethod
+    def delete_by_ids(self, ids: list[str]) -> int:
+        """
+        Delete the documents with the given identifiers, as returned by `add_documents`.
+
+        Returns:
+            int: The number of deleted documents.
+        """
+
+    @abstractmethod
+    def get_crawl_manifest(self) -> CrawlManifest:
+        """
+        Return the manifest of the crawled pages, stored next to the documents.
+        """
+
+    @abstractmethod
+    def get_file_manifest(self) -> FileManifest:
+        """
+        Return the manifest of the ingested files, stored next to the documents.
+        """
+
+    @abstractmethod
+    def get_ingestion_job_store(self) -> IngestionJobStore:
+        """
+        Return the store of the ingestion jobs, shared by the replicas of the service using the same vector store.
+        """
+
+    @abstractmethod
+    def get_stored_num_dimensions(self) -> int | None:
+        """
+        Return the number of dimensions of the embeddings already stored, or None if the store is empty.
+        """
+
+    def validate_num_dimensions(self) -> None:
+        """
+        Ensure that new embeddings can be added without mixing vectors of different sizes in the same collection.
+
+        Raises:
+            VectorDimensionsMismatchError: If the stored embeddings have a number of dimensions different from the configured one.
+        """
+        stored_num_dimensions = self.get_stored_num_dimensions()
+        if stored_num_dimensions is not None and stored_num_dimensions != self.params.num_dimensions:
+            raise VectorDimensionsMismatchError(stored_num_dimensions, self.params.num_dimensions)
+
+    @abstractmethod
+    def update_index(self) -> None:
+        """
+        Create or update the index structures required by the backend, according to the configuration.
+        """
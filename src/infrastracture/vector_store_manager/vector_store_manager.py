@@ -0,0 +1,127 @@
+from attr import evolve
+from langchain_core.embeddings import Embeddings
+from pymongo.uri_parser import parse_uri
+
+from src.configurations.service_model import VectorStoreType
+from src.constants import DEFAULT_NUM_DIMENSIONS_VALUE, DIMENSIONS_DICT
+from src.context import AppContext
+from src.infrastracture.vector_store_manager.errors import UnsupportedVectorStoreProviderError
+from src.infrastracture.vector_store_manager.local_backend import LocalVectorStoreBackend
+from src.infrastracture.vector_store_manager.mongodb_atlas_backend import MongoDBAtlasVectorStoreBackend
+from src.infrastracture.vector_store_manager.vector_store_backend import BulkWriteParams, MatryoshkaParams, VectorStoreBackend, VectorStoreBackendParams
+
+
+def create_vector_store_backend(params: VectorStoreBackendParams) -> VectorStoreBackend:
+    """
+    Create the vector store backend matching the type included in the params.
+    """
+    try:
+        vector_store_type = VectorStoreType(params.type)
+    except ValueError as ex:
+        raise UnsupportedVectorStoreProviderError(params.type) from ex
+
+    match vector_store_type:
+        case VectorStoreType.mongodb:
+            if params.db_name is None:
+                raise ValueError("Database name is not provided in the configuration or the cluster URI")
+            return MongoDBAtlasVectorStoreBackend(params)
+        case VectorStoreType.local:
+            if params.matryoshka is not None:
+                raise ValueError("Matryoshka retrieval is supported only by the 'mongodb' vector store")
+            return LocalVectorStoreBackend(params)
+        case _:
+            raise UnsupportedVectorStoreProviderError(params.type)
+
+
+class VectorStoreManager:
+    def __init__(self, app_context: AppContext):
+        self.app_context = app_context
+
+    def get_db_name(self) -> str | None:
+        """
+        Return the configured database name or, if missing, the default database of the MongoDB cluster URI.
+        """
+        db_name = self.app_context.configurations.vectorStore.dbName
+        mongodb_cluster_uri = self.app_context.env_vars.MONGODB_CLUSTER_URI
+
+        if db_name is None and mongodb_cluster_uri is not None and self.app_context.configurations.vectorStore.type == VectorStoreType.mongodb:
+            db_name = parse_uri(mongodb_cluster_uri).get("database")
+        return db_name
+
+    def get_num_dimensions(self) -> int:
+        """
+        Return the number of dimensions of the embeddings: the configured one or, if missing, the default size of the model.
+        """
+        embeddings_configuration = self.app_context.configurations.embeddings
+        if embeddings_configuration.dimensions is not None:
+            return embeddings_configuration.dimensions
+        return DIMENSIONS_DICT.get(embeddings_configuration.name, DEFAULT_NUM_DIMENSIONS_VALUE)
+
+    def get_matryoshka_params(self) -> MatryoshkaParams | None:
+        matryoshka_configuration = self.app_context.configurations.vectorStore.matryoshka
+        if matryoshka_configuration is None:
+            return None
+
+        return MatryoshkaParams(
+            embedding_key=matryoshka_configuration.embeddingKey,
+            index_name=matryoshka_configuration.indexName,
+            num_dimensions=matryoshka_configuration.numDimensions,
+            num_candidates=matryoshka_configuration.numCandidates,
+        )
+
+    def get_bulk_write_params(self) -> BulkWriteParams:
+        bulk_write_configuration = self.app_context.configurations.vectorStore.bulkWrite
+        if bulk_write_configuration is None:
+            return BulkWriteParams()
+
+        return BulkWriteParams(
+            max_batch_bytes=bulk_write_configuration.maxBatchBytes,
+            w=bulk_write_configuration.w,
+            journal=bulk_write_configuration.journal,
+            max_retries=bulk_write_configuration.maxRetries,
+            retry_backoff_seconds=bulk_write_configuration.retryBackoffSeconds,
+        )
+
+    def get_vector_store_params(self, embeddings: Embeddings | None = None) -> VectorStoreBackendParams:
+        vector_store_configuration = self.app_context.configurations.vectorStore
+
+        return VectorStoreBackendParams(
+            logger=self.app_context.logger,
+            type=vector_store_configuration.type,
+            collection_name=vector_store_configuration.collectionName,
+            index_name=vector_store_configuration.indexName,
+            embedding_key=vector_store_configuration.embeddingKey,
+            text_key=vector_store_configuration.textKey,
+            relevance_score_fn=vector_store_configuration.relevanceScoreFn,
+            embeddings=embeddings,
+            num_dimensions=self.get_num_dimensions(),
+            mongodb_cluster_uri=self.app_context.env_vars.MONGODB_CLUSTER_URI,
+            db_name=self.get_db_name(),
+            local_path=vector_store_configuration.path,
+            matryoshka=self.get_matryoshka_params(),
+            embeddings_encoding=vector_store_configuration.embeddingsEncoding,
+            index_quantization=vector_store_configuration.indexQuantization,
+            bulk_write=self.get_bulk_write_params(),
+        )
+
+    def get_vector_store_instance(self, embeddings: Embeddings | None = None) -> VectorStoreBackend:
+        return create_vector_store_backend(self.get_vector_store_params(embeddings))
+
+    def get_source_vector_store_instances(self, embeddings: Embeddings | None = None) -> list[VectorStoreBackend]:
+        """
+        Return a backend for each of the configured sources, which share the settings of the vector store
+        except for the database, the collection and the index.
+        """
+        params = self.get_vector_store_params(embeddings)
+
+        return [
+            create_vector_store_backend(
+                evolve(
+                    params,
+                    collection_name=source.collectionName,
+                    index_name=source.indexName or params.index_name,
+                    db_name=source.dbName or params.db_name,
+                )
+            )
+            for source in self.app_context.configurations.vectorStore.sources or []
+        ]
@@ -1,5 +1,7 @@
 # NOTE: clear_prometheus is needed to clear the prometheus registry before each test run in order to avoid conflicts between tests.
 from tests.fixtures.clear_prometheus import clear_prometheus_registry
+# NOTE: clear_mongo_clients drops the shared MongoDB clients, so that tests patching MongoClient always receive a new instance.
+from tests.fixtures.mongo_clients import clear_mongo_clients
 from tests.fixtures.test_client import test_client
 from tests.fixtures.mock_server import mock_server
 from tests.fixtures.logger import fixture_logger
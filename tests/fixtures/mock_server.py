@@ -1,6 +1,8 @@
 import httpretty
 import pytest
 
+from src.infrastracture.vector_store_manager import mongodb_atlas_backend
+
 
 class MockServer:
     """
@@ -18,6 +20,10 @@ class MockServer:
         self._respx_mock.clear()
         self._respx_mock.reset()
         self._respx_mock.stop()
+        # The monitor threads of the MongoDB clients must be stopped while the sockets are still mocked, as a mocked
+        # socket connecting once HTTPretty is disabled mocks the sockets again
+        for client in mongodb_atlas_backend._clients.values():  # pylint: disable=W0212
+            client.close()
         httpretty.reset()
         httpretty.disable()
 
@@ -0,0 +1,11 @@
+import pytest
+
+from src.infrastracture.vector_store_manager import mongodb_atlas_backend
+
+
+@pytest.fixture(autouse=True)
+def clear_mongo_clients():
+    # pylint: disable=W0212
+    mongodb_atlas_backend._clients.clear()
+    yield
+    mongodb_atlas_backend._clients.clear()
@@ -1,34 +1,188 @@
+import hashlib
 import io
-from unittest.mock import patch
+import threading
+import time
+from unittest.mock import ANY, patch
 from zipfile import ZipFile
 
 import pytest
 
-from src.api.controllers.embeddings.embeddings_handler import router
+from src.application.embeddings.ingestion_job_manager import IngestionJobManager
+from src.application.embeddings.web_crawler import CrawlBudget
+from src.configurations.service_model import ChunkingStrategy, IngestionExecutor
+from src.infrastracture.vector_store_manager.ingestion_job_store import IngestionJob, IngestionJobStatus, InMemoryIngestionJobStore
+
+IS_FILE_INGESTED_PATH = "src.application.embeddings.embedding_service.EmbeddingsService.is_file_ingested"
+GENERATE_FROM_URL_PATH = "src.application.embeddings.embedding_service.EmbeddingsService.generate_from_url"
+
+
+@pytest.fixture(autouse=True)
+def job_store():
+    store = InMemoryIngestionJobStore()
+    with patch("src.infrastracture.vector_store_manager.mongodb_atlas_backend.MongoDBAtlasVectorStoreBackend.get_ingestion_job_store", return_value=store):
+        yield store
+
+
+@pytest.fixture(autouse=True)
+def thread_executor(app_context):
+    # The jobs run in the test process, where the services are patched
+    app_context.configurations.ingestionJobs.executor = IngestionExecutor.thread
+
+
+def wait_for_job(test_client, response):
+    assert response.status_code == 200
+    test_client.app.state.ingestion_job_manager.wait(response.json()["jobId"], timeout=5)
 
 
 def test_generate_embeddings_from_url_success(test_client):
     url = "http://example.com"
     data = {"url": url}
 
-    with patch("src.api.controllers.embeddings.embeddings_handler.EmbeddingsService.generate_from_url") as mock_generate:
+    with patch(GENERATE_FROM_URL_PATH) as mock_generate:
         response = test_client.post("/embeddings/generate", json=data)
+        wait_for_job(test_client, response)
 
-        assert response.status_code == 200
-        assert response.json() == {"statusOk": True}
-        mock_generate.assert_called_once_with(url, None)
+        assert response.json() == {"statusOk": True, "jobId": response.json()["jobId"]}
+        mock_generate.assert_called_once_with(url, None, budget=CrawlBudget(), use_sitemap=False, chunking_strategy=None)
 
 
-def test_generate_embeddings_from_url_conflict(test_client):
+def test_generate_embeddings_from_url_with_budget(test_client):
     url = "http://example.com"
-    data = {"url": url}
+    data = {"url": url, "maxDepth": 2, "maxPages": 100, "maxDurationSeconds": 60, "maxBytes": 1000000, "useSitemap": True}
+
+    with patch(GENERATE_FROM_URL_PATH) as mock_generate:
+        response = test_client.post("/embeddings/generate", json=data)
+        wait_for_job(test_client, response)
+
+        mock_generate.assert_called_once_with(
+            url, None, budget=CrawlBudget(max_depth=2, max_pages=100, max_duration_seconds=60, max_bytes=1000000), use_sitemap=True, chunking_strategy=None
+        )
+
+
+def test_generate_embeddings_from_url_with_chunking_strategy(test_client):
+    with patch(GENERATE_FROM_URL_PATH) as mock_generate:
+        response = test_client.post("/embeddings/generate", json={"url": "http://example.com", "chunkingStrategy": "markdown"})
+        wait_for_job(test_client, response)
+
+        assert mock_generate.call_args.kwargs["chunking_strategy"] == ChunkingStrategy.markdown
+
+
+def test_generate_embeddings_from_url_invalid_chunking_strategy(test_client):
+    response = test_client.post("/embeddings/generate", json={"url": "http://example.com", "chunkingStrategy": "unknown"})
+
+    assert response.status_code == 422
+
+
+def test_generate_embeddings_from_url_invalid_budget(test_client):
+    response = test_client.post("/embeddings/generate", json={"url": "http://example.com", "maxPages": 0})
+
+    assert response.status_code == 422
+
+
+def test_generate_embeddings_from_urls_in_parallel(test_client):
+    # Both crawls must run at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    with patch(GENERATE_FROM_URL_PATH, side_effect=lambda *args, **kwargs: barrier.wait()) as mock_generate:
+        responses = [test_client.post("/embeddings/generate", json={"url": url}) for url in ("http://a.example.com", "http://b.example.com")]
+        for response in responses:
+            wait_for_job(test_client, response)
+
+        assert mock_generate.call_count == 2
+        assert [test_client.get(f"/embeddings/jobs/{response.json()['jobId']}").json()["status"] for response in responses] == ["completed", "completed"]
+
+
+def test_queue_jobs_beyond_the_maximum_concurrent_jobs(app_context, test_client):
+    app_context.configurations.ingestionJobs.maxConcurrentJobs = 1
+    test_client.app.state.ingestion_job_manager = IngestionJobManager(app_context)
+    release = threading.Event()
+
+    with patch(GENERATE_FROM_URL_PATH, side_effect=lambda *args, **kwargs: release.wait(5)):
+        first_job_id = test_client.post("/embeddings/generate", json={"url": "http://a.example.com"}).json()["jobId"]
+        second_job_id = test_client.post("/embeddings/generate", json={"url": "http://b.example.com"}).json()["jobId"]
+
+        assert test_client.get(f"/embeddings/jobs/{second_job_id}").json()["status"] == "queued"
+        assert test_client.get("/embeddings/status").json() == {"status": "running"}
+
+        release.set()
+        test_client.app.state.ingestion_job_manager.wait(first_job_id, timeout=5)
+        test_client.app.state.ingestion_job_manager.wait(second_job_id, timeout=5)
+
+    assert test_client.get(f"/embeddings/jobs/{second_job_id}").json()["status"] == "completed"
+    assert test_client.get("/embeddings/status").json() == {"status": "idle"}
+
+
+def test_report_failed_jobs(test_client):
+    with patch(GENERATE_FROM_URL_PATH, side_effect=RuntimeError("Crawl failed")):
+        response = test_client.post("/embeddings/generate", json={"url": "http://example.com"})
+        wait_for_job(test_client, response)
+
+    job = test_client.get(f"/embeddings/jobs/{response.json()['jobId']}").json()
+    assert job["status"] == "failed"
+    assert job["error"] == "Crawl failed"
+    assert job["kind"] == "url"
+    assert job["source"] == "http://example.com"
+
+
+def test_cancel_running_job(test_client):
+    started = threading.Event()
+
+    def crawl(*args, **kwargs):
+        started.set()
+        # The crawl checks its cancellation at each page
+        tracker = test_client.app.state.ingestion_job_manager._trackers[job_id]  # pylint: disable=W0212
+        while not tracker.is_cancelled:
+            threading.Event().wait(0.01)
+        tracker.check_cancelled()
+
+    with patch(GENERATE_FROM_URL_PATH, side_effect=crawl):
+        response = test_client.post("/embeddings/generate", json={"url": "http://example.com"})
+        job_id = response.json()["jobId"]
+        assert started.wait(5)
+
+        cancel_response = test_client.delete(f"/embeddings/jobs/{job_id}")
+        assert cancel_response.status_code == 200
+        assert cancel_response.json()["cancelRequested"] is True
+        wait_for_job(test_client, response)
+
+    assert test_client.get(f"/embeddings/jobs/{job_id}").json()["status"] == "cancelled"
+    assert test_client.delete(f"/embeddings/jobs/{job_id}").status_code == 409
 
-    router.lock = True  # Simulate a process already in progress
-    response = test_client.post("/embeddings/generate", json=data)
 
-    assert response.status_code == 409
-    assert response.json() == {"detail": "A process to generate embeddings is already in progress."}
-    router.lock = False  # Reset lock for other tests
+def test_cancel_queued_job(test_client, app_context):
+    release = threading.Event()
+    max_concurrent_jobs = app_context.configurations.ingestionJobs.maxConcurrentJobs
+
+    with patch(GENERATE_FROM_URL_PATH, side_effect=lambda *args, **kwargs: release.wait(5)):
+        responses = [test_client.post("/embeddings/generate", json={"url": f"http://{i}.example.com"}) for i in range(max_concurrent_jobs + 1)]
+        job_id = responses[-1].json()["jobId"]
+
+        cancel_response = test_client.delete(f"/embeddings/jobs/{job_id}")
+        release.set()
+        for response in responses:
+            wait_for_job(test_client, response)
+
+    assert cancel_response.status_code == 200
+    assert cancel_response.json()["status"] == "cancelled"
+    assert test_client.get(f"/embeddings/jobs/{job_id}").json()["status"] == "cancelled"
+
+
+def test_list_jobs(test_client):
+    with patch(GENERATE_FROM_URL_PATH):
+        responses = [test_client.post("/embeddings/generate", json={"url": url}) for url in ("http://a.example.com", "http://b.example.com")]
+        for response in responses:
+            wait_for_job(test_client, response)
+
+    response = test_client.get("/embeddings/jobs")
+
+    assert response.status_code == 200
+    assert {job["id"] for job in response.json()["jobs"]} == {response.json()["jobId"] for response in responses}
+    assert len(test_client.get("/embeddings/jobs", params={"limit": 1}).json()["jobs"]) == 1
+
+
+def test_get_unknown_job(test_client):
+    assert test_client.get("/embeddings/jobs/unknown").status_code == 404
+    assert test_client.delete("/embeddings/jobs/unknown").status_code == 404
 
 
 @pytest.mark.parametrize(
@@ -41,18 +195,19 @@ def test_generate_embeddings_from_url_conflict(test_client):
 )
 def test_generate_embeddings_from_file(test_client, file_name, file_content, content_type):
     with (
-        patch("src.api.controllers.embeddings.embeddings_handler.EmbeddingsService.generate_from_text") as mock_generate_from_text,
+        patch("src.application.embeddings.embedding_service.EmbeddingsService.generate_from_texts") as mock_generate_from_texts,
         patch("src.application.embeddings.file_parser.file_parser.FileParser.extract_documents_from_file") as mock_extract_documents_from_file,
+        patch(IS_FILE_INGESTED_PATH, return_value=False),
     ):
         mock_extract_documents_from_file.return_value = ["Mock content"]
 
         file = (file_name, file_content, content_type)
         files = {"file": file}
         response = test_client.post("/embeddings/generateFromFile", files=files)
+        wait_for_job(test_client, response)
 
-        assert response.status_code == 200
-        assert response.json() == {"statusOk": True}
-        mock_generate_from_text.assert_called_once_with("Mock content")
+        assert response.json() == {"statusOk": True, "jobId": response.json()["jobId"]}
+        mock_generate_from_texts.assert_called_once_with(["Mock content"], file_sha=hashlib.sha256(file_content).hexdigest(), chunking_strategy=None)
 
 
 def test_generate_embeddings_from_zip_file(test_client):
@@ -64,21 +219,80 @@ def test_generate_embeddings_from_zip_file(test_client):
     buffer.seek(0)
 
     with (
-        patch("src.api.controllers.embeddings.embeddings_handler.EmbeddingsService.generate_from_text") as mock_generate_from_text,
+        patch("src.application.embeddings.embedding_service.EmbeddingsService.generate_from_texts") as mock_generate_from_texts,
         patch("src.application.embeddings.file_parser.file_parser.FileParser.extract_documents_from_file") as mock_extract_documents_from_file,
+        patch(IS_FILE_INGESTED_PATH, return_value=False),
     ):
         mock_extract_documents_from_file.return_value = ["This is a text file", "This is a markdown file"]
         files = {"file": ("zip_file.zip", buffer, "application/zip")}
         response = test_client.post("/embeddings/generateFromFile", files=files)
+        wait_for_job(test_client, response)
 
-        assert response.status_code == 200
-        assert response.json() == {"statusOk": True}
+        assert response.json() == {"statusOk": True, "jobId": response.json()["jobId"]}
 
         assert mock_extract_documents_from_file.call_count == 1
-        assert mock_generate_from_text.call_count == 2
 
-        mock_generate_from_text.assert_any_call("This is a text file")
-        mock_generate_from_text.assert_any_call("This is a markdown file")
+        # The documents of the archive are embedded together, so that their chunks are batched
+        file_sha = hashlib.sha256(buffer.getvalue()).hexdigest()
+        mock_generate_from_texts.assert_called_once_with(["This is a text file", "This is a markdown file"], file_sha=file_sha, chunking_strategy=None)
+
+
+def test_skip_generate_embeddings_from_already_ingested_file(test_client):
+    with (
+        patch("src.application.embeddings.embedding_service.EmbeddingsService.generate_from_texts") as mock_generate_from_texts,
+        patch(IS_FILE_INGESTED_PATH, return_value=True) as mock_is_file_ingested,
+    ):
+        response = test_client.post("/embeddings/generateFromFile", files={"file": ("test.txt", b"Plain text content.", "text/plain")})
+        wait_for_job(test_client, response)
+
+        mock_is_file_ingested.assert_called_once_with(hashlib.sha256(b"Plain text content.").hexdigest(), None)
+        mock_generate_from_texts.assert_not_called()
+
+
+def test_generate_embeddings_from_file_with_chunking_strategy(test_client):
+    with (
+        patch("src.application.embeddings.embedding_service.EmbeddingsService.generate_from_texts") as mock_generate_from_texts,
+        patch(IS_FILE_INGESTED_PATH, return_value=False) as mock_is_file_ingested,
+    ):
+        response = test_client.post(
+            "/embeddings/generateFromFile", files={"file": ("test.md", b"# Title", "text/markdown")}, data={"chunkingStrategy": "token"}
+        )
+        wait_for_job(test_client, response)
+
+        file_sha = hashlib.sha256(b"# Title").hexdigest()
+        mock_is_file_ingested.assert_called_once_with(file_sha, ChunkingStrategy.token)
+        mock_generate_from_texts.assert_called_once_with(ANY, file_sha=file_sha, chunking_strategy=ChunkingStrategy.token)
+
+
+def test_parse_uploaded_file_within_the_job(app_context, test_client, tmp_path):
+    app_context.configurations.ingestionJobs.uploadDirectory = str(tmp_path)
+    test_client.app.state.ingestion_job_manager = IngestionJobManager(app_context)
+    parsed_documents = []
+
+    def generate_from_texts(texts, **kwargs):
+        # The file is saved to the upload directory until the job has parsed it
+        assert len(list(tmp_path.iterdir())) == 1
+        parsed_documents.extend(texts)
+
+    with (
+        patch("src.application.embeddings.embedding_service.EmbeddingsService.generate_from_texts", side_effect=generate_from_texts),
+        patch(IS_FILE_INGESTED_PATH, return_value=False),
+    ):
+        response = test_client.post("/embeddings/generateFromFile", files={"file": ("test.md", b"# Title", "text/markdown")})
+        wait_for_job(test_client, response)
+
+    assert parsed_documents == ["# Title"]
+    assert not list(tmp_path.iterdir())
+
+
+def test_fail_for_invalid_pdf_file(app_context, test_client, tmp_path):
+    app_context.configurations.ingestionJobs.uploadDirectory = str(tmp_path)
+    test_client.app.state.ingestion_job_manager = IngestionJobManager(app_context)
+
+    response = test_client.post("/embeddings/generateFromFile", files={"file": ("file.pdf", b"This is not a PDF file", "application/pdf")})
+
+    assert response.status_code == 400
+    assert not list(tmp_path.iterdir())
 
 
 @pytest.mark.parametrize(
@@ -90,36 +304,50 @@ def test_generate_embeddings_from_zip_file(test_client):
     ],
 )
 def test_fail_for_bad_archive_file(test_client, file_name, content_type):
-    with patch("src.api.controllers.embeddings.embeddings_handler.EmbeddingsService.generate_from_text") as mock_generate_from_text:
+    with patch("src.application.embeddings.embedding_service.EmbeddingsService.generate_from_texts") as mock_generate_from_texts:
         files = {"file": (file_name, b"This is not a valid archive file", content_type)}
         response = test_client.post("/embeddings/generateFromFile", files=files)
 
         assert response.status_code == 400
         assert response.json() == {"detail": "The file uploaded is not a valid archive file."}
-        mock_generate_from_text.assert_not_called()
+        mock_generate_from_texts.assert_not_called()
 
 
-def test_fail_generate_embeddings_from_file_for_conflicts(test_client):
-    router.lock = True  # Simulate a process already in progress
-    response = test_client.post("/embeddings/generateFromFile", files={"file": ("test.txt", io.BytesIO(b"Plain text content."), "text/plain")})
+def test_fail_for_archive_exceeding_the_decompressed_size_limit(app_context, test_client):
+    app_context.configurations.fileParsing.maxArchiveTotalBytes = 1000
+    buffer = io.BytesIO()
+    with ZipFile(buffer, "w") as zipf:
+        zipf.writestr("txt_file.txt", "a" * 1001)
 
-    assert response.status_code == 409
-    assert response.json() == {"detail": "A process to generate embeddings is already in progress."}
-    router.lock = False  # Reset lock for other tests
+    with patch("src.application.embeddings.embedding_service.EmbeddingsService.generate_from_texts") as mock_generate_from_texts:
+        response = test_client.post("/embeddings/generateFromFile", files={"file": ("zip_file.zip", buffer.getvalue(), "application/zip")})
+
+        assert response.status_code == 413
+        mock_generate_from_texts.assert_not_called()
 
 
 def test_embeddings_status_idle(test_client):
-    router.lock = False  # Ensure no process is running
     response = test_client.get("/embeddings/status")
 
     assert response.status_code == 200
     assert response.json() == {"status": "idle"}
 
 
-def test_embeddings_status_running(test_client):
-    router.lock = True  # Simulate a process running
+def test_embeddings_status_running(test_client, job_store):
+    # A job running on another replica
+    job_store.save(IngestionJob(id="job", kind="url", source="http://example.com", status=IngestionJobStatus.running, replica="other", updated_at=time.time()))
     response = test_client.get("/embeddings/status")
 
     assert response.status_code == 200
     assert response.json() == {"status": "running"}
-    router.lock = False  # Reset lock for other tests
+
+
+def test_embeddings_status_ignores_jobs_without_heartbeat(test_client, job_store):
+    # A job left running by a replica that crashed
+    job_store.save(
+        IngestionJob(id="job", kind="url", source="http://example.com", status=IngestionJobStatus.running, replica="other", updated_at=time.time() - 3600)
+    )
+    response = test_client.get("/embeddings/status")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "idle"}
@@ -8,6 +8,7 @@ from src.application.assistant.chains.assistant_chain import AssistantChain
 from src.application.assistant.chains.assistant_prompt import AssistantPromptBuilder
 from src.application.assistant.chains.combine_docs_chain import AggregateDocsChunksChain
 from src.application.assistant.chains.retriever_chain import RetrieverChain, RetrieverChainConfiguration
+from src.infrastracture.vector_store_manager.vector_store_backend import VectorStoreBackendParams
 from tests.src.utils.fake_llm import FakeLLM
 
 # pylint: disable=fixme
@@ -28,14 +29,17 @@ def test_call(mock_retreive_call, app_context, snapshot):
     aggregate_docs_chain = AggregateDocsChunksChain(context=app_context)
 
     vector_store_configuration = RetrieverChainConfiguration(
-        mongodb_cluster_uri="mongodb://localhost:27017",
-        db_name="test_db",
-        collection_name="test_collection",
-        embeddings=OpenAIEmbeddings(openai_api_key="test_api_key", model="test_model"),
-        index_name="test_index",
-        embedding_key="embedding_key",
-        relevance_score_fn="euclidean",
-        text_key="page_content",
+        vector_store=VectorStoreBackendParams(
+            logger=app_context.logger,
+            mongodb_cluster_uri="mongodb://localhost:27017",
+            db_name="test_db",
+            collection_name="test_collection",
+            embeddings=OpenAIEmbeddings(openai_api_key="test_api_key", model="test_model"),
+            index_name="test_index",
+            embedding_key="embedding_key",
+            relevance_score_fn="euclidean",
+            text_key="page_content",
+        ),
         max_number_of_results=3,
     )
 
@@ -82,14 +86,17 @@ def test_call_without_documents(mock_retreive_call, app_context, snapshot):
     aggregate_docs_chain = AggregateDocsChunksChain(context=app_context)
 
     vector_store_configuration = RetrieverChainConfiguration(
-        mongodb_cluster_uri="mongodb://localhost:27017",
-        db_name="test_db",
-        collection_name="test_collection",
-        embeddings=OpenAIEmbeddings(openai_api_key="test_api_key", model="test_model"),
-        index_name="test_index",
-        embedding_key="embedding_key",
-        relevance_score_fn="euclidean",
-        text_key="page_content",
+        vector_store=VectorStoreBackendParams(
+            logger=app_context.logger,
+            mongodb_cluster_uri="mongodb://localhost:27017",
+            db_name="test_db",
+            collection_name="test_collection",
+            embeddings=OpenAIEmbeddings(openai_api_key="test_api_key", model="test_model"),
+            index_name="test_index",
+            embedding_key="embedding_key",
+            relevance_score_fn="euclidean",
+            text_key="page_content",
+        ),
         max_number_of_results=3,
     )
 
@@ -143,14 +150,17 @@ def test_call_with_custom_prompt(mock_retreive_call, app_context, snapshot):
     )
 
     vector_store_configuration = RetrieverChainConfiguration(
-        mongodb_cluster_uri="mongodb://localhost:27017",
-        db_name="test_db",
-        collection_name="test_collection",
-        embeddings=OpenAIEmbeddings(openai_api_key="test_api_key", model="test_model"),
-        index_name="test_index",
-        embedding_key="embedding_key",
-        relevance_score_fn="euclidean",
-        text_key="page_content",
+        vector_store=VectorStoreBackendParams(
+            logger=app_context.logger,
+            mongodb_cluster_uri="mongodb://localhost:27017",
+            db_name="test_db",
+            collection_name="test_collection",
+            embeddings=OpenAIEmbeddings(openai_api_key="test_api_key", model="test_model"),
+            index_name="test_index",
+            embedding_key="embedding_key",
+            relevance_score_fn="euclidean",
+            text_key="page_content",
+        ),
         max_number_of_results=3,
     )
 
@@ -209,14 +219,17 @@ def test_call_without_chat_history(mock_retreive_call, app_context, snapshot):
     aggregate_docs_chain = AggregateDocsChunksChain(context=app_context)
 
     vector_store_configuration = RetrieverChainConfiguration(
-        mongodb_cluster_uri="mongodb://localhost:27017",
-        db_name="test_db",
-        collection_name="test_collection",
-        embeddings=OpenAIEmbeddings(openai_api_key="test_api_key", model="test_model"),
-        index_name="test_index",
-        embedding_key="embedding_key",
-        relevance_score_fn="euclidean",
-        text_key="page_content",
+        vector_store=VectorStoreBackendParams(
+            logger=app_context.logger,
+            mongodb_cluster_uri="mongodb://localhost:27017",
+            db_name="test_db",
+            collection_name="test_collection",
+            embeddings=OpenAIEmbeddings(openai_api_key="test_api_key", model="test_model"),
+            index_name="test_index",
+            embedding_key="embedding_key",
+            relevance_score_fn="euclidean",
+            text_key="page_content",
+        ),
         max_number_of_results=3,
     )
 
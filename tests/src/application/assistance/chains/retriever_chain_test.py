@@ -1,12 +1,16 @@
 import json
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import call, patch
 
 from httpx import Response
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
-from src.application.assistant.chains.retriever_chain import RetrieverChain, RetrieverChainConfiguration
+from src.application.assistant.chains.retriever_chain import RetrieverChain, RetrieverChainConfiguration, RetrieverSourceConfiguration
+from src.infrastracture.vector_store_manager.local_vector_index import get_local_vector_index
+from src.infrastracture.vector_store_manager.vector_store_backend import VectorStoreBackendParams
+from src.infrastracture.vector_store_manager.vector_store_manager import create_vector_store_backend
 
 
 def load_json_response(file_name):
@@ -31,14 +35,17 @@ def setup_test(app_context, mock_server, max_score_distance=None, min_score_dist
     mock_server.respx_mock.post("https://api.openai.com/v1/embeddings").mock(return_value=Response(200, json=embedding_reply_mock))
 
     vector_store_configuration = RetrieverChainConfiguration(
-        mongodb_cluster_uri="mongodb://localhost:27017",
-        db_name="test_db",
-        collection_name="test_collection",
-        embeddings=OpenAIEmbeddings(openai_api_key="test_api_key", model="test_model"),
-        index_name="test_index",
-        embedding_key="embedding_key",
-        relevance_score_fn="euclidean",
-        text_key="page_content",
+        vector_store=VectorStoreBackendParams(
+            logger=app_context.logger,
+            mongodb_cluster_uri="mongodb://localhost:27017",
+            db_name="test_db",
+            collection_name="test_collection",
+            embeddings=OpenAIEmbeddings(openai_api_key="test_api_key", model="test_model"),
+            index_name="test_index",
+            embedding_key="embedding_key",
+            relevance_score_fn="euclidean",
+            text_key="page_content",
+        ),
         max_number_of_results=3,
         max_score_distance=max_score_distance,
         min_score_distance=min_score_distance,
@@ -113,3 +120,84 @@ def test_call_with_min_distance(
     # Assert that the similarity_search_with_score method was called with the expected parameters
     post_filter_call_arg = similarity_search_with_score.call_args[1]["post_filter_pipeline"]
     assert post_filter_call_arg[0]["$match"]["score"]["$gte"] == 0.5
+
+
+class CharactersCountEmbeddings(Embeddings):
+    """Deterministic embeddings: the number of "a", "b" and "c" characters of the text."""
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return [float(text.count("a")), float(text.count("b")), float(text.count("c"))]
+
+
+def setup_fan_out_test(app_context, tmp_path, sources):
+    embeddings = CharactersCountEmbeddings()
+    for collection_name, texts in [("products", ["aaa", "aab", "abc"]), ("guides", ["aaab", "ccc"])]:
+        backend = create_vector_store_backend(
+            VectorStoreBackendParams(
+                logger=app_context.logger,
+                type="local",
+                local_path=str(tmp_path),
+                collection_name=collection_name,
+                index_name="index",
+                embedding_key="embedding",
+                text_key="page_content",
+                relevance_score_fn="cosine",
+                embeddings=embeddings,
+            )
+        )
+        backend.add_documents([Document(page_content=text) for text in texts])
+
+    configuration = RetrieverChainConfiguration(
+        vector_store=VectorStoreBackendParams(
+            logger=app_context.logger,
+            type="local",
+            local_path=str(tmp_path),
+            collection_name="products",
+            embeddings=embeddings,
+            index_name="index",
+            embedding_key="embedding",
+            relevance_score_fn="cosine",
+            text_key="page_content",
+        ),
+        max_number_of_results=3,
+        sources=sources,
+    )
+    return RetrieverChain(context=app_context, configuration=configuration)
+
+
+def test_call_with_sources_merges_weighted_results(app_context, tmp_path):
+    chain = setup_fan_out_test(
+        app_context,
+        tmp_path,
+        [
+            RetrieverSourceConfiguration(name="products", collection_name="products", index_name="index", weight=0.5),
+            RetrieverSourceConfiguration(name="guides", collection_name="guides", index_name="index"),
+        ],
+    )
+
+    result = chain.invoke({chain.query_key: "a"})[chain.output_key]
+
+    # The scores of each source are rescaled over its results: the worst result of "guides" scores 0
+    assert [(doc.page_content, doc.metadata["source"]) for doc in result] == [("aaab", "guides"), ("aaa", "products"), ("aab", "products")]
+    app_context.metrics_manager.retrieval_source_duration.labels.assert_has_calls([call(source="products"), call(source="guides")], any_order=True)
+
+
+def test_call_with_sources_skips_failing_source(app_context, tmp_path):
+    chain = setup_fan_out_test(
+        app_context,
+        tmp_path,
+        [
+            RetrieverSourceConfiguration(name="guides", collection_name="guides", index_name="index"),
+            RetrieverSourceConfiguration(name="broken", collection_name="broken", index_name="index"),
+        ],
+    )
+    # The vectors of this source have a different number of dimensions, so the search fails
+    get_local_vector_index(tmp_path / "broken", "index").add([{"page_content": "aa"}], [[1.0, 0.0]])
+
+    result = chain.invoke({chain.query_key: "a"})[chain.output_key]
+
+    assert [doc.page_content for doc in result] == ["aaab", "ccc"]
+    app_context.logger.warning.assert_called_once()
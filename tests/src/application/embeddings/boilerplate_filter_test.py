@@ -0,0 +1,50 @@
+from src.application.embeddings.boilerplate_filter import BoilerplateFilter, BoilerplateParams
+from src.configurations.service_model import Boilerplate
+
+FOOTER = "Copyright 2026 Example Inc. All rights reserved."
+
+
+def test_filter_removes_blocks_repeated_on_previous_pages():
+    boilerplate_filter = BoilerplateFilter(BoilerplateParams(enabled=True, min_pages=1))
+
+    assert boilerplate_filter.filter(f"First page content\n{FOOTER}") == f"First page content\n{FOOTER}"
+    assert boilerplate_filter.filter(f"Second page content\n{FOOTER}") == "Second page content\n"
+    assert boilerplate_filter.removed_count == 1
+
+
+def test_filter_ignores_whitespace_and_repetitions_within_a_page():
+    boilerplate_filter = BoilerplateFilter(BoilerplateParams(enabled=True, min_pages=1))
+
+    assert boilerplate_filter.filter(f"{FOOTER}\n{FOOTER}") == f"{FOOTER}\n{FOOTER}"
+    assert boilerplate_filter.filter(f"  {FOOTER.replace(' ', '   ')}  \nContent") == "Content"
+
+
+def test_filter_keeps_the_blocks_of_the_first_pages():
+    boilerplate_filter = BoilerplateFilter(BoilerplateParams(enabled=True))
+
+    assert [boilerplate_filter.filter(FOOTER) for _ in range(7)] == [FOOTER] * 5 + ["", ""]
+
+
+def test_filter_keeps_blocks_found_on_few_of_the_previous_pages():
+    boilerplate_filter = BoilerplateFilter(BoilerplateParams(enabled=True, min_pages=2, min_page_fraction=0.5))
+    shared_block = "A paragraph quoted by a couple of pages"
+
+    assert boilerplate_filter.filter(f"{shared_block}\n{FOOTER}") == f"{shared_block}\n{FOOTER}"
+    assert boilerplate_filter.filter(f"Second page\n{FOOTER}") == f"Second page\n{FOOTER}"
+    assert boilerplate_filter.filter(f"Third page\n{FOOTER}") == "Third page\n"
+    assert boilerplate_filter.filter(f"Fourth page\n{FOOTER}") == "Fourth page\n"
+    assert boilerplate_filter.filter(f"{shared_block}\n{FOOTER}") == f"{shared_block}\n"
+
+
+def test_filter_keeps_short_blocks():
+    boilerplate_filter = BoilerplateFilter(BoilerplateParams(enabled=True, min_pages=1, min_block_chars=10))
+
+    boilerplate_filter.filter("Overview\nA long enough block")
+    assert boilerplate_filter.filter("Overview\nA long enough block") == "Overview\n"
+
+
+def test_filter_disabled_by_default():
+    boilerplate_filter = BoilerplateFilter(BoilerplateParams.from_configuration(Boilerplate(minPages=1)))
+
+    boilerplate_filter.filter(FOOTER)
+    assert boilerplate_filter.filter(FOOTER) == FOOTER
@@ -1,18 +1,129 @@
 from unittest.mock import patch
 
+import numpy as np
+import pytest
 from langchain_openai import OpenAIEmbeddings
 
-from src.application.embeddings.document_chunker import DocumentChunker
+from src.application.embeddings.document_chunker import ChunkingParams, DocumentChunker
+from src.application.embeddings.semantic_chunker import SemanticChunk
+from src.configurations.service_model import ChunkingStrategy
+from src.infrastracture.embeddings_manager.tokenizer import count_tokens, get_tokenizer
+
+ITER_SPLIT_PATH = "src.application.embeddings.semantic_chunker.SemanticChunker.iter_split"
 
 
 def test_split_text_into_chunks():
-    with patch("langchain_experimental.text_splitter.SemanticChunker.split_text") as mock_split_text:
-        mock_split_text.return_value = ["This is a test.", "this is another test."]
+    with patch(ITER_SPLIT_PATH) as mock_iter_split:
+        mock_iter_split.return_value = [SemanticChunk("This is a test."), SemanticChunk("this is another test.")]
         embedding = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key="embeddings_api_key")
         document_chunker = DocumentChunker(embedding)
         text = "This is a test. This is another test."
         url = "http://example.com"
         chunks = document_chunker.split_text_into_chunks(text, url)
 
-        assert mock_split_text.call_count == 1
+        assert mock_iter_split.call_count == 1
         assert len(chunks) == 2
+
+
+def test_split_text_into_embedded_chunks():
+    with patch("langchain_openai.OpenAIEmbeddings.embed_documents") as mock_embed_documents:
+        mock_embed_documents.return_value = [[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]]
+        embedding = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key="embeddings_api_key")
+        document_chunker = DocumentChunker(embedding)
+
+        chunks, vectors = document_chunker.split_text_into_embedded_chunks("This is a test. This is another test. Something else.", "http://example.com")
+
+        assert mock_embed_documents.call_count == 1
+        assert [chunk.page_content for chunk in chunks] == ["This is a test. This is another test.", "Something else."]
+        assert chunks[0].metadata["url"] == "http://example.com"
+        assert vectors.tolist() == [[1.0, 0.0], [0.0, 1.0]]
+
+
+def test_split_markdown_text_by_section():
+    embedding = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key="embeddings_api_key")
+    document_chunker = DocumentChunker(embedding, ChunkingParams(strategy=ChunkingStrategy.markdown))
+    text = "# Guide\nIntroduction.\n\n## Install\nRun the installer.\n```\n# not a heading\n```\n## Usage\nCall the API."
+
+    with patch(ITER_SPLIT_PATH) as mock_iter_split:
+        chunks = document_chunker.split_text_into_chunks(text, "http://example.com")
+
+    mock_iter_split.assert_not_called()
+    assert [chunk.page_content for chunk in chunks] == [
+        "# Guide\nIntroduction.",
+        "## Install\nRun the installer.\n```\n# not a heading\n```",
+        "## Usage\nCall the API.",
+    ]
+    assert all(chunk.metadata["url"] == "http://example.com" for chunk in chunks)
+
+
+def test_split_long_markdown_sections_by_tokens():
+    embedding = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key="embeddings_api_key")
+    document_chunker = DocumentChunker(embedding, ChunkingParams(strategy=ChunkingStrategy.markdown, chunk_size=20, chunk_overlap=0))
+    tokenizer = get_tokenizer("text-embedding-3-small")
+
+    chunks = document_chunker.split_text_into_chunks("# Title\n" + "word " * 100)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(tokenizer, chunk.page_content) <= 20 for chunk in chunks)
+
+
+def test_split_text_by_tokens_with_overlap():
+    embedding = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key="embeddings_api_key")
+    document_chunker = DocumentChunker(embedding, ChunkingParams(strategy=ChunkingStrategy.markdown, chunk_size=40, chunk_overlap=15))
+    tokenizer = get_tokenizer("text-embedding-3-small")
+    text = " ".join(f"word{i}" for i in range(100))
+
+    chunks = document_chunker.split_text_into_chunks(text, strategy=ChunkingStrategy.token)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(tokenizer, chunk.page_content) <= 40 for chunk in chunks)
+    # Consecutive chunks share some words
+    assert chunks[0].page_content.split()[-1] in chunks[1].page_content.split()
+
+
+def test_split_chunks_longer_than_max_tokens():
+    embedding = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key="embeddings_api_key")
+    document_chunker = DocumentChunker(embedding, ChunkingParams(max_tokens=20))
+    tokenizer = get_tokenizer("text-embedding-3-small")
+
+    with patch(ITER_SPLIT_PATH, return_value=[SemanticChunk("word " * 100)]):
+        chunks = document_chunker.split_text_into_chunks("word " * 100)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(tokenizer, chunk.page_content) <= 20 for chunk in chunks)
+
+
+def test_merge_chunks_shorter_than_min_tokens():
+    embedding = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key="embeddings_api_key")
+    paragraph = "A longer paragraph about the installation of the service."
+    tokenizer = get_tokenizer("text-embedding-3-small")
+    max_tokens = count_tokens(tokenizer, paragraph) + 1
+    document_chunker = DocumentChunker(embedding, ChunkingParams(min_tokens=count_tokens(tokenizer, "Item one.") + 1, max_tokens=max_tokens))
+
+    with patch(ITER_SPLIT_PATH, return_value=[SemanticChunk("Item one."), SemanticChunk("Item two."), SemanticChunk(paragraph), SemanticChunk("End.")]):
+        chunks = document_chunker.split_text_into_chunks("text")
+
+    # The last chunk is not merged with the paragraph, since the merged chunk would exceed the maximum size
+    assert [chunk.page_content for chunk in chunks] == ["Item one.\nItem two.", paragraph, "End."]
+
+
+def test_bound_chunk_sizes_with_vectors():
+    embedding = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key="embeddings_api_key")
+    document_chunker = DocumentChunker(embedding, ChunkingParams(min_tokens=5, max_tokens=20))
+    semantic_chunks = [
+        SemanticChunk("A.", np.array([1.0, 0.0])),
+        SemanticChunk("B c.", np.array([0.0, 1.0])),
+        SemanticChunk("word " * 50, np.array([1.0, 0.0])),
+    ]
+
+    with (
+        patch(ITER_SPLIT_PATH, return_value=semantic_chunks),
+        patch("langchain_openai.OpenAIEmbeddings.embed_documents", side_effect=lambda texts: [[0.0, 2.0]] * len(texts)) as mock_embed_documents,
+    ):
+        chunks, vectors = document_chunker.split_text_into_embedded_chunks("text")
+
+    # Merged chunks get the length-weighted mean of their embeddings, pieces of split chunks are embedded again
+    assert chunks[0].page_content == "A.\nB c."
+    assert vectors[0] == pytest.approx(np.array([2.0, 4.0]) / np.sqrt(20))
+    assert mock_embed_documents.call_args.args[0] == [chunk.page_content for chunk in chunks[1:]]
+    assert vectors[1:].tolist() == [[0.0, 1.0]] * (len(chunks) - 1)
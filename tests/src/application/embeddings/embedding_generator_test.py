@@ -1,12 +1,31 @@
+import hashlib
 from pathlib import Path
 from unittest.mock import patch
 
-import requests_mock
+import numpy as np
+import pytest
+from aioresponses import aioresponses
 
 from src.application.embeddings.embedding_service import EmbeddingsService
+from src.application.embeddings.errors import IngestionJobCancelledError
+from src.application.embeddings.ingestion_job_tracker import IngestionJobTracker
+from src.application.embeddings.semantic_chunker import SemanticChunk
+from src.configurations.service_model import ChunkingStrategy, VectorStoreType
+from src.infrastracture.embeddings_manager.tokenizer import count_tokens, get_tokenizer
+from src.infrastracture.vector_store_manager.crawl_manifest import CrawlManifestEntry
+from src.infrastracture.vector_store_manager.errors import VectorDimensionsMismatchError
+from src.infrastracture.vector_store_manager.ingestion_job_store import IngestionJob, InMemoryIngestionJobStore
 
 TEXT_HTML_HEADERS = {"Content-type": "text/html"}
 IMAGE_PNG_HEADERS = {"Content-type": "image/png"}
+GET_STORED_NUM_DIMENSIONS_PATH = "src.infrastracture.vector_store_manager.mongodb_atlas_backend.MongoDBAtlasVectorStoreBackend.get_stored_num_dimensions"
+GET_FILE_MANIFEST_PATH = "src.infrastracture.vector_store_manager.mongodb_atlas_backend.MongoDBAtlasVectorStoreBackend.get_file_manifest"
+GET_CRAWL_MANIFEST_PATH = "src.infrastracture.vector_store_manager.mongodb_atlas_backend.MongoDBAtlasVectorStoreBackend.get_crawl_manifest"
+ADD_DOCUMENTS_PATH = "src.infrastracture.vector_store_manager.mongodb_atlas_backend.MongoDBAtlasVectorStoreBackend.add_documents"
+GET_EXISTING_IDS_PATH = "src.infrastracture.vector_store_manager.mongodb_atlas_backend.MongoDBAtlasVectorStoreBackend.get_existing_ids"
+ITER_SPLIT_PATH = "src.application.embeddings.semantic_chunker.SemanticChunker.iter_split"
+EMBED_DOCUMENTS_PATH = "langchain_openai.OpenAIEmbeddings.embed_documents"
+DELETE_BY_IDS_PATH = "src.infrastracture.vector_store_manager.mongodb_atlas_backend.MongoDBAtlasVectorStoreBackend.delete_by_ids"
 
 
 def test_generate_from_url_without_domain(app_context):
@@ -15,19 +34,24 @@ def test_generate_from_url_without_domain(app_context):
     with open(file_path, encoding="utf-8") as f:
         html_content = f.read()
 
-    with requests_mock.Mocker() as mocker:
-        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, text=html_content)
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body=html_content)
 
         with (
-            patch("langchain_experimental.text_splitter.SemanticChunker.split_text") as mock_split_text,
-            patch("langchain_community.vectorstores.mongodb_atlas.MongoDBAtlasVectorSearch.add_documents") as mock_add_documents,
+            patch(ITER_SPLIT_PATH) as mock_iter_split,
+            patch(EMBED_DOCUMENTS_PATH, side_effect=lambda texts: [[1.0, 0.0]] * len(texts)),
+            patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+            patch(GET_EXISTING_IDS_PATH, return_value=set()),
+            patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+            patch(GET_CRAWL_MANIFEST_PATH) as mock_get_crawl_manifest,
         ):
-            mock_split_text.return_value = ["chunk1", "chunk2"]
+            mock_get_crawl_manifest.return_value.load.return_value = {}
+            mock_iter_split.return_value = [SemanticChunk("chunk1"), SemanticChunk("chunk2")]
 
             embedding_generator = EmbeddingsService(app_context)
             embedding_generator.generate_from_url("http://example.com")
 
-            mock_split_text.assert_called_once()
+            mock_iter_split.assert_called_once()
             mock_add_documents.assert_called_once()
             embedding_generator.logger.debug.assert_called()
 
@@ -39,35 +63,382 @@ def test_generate_from_url_with_domain(app_context):
     with open(current_dir / "assets" / "html_page_with_links.html", encoding="utf-8") as f:
         html_page_with_links_content = f.read()
 
-    with requests_mock.Mocker() as mocker:
-        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, text=html_page_with_links_content)
-        mocker.get("http://example.com/domain/page", headers=TEXT_HTML_HEADERS, text=html_page_without_links_content)
-        mocker.get("http://example.com/domain/img.png", headers=IMAGE_PNG_HEADERS, text="I shouldn't be here")
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body=html_page_with_links_content)
+        mocker.get("http://example.com/domain/page", headers=TEXT_HTML_HEADERS, body=html_page_without_links_content)
+        mocker.get("http://example.com/domain/img.png", headers=IMAGE_PNG_HEADERS, body="I shouldn't be here")
 
         with (
-            patch("langchain_experimental.text_splitter.SemanticChunker.split_text") as mock_split_text,
-            patch("langchain_community.vectorstores.mongodb_atlas.MongoDBAtlasVectorSearch.add_documents") as mock_add_documents,
+            patch(ITER_SPLIT_PATH) as mock_iter_split,
+            patch(EMBED_DOCUMENTS_PATH, side_effect=lambda texts: [[1.0, 0.0]] * len(texts)),
+            patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+            patch(GET_EXISTING_IDS_PATH, return_value=set()),
+            patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+            patch(GET_CRAWL_MANIFEST_PATH) as mock_get_crawl_manifest,
         ):
-            mock_split_text.return_value = ["chunk1", "chunk2"]
+            mock_get_crawl_manifest.return_value.load.return_value = {}
+            mock_iter_split.return_value = [SemanticChunk("chunk1"), SemanticChunk("chunk2")]
 
             embedding_generator = EmbeddingsService(app_context)
             embedding_generator.generate_from_url("http://example.com", filter_path="http://example.com/domain")
 
-            assert mock_split_text.call_count == 2
-            assert mock_add_documents.call_count == 2
+            assert mock_iter_split.call_count == 2
+            # The chunks of both pages are batched together, and the chunks repeated in the second page are stored once
+            assert mock_add_documents.call_count == 1
             embedding_generator.logger.debug.assert_called()
 
 
+def test_filter_domain_links_matches_whole_path_segments(app_context):
+    embedding_generator = EmbeddingsService(app_context)
+    links = ["http://example.com/docs", "http://example.com/docs/intro", "http://example.com/docs-old", "http://other.com/docs"]
+
+    filtered_links = embedding_generator._filter_domain_links(links, "example.com", "/docs")  # pylint: disable=W0212
+
+    assert filtered_links == ["http://example.com/docs", "http://example.com/docs/intro"]
+
+
 def test_generate_from_text(app_context):
     with (
-        patch("langchain_experimental.text_splitter.SemanticChunker.split_text") as mock_split_text,
-        patch("langchain_community.vectorstores.mongodb_atlas.MongoDBAtlasVectorSearch.add_documents") as mock_add_documents,
+        patch(ITER_SPLIT_PATH) as mock_iter_split,
+        patch(EMBED_DOCUMENTS_PATH, return_value=[[1.0, 0.0]]),
+        patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+        patch(GET_EXISTING_IDS_PATH, return_value=set()),
+        patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
     ):
+        mock_iter_split.return_value = [SemanticChunk("This is a text example")]
+
         embedding_generator = EmbeddingsService(app_context)
         embedding_generator.generate_from_text("This is a text example\n")
 
-        assert mock_split_text.call_count == 1
+        assert mock_iter_split.call_count == 1
         assert mock_add_documents.call_count == 1
         embedding_generator.logger.debug.assert_called()
 
-        mock_split_text.assert_any_call("This is a text example\n")
+        mock_iter_split.assert_any_call("This is a text example\n", with_vectors=False)
+
+
+def test_fail_to_generate_from_text_with_different_dimensions(app_context):
+    app_context.configurations.embeddings.dimensions = 512
+
+    with (
+        patch(ITER_SPLIT_PATH) as mock_iter_split,
+        patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+        patch(GET_EXISTING_IDS_PATH, return_value=set()),
+        patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=1536),
+    ):
+        embedding_generator = EmbeddingsService(app_context)
+
+        with pytest.raises(VectorDimensionsMismatchError):
+            embedding_generator.generate_from_text("This is a text example\n")
+
+        mock_iter_split.assert_not_called()
+        mock_add_documents.assert_not_called()
+
+
+def test_generate_from_url_embeds_only_changed_pages(app_context):
+    unchanged_html = "<html><body>Unchanged page</body></html>"
+    previous_pages = {
+        "http://example.com": CrawlManifestEntry(
+            url="http://example.com", sha="outdated", chunk_ids=["old-1", "old-2"], links=["http://example.com/unchanged"]
+        ),
+        "http://example.com/unchanged": CrawlManifestEntry(
+            url="http://example.com/unchanged", sha=hashlib.sha256(b"Unchanged page").hexdigest(), chunk_ids=["unchanged-1"]
+        ),
+    }
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body='<html><body>Changed page<a href="/unchanged"></a></body></html>')
+        mocker.get("http://example.com/unchanged", headers=TEXT_HTML_HEADERS, body=unchanged_html)
+
+        with (
+            patch(ITER_SPLIT_PATH) as mock_iter_split,
+            patch(EMBED_DOCUMENTS_PATH, side_effect=lambda texts: [[1.0, 0.0]] * len(texts)),
+            patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+            patch(GET_EXISTING_IDS_PATH, return_value=set()),
+            patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+            patch(GET_CRAWL_MANIFEST_PATH) as mock_get_crawl_manifest,
+            patch(DELETE_BY_IDS_PATH) as mock_delete_by_ids,
+        ):
+            manifest = mock_get_crawl_manifest.return_value
+            manifest.load.return_value = previous_pages
+            mock_iter_split.return_value = [SemanticChunk("chunk1")]
+
+            embedding_generator = EmbeddingsService(app_context)
+            embedding_generator.generate_from_url("http://example.com")
+
+            mock_iter_split.assert_called_once_with("Changed page", with_vectors=False)
+            mock_add_documents.assert_called_once()
+            mock_delete_by_ids.assert_called_once_with(["old-1", "old-2"])
+            saved_entries = {call.args[0].url: call.args[0] for call in manifest.save.call_args_list}
+            assert saved_entries["http://example.com"].chunk_ids == [embedding_generator._get_chunk_id("chunk1")]  # pylint: disable=W0212
+            assert saved_entries["http://example.com"].links == ["http://example.com/unchanged"]
+            assert saved_entries["http://example.com/unchanged"].chunk_ids == ["unchanged-1"]
+
+
+def test_generate_from_url_removes_blocks_repeated_across_pages(app_context):
+    app_context.configurations.boilerplate.enabled = True
+    app_context.configurations.boilerplate.minPages = 1
+    footer = "<footer>Menu</footer><p>Copyright 2026 Example Inc. All rights reserved.</p>"
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body=f'<p>Home page</p><a href="/page"></a>{footer}')
+        mocker.get("http://example.com/page", headers=TEXT_HTML_HEADERS, body=f"<p>Other page</p>{footer}")
+
+        with (
+            patch(ITER_SPLIT_PATH, return_value=[SemanticChunk("chunk")]) as mock_iter_split,
+            patch(EMBED_DOCUMENTS_PATH, side_effect=lambda texts: [[1.0, 0.0]] * len(texts)),
+            patch(ADD_DOCUMENTS_PATH),
+            patch(GET_EXISTING_IDS_PATH, return_value=set()),
+            patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+            patch(GET_CRAWL_MANIFEST_PATH) as mock_get_crawl_manifest,
+        ):
+            manifest = mock_get_crawl_manifest.return_value
+            manifest.load.return_value = {}
+
+            EmbeddingsService(app_context).generate_from_url("http://example.com")
+
+            split_texts = [call.args[0] for call in mock_iter_split.call_args_list]
+            assert split_texts == ["Home page\nCopyright 2026 Example Inc. All rights reserved.", "Other page\n"]
+            # The hash of the page covers its whole text
+            saved_entries = {call.args[0].url: call.args[0] for call in manifest.save.call_args_list}
+            assert saved_entries["http://example.com/page"].sha == hashlib.sha256(b"Other page\nCopyright 2026 Example Inc. All rights reserved.").hexdigest()
+
+
+def test_generate_from_text_stores_only_new_chunks(app_context):
+    with (
+        patch(ITER_SPLIT_PATH) as mock_iter_split,
+        patch(EMBED_DOCUMENTS_PATH, return_value=[[1.0, 0.0]]) as mock_embed_documents,
+        patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+        patch(GET_EXISTING_IDS_PATH) as mock_get_existing_ids,
+        patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+        patch(GET_FILE_MANIFEST_PATH),
+    ):
+        mock_iter_split.return_value = [SemanticChunk("stored chunk"), SemanticChunk("new chunk"), SemanticChunk("new  chunk\n")]
+        embedding_generator = EmbeddingsService(app_context)
+        stored_chunk_id = embedding_generator._get_chunk_id("stored chunk")  # pylint: disable=W0212
+        new_chunk_id = embedding_generator._get_chunk_id("new chunk")  # pylint: disable=W0212
+        mock_get_existing_ids.return_value = {stored_chunk_id}
+
+        embedding_generator.generate_from_text("stored chunk. new chunk. new chunk.", file_sha="file-sha")
+
+        # Chunks differing only by whitespaces have the same content address, and are stored once
+        (documents,) = mock_add_documents.call_args.args
+        assert [document.page_content for document in documents] == ["new chunk"]
+        assert documents[0].metadata["fileSha"] == "file-sha"
+        assert mock_add_documents.call_args.kwargs["ids"] == [new_chunk_id]
+        assert mock_add_documents.call_args.kwargs["vectors"].tolist() == [[1.0, 0.0]]
+        mock_embed_documents.assert_called_once_with(["new chunk"])
+
+
+def test_chunk_id_depends_on_the_embeddings_model(app_context):
+    chunk_id = EmbeddingsService(app_context)._get_chunk_id("text")  # pylint: disable=W0212
+    app_context.configurations.embeddings.dimensions = 512
+
+    assert EmbeddingsService(app_context)._get_chunk_id("text") != chunk_id  # pylint: disable=W0212
+
+
+def test_generate_from_text_reuses_sentence_embeddings(app_context):
+    app_context.configurations.chunking.reuseSentenceEmbeddings = True
+
+    with (
+        patch("langchain_openai.OpenAIEmbeddings.embed_documents") as mock_embed_documents,
+        patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+        patch(GET_EXISTING_IDS_PATH, return_value=set()),
+        patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+    ):
+        mock_embed_documents.return_value = [[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]]
+
+        EmbeddingsService(app_context).generate_from_text("First sentence. Second sentence. Third sentence.")
+
+        # The sentences are embedded once, and the chunks are stored with the derived embeddings
+        mock_embed_documents.assert_called_once()
+        (documents,) = mock_add_documents.call_args.args
+        vectors = mock_add_documents.call_args.kwargs["vectors"]
+        assert len(vectors) == len(documents)
+        assert np.linalg.norm(vectors, axis=1) == pytest.approx([1.0] * len(documents))
+
+
+def test_generate_from_text_stores_chunks_in_batches(app_context):
+    app_context.configurations.ingestion.batchMaxSize = 2
+
+    with (
+        patch(ITER_SPLIT_PATH) as mock_iter_split,
+        patch("src.application.embeddings.embedding_service.CHUNKS_BATCH_SIZE", 2),
+        patch(EMBED_DOCUMENTS_PATH, side_effect=lambda texts: [[1.0, 0.0]] * len(texts)),
+        patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+        patch(GET_EXISTING_IDS_PATH, return_value=set()),
+        patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+        patch(GET_FILE_MANIFEST_PATH),
+    ):
+        mock_iter_split.return_value = iter([SemanticChunk("chunk1"), SemanticChunk("chunk2"), SemanticChunk("chunk3")])
+
+        EmbeddingsService(app_context).generate_from_text("chunk1. chunk2. chunk3.", file_sha="file-sha")
+
+        stored_texts = [[document.page_content for document in call.args[0]] for call in mock_add_documents.call_args_list]
+        assert stored_texts == [["chunk1", "chunk2"], ["chunk3"]]
+        assert all(document.metadata["fileSha"] == "file-sha" for call in mock_add_documents.call_args_list for document in call.args[0])
+
+
+def test_generate_from_text_with_chunking_strategy(app_context):
+    app_context.configurations.chunking.reuseSentenceEmbeddings = True
+
+    with (
+        patch(EMBED_DOCUMENTS_PATH, return_value=[[1.0, 0.0], [0.0, 1.0]]) as mock_embed_documents,
+        patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+        patch(GET_EXISTING_IDS_PATH, return_value=set()),
+        patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+        patch(GET_FILE_MANIFEST_PATH),
+    ):
+        EmbeddingsService(app_context).generate_from_text(
+            "# Title\nText.\n## Section\nMore text.", file_sha="file-sha", chunking_strategy=ChunkingStrategy.markdown
+        )
+
+        # The markdown strategy does not call the embeddings model while splitting, the chunks are embedded once in a batch
+        mock_embed_documents.assert_called_once_with(["# Title\nText.", "## Section\nMore text."])
+        (documents,) = mock_add_documents.call_args.args
+        assert [document.page_content for document in documents] == ["# Title\nText.", "## Section\nMore text."]
+        assert documents[0].metadata["chunkingStrategy"] == "markdown"
+        assert mock_add_documents.call_args.kwargs["vectors"].tolist() == [[1.0, 0.0], [0.0, 1.0]]
+
+
+def test_is_file_ingested_with_chunking_strategy(app_context):
+    with patch(GET_FILE_MANIFEST_PATH) as mock_get_file_manifest:
+        embedding_generator = EmbeddingsService(app_context)
+        embedding_generator.is_file_ingested("file-sha")
+        embedding_generator.is_file_ingested("file-sha", ChunkingStrategy.token)
+
+        assert [call.args for call in mock_get_file_manifest.return_value.contains.call_args_list] == [("file-sha", "semantic"), ("file-sha", "token")]
+
+
+def test_ingest_again_a_file_whose_ingestion_failed(app_context, tmp_path):
+    app_context.configurations.vectorStore.type = VectorStoreType.local
+    app_context.configurations.vectorStore.path = str(tmp_path)
+    app_context.configurations.ingestion.batchMaxSize = 1
+    app_context.configurations.embeddings.dimensions = 2
+    embedded_texts = []
+
+    def embed_documents(texts):
+        embedded_texts.extend(texts)
+        if len(embedded_texts) == 2:
+            raise RuntimeError("The embeddings model is unavailable")
+        return [[1.0, 0.0]] * len(texts)
+
+    with (
+        patch(ITER_SPLIT_PATH, side_effect=lambda text, with_vectors: [SemanticChunk(text)]),
+        patch(EMBED_DOCUMENTS_PATH, side_effect=embed_documents),
+    ):
+        with pytest.raises(RuntimeError):
+            EmbeddingsService(app_context).generate_from_texts(["Page one", "Page two"], file_sha="file-sha")
+        # Some chunks of the file are stored, but its ingestion did not complete
+        assert not EmbeddingsService(app_context).is_file_ingested("file-sha")
+
+        EmbeddingsService(app_context).generate_from_texts(["Page one", "Page two"], file_sha="file-sha")
+
+        assert EmbeddingsService(app_context).is_file_ingested("file-sha")
+
+
+def test_generate_from_texts_batches_chunks_across_texts(app_context):
+    with (
+        patch(ITER_SPLIT_PATH, side_effect=lambda text, with_vectors: [SemanticChunk(text)]),
+        patch(EMBED_DOCUMENTS_PATH, side_effect=lambda texts: [[1.0, 0.0]] * len(texts)),
+        patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+        patch(GET_EXISTING_IDS_PATH, return_value=set()),
+        patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+        patch(GET_FILE_MANIFEST_PATH),
+    ):
+        EmbeddingsService(app_context).generate_from_texts(["Page one", "Page two", "Page three"], file_sha="file-sha")
+
+        mock_add_documents.assert_called_once()
+        # The texts are split by concurrent workers, in any order
+        assert sorted(document.page_content for document in mock_add_documents.call_args.args[0]) == ["Page one", "Page three", "Page two"]
+
+
+def test_generate_from_texts_removes_blocks_repeated_across_texts(app_context):
+    app_context.configurations.boilerplate.enabled = True
+    app_context.configurations.boilerplate.minPages = 1
+    footer = "Confidential - do not distribute outside of the company"
+    with (
+        patch(ITER_SPLIT_PATH, side_effect=lambda text, with_vectors: [SemanticChunk(text)]) as mock_iter_split,
+        patch(EMBED_DOCUMENTS_PATH, side_effect=lambda texts: [[1.0, 0.0]] * len(texts)),
+        patch(ADD_DOCUMENTS_PATH),
+        patch(GET_EXISTING_IDS_PATH, return_value=set()),
+        patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+    ):
+        EmbeddingsService(app_context).generate_from_texts([f"Page one\n{footer}", f"Page two\n{footer}", f"Page three\n{footer}"])
+
+        split_texts = sorted(call.args[0] for call in mock_iter_split.call_args_list)
+        # The footer is kept only in the first text
+        assert split_texts == [f"Page one\n{footer}", "Page three\n", "Page two\n"]
+
+
+def test_generate_from_texts_reports_the_progress_of_the_job(app_context):
+    store = InMemoryIngestionJobStore()
+    tracker = IngestionJobTracker(IngestionJob(id="job", kind="file", source="file.txt"), store)
+    with (
+        patch(ITER_SPLIT_PATH, side_effect=lambda text, with_vectors: [SemanticChunk(text)]),
+        patch(EMBED_DOCUMENTS_PATH, side_effect=lambda texts: [[1.0, 0.0]] * len(texts)),
+        patch(ADD_DOCUMENTS_PATH),
+        patch(GET_EXISTING_IDS_PATH, return_value=set()),
+        patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+    ):
+        EmbeddingsService(app_context, job_tracker=tracker).generate_from_texts(["Page one", "Page two"])
+    tracker.save()
+
+    progress = store.get("job").progress
+    assert (progress.pages, progress.chunks, progress.total_pages) == (2, 2, 2)
+    assert progress.tokens == sum(count_tokens(get_tokenizer("embeddings_name"), text) for text in ["Page one", "Page two"])
+
+
+def test_generate_from_texts_stops_when_the_job_is_cancelled(app_context):
+    tracker = IngestionJobTracker(IngestionJob(id="job", kind="file", source="file.txt"), InMemoryIngestionJobStore())
+    tracker.cancel()
+    with (
+        patch(ADD_DOCUMENTS_PATH) as mock_add_documents,
+        patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+        pytest.raises(IngestionJobCancelledError),
+    ):
+        EmbeddingsService(app_context, job_tracker=tracker).generate_from_texts(["Page one"])
+
+    mock_add_documents.assert_not_called()
+
+
+def test_generate_from_url_saves_manifest_after_storing_chunks(app_context):
+    events = []
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body="<html><body>Page</body></html>")
+
+        with (
+            patch(ITER_SPLIT_PATH, return_value=[SemanticChunk("chunk1")]),
+            patch(EMBED_DOCUMENTS_PATH, side_effect=lambda texts: [[1.0, 0.0]] * len(texts)),
+            patch(ADD_DOCUMENTS_PATH, side_effect=lambda *args, **kwargs: events.append("add_documents")),
+            patch(GET_EXISTING_IDS_PATH, return_value=set()),
+            patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+            patch(GET_CRAWL_MANIFEST_PATH) as mock_get_crawl_manifest,
+        ):
+            mock_get_crawl_manifest.return_value.load.return_value = {}
+            mock_get_crawl_manifest.return_value.save.side_effect = lambda entry: events.append("save")
+
+            EmbeddingsService(app_context).generate_from_url("http://example.com")
+
+    assert events == ["add_documents", "save"]
+
+
+def test_generate_from_url_raises_the_errors_of_the_pipeline(app_context):
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body="<html><body>Page</body></html>")
+
+        with (
+            patch(ITER_SPLIT_PATH, return_value=[SemanticChunk("chunk1")]),
+            patch(EMBED_DOCUMENTS_PATH, side_effect=lambda texts: [[1.0, 0.0]] * len(texts)),
+            patch(ADD_DOCUMENTS_PATH, side_effect=RuntimeError("Bulk write failed")),
+            patch(GET_EXISTING_IDS_PATH, return_value=set()),
+            patch(GET_STORED_NUM_DIMENSIONS_PATH, return_value=None),
+            patch(GET_CRAWL_MANIFEST_PATH) as mock_get_crawl_manifest,
+        ):
+            mock_get_crawl_manifest.return_value.load.return_value = {}
+
+            with pytest.raises(RuntimeError, match="Bulk write failed"):
+                EmbeddingsService(app_context).generate_from_url("http://example.com")
+
+            mock_get_crawl_manifest.return_value.save.assert_not_called()
@@ -1,12 +1,17 @@
+import gzip
+import hashlib
 import io
+import tarfile
 from pathlib import Path
-from zipfile import BadZipFile
+from zipfile import ZIP_DEFLATED, BadZipFile, ZipFile
 
+import pymupdf
 import pytest
-from fastapi import UploadFile
 
-from src.application.embeddings.file_parser.errors import InvalidFileError
-from src.application.embeddings.file_parser.file_parser import FileParser
+from src.application.embeddings.file_parser.errors import ArchiveTooLargeError, InvalidFileError
+from src.application.embeddings.file_parser.file_parser import FileParser, FileParserParams
+from src.application.embeddings.file_parser.get_file_type import FileType
+from src.application.embeddings.file_parser.spooled_file import spool_file
 from src.constants import (
     GZIP_CONTENT_TYPE,
     MD_CONTENT_TYPE,
@@ -47,24 +52,22 @@ PDF_FILE_CONTENT = "this is a PDF (portable document format) file\n"
 def test_extract_document_from_non_compressed_file(logger, file_name, file_content_type, file_content):
     current_dir = Path(__file__).parent
 
-    with open(current_dir / ASSETS_FOLDER / file_name, "rb") as file:
-        upload_file = UploadFile(filename=file_name, headers={"content-type": file_content_type}, file=file)
-
-        file_parser = FileParser(logger)
-        result = list(file_parser.extract_documents_from_file(upload_file))
+    file_parser = FileParser(logger)
+    result = list(file_parser.extract_documents_from_file(str(current_dir / ASSETS_FOLDER / file_name), file_name, file_content_type))
 
-        # check that the result list includes only one document, the txt document
-        assert len(result) == 1
-        assert result[0] == file_content
+    # check that the result list includes only one document, the txt document
+    assert len(result) == 1
+    assert result[0] == file_content
 
 
-def test_fail_open_file_with_wrong_extension(logger):
-    upload_file = UploadFile(filename="image_png.png", headers={"content-type": "image/png"}, file=io.BytesIO(b"this is an image"))
+def test_fail_open_file_with_wrong_extension(logger, tmp_path):
+    file_path = tmp_path / "image_png.png"
+    file_path.write_bytes(b"this is an image")
 
     file_parser = FileParser(logger)
 
     with pytest.raises(InvalidFileError):
-        document_generator = file_parser.extract_documents_from_file(upload_file)
+        document_generator = file_parser.extract_documents_from_file(str(file_path), "image_png.png", "image/png")
         for _ in document_generator:
             # We are not supposed to get here
             pass
@@ -87,30 +90,184 @@ def test_extract_documents_from_compressed_file_test(logger, file_name, file_con
 
     current_dir = Path(__file__).parent
 
-    with open(current_dir / ASSETS_FOLDER / file_name, "rb") as file:
-        upload_file = UploadFile(filename=file_name, headers={"content-type": file_content_type}, file=file)
-
-        file_parser = FileParser(logger)
-        result = list(file_parser.extract_documents_from_file(upload_file))
+    file_parser = FileParser(logger)
+    result = list(file_parser.extract_documents_from_file(str(current_dir / ASSETS_FOLDER / file_name), file_name, file_content_type))
 
-        # check that the result list includes the text_content, the markdown_content and pdf_content
-        assert len(result) == 3
-        assert result[0] == MD_FILE_CONTENT
-        assert result[1] == PDF_FILE_CONTENT
-        assert result[2] == TXT_FILE_CONTENT
+    # check that the result list includes the text_content, the markdown_content and pdf_content
+    assert len(result) == 3
+    assert result[0] == MD_FILE_CONTENT
+    assert result[1] == PDF_FILE_CONTENT
+    assert result[2] == TXT_FILE_CONTENT
 
 
-def test_fail_if_non_valid_zip_file(logger):
-    upload_file = UploadFile(
-        filename="not_a_zip_file.zip",
-        headers={"content-type": "application/zip"},
-        file=io.BytesIO(b"this is a text file"),
-    )
+def test_fail_if_non_valid_zip_file(logger, tmp_path):
+    file_path = tmp_path / "not_a_zip_file.zip"
+    file_path.write_bytes(b"this is a text file")
 
     file_parser = FileParser(logger)
 
     with pytest.raises(BadZipFile):
-        document_generator = file_parser.extract_documents_from_file(upload_file)
+        document_generator = file_parser.extract_documents_from_file(str(file_path), "not_a_zip_file.zip", "application/zip")
         for _ in document_generator:
             # We are not supposed to get here
             pass
+
+
+@pytest.mark.parametrize(
+    "file_name, file_content_type, file_type",
+    [
+        (TXT_FILE_NAME, TEXT_CONTENT_TYPE, FileType.TEXT),
+        (PDF_FILE_NAME, PDF_CONTENT_TYPE, FileType.PDF),
+        (ZIP_FILE_NAME, ZIP_CONTENT_TYPE, FileType.ZIP),
+        (TAR_FILE_NAME, TAR_CONTENT_TYPE, FileType.TAR),
+        (GZIP_FILE_NAME, GZIP_CONTENT_TYPE, FileType.GZIP),
+    ],
+)
+def test_validate_file(logger, file_name, file_content_type, file_type):
+    current_dir = Path(__file__).parent
+
+    assert FileParser(logger).validate_file(str(current_dir / ASSETS_FOLDER / file_name), file_name, file_content_type) == file_type
+
+
+@pytest.mark.parametrize(
+    "file_name, file_content_type, error",
+    [
+        ("image_png.png", "image/png", InvalidFileError),
+        ("not_a_pdf_file.pdf", PDF_CONTENT_TYPE, InvalidFileError),
+        ("not_a_zip_file.zip", ZIP_CONTENT_TYPE, BadZipFile),
+        ("not_a_tar_file.tar", TAR_CONTENT_TYPE, tarfile.TarError),
+        ("not_a_gzip_file.gz", GZIP_CONTENT_TYPE, gzip.BadGzipFile),
+        ("not_a_tar_file.tar.gz", GZIP_CONTENT_TYPE, tarfile.TarError),
+    ],
+)
+def test_fail_validate_invalid_file(logger, tmp_path, file_name, file_content_type, error):
+    file_path = tmp_path / file_name
+    file_path.write_bytes(gzip.compress(b"this is a text file") if file_name.endswith(".tar.gz") else b"this is a text file")
+
+    with pytest.raises(error):
+        FileParser(logger).validate_file(str(file_path), file_name, file_content_type)
+
+
+def test_spool_file_to_the_disk(tmp_path):
+    content = b"this is a text file\n" * 100000
+
+    spooled_file = spool_file(io.BytesIO(content), str(tmp_path / "uploads"))
+
+    assert Path(spooled_file.path).parent == tmp_path / "uploads"
+    assert Path(spooled_file.path).read_bytes() == content
+    assert spooled_file.sha256 == hashlib.sha256(content).hexdigest()
+    spooled_file.remove()
+    assert not Path(spooled_file.path).exists()
+
+
+def create_zip_file(file_path, members):
+    with ZipFile(file_path, "w", compression=ZIP_DEFLATED) as zipf:
+        for member_name, content in members:
+            zipf.writestr(member_name, content)
+
+
+def create_tar_file(file_path, members, mode="w"):
+    with tarfile.open(file_path, mode) as tarf:
+        for member_name, content in members:
+            member = tarfile.TarInfo(member_name)
+            member.size = len(content)
+            tarf.addfile(member, io.BytesIO(content))
+
+
+@pytest.mark.parametrize(
+    "file_name, content_type, create_file",
+    [
+        ("archive.zip", ZIP_CONTENT_TYPE, create_zip_file),
+        ("archive.tar", TAR_CONTENT_TYPE, create_tar_file),
+        ("archive.tar.gz", GZIP_CONTENT_TYPE, lambda file_path, members: create_tar_file(file_path, members, mode="w:gz")),
+    ],
+)
+def test_extract_only_the_supported_files_of_archives(logger, tmp_path, file_name, content_type, create_file):
+    file_path = tmp_path / file_name
+    create_file(file_path, [("image.png", b"\x89PNG" * 1000), ("docs/first.txt", b"first"), ("docs/second.md", b"# second")])
+
+    result = list(FileParser(logger).extract_documents_from_file(str(file_path), file_name, content_type))
+
+    assert result == ["first", "# second"]
+    # The archive is read in place, nothing is extracted next to it
+    assert [path.name for path in tmp_path.iterdir()] == [file_name]
+
+
+@pytest.mark.parametrize(
+    "file_name, content_type, create_file",
+    [
+        ("archive.zip", ZIP_CONTENT_TYPE, create_zip_file),
+        ("archive.tar", TAR_CONTENT_TYPE, create_tar_file),
+        ("archive.tar.gz", GZIP_CONTENT_TYPE, lambda file_path, members: create_tar_file(file_path, members, mode="w:gz")),
+    ],
+)
+@pytest.mark.parametrize(
+    "params",
+    [
+        FileParserParams(max_archive_member_bytes=1500, max_archive_total_bytes=10000),
+        FileParserParams(max_archive_member_bytes=10000, max_archive_total_bytes=2500),
+    ],
+)
+def test_fail_extract_archives_exceeding_the_decompressed_size_limits(logger, tmp_path, file_name, content_type, create_file, params):
+    file_path = tmp_path / file_name
+    create_file(file_path, [("first.txt", b"a" * 1000), ("second.txt", b"b" * 2000)])
+
+    with pytest.raises(ArchiveTooLargeError):
+        list(FileParser(logger, params).extract_documents_from_file(str(file_path), file_name, content_type))
+
+
+def test_fail_extract_gzip_file_exceeding_the_decompressed_size_limit(logger, tmp_path):
+    file_path = tmp_path / "file.txt.gz"
+    file_path.write_bytes(gzip.compress(b"a" * 5000))
+    file_parser = FileParser(logger, FileParserParams(max_archive_member_bytes=4096))
+
+    with pytest.raises(ArchiveTooLargeError):
+        list(file_parser.extract_documents_from_file(str(file_path), "file.txt.gz", GZIP_CONTENT_TYPE))
+    assert list(FileParser(logger).extract_documents_from_file(str(file_path), "file.txt.gz", GZIP_CONTENT_TYPE)) == ["a" * 5000]
+
+
+def test_fail_validate_zip_file_declaring_files_exceeding_the_size_limits(logger, tmp_path):
+    file_path = tmp_path / "archive.zip"
+    create_zip_file(file_path, [("first.txt", b"a" * 1000), ("second.txt", b"b" * 2000), ("image.png", b"c" * 5000)])
+
+    assert FileParser(logger, FileParserParams(max_archive_total_bytes=3000)).validate_file(str(file_path), "archive.zip") == FileType.ZIP
+    with pytest.raises(ArchiveTooLargeError):
+        FileParser(logger, FileParserParams(max_archive_total_bytes=2999)).validate_file(str(file_path), "archive.zip")
+
+
+def create_pdf(page_texts) -> bytes:
+    with pymupdf.open() as doc:
+        for text in page_texts:
+            doc.new_page().insert_text((72, 72), text)
+        return doc.tobytes()
+
+
+def test_extract_pdf_pages_in_parallel(logger, tmp_path):
+    file_path = tmp_path / "manual.pdf"
+    file_path.write_bytes(create_pdf([f"page {number}" for number in range(7)]))
+
+    sequential_result = list(FileParser(logger).extract_documents_from_file(str(file_path), "manual.pdf", PDF_CONTENT_TYPE))
+    file_parser = FileParser(logger, FileParserParams(workers=2, pdf_pages_per_task=2))
+    result = list(file_parser.extract_documents_from_file(str(file_path), "manual.pdf", PDF_CONTENT_TYPE))
+
+    assert result == sequential_result
+    assert [text.strip() for text in result] == [f"page {number}" for number in range(7)]
+
+
+def test_extract_archive_members_in_parallel_preserving_their_order(logger, tmp_path):
+    file_path = tmp_path / "archive.zip"
+    create_zip_file(
+        file_path,
+        [
+            ("first.pdf", create_pdf(["first page 1", "first page 2"])),
+            ("second.txt", b"second"),
+            ("third.pdf", create_pdf(["third page 1"])),
+            ("fourth.md", b"# fourth"),
+            ("fifth.pdf", create_pdf(["fifth page 1"])),
+        ],
+    )
+
+    file_parser = FileParser(logger, FileParserParams(workers=2))
+    result = list(file_parser.extract_documents_from_file(str(file_path), "archive.zip", ZIP_CONTENT_TYPE))
+
+    assert [text.strip() for text in result] == ["first page 1", "first page 2", "second", "third page 1", "# fourth", "fifth page 1"]
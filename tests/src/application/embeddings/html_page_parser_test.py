@@ -0,0 +1,92 @@
+from src.application.embeddings.html_page_parser import HtmlPageParser
+
+
+def test_initial_hyperlinks_empty():
+    parser = HtmlPageParser()
+    assert not parser.hyperlinks
+
+
+def test_handle_starttag_adds_hyperlink():
+    parser = HtmlPageParser()
+    parser.handle_starttag("a", [("href", "http://example.com")])
+    assert parser.hyperlinks == ["http://example.com"]
+
+
+def test_handle_starttag_ignores_non_anchor_tags():
+    parser = HtmlPageParser()
+    parser.handle_starttag("div", [("href", "http://example.com")])
+    assert not parser.hyperlinks
+
+
+def test_handle_starttag_ignores_anchor_without_href():
+    parser = HtmlPageParser()
+    parser.handle_starttag("a", [("class", "link")])
+    assert not parser.hyperlinks
+
+
+def test_handle_starttag_multiple_hyperlinks():
+    parser = HtmlPageParser()
+    parser.handle_starttag("a", [("href", "http://example1.com")])
+    parser.handle_starttag("a", [("href", "http://example2.com")])
+    assert parser.hyperlinks == ["http://example1.com", "http://example2.com"]
+
+
+def test_feed_extracts_canonical_url():
+    parser = HtmlPageParser()
+    parser.feed('<head><link rel="stylesheet" href="style.css"><link rel="Canonical" href="http://example.com/page"></head>')
+    assert parser.canonical_url == "http://example.com/page"
+    assert not parser.hyperlinks
+
+
+def parse(html: str) -> HtmlPageParser:
+    parser = HtmlPageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def test_feed_extracts_text_and_links_in_a_single_pass():
+    parser = parse('<html><head><title>Title</title></head><body><p>First <a href="/page">paragraph</a></p><p>Second\n   paragraph</p></body></html>')
+    assert parser.hyperlinks == ["/page"]
+    assert parser.text == "Title\nFirst paragraph\nSecond paragraph"
+
+
+def test_feed_skips_boilerplate_elements():
+    parser = parse(
+        "<body>"
+        '<header><a href="/">Home</a></header>'
+        '<nav><ul><li><a href="/docs">Docs</a></li></ul></nav>'
+        "<script>var tracking = true;</script><style>p { color: red; }</style>"
+        '<div class="cookie-banner"><p>We use cookies</p><button>Accept</button></div>'
+        '<div id="gdpr_consent">Consent</div><div hidden>Hidden</div><div aria-hidden="true">Decorative</div>'
+        "<p>Content</p>"
+        "<footer>Copyright</footer>"
+        "</body>"
+    )
+    # The links of the skipped elements are still crawled
+    assert parser.hyperlinks == ["/", "/docs"]
+    assert parser.text == "Content"
+
+
+def test_feed_keeps_only_the_main_content():
+    parser = parse(
+        "<title>Page</title><body><div>Sidebar</div>"
+        "<main><article><header><h1>Heading</h1></header><p>Content</p></article></main>"
+        '<div role="note">Related</div></body>'
+    )
+    assert parser.blocks == ["Page", "Heading", "Content"]
+
+
+def test_feed_does_not_skip_the_body_by_its_attributes():
+    parser = parse('<body class="cookie-consent-enabled"><p>Content</p></body>')
+    assert parser.text == "Content"
+
+
+def test_feed_closes_elements_left_open():
+    parser = parse("<body><div><p>First<p>Second</div><nav>Menu</nav></span><p>Third<br>Fourth</body>")
+    assert parser.blocks == ["First", "Second", "Third", "Fourth"]
+
+
+def test_feed_preserves_preformatted_text():
+    parser = parse("<body><pre>def f():\n    return 1</pre></body>")
+    assert parser.text == "def f():\n    return 1"
@@ -0,0 +1,81 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.application.embeddings.ingestion_batcher import ChunkBatch, ChunkBatcher, IngestionParams, PendingChunks
+from src.infrastracture.embeddings_manager.tokenizer import count_tokens, get_tokenizer
+
+
+def chunk_batch(*texts: str, vectors: np.ndarray | None = None, pending: PendingChunks | None = None) -> ChunkBatch:
+    return ChunkBatch([Document(page_content=text) for text in texts], list(texts), vectors, [pending] * len(texts) if pending else [])
+
+
+def add_all(chunk_batcher: ChunkBatcher, *batches: ChunkBatch) -> list[ChunkBatch]:
+    added = [filled for batch in batches for filled in chunk_batcher.add(batch)]
+    return added + chunk_batcher.flush()
+
+
+def test_batches_chunks_up_to_the_maximum_size():
+    batches = add_all(ChunkBatcher(IngestionParams(batch_max_size=2)), chunk_batch("a", "b"), chunk_batch("c"))
+
+    assert [batch.ids for batch in batches] == [["a", "b"], ["c"]]
+    assert batches[0].vectors is None
+
+
+def test_batches_chunks_up_to_the_maximum_tokens():
+    tokens = count_tokens(get_tokenizer(None), "some text")
+    chunk_batcher = ChunkBatcher(IngestionParams(batch_max_tokens=2 * tokens))
+
+    batches = add_all(chunk_batcher, *(ChunkBatch([Document(page_content="some text")], [str(index)]) for index in range(3)))
+
+    assert [batch.ids for batch in batches] == [["0", "1"], ["2"]]
+
+
+def test_ignores_chunks_already_added():
+    batches = add_all(ChunkBatcher(), chunk_batch("a"), chunk_batch("a", "b"))
+
+    assert [batch.ids for batch in batches] == [["a", "b"]]
+
+
+def test_remembers_only_the_chunks_recently_added():
+    chunk_batcher = ChunkBatcher(IngestionParams(batch_max_size=1), max_recent_ids=2)
+
+    batches = add_all(chunk_batcher, *(chunk_batch(_id) for _id in ["a", "b", "a", "c", "b"]))
+
+    # "b" is forgotten once "a" (added again) and "c" are more recent
+    assert [batch.ids for batch in batches] == [["a"], ["b"], ["c"], ["b"]]
+
+
+def test_separates_chunks_with_and_without_vectors():
+    batches = add_all(ChunkBatcher(), chunk_batch("a", vectors=np.array([[1.0, 0.0]])), chunk_batch("b"))
+
+    assert [batch.ids for batch in batches] == [["a"], ["b"]]
+    assert batches[0].vectors.tolist() == [[1.0, 0.0]]
+    assert batches[1].vectors is None
+
+
+def test_releases_the_chunks_of_the_batches_stored():
+    callback = MagicMock()
+    pending = PendingChunks(callback)
+    pending.attach(4)
+    chunk_batcher = ChunkBatcher(IngestionParams(batch_max_size=2))
+
+    batches = add_all(chunk_batcher, chunk_batch("a", "b", pending=pending), chunk_batch("a", "c", pending=pending))
+    pending.close()
+    batches[0].release()
+
+    callback.assert_not_called()
+
+    batches[1].release()
+
+    callback.assert_called_once()
+
+
+def test_calls_the_callback_once_closed_when_no_chunks_are_attached():
+    callback = MagicMock()
+    pending = PendingChunks(callback)
+
+    pending.close()
+
+    callback.assert_called_once()
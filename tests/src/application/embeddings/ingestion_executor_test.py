@@ -0,0 +1,108 @@
+import os
+import queue
+import threading
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+
+from src.application.embeddings.errors import IngestionJobCancelledError
+from src.application.embeddings.ingestion_executor import (
+    ProcessIngestionExecutor,
+    ThreadIngestionExecutor,
+    _WorkerJobTracker,
+    _WorkerMetricsManager,
+    apply_metrics,
+    create_ingestion_executor,
+)
+from src.application.embeddings.ingestion_job_tracker import IngestionJobTracker
+from src.application.embeddings.ingestion_tasks import FileIngestionTask, UrlIngestionTask
+from src.configurations.service_model import IngestionExecutor, VectorStoreType
+from src.infrastracture.vector_store_manager.ingestion_job_store import IngestionJob, InMemoryIngestionJobStore
+
+
+def create_tracker() -> IngestionJobTracker:
+    return IngestionJobTracker(IngestionJob(id="job", kind="file", source="file.txt"), InMemoryIngestionJobStore(), progress_interval_seconds=0)
+
+
+def test_create_the_configured_executor(app_context):
+    assert isinstance(create_ingestion_executor(app_context, IngestionExecutor.thread, 2), ThreadIngestionExecutor)
+    assert isinstance(create_ingestion_executor(app_context, IngestionExecutor.process, 2, [0]), ProcessIngestionExecutor)
+
+
+def test_create_a_thread_executor_for_the_local_vector_store(app_context):
+    app_context.configurations.vectorStore.type = VectorStoreType.local
+
+    assert isinstance(create_ingestion_executor(app_context, IngestionExecutor.process, 2), ThreadIngestionExecutor)
+    app_context.logger.warning.assert_called_once()
+
+
+def test_thread_executor_runs_the_task_with_the_job_tracker(app_context):
+    tracker = create_tracker()
+    task = UrlIngestionTask(url="https://example.com")
+
+    with patch("src.application.embeddings.ingestion_executor.run_ingestion_task") as mock_run:
+        ThreadIngestionExecutor(app_context).run(task, tracker)
+
+    mock_run.assert_called_once_with(app_context, task, tracker)
+
+
+def test_worker_tracker_sends_the_progress_and_reads_the_cancellation():
+    progress_queue = queue.Queue()
+    cancelled = threading.Event()
+    tracker = _WorkerJobTracker("job", progress_queue, cancelled)
+
+    tracker.set_total_pages(3)
+    tracker.add_progress(pages=1, chunks=2, tokens=20)
+    tracker.check_cancelled()
+    cancelled.set()
+
+    assert progress_queue.get_nowait() == ("total_pages", 3)
+    assert progress_queue.get_nowait() == ("progress", {"pages": 1, "chunks": 2, "tokens": 20, "errors": 0})
+    with pytest.raises(IngestionJobCancelledError):
+        tracker.check_cancelled()
+
+
+def test_worker_tracker_sends_the_metrics_of_the_worker_with_the_progress():
+    progress_queue = queue.Queue()
+    metrics_manager = _WorkerMetricsManager()
+    tracker = _WorkerJobTracker("job", progress_queue, threading.Event(), metrics_manager)
+
+    metrics_manager.embeddings_cache_hits.inc(2)
+    metrics_manager.embeddings_cache_hits.inc(3)
+    metrics_manager.ingestion_queue_depth.labels(stage="chunk").set(4)
+    metrics_manager.ingestion_queue_depth.labels(stage="chunk").set(1)
+    tracker.add_progress(pages=1)
+    tracker.send_metrics()
+
+    assert progress_queue.get_nowait() == ("progress", {"pages": 1, "chunks": 0, "tokens": 0, "errors": 0})
+    kind, updates = progress_queue.get_nowait()
+    assert kind == "metrics"
+    # The metrics are sent once, with the sum of the increments and the last value of the gauges
+    assert progress_queue.empty()
+
+    api_metrics_manager = MagicMock()
+    apply_metrics(api_metrics_manager, updates)
+    api_metrics_manager.embeddings_cache_hits.inc.assert_called_once_with(5)
+    api_metrics_manager.ingestion_queue_depth.labels.assert_called_once_with(stage="chunk")
+    assert api_metrics_manager.ingestion_queue_depth.labels.return_value.set.call_args_list == [call(1)]
+
+
+def test_process_executor_runs_the_task_in_a_worker_process(app_context, tmp_path):
+    app_context.configurations.vectorStore.type = VectorStoreType.local
+    app_context.configurations.vectorStore.path = str(tmp_path)
+    file_path = tmp_path / "file.txt"
+    file_path.write_bytes(b"")
+    executor = ProcessIngestionExecutor(app_context, max_workers=1)
+    tracker = create_tracker()
+
+    try:
+        # An empty file is split into no chunks, so that nothing reaches the vector store
+        executor.run(FileIngestionTask(file_name="file.txt", file_path=str(file_path)), tracker)
+        pool, _ = executor._get_pool()  # pylint: disable=W0212
+        worker_pids = [process.pid for process in pool._processes.values()]  # pylint: disable=W0212
+    finally:
+        executor.shutdown()
+
+    assert worker_pids
+    assert all(pid != os.getpid() for pid in worker_pids)
+    assert tracker.snapshot().progress.pages == 1
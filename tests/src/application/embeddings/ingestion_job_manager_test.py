@@ -0,0 +1,202 @@
+import threading
+import time
+
+import pytest
+
+from src.application.embeddings.errors import IngestionJobCancelledError, IngestionJobFinishedError
+from src.application.embeddings.ingestion_executor import ThreadIngestionExecutor
+from src.application.embeddings.ingestion_job_manager import IngestionJobManager
+from src.application.embeddings.ingestion_job_tracker import IngestionJobTracker
+from src.infrastracture.vector_store_manager.ingestion_job_store import IngestionJob, IngestionJobStatus, InMemoryIngestionJobStore
+
+
+def create_manager(app_context, max_concurrent_jobs=2) -> IngestionJobManager:
+    app_context.configurations.ingestionJobs.maxConcurrentJobs = max_concurrent_jobs
+    manager = IngestionJobManager(app_context)
+    manager._store = InMemoryIngestionJobStore()  # pylint: disable=W0212
+    return manager
+
+
+def test_run_job_and_save_its_progress(app_context):
+    manager = create_manager(app_context)
+
+    def task(tracker: IngestionJobTracker):
+        tracker.set_total_pages(4)
+        tracker.add_progress(pages=2, chunks=3, tokens=30, errors=1)
+
+    job = manager.submit("url", "https://example.com", task)
+    assert job.status == IngestionJobStatus.queued
+    manager.wait(job.id, timeout=5)
+
+    job = manager.get_job(job.id)
+    assert job.status == IngestionJobStatus.completed
+    assert (job.progress.pages, job.progress.chunks, job.progress.tokens, job.progress.errors, job.progress.total_pages) == (2, 3, 30, 1, 4)
+    assert job.started_at is not None
+    assert job.finished_at is not None
+
+
+def test_run_jobs_in_threads_by_default(app_context):
+    assert isinstance(create_manager(app_context).task_executor, ThreadIngestionExecutor)
+
+
+def test_queue_jobs_beyond_the_maximum_concurrent_jobs(app_context):
+    manager = create_manager(app_context, max_concurrent_jobs=1)
+    release = threading.Event()
+
+    first_job = manager.submit("url", "https://a.example.com", lambda tracker: release.wait(5))
+    second_job = manager.submit("url", "https://b.example.com", lambda tracker: None)
+
+    assert manager.get_job(second_job.id).status == IngestionJobStatus.queued
+    release.set()
+    manager.wait(first_job.id, timeout=5)
+    manager.wait(second_job.id, timeout=5)
+    assert manager.get_job(second_job.id).status == IngestionJobStatus.completed
+    assert not manager.has_active_jobs()
+
+
+def test_cancel_queued_job(app_context):
+    manager = create_manager(app_context, max_concurrent_jobs=1)
+    release = threading.Event()
+    calls = []
+
+    first_job = manager.submit("url", "https://a.example.com", lambda tracker: release.wait(5))
+    second_job = manager.submit("url", "https://b.example.com", calls.append)
+
+    assert manager.cancel(second_job.id).status == IngestionJobStatus.cancelled
+    release.set()
+    manager.wait(first_job.id, timeout=5)
+    assert calls == []
+    assert manager.get_job(second_job.id).status == IngestionJobStatus.cancelled
+
+
+def test_fail_to_cancel_finished_job(app_context):
+    manager = create_manager(app_context)
+
+    job = manager.submit("url", "https://example.com", lambda tracker: None)
+    manager.wait(job.id, timeout=5)
+
+    with pytest.raises(IngestionJobFinishedError):
+        manager.cancel(job.id)
+
+
+def test_call_on_finished_of_completed_and_cancelled_jobs(app_context):
+    manager = create_manager(app_context, max_concurrent_jobs=1)
+    release = threading.Event()
+    finished = []
+
+    first_job = manager.submit("file", "a.txt", lambda tracker: release.wait(5), on_finished=lambda: finished.append("a.txt"))
+    second_job = manager.submit("file", "b.txt", lambda tracker: None, on_finished=lambda: finished.append("b.txt"))
+
+    manager.cancel(second_job.id)
+    assert finished == ["b.txt"]
+    release.set()
+    manager.wait(first_job.id, timeout=5)
+    assert finished == ["b.txt", "a.txt"]
+
+
+def test_cancel_running_job_at_its_next_checkpoint(app_context):
+    manager = create_manager(app_context)
+    started = threading.Event()
+
+    def task(tracker: IngestionJobTracker):
+        started.set()
+        while True:
+            tracker.check_cancelled()
+            time.sleep(0.01)
+
+    job = manager.submit("url", "https://example.com", task)
+    assert started.wait(5)
+    assert manager.cancel(job.id).cancel_requested
+    manager.wait(job.id, timeout=5)
+
+    assert manager.get_job(job.id).status == IngestionJobStatus.cancelled
+
+
+def test_record_errors_of_failed_jobs(app_context):
+    manager = create_manager(app_context)
+
+    def task(tracker: IngestionJobTracker):
+        raise RuntimeError("Embeddings request failed")
+
+    job = manager.submit("file", "file.txt", task)
+    manager.wait(job.id, timeout=5)
+
+    job = manager.get_job(job.id)
+    assert job.status == IngestionJobStatus.failed
+    assert job.error == "Embeddings request failed"
+
+
+def test_tracker_sees_the_cancellation_requested_by_another_replica():
+    store = InMemoryIngestionJobStore()
+    tracker = IngestionJobTracker(IngestionJob(id="job", kind="url", source="https://example.com"), store, progress_interval_seconds=0)
+    tracker.save()
+
+    store.request_cancel("job")
+    tracker.add_progress(pages=1)
+
+    with pytest.raises(IngestionJobCancelledError):
+        tracker.check_cancelled()
+
+
+def test_tracker_saves_the_progress_at_most_once_per_interval():
+    store = InMemoryIngestionJobStore()
+    tracker = IngestionJobTracker(IngestionJob(id="job", kind="url", source="https://example.com"), store, progress_interval_seconds=60)
+
+    tracker.add_progress(pages=1)
+    tracker.add_progress(pages=1)
+
+    assert store.get("job").progress.pages == 1
+    tracker.save()
+    assert store.get("job").progress.pages == 2
+
+
+def test_estimate_the_time_to_complete_running_jobs():
+    job = IngestionJob(id="job", kind="url", source="https://example.com", status=IngestionJobStatus.running, started_at=time.time() - 10)
+    job.progress.pages = 2
+    job.progress.total_pages = 6
+
+    assert job.eta_seconds == pytest.approx(20, abs=1)
+    job.progress.total_pages = None
+    assert job.eta_seconds is None
+
+
+def test_save_the_heartbeat_of_the_jobs_while_they_run(app_context):
+    app_context.configurations.ingestionJobs.heartbeatIntervalSeconds = 0.05
+    manager = create_manager(app_context)
+    release = threading.Event()
+
+    job = manager.submit("url", "https://example.com", lambda tracker: release.wait(5))
+    first_updated_at = manager.get_job(job.id).updated_at
+    time.sleep(0.2)
+
+    assert manager.get_job(job.id).updated_at > first_updated_at
+    assert manager.has_active_jobs()
+    release.set()
+    manager.wait(job.id, timeout=5)
+
+
+def test_ignore_active_jobs_without_recent_heartbeat(app_context):
+    app_context.configurations.ingestionJobs.staleJobTimeoutSeconds = 60
+    manager = create_manager(app_context)
+    manager.store.save(IngestionJob(id="job", kind="url", source="https://example.com", status=IngestionJobStatus.running, updated_at=time.time() - 120))
+
+    assert not manager.has_active_jobs()
+
+
+def test_recover_the_jobs_left_active_by_the_replica(app_context):
+    manager = create_manager(app_context)
+    replica = manager._replica  # pylint: disable=W0212
+    created_at = time.time() - 60
+    manager.store.save(
+        IngestionJob(id="orphan", kind="url", source="https://a.example.com", status=IngestionJobStatus.running, replica=replica, created_at=created_at)
+    )
+    manager.store.save(
+        IngestionJob(id="other", kind="url", source="https://b.example.com", status=IngestionJobStatus.queued, replica="other", created_at=created_at)
+    )
+
+    manager.recover_jobs()
+
+    orphan = manager.get_job("orphan")
+    assert orphan.status == IngestionJobStatus.failed
+    assert orphan.error is not None
+    assert manager.get_job("other").status == IngestionJobStatus.queued
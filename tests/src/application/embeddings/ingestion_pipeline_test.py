@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from src.application.embeddings.ingestion_pipeline import IngestionPipeline, PipelineStage
+from src.infrastracture.metrics_manager.metrics_manager import MetricsManager
+
+
+def test_run_items_through_stages():
+    results = []
+    pipeline = IngestionPipeline(
+        [
+            PipelineStage("split", lambda text: text.split(), workers=2),
+            PipelineStage("upper", lambda word: [word.upper()], workers=3),
+            PipelineStage("collect", results.append),
+        ],
+        MetricsManager(),
+    )
+
+    pipeline.run(["a b", "c", "d e f"])
+
+    assert sorted(results) == ["A", "B", "C", "D", "E", "F"]
+
+
+def test_finish_stage_after_all_items():
+    results = []
+    accumulated = []
+
+    def accumulate(item):
+        accumulated.append(item)
+        return []
+
+    pipeline = IngestionPipeline(
+        [
+            PipelineStage("accumulate", accumulate, finish=lambda: [list(accumulated)]),
+            PipelineStage("collect", results.append),
+        ],
+        MetricsManager(),
+    )
+
+    pipeline.run([1, 2, 3])
+
+    assert results == [[1, 2, 3]]
+
+
+def test_stages_overlap_with_bounded_queues():
+    produced = []
+    consumed = threading.Event()
+
+    def produce():
+        for item in range(10):
+            produced.append(item)
+            yield item
+
+    def consume(item):
+        # The first item is consumed only once the producer is blocked by the full queue
+        consumed.wait(timeout=5)
+        return []
+
+    pipeline = IngestionPipeline([PipelineStage("consume", consume)], MetricsManager(), queue_size=2)
+    thread = threading.Thread(target=pipeline.run, args=(produce(),))
+    thread.start()
+    thread.join(timeout=0.5)
+
+    # The worker holds one item and the queue two more, the producer waits to put the next one
+    assert len(produced) == 4
+    consumed.set()
+    thread.join(timeout=5)
+    assert len(produced) == 10
+
+
+def test_raise_first_error_of_stages():
+    def fail(item):
+        raise ValueError(f"Invalid item {item}")
+
+    pipeline = IngestionPipeline([PipelineStage("fail", fail, workers=2), PipelineStage("never", lambda item: [])], MetricsManager(), queue_size=1)
+
+    with pytest.raises(ValueError, match="Invalid item"):
+        pipeline.run(range(100))
+
+
+def test_expose_stage_metrics():
+    metrics_manager = MetricsManager()
+    pipeline = IngestionPipeline([PipelineStage("double", lambda item: [item, item]), PipelineStage("collect", lambda item: [])], metrics_manager)
+
+    pipeline.run([1, 2], source_name="parse")
+
+    metrics_data = metrics_manager.expose_metrics().body.decode()
+    assert 'console_ingestion_stage_items_total{stage="parse"} 2.0' in metrics_data
+    assert 'console_ingestion_stage_items_total{stage="double"} 2.0' in metrics_data
+    assert 'console_ingestion_stage_items_total{stage="collect"} 4.0' in metrics_data
+    assert 'console_ingestion_queue_depth{stage="collect"}' in metrics_data
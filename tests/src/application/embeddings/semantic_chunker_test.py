@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from src.application.embeddings.semantic_chunker import SemanticChunker
+
+
+class TopicEmbeddings(Embeddings):
+    """Embeddings counting the occurrences of "cat" and "car" in the text, recording the calls to the model."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(texts)
+        return [[float(text.count("cat")), float(text.count("car"))] for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+TEXT = "The cat sleeps. A cat purrs! Is the cat hungry? The car is red. My car is fast."
+
+
+def test_split_text_at_topic_changes():
+    embeddings = TopicEmbeddings()
+    chunker = SemanticChunker(embeddings, buffer_size=0)
+
+    chunks = chunker.split_text(TEXT)
+
+    assert chunks == ["The cat sleeps. A cat purrs! Is the cat hungry?", "The car is red. My car is fast."]
+    assert embeddings.calls == [["The cat sleeps.", "A cat purrs!", "Is the cat hungry?", "The car is red.", "My car is fast."]]
+
+
+def test_split_text_embeds_sentences_with_their_neighbours():
+    embeddings = TopicEmbeddings()
+    chunker = SemanticChunker(embeddings, buffer_size=1)
+
+    chunker.split_text("One. Two. Three.")
+
+    assert embeddings.calls == [["One. Two.", "One. Two. Three.", "Two. Three."]]
+
+
+def test_split_text_without_sentences():
+    embeddings = TopicEmbeddings()
+    chunker = SemanticChunker(embeddings)
+
+    assert chunker.split_text("") == []
+    assert chunker.split_text("A single cat") == ["A single cat"]
+    assert not embeddings.calls
+
+
+def test_split_with_vectors_derives_chunk_vectors_from_sentences():
+    embeddings = TopicEmbeddings()
+    chunker = SemanticChunker(embeddings, buffer_size=0)
+
+    chunks = chunker.split("The cat and the car. A cat. The car is red. My car is fast.", with_vectors=True)
+
+    assert [chunk.text for chunk in chunks] == ["The cat and the car. A cat.", "The car is red. My car is fast."]
+    # Length-weighted mean of the normalized sentence vectors, normalized to unit length
+    expected_vector = 20 * np.array([1.0, 1.0]) / np.sqrt(2) + 6 * np.array([1.0, 0.0])
+    assert chunks[0].vector == pytest.approx(expected_vector / np.linalg.norm(expected_vector))
+    assert chunks[1].vector == pytest.approx([0.0, 1.0])
+    assert len(embeddings.calls) == 1
+
+
+def test_split_single_sentence_with_vectors():
+    chunker = SemanticChunker(TopicEmbeddings())
+
+    (chunk,) = chunker.split("A single cat", with_vectors=True)
+
+    assert chunk.text == "A single cat"
+    assert chunk.vector == pytest.approx([1.0, 0.0])
+
+
+def test_iter_split_embeds_sentences_in_windows():
+    embeddings = TopicEmbeddings()
+    chunker = SemanticChunker(embeddings, buffer_size=0, window_size=4)
+
+    chunks = chunker.iter_split(TEXT)
+
+    # The first chunk is yielded before the sentences of the next window are embedded
+    assert next(chunks).text == "The cat sleeps. A cat purrs! Is the cat hungry?"
+    assert len(embeddings.calls) == 1
+    # The sentences after the last breakpoint of a window are carried over to the next one
+    assert [chunk.text for chunk in chunks] == ["The car is red. My car is fast."]
+    assert embeddings.calls == [["The cat sleeps.", "A cat purrs!", "Is the cat hungry?", "The car is red."], ["My car is fast."]]
+
+
+def test_iter_split_embeds_sentences_with_neighbours_of_adjacent_windows():
+    embeddings = TopicEmbeddings()
+    chunker = SemanticChunker(embeddings, buffer_size=1, window_size=2)
+
+    list(chunker.iter_split("One. Two. Three. Four."))
+
+    assert embeddings.calls == [["One. Two.", "One. Two. Three."], ["Two. Three. Four.", "Three. Four."]]
+
+
+def test_iter_split_limits_chunks_to_the_window_size():
+    chunker = SemanticChunker(TopicEmbeddings(), buffer_size=0, window_size=2)
+
+    chunks = chunker.split_text("A cat. A cat. A cat. A cat. A cat.")
+
+    assert chunks == ["A cat. A cat.", "A cat. A cat.", "A cat."]
@@ -0,0 +1,303 @@
+import asyncio
+import gzip
+from unittest.mock import MagicMock
+
+from aioresponses import aioresponses
+from yarl import URL
+
+from src.application.embeddings.web_crawler import CrawlBudget, CrawledPage, CrawlerParams, WebCrawler
+from src.infrastracture.vector_store_manager.crawl_manifest import CrawlManifestEntry
+
+TEXT_HTML_HEADERS = {"Content-type": "text/html"}
+
+
+def crawl(crawler, url, **kwargs):
+    async def collect():
+        return [page async for page in crawler.crawl(url, **kwargs)]
+
+    return asyncio.run(collect())
+
+
+def create_crawler(filter_links=None, previous_pages=None, **params):
+    return WebCrawler(logger=MagicMock(), params=CrawlerParams(retry_backoff_seconds=0, **params), filter_links=filter_links, previous_pages=previous_pages)
+
+
+def mock_website(mocker):
+    """A website with two levels of links: / -> /a, /b -> /a1, /b1"""
+    mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body='<a href="http://example.com/a"></a><a href="http://example.com/b"></a>')
+    mocker.get("http://example.com/a", headers=TEXT_HTML_HEADERS, body='<a href="http://example.com/a1"></a>')
+    mocker.get("http://example.com/b", headers=TEXT_HTML_HEADERS, body='<a href="http://example.com/b1"></a>')
+    mocker.get("http://example.com/a1", headers=TEXT_HTML_HEADERS, body="a1")
+    mocker.get("http://example.com/b1", headers=TEXT_HTML_HEADERS, body="b1")
+
+
+def test_crawl_follows_links_once():
+    crawler = create_crawler()
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body='<a href="http://example.com/a"></a><a href="http://example.com/b"></a>')
+        mocker.get("http://example.com/a", headers=TEXT_HTML_HEADERS, body='<a href="http://example.com/b"></a><a href="http://example.com"></a>')
+        mocker.get("http://example.com/b", headers=TEXT_HTML_HEADERS, body="page b")
+
+        pages = crawl(crawler, "http://example.com")
+
+    assert sorted(page.url for page in pages) == ["http://example.com", "http://example.com/a", "http://example.com/b"]
+
+
+def test_crawl_extracts_the_text_of_the_pages():
+    crawler = create_crawler()
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body='<nav><a href="http://example.com/a">Menu</a></nav><main><p>Home</p></main>')
+        mocker.get("http://example.com/a", headers=TEXT_HTML_HEADERS, body="<p>Page a</p><footer>Footer</footer>")
+
+        pages = crawl(crawler, "http://example.com")
+
+    assert {page.url: page.text for page in pages} == {"http://example.com": "Home", "http://example.com/a": "Page a"}
+
+
+def test_crawl_resolves_relative_links_against_the_downloaded_url():
+    crawler = create_crawler()
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com/docs", status=301, headers={"Location": "http://example.com/docs/"})
+        mocker.get("http://example.com/docs/", headers=TEXT_HTML_HEADERS, body='<a href="intro.html"></a>')
+        mocker.get("http://example.com/docs/intro.html", headers=TEXT_HTML_HEADERS, body="intro")
+
+        pages = crawl(crawler, "http://example.com/docs/")
+
+    assert sorted(page.url for page in pages) == ["http://example.com/docs", "http://example.com/docs/intro.html"]
+
+
+def test_parse_page_resolves_links_against_the_index_page():
+    crawler = create_crawler()
+    page = CrawledPage(url="http://example.com/docs", base_url="http://example.com/docs/index.html", html='<a href="intro.html"></a>')
+
+    links, _ = crawler._parse_page(page)  # pylint: disable=W0212
+
+    assert links == ["http://example.com/docs/intro.html"]
+
+
+def test_crawl_tolerates_failing_pages():
+    crawler = create_crawler()
+
+    with aioresponses() as mocker:
+        mocker.get(
+            "http://example.com",
+            headers=TEXT_HTML_HEADERS,
+            body='<a href="http://example.com/missing"></a><a href="http://example.com/image.png"></a><a href="http://example.com/ok"></a>',
+        )
+        mocker.get("http://example.com/missing", status=404)
+        mocker.get("http://example.com/image.png", headers={"Content-type": "image/png"}, body=b"png")
+        mocker.get("http://example.com/ok", headers=TEXT_HTML_HEADERS, body="ok")
+
+        pages = crawl(crawler, "http://example.com")
+
+    assert sorted(page.url for page in pages) == ["http://example.com", "http://example.com/ok"]
+    crawler.logger.warning.assert_called_once_with("Skipping page http://example.com/missing as the server replied with status 404.")
+
+
+def test_crawl_retries_failed_downloads():
+    crawler = create_crawler(max_retries=2)
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", status=503)
+        mocker.get("http://example.com", exception=TimeoutError())
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body="finally")
+
+        pages = crawl(crawler, "http://example.com")
+
+    assert [page.html for page in pages] == ["finally"]
+
+
+def test_crawl_gives_up_after_max_retries():
+    crawler = create_crawler(max_retries=1)
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", status=503, repeat=True)
+
+        pages = crawl(crawler, "http://example.com")
+
+    assert not pages
+    crawler.logger.warning.assert_called_once()
+
+
+def test_crawl_skips_pages_larger_than_max_size():
+    crawler = create_crawler(max_response_bytes=50)
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body='<a href="http://example.com/large"></a>')
+        mocker.get("http://example.com/large", headers=TEXT_HTML_HEADERS, body="x" * 51)
+
+        pages = crawl(crawler, "http://example.com")
+
+    assert [page.url for page in pages] == ["http://example.com"]
+    crawler.logger.warning.assert_called_once_with("Skipping page http://example.com/large as it is larger than 50 bytes.")
+
+
+def test_crawl_visits_pages_in_breadth_first_order():
+    crawler = create_crawler(max_concurrency=1)
+
+    with aioresponses() as mocker:
+        mock_website(mocker)
+
+        pages = crawl(crawler, "http://example.com")
+
+    assert [(page.url, page.depth) for page in pages] == [
+        ("http://example.com", 0),
+        ("http://example.com/a", 1),
+        ("http://example.com/b", 1),
+        ("http://example.com/a1", 2),
+        ("http://example.com/b1", 2),
+    ]
+
+
+def test_crawl_stops_at_max_depth():
+    crawler = create_crawler()
+
+    with aioresponses() as mocker:
+        mock_website(mocker)
+
+        pages = crawl(crawler, "http://example.com", budget=CrawlBudget(max_depth=1))
+
+    assert sorted(page.url for page in pages) == ["http://example.com", "http://example.com/a", "http://example.com/b"]
+
+
+def test_crawl_stops_at_max_pages():
+    crawler = create_crawler(max_concurrency=1)
+
+    with aioresponses() as mocker:
+        mock_website(mocker)
+
+        pages = crawl(crawler, "http://example.com", budget=CrawlBudget(max_pages=2))
+
+    assert [page.url for page in pages] == ["http://example.com", "http://example.com/a"]
+    crawler.logger.info.assert_called_once_with("Crawl budget exhausted (maximum of 2 pages): no more pages will be downloaded.")
+
+
+def test_crawl_stops_at_max_bytes():
+    crawler = create_crawler(max_concurrency=1)
+
+    with aioresponses() as mocker:
+        mock_website(mocker)
+
+        pages = crawl(crawler, "http://example.com", budget=CrawlBudget(max_bytes=1))
+
+    assert [page.url for page in pages] == ["http://example.com"]
+
+
+def test_crawl_stops_at_max_duration():
+    crawler = create_crawler()
+
+    with aioresponses() as mocker:
+        mock_website(mocker)
+
+        pages = crawl(crawler, "http://example.com", budget=CrawlBudget(max_duration_seconds=0))
+
+    assert not pages
+    crawler.logger.info.assert_called_once_with("Crawl budget exhausted (maximum duration of 0 seconds): no more pages will be downloaded.")
+
+
+def test_crawl_is_seeded_from_sitemap_index():
+    crawler = create_crawler(filter_links=lambda links: [link for link in links if link.startswith("http://example.com/")])
+    sitemap_index = """<?xml version="1.0" encoding="UTF-8"?>
+        <sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <sitemap><loc>http://example.com/sitemap-1.xml</loc></sitemap>
+            <sitemap><loc>http://example.com/sitemap-2.xml.gz</loc></sitemap>
+        </sitemapindex>"""
+    sitemap_1 = """<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <url><loc>http://example.com/from-sitemap</loc></url>
+            <url><loc>http://other.com/external</loc></url>
+        </urlset>"""
+    sitemap_2 = '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"><url><loc>http://example.com/from-gzip-sitemap</loc></url></urlset>'
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com/sitemap.xml", headers={"Content-type": "application/xml"}, body=sitemap_index)
+        mocker.get("http://example.com/sitemap-1.xml", headers={"Content-type": "application/xml"}, body=sitemap_1)
+        mocker.get("http://example.com/sitemap-2.xml.gz", headers={"Content-type": "application/gzip"}, body=gzip.compress(sitemap_2.encode()))
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body="home")
+        mocker.get("http://example.com/from-sitemap", headers=TEXT_HTML_HEADERS, body="from sitemap")
+        mocker.get("http://example.com/from-gzip-sitemap", headers=TEXT_HTML_HEADERS, body="from gzip sitemap")
+
+        pages = crawl(crawler, "http://example.com", sitemap_url="http://example.com/sitemap.xml")
+
+    assert sorted(page.url for page in pages) == ["http://example.com", "http://example.com/from-gzip-sitemap", "http://example.com/from-sitemap"]
+
+
+def test_crawl_without_sitemap():
+    crawler = create_crawler()
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com/sitemap.xml", status=404)
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body="home")
+
+        pages = crawl(crawler, "http://example.com", sitemap_url="http://example.com/sitemap.xml")
+
+    assert [page.url for page in pages] == ["http://example.com"]
+    crawler.logger.warning.assert_not_called()
+
+
+def test_crawl_deduplicates_url_variants():
+    crawler = create_crawler()
+
+    with aioresponses() as mocker:
+        mocker.get(
+            "http://example.com",
+            headers=TEXT_HTML_HEADERS,
+            body='<a href="/page?b=2&a=1#top"></a><a href="HTTP://EXAMPLE.COM/page/?a=1&b=2"></a><a href="https://example.com/page?a=1&b=2&utm_source=x"></a>',
+        )
+        mocker.get("http://example.com/page?a=1&b=2", headers=TEXT_HTML_HEADERS, body='<a href="index.html"></a>')
+
+        pages = crawl(crawler, "http://example.com/")
+
+    assert sorted(page.url for page in pages) == ["http://example.com", "http://example.com/page?a=1&b=2"]
+
+
+def test_crawl_skips_redirects_to_crawled_pages():
+    crawler = create_crawler(max_concurrency=1)
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body='<a href="/old"></a><a href="/new"></a>')
+        mocker.get("http://example.com/old", status=301, headers={"Location": "http://example.com/new"})
+        mocker.get("http://example.com/new", headers=TEXT_HTML_HEADERS, body="new", repeat=True)
+
+        pages = crawl(crawler, "http://example.com")
+
+    assert [page.url for page in pages] == ["http://example.com", "http://example.com/new"]
+
+
+def test_crawl_honours_canonical_url():
+    crawler = create_crawler(max_concurrency=1)
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", headers=TEXT_HTML_HEADERS, body='<a href="/print?id=1"></a><a href="/article"></a>')
+        mocker.get("http://example.com/print?id=1", headers=TEXT_HTML_HEADERS, body='<link rel="canonical" href="/article">article')
+        mocker.get("http://example.com/article", headers=TEXT_HTML_HEADERS, body="article")
+
+        pages = crawl(crawler, "http://example.com")
+
+    assert [page.url for page in pages] == ["http://example.com", "http://example.com/article"]
+
+
+def test_crawl_sends_conditional_requests_for_previous_pages():
+    previous_pages = {
+        "http://example.com": CrawlManifestEntry(
+            url="http://example.com", sha="sha", etag='"v1"', last_modified="Mon, 19 Oct 2026 10:00:00 GMT", links=["http://example.com/a"]
+        ),
+    }
+    crawler = create_crawler(previous_pages=previous_pages)
+
+    with aioresponses() as mocker:
+        mocker.get("http://example.com", status=304)
+        mocker.get("http://example.com/a", headers={**TEXT_HTML_HEADERS, "ETag": '"a1"'}, body="a")
+
+        pages = crawl(crawler, "http://example.com")
+
+        (request,) = mocker.requests[("GET", URL("http://example.com"))]
+        assert request.kwargs["headers"] == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 19 Oct 2026 10:00:00 GMT"}
+
+    unchanged_page, new_page = sorted(pages, key=lambda page: page.url)
+    assert unchanged_page.not_modified
+    assert unchanged_page.links == ["http://example.com/a"]
+    assert not new_page.not_modified
+    assert new_page.etag == '"a1"'
@@ -22,6 +22,7 @@ def get_test_configuration(path, logger):
         ("with minimal configuration", "assets/correct_config.json"),
         ("with OpenAI configuration", "assets/openai_config.json"),
         ("with Azure OpenAI configuration", "assets/azure_config.json"),
+        ("with local vector store configuration", "assets/local_vector_store_config.json"),
     ],
 )
 # pylint: disable=unused-argument
@@ -42,6 +43,7 @@ def test_fail_non_existing_configuration_file(logger):
         ("missing llm", "assets/missing_llm_config.json"),
         ("unknown llm type", "assets/unknown_llm_type_config.json"),
         ("unknown_embedding_type", "assets/unknown_embedding_type_config.json"),
+        ("local vector store without path", "assets/local_vector_store_without_path_config.json"),
     ],
 )
 # pylint: disable=unused-argument
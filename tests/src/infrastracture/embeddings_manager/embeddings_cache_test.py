@@ -0,0 +1,98 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import tiktoken
+from langchain_core.embeddings import Embeddings
+from pymongo.operations import UpdateOne
+
+from src.configurations.service_model import EmbeddingsEncoding
+from src.infrastracture.embeddings_manager.embeddings_cache import CachedEmbeddings, LocalEmbeddingsCache, MongoDBEmbeddingsCache
+from src.infrastracture.vector_store_manager.vector_encoding import encode_vector
+
+
+class LengthEmbeddings(Embeddings):
+    """Embeddings returning the length of the text, recording the texts sent to the model."""
+
+    def __init__(self):
+        self.embedded_texts = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.embedded_texts.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return [float(len(text)), 0.0]
+
+
+def create_cached_embeddings(cache, model_id="openai/model/default"):
+    return CachedEmbeddings(embeddings=LengthEmbeddings(), cache=cache, model_id=model_id, metrics_manager=MagicMock(), model_name="text-embedding-3-small")
+
+
+def test_local_cache_stores_vectors(tmp_path):
+    cache = LocalEmbeddingsCache(tmp_path / "cache" / "embeddings_cache.sqlite3")
+
+    cache.put_many({"a": np.array([1.0, 2.0]), "b": np.array([3.0, 4.0])})
+
+    vectors = LocalEmbeddingsCache(tmp_path / "cache" / "embeddings_cache.sqlite3").get_many(["a", "b", "c"])
+    assert vectors.keys() == {"a", "b"}
+    assert vectors["a"].tolist() == [1.0, 2.0]
+    assert vectors["b"].dtype == np.float32
+
+
+def test_mongodb_cache_stores_vectors_as_binary():
+    collection = MagicMock()
+    collection.find.return_value = [{"_id": "a", "vector": encode_vector(np.array([1.0, 2.0]), EmbeddingsEncoding.float32)[0]}]
+    cache = MongoDBEmbeddingsCache(collection)
+
+    cache.put_many({"a": np.array([1.0, 2.0])})
+    vectors = cache.get_many(["a", "b"])
+
+    collection.bulk_write.assert_called_once_with(
+        [UpdateOne({"_id": "a"}, {"$setOnInsert": {"vector": encode_vector(np.array([1.0, 2.0]), EmbeddingsEncoding.float32)[0]}}, upsert=True)], ordered=False
+    )
+    collection.find.assert_called_once_with({"_id": {"$in": ["a", "b"]}})
+    assert vectors["a"].tolist() == [1.0, 2.0]
+
+
+def test_cached_embeddings_embed_only_new_texts(tmp_path):
+    cache = LocalEmbeddingsCache(tmp_path / "embeddings_cache.sqlite3")
+    cached_embeddings = create_cached_embeddings(cache)
+
+    first_vectors = cached_embeddings.embed_documents(["hello", "world", "hello"])
+    second_vectors = cached_embeddings.embed_documents(["hello", "new text"])
+
+    assert first_vectors == [[5.0, 1.0], [5.0, 1.0], [5.0, 1.0]]
+    assert second_vectors == [[5.0, 1.0], [8.0, 1.0]]
+    assert cached_embeddings.embeddings.embedded_texts == ["hello", "world", "new text"]
+
+
+def test_cached_embeddings_update_metrics(tmp_path):
+    cache = LocalEmbeddingsCache(tmp_path / "embeddings_cache.sqlite3")
+    cached_embeddings = create_cached_embeddings(cache)
+    cached_embeddings.embed_documents(["hello world"])
+    cached_embeddings.metrics_manager.reset_mock()
+
+    cached_embeddings.embed_documents(["hello world", "new text"])
+
+    cached_embeddings.metrics_manager.embeddings_cache_hits.inc.assert_called_once_with(1)
+    cached_embeddings.metrics_manager.embeddings_cache_misses.inc.assert_called_once_with(1)
+    cached_embeddings.metrics_manager.embeddings_cache_saved_tokens.inc.assert_called_once_with(
+        len(tiktoken.encoding_for_model("text-embedding-3-small").encode("hello world"))
+    )
+
+
+def test_cached_embeddings_are_separated_by_model(tmp_path):
+    cache = LocalEmbeddingsCache(tmp_path / "embeddings_cache.sqlite3")
+    create_cached_embeddings(cache, model_id="openai/model/default").embed_documents(["hello"])
+
+    other_model_embeddings = create_cached_embeddings(cache, model_id="openai/model/256")
+    other_model_embeddings.embed_documents(["hello"])
+
+    assert other_model_embeddings.embeddings.embedded_texts == ["hello"]
+
+
+def test_cached_embeddings_do_not_cache_queries(tmp_path):
+    cached_embeddings = create_cached_embeddings(LocalEmbeddingsCache(tmp_path / "embeddings_cache.sqlite3"))
+
+    assert cached_embeddings.embed_query("hello") == [5.0, 0.0]
+    cached_embeddings.metrics_manager.embeddings_cache_hits.inc.assert_not_called()
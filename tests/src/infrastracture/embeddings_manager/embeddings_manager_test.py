@@ -2,7 +2,8 @@ import pytest
 from langchain_openai import AzureOpenAIEmbeddings, OpenAIEmbeddings
 from pydantic import ValidationError
 
-from src.configurations.service_model import AzureEmbeddingsConfiguration, OpenAIEmbeddingsConfiguration
+from src.configurations.service_model import AzureEmbeddingsConfiguration, EmbeddingsCache, OpenAIEmbeddingsConfiguration, VectorStoreType
+from src.infrastracture.embeddings_manager.embeddings_cache import CachedEmbeddings, LocalEmbeddingsCache
 from src.infrastracture.embeddings_manager.embeddings_manager import EmbeddingsManager
 
 
@@ -24,6 +25,14 @@ def test_get_embeddings_instance_from_openai_configuration(app_context):
     assert isinstance(embeddings_instance, OpenAIEmbeddings)
 
 
+def test_get_embeddings_instance_with_dimensions(app_context):
+    app_context.configurations.embeddings = OpenAIEmbeddingsConfiguration(type="openai", name="text-embeddings-3-small", dimensions=512)
+
+    embeddings_instance = EmbeddingsManager(app_context).get_embeddings_instance()
+
+    assert embeddings_instance.dimensions == 512
+
+
 def test_get_embeddings_instance_from_azure_configuration(app_context):
     app_context.configurations.embeddings = AzureEmbeddingsConfiguration(
         apiVersion="2023-03-15-preview",
@@ -43,3 +52,22 @@ def test_get_embeddings_instance_from_azure_configuration(app_context):
 def test_fail_to_get_embeddings_instance_from_unsupported_configuration(app_context):
     with pytest.raises(ValidationError):
         OpenAIEmbeddingsConfiguration(type="unsupported", name="text-embeddings-3-small")
+
+
+def test_get_ingestion_embeddings_instance_without_cache(app_context):
+    embeddings_instance = EmbeddingsManager(app_context).get_ingestion_embeddings_instance()
+
+    assert isinstance(embeddings_instance, OpenAIEmbeddings)
+
+
+def test_get_ingestion_embeddings_instance_with_local_cache(app_context, tmp_path):
+    app_context.configurations.embeddingsCache = EmbeddingsCache(enabled=True)
+    app_context.configurations.vectorStore.type = VectorStoreType.local
+    app_context.configurations.vectorStore.path = str(tmp_path)
+
+    embeddings_instance = EmbeddingsManager(app_context).get_ingestion_embeddings_instance()
+
+    assert isinstance(embeddings_instance, CachedEmbeddings)
+    assert isinstance(embeddings_instance.cache, LocalEmbeddingsCache)
+    assert isinstance(embeddings_instance.embeddings, OpenAIEmbeddings)
+    assert (tmp_path / app_context.configurations.vectorStore.dbName / "embeddings_cache.sqlite3").exists()
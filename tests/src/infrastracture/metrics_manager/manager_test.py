@@ -38,3 +38,27 @@ def test_embeddings_tokens_consumed_counter_0():
 
     # Check that the counter value is correct
     assert "embeddings_tokens_consumed_total 0.0" in metrics_data
+
+
+def test_retrieval_source_duration_histogram():
+    metrics_manager = MetricsManager()
+
+    metrics_manager.retrieval_source_duration.labels(source="docs").observe(0.2)
+
+    metrics_data = metrics_manager.expose_metrics().body.decode()
+
+    assert 'console_retrieval_source_duration_seconds_count{source="docs"} 1.0' in metrics_data
+
+
+def test_embeddings_cache_counters():
+    metrics_manager = MetricsManager()
+
+    metrics_manager.embeddings_cache_hits.inc(3)
+    metrics_manager.embeddings_cache_misses.inc()
+    metrics_manager.embeddings_cache_saved_tokens.inc(42)
+
+    metrics_data = metrics_manager.expose_metrics().body.decode()
+
+    assert "console_embeddings_cache_hits_total 3.0" in metrics_data
+    assert "console_embeddings_cache_misses_total 1.0" in metrics_data
+    assert "console_embeddings_cache_saved_tokens_total 42.0" in metrics_data
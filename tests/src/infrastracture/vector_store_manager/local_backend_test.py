@@ -0,0 +1,256 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.configurations.service_model import RelevanceScoreFn
+from src.infrastracture.vector_store_manager import local_vector_index
+from src.infrastracture.vector_store_manager.crawl_manifest import CRAWL_MANIFEST_FILE_NAME, CrawlManifestEntry
+from src.infrastracture.vector_store_manager.errors import LocalVectorIndexError, VectorDimensionsMismatchError
+from src.infrastracture.vector_store_manager.file_manifest import FILE_MANIFEST_FILE_NAME
+from src.infrastracture.vector_store_manager.local_backend import LocalVectorStoreBackend
+from src.infrastracture.vector_store_manager.vector_store_backend import VectorStoreBackendParams
+
+
+class CharactersCountEmbeddings(Embeddings):
+    """Deterministic embeddings: the number of "a", "b" and "c" characters of the text."""
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return [float(text.count("a")), float(text.count("b")), float(text.count("c"))]
+
+
+@pytest.fixture(autouse=True)
+def clear_local_vector_indexes():
+    local_vector_index._indexes.clear()  # pylint: disable=W0212
+    yield
+    local_vector_index._indexes.clear()  # pylint: disable=W0212
+
+
+def create_backend(path, relevance_score_fn=RelevanceScoreFn.cosine, num_dimensions=3, index_name="index"):
+    params = VectorStoreBackendParams(
+        logger=MagicMock(),
+        type="local",
+        local_path=str(path),
+        collection_name="collection",
+        index_name=index_name,
+        embedding_key="embedding",
+        text_key="text",
+        relevance_score_fn=relevance_score_fn,
+        embeddings=CharactersCountEmbeddings(),
+        num_dimensions=num_dimensions,
+    )
+    return LocalVectorStoreBackend(params)
+
+
+def test_add_documents_and_search(tmp_path):
+    backend = create_backend(tmp_path)
+    ids = backend.add_documents(
+        [
+            Document(page_content="aaa", metadata={"url": "https://example.com/a"}),
+            Document(page_content="bbb", metadata={"url": "https://example.com/b"}),
+            Document(page_content="ccc", metadata={"url": "https://example.com/c"}),
+        ]
+    )
+
+    result = backend.similarity_search("aa", k=2)
+
+    assert len(ids) == 3
+    assert [doc.page_content for doc in result] == ["aaa", "bbb"]
+    assert result[0].metadata["url"] == "https://example.com/a"
+    assert result[0].metadata["score"] == pytest.approx(1.0)
+    assert result[1].metadata["score"] == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize(
+    "relevance_score_fn, expected_score",
+    [
+        (RelevanceScoreFn.cosine, 1.0),
+        (RelevanceScoreFn.euclidean, 1 / 2),
+        (RelevanceScoreFn.dotProduct, (1 + 2) / 2),
+    ],
+)
+def test_search_scores(tmp_path, relevance_score_fn, expected_score):
+    backend = create_backend(tmp_path, relevance_score_fn=relevance_score_fn)
+    backend.add_documents([Document(page_content="aa")])
+
+    result = backend.similarity_search("a", k=1)
+
+    assert result[0].metadata["score"] == pytest.approx(expected_score)
+
+
+def test_search_with_score_thresholds(tmp_path):
+    backend = create_backend(tmp_path)
+    backend.add_documents([Document(page_content="aaa"), Document(page_content="aab"), Document(page_content="ccc")])
+
+    assert [doc.page_content for doc in backend.similarity_search("a", k=3, min_score_distance=0.9)] == ["aaa", "aab"]
+    assert [doc.page_content for doc in backend.similarity_search("a", k=3, max_score_distance=0.9)] == ["ccc"]
+
+
+def test_delete_by_metadata_and_reload(tmp_path):
+    backend = create_backend(tmp_path)
+    backend.add_documents(
+        [
+            Document(page_content="aaa", metadata={"url": "https://example.com/a"}),
+            Document(page_content="aab", metadata={"url": "https://example.com/a"}),
+            Document(page_content="bbb", metadata={"url": "https://example.com/b"}),
+        ]
+    )
+
+    deleted_count = backend.delete_by_metadata({"url": "https://example.com/a"})
+
+    local_vector_index._indexes.clear()  # pylint: disable=W0212
+    reloaded_backend = create_backend(tmp_path)
+
+    assert deleted_count == 2
+    assert len(reloaded_backend.index) == 1
+    assert [doc.page_content for doc in reloaded_backend.similarity_search("a", k=3)] == ["bbb"]
+
+
+def test_add_many_batches_persists_every_vector(tmp_path):
+    backend = create_backend(tmp_path)
+    for i in range(10):
+        backend.add_documents([Document(page_content="a" * i + "b" * j) for j in range(1, 4)])
+
+    local_vector_index._indexes.clear()  # pylint: disable=W0212
+    reloaded_backend = create_backend(tmp_path)
+
+    assert len(reloaded_backend.index) == 30
+    assert reloaded_backend.similarity_search("aaaaaaaaab", k=1)[0].page_content == "aaaaaaaaab"
+
+
+def test_indexes_of_the_same_directory_store_their_own_documents(tmp_path):
+    create_backend(tmp_path, index_name="first").add_documents([Document(page_content="aaa")])
+    create_backend(tmp_path, index_name="second").add_documents([Document(page_content="bbb"), Document(page_content="ccc")])
+
+    local_vector_index._indexes.clear()  # pylint: disable=W0212
+
+    assert [doc.page_content for doc in create_backend(tmp_path, index_name="first").similarity_search("a", k=3)] == ["aaa"]
+    assert len(create_backend(tmp_path, index_name="second").index) == 2
+
+
+def test_drop_the_vectors_without_documents_when_loading(tmp_path):
+    create_backend(tmp_path).add_documents([Document(page_content="aaa"), Document(page_content="bbb")])
+    vectors_path = tmp_path / "collection" / "index.f32"
+    # The process stopped after appending the vectors of a batch, before appending its documents
+    with open(vectors_path, "ab") as vectors_file:
+        vectors_file.write(np.array([0.0, 0.0, 3.0, 0.0], dtype=np.float32).tobytes())
+
+    local_vector_index._indexes.clear()  # pylint: disable=W0212
+    reloaded_backend = create_backend(tmp_path)
+
+    assert len(reloaded_backend.index) == 2
+    assert vectors_path.stat().st_size == 2 * 3 * 4
+    reloaded_backend.add_documents([Document(page_content="ccc")])
+    assert [doc.page_content for doc in reloaded_backend.similarity_search("c", k=1)] == ["ccc"]
+
+
+def test_drop_the_documents_without_vectors_when_loading(tmp_path):
+    create_backend(tmp_path).add_documents([Document(page_content="aaa"), Document(page_content="bbb")])
+    documents_path = tmp_path / "collection" / "index.documents.jsonl"
+    vectors_path = tmp_path / "collection" / "index.f32"
+    # The process stopped while appending the documents of a batch, after appending its vectors
+    with open(vectors_path, "ab") as vectors_file:
+        vectors_file.write(np.array([0.0, 0.0, 3.0, 0.0, 0.0, 3.0], dtype=np.float32).tobytes())
+    with open(documents_path, "a", encoding="utf-8") as documents_file:
+        documents_file.write('{"text": "ccc"}\n{"text": "c')
+
+    local_vector_index._indexes.clear()  # pylint: disable=W0212
+    reloaded_backend = create_backend(tmp_path)
+
+    assert len(reloaded_backend.index) == 3
+    assert len(documents_path.read_text(encoding="utf-8").splitlines()) == 3
+    assert vectors_path.stat().st_size == 3 * 3 * 4
+
+
+def test_fail_to_add_vectors_with_different_dimensions(tmp_path):
+    backend = create_backend(tmp_path)
+    backend.add_documents([Document(page_content="aaa")])
+
+    with pytest.raises(LocalVectorIndexError):
+        backend.index.add([{"text": "aaa"}], [[1.0, 2.0]])
+
+
+def test_update_index(tmp_path):
+    backend = create_backend(tmp_path)
+    backend.add_documents([Document(page_content="aaa")])
+
+    backend.update_index()
+
+    backend.logger.warning.assert_not_called()
+    backend.logger.info.assert_called_with('Local vector index "index" is up-to-date (1 documents)')
+
+
+def test_update_index_warns_for_dimensions_mismatch(tmp_path):
+    create_backend(tmp_path).add_documents([Document(page_content="aaa")])
+    backend = create_backend(tmp_path, num_dimensions=1536)
+
+    backend.update_index()
+
+    backend.logger.warning.assert_called_once()
+
+
+def test_validate_num_dimensions(tmp_path):
+    create_backend(tmp_path).add_documents([Document(page_content="aaa")])
+
+    create_backend(tmp_path).validate_num_dimensions()
+    with pytest.raises(VectorDimensionsMismatchError):
+        create_backend(tmp_path, num_dimensions=1536).validate_num_dimensions()
+
+
+def test_delete_by_ids(tmp_path):
+    backend = create_backend(tmp_path)
+    ids = backend.add_documents([Document(page_content="aaa"), Document(page_content="bbb"), Document(page_content="ccc")])
+
+    assert backend.delete_by_ids([ids[0], ids[2], "missing"]) == 2
+    assert [doc.page_content for doc in backend.similarity_search("abc", k=3)] == ["bbb"]
+
+
+def test_crawl_manifest_keeps_the_last_entry_of_each_page(tmp_path):
+    manifest = create_backend(tmp_path).get_crawl_manifest()
+    manifest.save(CrawlManifestEntry(url="https://example.com/a", sha="sha-1", etag='"v1"', chunk_ids=["1"]))
+    manifest.save(CrawlManifestEntry(url="https://example.com/b", sha="sha-2", links=["https://example.com/a"]))
+    manifest.save(CrawlManifestEntry(url="https://example.com/a", sha="sha-3", chunk_ids=["3"]))
+
+    entries = create_backend(tmp_path).get_crawl_manifest().load()
+
+    assert entries == {
+        "https://example.com/a": CrawlManifestEntry(url="https://example.com/a", sha="sha-3", chunk_ids=["3"]),
+        "https://example.com/b": CrawlManifestEntry(url="https://example.com/b", sha="sha-2", links=["https://example.com/a"]),
+    }
+    # The manifest is compacted when loaded
+    assert len((tmp_path / "collection" / CRAWL_MANIFEST_FILE_NAME).read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_file_manifest_records_the_ingested_files(tmp_path):
+    manifest = create_backend(tmp_path).get_file_manifest()
+
+    manifest.save("file-sha", "semantic")
+    manifest.save("file-sha", "semantic")
+
+    assert manifest.contains("file-sha", "semantic")
+    assert not manifest.contains("file-sha", "token")
+    assert len((tmp_path / "collection" / FILE_MANIFEST_FILE_NAME).read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_add_documents_upserts_by_id(tmp_path):
+    backend = create_backend(tmp_path)
+    backend.add_documents([Document(page_content="aaa"), Document(page_content="bbb")], ids=["a", "b"])
+    backend.add_documents([Document(page_content="aab", metadata={"version": 2})], ids=["a"])
+
+    assert backend.get_existing_ids(["a", "b", "c"]) == {"a", "b"}
+    documents = backend.similarity_search("abc", k=3)
+    assert sorted(doc.page_content for doc in documents) == ["aab", "bbb"]
+    assert next(doc for doc in documents if doc.page_content == "aab").metadata["version"] == 2
+
+
+def test_add_documents_with_precomputed_vectors(tmp_path):
+    backend = create_backend(tmp_path)
+    backend.add_documents([Document(page_content="aaa"), Document(page_content="bbb")], vectors=np.array([[0.0, 0.0, 1.0], [0.0, 1.0, 0.0]]))
+
+    # The stored vectors are used instead of the embeddings of the texts
+    assert [doc.page_content for doc in backend.similarity_search("c", k=1)] == ["aaa"]
@@ -0,0 +1,390 @@
+from unittest.mock import MagicMock
+
+import bson
+import numpy as np
+import pytest
+from bson import ObjectId
+from bson.binary import Binary
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from pymongo.errors import AutoReconnect, BulkWriteError
+from pymongo.operations import ReplaceOne
+from pymongo.write_concern import WriteConcern
+
+from src.configurations.service_model import EmbeddingsEncoding, IndexQuantization, RelevanceScoreFn
+from src.infrastracture.vector_store_manager.crawl_manifest import CrawlManifestEntry
+from src.infrastracture.vector_store_manager.ingestion_job_store import IngestionJob, IngestionJobStatus
+from src.infrastracture.vector_store_manager.mongodb_atlas_backend import MongoDBAtlasVectorStoreBackend
+from src.infrastracture.vector_store_manager.similarity import truncate_vectors
+from src.infrastracture.vector_store_manager.vector_encoding import decode_vector, encode_vector
+from src.infrastracture.vector_store_manager.vector_store_backend import BulkWriteParams, MatryoshkaParams, VectorStoreBackendParams
+
+
+class FixedEmbeddings(Embeddings):
+    """Embeddings returning the same vector for every text."""
+
+    def __init__(self, vector: list[float]):
+        self.vector = vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.vector for _ in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.vector
+
+
+MATRYOSHKA_PARAMS = MatryoshkaParams(embedding_key="short", index_name="short_index", num_dimensions=2, num_candidates=3)
+
+
+def create_backend(
+    embeddings,
+    matryoshka=MATRYOSHKA_PARAMS,
+    embeddings_encoding=EmbeddingsEncoding.array,
+    index_quantization=IndexQuantization.none,
+    relevance_score_fn=RelevanceScoreFn.cosine,
+):
+    params = VectorStoreBackendParams(
+        logger=MagicMock(),
+        mongodb_cluster_uri="mongodb://localhost:27017",
+        db_name="db",
+        collection_name="collection",
+        index_name="index",
+        embedding_key="embedding",
+        text_key="text",
+        relevance_score_fn=relevance_score_fn,
+        embeddings=embeddings,
+        num_dimensions=4,
+        matryoshka=matryoshka,
+        embeddings_encoding=embeddings_encoding,
+        index_quantization=index_quantization,
+    )
+    backend = MongoDBAtlasVectorStoreBackend(params)
+    backend._collection = MagicMock()  # pylint: disable=W0212
+    return backend
+
+
+def test_add_documents_stores_the_shortened_embeddings():
+    backend = create_backend(FixedEmbeddings([3.0, 4.0, 1.0, 1.0]))
+
+    backend.add_documents([Document(page_content="text", metadata={"url": "https://example.com"})])
+
+    (records,) = backend.collection.insert_many.call_args.args
+    assert records[0]["text"] == "text"
+    assert records[0]["url"] == "https://example.com"
+    assert records[0]["embedding"] == [3.0, 4.0, 1.0, 1.0]
+    assert records[0]["short"] == pytest.approx([0.6, 0.8])
+
+
+def test_two_stage_search_re_ranks_candidates_with_full_embeddings():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 1.0, 0.0]))
+    # Candidates returned by the first stage, all equally close on the first 2 dimensions
+    backend.collection.aggregate.return_value = [
+        {"_id": 1, "text": "far", "embedding": [1.0, 0.0, -1.0, 0.0]},
+        {"_id": 2, "text": "closest", "embedding": [1.0, 0.0, 1.0, 0.0]},
+        {"_id": 3, "text": "close", "embedding": [1.0, 0.0, 0.0, 1.0]},
+    ]
+
+    result = backend.similarity_search("query", k=2)
+
+    (pipeline,) = backend.collection.aggregate.call_args.args
+    assert pipeline[0]["$vectorSearch"]["index"] == "short_index"
+    assert pipeline[0]["$vectorSearch"]["path"] == "short"
+    assert pipeline[0]["$vectorSearch"]["limit"] == 3
+    assert pipeline[0]["$vectorSearch"]["queryVector"] == pytest.approx([1.0, 0.0])
+    assert [doc.page_content for doc in result] == ["closest", "close"]
+    assert result[0].metadata == {"_id": 2, "score": pytest.approx(1.0)}
+    assert result[1].metadata["score"] == pytest.approx((1 + 0.5) / 2)
+
+
+def test_two_stage_search_applies_score_thresholds():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 1.0, 0.0]))
+    backend.collection.aggregate.return_value = [
+        {"_id": 1, "text": "far", "embedding": [1.0, 0.0, -1.0, 0.0]},
+        {"_id": 2, "text": "closest", "embedding": [1.0, 0.0, 1.0, 0.0]},
+    ]
+
+    result = backend.similarity_search("query", k=2, min_score_distance=0.9)
+
+    assert [doc.page_content for doc in result] == ["closest"]
+
+
+def test_fail_to_create_backend_with_longer_matryoshka_embeddings():
+    with pytest.raises(ValueError):
+        create_backend(FixedEmbeddings([1.0]), matryoshka=MatryoshkaParams(embedding_key="short", index_name="short_index", num_dimensions=4))
+
+
+def test_truncate_vectors_normalizes_shortened_vectors():
+    result = truncate_vectors(np.array([[3.0, 4.0, 5.0], [0.0, 0.0, 1.0]]), 2)
+
+    assert result.tolist() == [pytest.approx([0.6, 0.8]), [0.0, 0.0]]
+
+
+def test_add_documents_stores_int8_binary_vectors_with_scale():
+    backend = create_backend(FixedEmbeddings([0.5, -1.0, 0.25, 0.0]), matryoshka=None, embeddings_encoding=EmbeddingsEncoding.int8)
+
+    backend.add_documents([Document(page_content="text")])
+
+    (records,) = backend.collection.insert_many.call_args.args
+    assert isinstance(records[0]["embedding"], Binary)
+    assert records[0]["embedding_scale"] == pytest.approx(1.0 / 127)
+    assert decode_vector(records[0]["embedding"], records[0]["embedding_scale"]) == pytest.approx([0.5, -1.0, 0.25, 0.0], abs=0.01)
+
+
+def test_search_binary_vectors():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 1.0, 0.0]), matryoshka=None, embeddings_encoding=EmbeddingsEncoding.int8)
+    backend.collection.aggregate.return_value = [{"_id": 1, "text": "text", "score": 0.9}]
+
+    result = backend.similarity_search("query", k=2, max_score_distance=0.95)
+
+    (pipeline,) = backend.collection.aggregate.call_args.args
+    assert pipeline[0]["$vectorSearch"]["queryVector"] == encode_vector(np.array([1.0, 0.0, 1.0, 0.0]), EmbeddingsEncoding.int8)[0]
+    assert pipeline[0]["$vectorSearch"]["index"] == "index"
+    assert pipeline[2] == {"$project": {"embedding": 0, "embedding_scale": 0}}
+    assert pipeline[3] == {"$match": {"score": {"$lte": 0.95}}}
+    assert result == [Document(page_content="text", metadata={"_id": 1, "score": 0.9})]
+
+
+def test_two_stage_search_re_ranks_float32_binary_vectors():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 1.0, 0.0]), embeddings_encoding=EmbeddingsEncoding.float32)
+    backend.collection.aggregate.return_value = [
+        {"_id": 1, "text": "far", "embedding": encode_vector(np.array([1.0, 0.0, -1.0, 0.0]), EmbeddingsEncoding.float32)[0]},
+        {"_id": 2, "text": "closest", "embedding": encode_vector(np.array([1.0, 0.0, 1.0, 0.0]), EmbeddingsEncoding.float32)[0]},
+    ]
+
+    result = backend.similarity_search("query", k=1)
+
+    assert [doc.page_content for doc in result] == ["closest"]
+
+
+@pytest.mark.parametrize("embeddings_encoding", [EmbeddingsEncoding.int8, EmbeddingsEncoding.int1])
+def test_fail_to_create_backend_with_quantization_of_quantized_embeddings(embeddings_encoding):
+    with pytest.raises(ValueError):
+        create_backend(FixedEmbeddings([1.0]), embeddings_encoding=embeddings_encoding, index_quantization=IndexQuantization.scalar)
+
+
+@pytest.mark.parametrize(
+    ("embeddings_encoding", "relevance_score_fn"),
+    [
+        (EmbeddingsEncoding.int1, RelevanceScoreFn.cosine),
+        (EmbeddingsEncoding.int1, RelevanceScoreFn.dotProduct),
+        (EmbeddingsEncoding.int8, RelevanceScoreFn.euclidean),
+        (EmbeddingsEncoding.int8, RelevanceScoreFn.dotProduct),
+    ],
+)
+def test_fail_to_create_backend_with_unsupported_similarity_of_quantized_embeddings(embeddings_encoding, relevance_score_fn):
+    with pytest.raises(ValueError, match="relevance score function"):
+        create_backend(FixedEmbeddings([1.0]), embeddings_encoding=embeddings_encoding, relevance_score_fn=relevance_score_fn)
+
+
+def test_create_backend_with_int1_embeddings_and_euclidean_similarity():
+    backend = create_backend(
+        FixedEmbeddings([1.0]), matryoshka=None, embeddings_encoding=EmbeddingsEncoding.int1, relevance_score_fn=RelevanceScoreFn.euclidean
+    )
+
+    assert backend.index_similarity_fn == RelevanceScoreFn.euclidean
+
+
+def test_index_definition_includes_quantization():
+    backend = create_backend(FixedEmbeddings([1.0]), matryoshka=None, index_quantization=IndexQuantization.scalar)
+
+    (definition,) = backend._get_updated_vector_index_definitions()  # pylint: disable=W0212
+
+    assert definition.document["definition"]["fields"][0]["quantization"] == "scalar"
+
+
+def test_delete_by_ids_converts_object_ids():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]))
+    object_id = ObjectId()
+
+    backend.delete_by_ids([str(object_id), "custom-id"])
+
+    backend.collection.delete_many.assert_called_once_with({"_id": {"$in": [object_id, "custom-id"]}})
+
+
+def test_crawl_manifest_is_stored_next_to_the_collection():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]))
+    manifest_collection = backend.collection.database.__getitem__.return_value
+    manifest_collection.find.return_value = [{"_id": "https://example.com", "sha": "sha", "etag": '"v1"', "chunk_ids": ["1"]}]
+
+    manifest = backend.get_crawl_manifest()
+    manifest.save(CrawlManifestEntry(url="https://example.com/a", sha="sha-a", last_modified="Mon, 19 Oct 2026 10:00:00 GMT"))
+
+    backend.collection.database.__getitem__.assert_called_with("collection_crawl_manifest")
+    manifest_collection.replace_one.assert_called_once_with(
+        {"_id": "https://example.com/a"},
+        {"sha": "sha-a", "etag": None, "last_modified": "Mon, 19 Oct 2026 10:00:00 GMT", "chunk_ids": [], "links": []},
+        upsert=True,
+    )
+    assert manifest.load() == {"https://example.com": CrawlManifestEntry(url="https://example.com", sha="sha", etag='"v1"', chunk_ids=["1"])}
+
+
+def test_file_manifest_is_stored_next_to_the_collection():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]))
+    manifest_collection = backend.collection.database.__getitem__.return_value
+    manifest_collection.find_one.return_value = None
+
+    manifest = backend.get_file_manifest()
+    manifest.save("file-sha", "semantic")
+
+    backend.collection.database.__getitem__.assert_called_with("collection_file_manifest")
+    manifest_collection.replace_one.assert_called_once_with(
+        {"_id": "file-sha:semantic"}, {"file_sha": "file-sha", "chunking_strategy": "semantic"}, upsert=True
+    )
+    assert not manifest.contains("file-sha", "token")
+    manifest_collection.find_one.assert_called_once_with({"_id": "file-sha:token"}, projection={"_id": 1})
+
+
+def test_add_documents_with_ids_upserts_documents():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]), matryoshka=None)
+
+    ids = backend.add_documents([Document(page_content="text", metadata={"url": "https://example.com"})], ids=["chunk-id"])
+
+    assert ids == ["chunk-id"]
+    backend.collection.insert_many.assert_not_called()
+    (operations,) = backend.collection.bulk_write.call_args.args
+    assert operations == [ReplaceOne({"_id": "chunk-id"}, {"text": "text", "embedding": [1.0, 0.0, 0.0, 0.0], "url": "https://example.com"}, upsert=True)]
+    assert backend.collection.bulk_write.call_args.kwargs == {"ordered": False}
+
+
+def test_add_documents_with_precomputed_vectors():
+    embeddings = MagicMock()
+    backend = create_backend(embeddings, matryoshka=None)
+
+    ids = backend.add_documents([Document(page_content="text")], vectors=np.array([[0.0, 1.0, 0.0, 0.0]]))
+
+    embeddings.embed_documents.assert_not_called()
+    (records,) = backend.collection.insert_many.call_args.args
+    assert records == [{"_id": ids[0], "text": "text", "embedding": [0.0, 1.0, 0.0, 0.0]}]
+    assert isinstance(ids[0], ObjectId)
+    assert backend.collection.insert_many.call_args.kwargs == {"ordered": False}
+
+
+def test_add_documents_splits_bulk_writes_by_size():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]), matryoshka=None)
+    record_bytes = len(bson.encode({"_id": "a", "text": "text", "embedding": [1.0, 0.0, 0.0, 0.0]}))
+    backend.params.bulk_write = BulkWriteParams(max_batch_bytes=2 * record_bytes)
+
+    backend.add_documents([Document(page_content="text") for _ in range(3)], ids=["a", "b", "c"])
+
+    assert [[operation._filter["_id"] for operation in call.args[0]] for call in backend.collection.bulk_write.call_args_list] == [["a", "b"], ["c"]]  # pylint: disable=W0212
+
+
+def test_add_documents_uses_the_configured_write_concern():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]), matryoshka=None)
+    backend.params.bulk_write = BulkWriteParams(w=1, journal=False)
+
+    backend.add_documents([Document(page_content="text")], ids=["a"])
+
+    backend.collection.with_options.assert_called_once_with(write_concern=WriteConcern(w=1, j=False))
+    backend.collection.with_options.return_value.bulk_write.assert_called_once()
+
+
+def test_add_documents_retries_only_the_failed_writes():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]), matryoshka=None)
+    backend.params.bulk_write = BulkWriteParams(retry_backoff_seconds=0)
+    backend.collection.bulk_write.side_effect = [BulkWriteError({"writeErrors": [{"index": 1, "code": 11000}]}), None]
+
+    backend.add_documents([Document(page_content="text") for _ in range(3)], ids=["a", "b", "c"])
+
+    assert [[operation._filter["_id"] for operation in call.args[0]] for call in backend.collection.bulk_write.call_args_list] == [["a", "b", "c"], ["b"]]  # pylint: disable=W0212
+
+
+def test_add_documents_ignores_the_inserts_written_by_a_previous_attempt():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]), matryoshka=None)
+    backend.params.bulk_write = BulkWriteParams(retry_backoff_seconds=0)
+    backend.collection.insert_many.side_effect = [
+        AutoReconnect("connection lost"),
+        BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}, {"index": 1, "code": 91}]}),
+        None,
+    ]
+
+    ids = backend.add_documents([Document(page_content="text") for _ in range(3)])
+
+    # The first document was written before the connection was lost, only the one interrupted is written again
+    assert [[record["_id"] for record in call.args[0]] for call in backend.collection.insert_many.call_args_list] == [ids, ids, [ids[1]]]
+
+
+def test_add_documents_does_not_retry_permanent_errors():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]), matryoshka=None)
+    backend.params.bulk_write = BulkWriteParams(retry_backoff_seconds=0)
+    backend.collection.bulk_write.side_effect = BulkWriteError({"writeErrors": [{"index": 0, "code": 10334, "errmsg": "BSONObj size is invalid"}]})
+
+    with pytest.raises(BulkWriteError):
+        backend.add_documents([Document(page_content="text")], ids=["a"])
+
+    backend.collection.bulk_write.assert_called_once()
+
+
+def test_add_documents_fails_after_the_maximum_retries():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]), matryoshka=None)
+    backend.params.bulk_write = BulkWriteParams(max_retries=1, retry_backoff_seconds=0)
+    backend.collection.insert_many.side_effect = AutoReconnect("connection lost")
+
+    with pytest.raises(AutoReconnect):
+        backend.add_documents([Document(page_content="text")])
+
+    assert backend.collection.insert_many.call_count == 2
+
+
+def test_get_existing_ids():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]))
+    backend.collection.find.return_value = [{"_id": "a"}]
+
+    assert backend.get_existing_ids(["a", "b"]) == {"a"}
+    backend.collection.find.assert_called_once_with({"_id": {"$in": ["a", "b"]}}, projection={"_id": 1})
+
+
+def test_ingestion_jobs_are_stored_next_to_the_collection():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]))
+    store = backend.get_ingestion_job_store()
+    jobs_collection = backend.collection.database.__getitem__.return_value
+    jobs_collection.find_one_and_update.return_value = {"_id": "job", "cancel_requested": True}
+
+    cancel_requested = store.save(IngestionJob(id="job", kind="url", source="https://example.com", created_at=1.0))
+
+    backend.collection.database.__getitem__.assert_called_with("collection_ingestion_jobs")
+    assert cancel_requested
+    (query, update), kwargs = jobs_collection.find_one_and_update.call_args
+    assert query == {"_id": "job"}
+    # The cancellation request is never overwritten by the replica running the job
+    assert "cancel_requested" not in update["$set"]
+    assert update["$setOnInsert"] == {"cancel_requested": False}
+    assert kwargs["upsert"] is True
+
+
+def test_active_ingestion_jobs_require_a_recent_heartbeat():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]))
+    store = backend.get_ingestion_job_store()
+    jobs_collection = backend.collection.database.__getitem__.return_value
+    jobs_collection.find_one.return_value = None
+
+    assert not store.has_active_jobs(updated_after=100.0)
+    assert jobs_collection.find_one.call_args.args[0] == {"status": {"$in": ["queued", "running"]}, "updated_at": {"$gt": 100.0}}
+
+
+def test_fail_orphaned_ingestion_jobs_of_the_replica():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]))
+    store = backend.get_ingestion_job_store()
+    jobs_collection = backend.collection.database.__getitem__.return_value
+    jobs_collection.update_many.return_value.modified_count = 2
+
+    assert store.fail_orphaned_jobs("replica", created_before=100.0, error="stopped") == 2
+    query, update = jobs_collection.update_many.call_args.args
+    assert query == {"replica": "replica", "status": {"$in": ["queued", "running"]}, "created_at": {"$lt": 100.0}}
+    assert update["$set"]["status"] == "failed"
+
+
+def test_request_cancel_of_active_ingestion_jobs_only():
+    backend = create_backend(FixedEmbeddings([1.0, 0.0, 0.0, 0.0]))
+    store = backend.get_ingestion_job_store()
+    jobs_collection = backend.collection.database.__getitem__.return_value
+    document = IngestionJob(id="job", kind="url", source="https://example.com", status=IngestionJobStatus.completed).to_document()
+    jobs_collection.find_one_and_update.return_value = None
+    jobs_collection.find_one.return_value = document
+
+    job = store.request_cancel("job")
+
+    assert job.status == IngestionJobStatus.completed
+    assert not job.cancel_requested
+    (query, _), _ = jobs_collection.find_one_and_update.call_args
+    assert query == {"_id": "job", "status": {"$in": ["queued", "running"]}}
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from bson import BSON
+from bson.binary import Binary
+
+from src.configurations.service_model import EmbeddingsEncoding
+from src.infrastracture.vector_store_manager.vector_encoding import (
+    decode_vector,
+    encode_query_vector,
+    encode_vector,
+    get_vector_num_dimensions,
+)
+
+VECTOR = np.array([0.5, -0.25, 0.125, -1.0, 0.75, 0.0, 0.3, -0.6, 0.9, 0.1], dtype=np.float32)
+
+
+def test_encode_array():
+    value, scale = encode_vector(VECTOR, EmbeddingsEncoding.array)
+
+    assert value == pytest.approx(VECTOR.tolist())
+    assert scale is None
+
+
+def test_encode_float32_binary_vector():
+    value, scale = encode_vector(VECTOR, EmbeddingsEncoding.float32)
+
+    assert isinstance(value, Binary)
+    assert value.subtype == 9
+    assert bytes(value[:2]) == b"\x27\x00"
+    assert len(value) == 2 + 4 * len(VECTOR)
+    assert scale is None
+    assert decode_vector(value).tolist() == VECTOR.tolist()
+    assert get_vector_num_dimensions(value) == len(VECTOR)
+
+
+def test_encode_int8_binary_vector():
+    value, scale = encode_vector(VECTOR, EmbeddingsEncoding.int8)
+
+    assert bytes(value[:2]) == b"\x03\x00"
+    assert len(value) == 2 + len(VECTOR)
+    assert scale == pytest.approx(1.0 / 127)
+    assert decode_vector(value, scale) == pytest.approx(VECTOR, abs=scale)
+    assert get_vector_num_dimensions(value) == len(VECTOR)
+
+
+def test_encode_int1_binary_vector():
+    value, scale = encode_vector(VECTOR, EmbeddingsEncoding.int1)
+
+    # 10 dimensions are packed in 2 bytes, with 6 padding bits
+    assert bytes(value) == b"\x10\x06" + bytes((0b10101010, 0b11000000))
+    assert scale == pytest.approx(float(np.abs(VECTOR).mean()))
+    assert np.sign(decode_vector(value, scale)).tolist() == [1, -1, 1, -1, 1, -1, 1, -1, 1, 1]
+    assert get_vector_num_dimensions(value) == len(VECTOR)
+
+
+def test_encode_query_vector():
+    assert encode_query_vector(VECTOR, EmbeddingsEncoding.float32) == pytest.approx(VECTOR.tolist())
+    assert encode_query_vector(VECTOR, EmbeddingsEncoding.int8) == encode_vector(VECTOR, EmbeddingsEncoding.int8)[0]
+
+
+def test_binary_vectors_are_smaller_than_arrays():
+    array_size = len(BSON.encode({"embedding": encode_vector(VECTOR, EmbeddingsEncoding.array)[0]}))
+    float32_size = len(BSON.encode({"embedding": encode_vector(VECTOR, EmbeddingsEncoding.float32)[0]}))
+    int8_size = len(BSON.encode({"embedding": encode_vector(VECTOR, EmbeddingsEncoding.int8)[0]}))
+
+    assert array_size > float32_size > int8_size
@@ -0,0 +1,87 @@
+import pytest
+
+from src.configurations.service_model import BulkWriteConfiguration, VectorStoreSource, VectorStoreType
+from src.infrastracture.vector_store_manager.errors import UnsupportedVectorStoreProviderError
+from src.infrastracture.vector_store_manager.local_backend import LocalVectorStoreBackend
+from src.infrastracture.vector_store_manager.mongodb_atlas_backend import MongoDBAtlasVectorStoreBackend
+from src.infrastracture.vector_store_manager.vector_store_backend import VectorStoreBackendParams
+from src.infrastracture.vector_store_manager.vector_store_manager import VectorStoreManager, create_vector_store_backend
+
+
+def test_get_vector_store_instance_from_default_configuration(app_context):
+    vector_store = VectorStoreManager(app_context).get_vector_store_instance()
+
+    assert isinstance(vector_store, MongoDBAtlasVectorStoreBackend)
+    assert vector_store.params.db_name == "sample_mflix"
+    assert vector_store.params.collection_name == "movies"
+
+
+def test_get_vector_store_instance_with_configured_dimensions(app_context):
+    app_context.configurations.embeddings.dimensions = 512
+
+    vector_store = VectorStoreManager(app_context).get_vector_store_instance()
+
+    assert vector_store.params.num_dimensions == 512
+
+
+def test_get_vector_store_instance_with_configured_bulk_writes(app_context):
+    app_context.configurations.vectorStore.bulkWrite = BulkWriteConfiguration(maxRetries=4, retryBackoffSeconds=2)
+
+    vector_store = VectorStoreManager(app_context).get_vector_store_instance()
+
+    assert (vector_store.params.bulk_write.max_retries, vector_store.params.bulk_write.retry_backoff_seconds) == (4, 2)
+
+
+def test_get_vector_store_instance_with_db_name_from_uri(app_context):
+    app_context.configurations.vectorStore.dbName = None
+    app_context.env_vars.MONGODB_CLUSTER_URI = "mongodb://localhost:27017/db_name"
+
+    vector_store = VectorStoreManager(app_context).get_vector_store_instance()
+
+    assert vector_store.params.db_name == "db_name"
+
+
+def test_fail_to_get_mongodb_vector_store_without_db_name(app_context):
+    app_context.configurations.vectorStore.dbName = None
+    app_context.env_vars.MONGODB_CLUSTER_URI = "mongodb://localhost:27017"
+
+    with pytest.raises(ValueError):
+        VectorStoreManager(app_context).get_vector_store_instance()
+
+
+def test_get_vector_store_instance_from_local_configuration(app_context, tmp_path):
+    app_context.configurations.vectorStore.type = VectorStoreType.local
+    app_context.configurations.vectorStore.path = str(tmp_path)
+    app_context.env_vars.MONGODB_CLUSTER_URI = None
+
+    vector_store = VectorStoreManager(app_context).get_vector_store_instance()
+
+    assert isinstance(vector_store, LocalVectorStoreBackend)
+
+
+def test_fail_to_get_local_vector_store_without_path(app_context):
+    app_context.configurations.vectorStore.type = VectorStoreType.local
+
+    with pytest.raises(ValueError):
+        VectorStoreManager(app_context).get_vector_store_instance()
+
+
+def test_fail_to_create_vector_store_from_unsupported_type(logger):
+    params = VectorStoreBackendParams(logger=logger, type="unsupported", collection_name="collection", index_name="index", embedding_key="e", text_key="t")
+
+    with pytest.raises(UnsupportedVectorStoreProviderError):
+        create_vector_store_backend(params)
+
+
+def test_get_source_vector_store_instances(app_context):
+    app_context.configurations.vectorStore.sources = [
+        VectorStoreSource(collectionName="products"),
+        VectorStoreSource(collectionName="guides", dbName="docs", indexName="guides_index"),
+    ]
+
+    vector_stores = VectorStoreManager(app_context).get_source_vector_store_instances()
+
+    assert [(vs.params.db_name, vs.params.collection_name, vs.params.index_name) for vs in vector_stores] == [
+        ("sample_mflix", "products", "openai_vector_index"),
+        ("docs", "guides", "guides_index"),
+    ]
@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock, call, patch
 
+from src.configurations.service_model import MatryoshkaConfiguration, VectorStoreSource
 from src.lib.vector_search_index_updater import VectorSearchIndexUpdater
 
 
@@ -114,3 +115,51 @@ def test_update_vector_index_requires_update(app_context):
             call('Updated Vector Search index "openai_vector_index" in collection movies'),
         ]
         app_context.logger.info.assert_has_calls(info_log_calls, any_order=True)
+
+
+def test_update_vector_index_creates_matryoshka_index(app_context):
+    """
+    With the Matryoshka configuration, the index on the shortened embeddings must be created next to the existing one.
+    """
+    app_context.configurations.vectorStore.matryoshka = MatryoshkaConfiguration(embeddingKey="embedding_256", indexName="openai_vector_index_256")
+
+    with patch("pymongo.collection.Collection") as mock_collection, patch("pymongo.MongoClient.__new__") as mock_client:
+        mock_client.return_value = {"sample_mflix": MockDatabase(movies=mock_collection)}
+
+        mock_collection.name = "movies"
+        mock_collection.list_search_indexes.return_value = [
+            {
+                "name": "openai_vector_index",
+                "latestDefinition": {"fields": [{"numDimensions": 1536, "path": "embedding", "similarity": "euclidean", "type": "vector"}]},
+            }
+        ]
+
+        vector_search_index_updater = VectorSearchIndexUpdater(app_context)
+        vector_search_index_updater.update_vector_search_index()
+
+        mock_collection.list_search_indexes.assert_called_once()
+        mock_collection.update_search_index.assert_not_called()
+        mock_collection.create_search_index.assert_called_once()
+
+        created_index = mock_collection.create_search_index.call_args.kwargs["model"].document
+        assert created_index["name"] == "openai_vector_index_256"
+        assert created_index["definition"]["fields"] == [{"numDimensions": 256, "path": "embedding_256", "similarity": "euclidean", "type": "vector"}]
+
+
+def test_update_vector_index_of_sources(app_context):
+    """
+    The index of each source must be checked once, even if a source matches the main collection.
+    """
+    app_context.configurations.vectorStore.sources = [VectorStoreSource(collectionName="movies"), VectorStoreSource(collectionName="series")]
+
+    with patch("pymongo.collection.Collection") as mock_collection, patch("pymongo.MongoClient.__new__") as mock_client:
+        mock_client.return_value = {"sample_mflix": MockDatabase(movies=mock_collection, series=mock_collection)}
+
+        mock_collection.name = "movies"
+        mock_collection.list_search_indexes.return_value = []
+
+        vector_search_index_updater = VectorSearchIndexUpdater(app_context)
+        vector_search_index_updater.update_vector_search_index()
+
+        assert mock_collection.list_search_indexes.call_count == 2
+        assert mock_collection.create_search_index.call_count == 2